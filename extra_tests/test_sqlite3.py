@@ -322,3 +322,45 @@ def test_close_in_del_ordering():
     gc.collect()
     gc.collect()
     assert SQLiteBackend.success
+
+@pypy_only
+def test_statement_cache_lru():
+    con = _sqlite3.connect(':memory:', cached_statements=2)
+    stmt1 = con("select 1")
+    stmt2 = con("select 2")
+    assert con("select 1") is stmt1    # now the most recently used
+    con("select 3")                    # evicts "select 2"
+    assert con("select 1") is stmt1
+    assert con("select 2") is not stmt2
+    con.close()
+
+@pypy_only
+def test_executemany_binding(con):
+    con.execute("create table foo (a, b, c)")
+    rows = [(1, 2.5, u'x'), (None, 2**40, b'y'), (True, u'\xe9', 3)]
+    cur = con.executemany("insert into foo values (?, ?, ?)", rows)
+    assert cur.rowcount == 3
+    con.executemany("insert into foo values (:a, :b, :c)",
+                    [{'a': i, 'b': -i, 'c': None} for i in range(3)])
+    res = con.execute("select * from foo").fetchall()
+    assert res == [(1, 2.5, u'x'), (None, 2**40, u'y'), (1, u'\xe9', 3),
+                   (0, 0, None), (1, -1, None), (2, -2, None)]
+    with pytest.raises(_sqlite3.ProgrammingError):
+        con.executemany("insert into foo values (?, ?, ?)", [(1, 2)])
+    with pytest.raises(_sqlite3.InterfaceError):
+        con.executemany("insert into foo values (?, ?, ?)", [(1, 2, {})])
+
+def test_executemany_adapter_for_builtin_type(con):
+    class Adapted(int):
+        pass
+    _sqlite3.register_adapter(int, lambda x: x * 10)
+    _sqlite3.register_adapter(Adapted, lambda x: 'adapted')
+    try:
+        con.execute("create table foo (a)")
+        con.executemany("insert into foo values (?)",
+                        [(1,), (Adapted(2),), (2.5,)])
+    finally:
+        del _sqlite3.adapters[int, _sqlite3.PrepareProtocol]
+        del _sqlite3.adapters[Adapted, _sqlite3.PrepareProtocol]
+    res = con.execute("select * from foo").fetchall()
+    assert res == [(10,), (u'adapted',), (2.5,)]
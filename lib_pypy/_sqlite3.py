@@ -180,17 +180,18 @@ class _StatementCache(object):
         self.cache = OrderedDict()
 
     def get(self, sql):
+        # least recently used first: a hit moves the statement to the end,
+        # and the first one is evicted.  On PyPy both are O(1).
         try:
-            stat = self.cache[sql]
+            stat = self.cache.pop(sql)
         except KeyError:
             stat = Statement(self.connection, sql)
-            self.cache[sql] = stat
-            if len(self.cache) > self.maxcount:
-                self.cache.popitem(0)
         else:
             if stat._in_use:
                 stat = Statement(self.connection, sql)
-                self.cache[sql] = stat
+        self.cache[sql] = stat
+        if len(self.cache) > self.maxcount:
+            self.cache.popitem(last=False)
         return stat
 
 
@@ -842,8 +843,9 @@ class Cursor(object):
                         raise ProgrammingError("You cannot execute SELECT "
                                                "statements in executemany().")
 
+            binders = _get_param_binders()
             for params in many_params:
-                self.__statement._set_params(params)
+                self.__statement._set_params(params, binders)
 
                 # Actually execute the SQL statement
 
@@ -1020,6 +1022,8 @@ class Cursor(object):
 
 class Statement(object):
     _statement = None
+    _num_params = 0
+    _param_names = None
 
     def __init__(self, connection, sql):
         self.__con = connection
@@ -1053,20 +1057,15 @@ class Statement(object):
 
         if isinstance(sql, unicode):
             sql = sql.encode('utf-8')
-        statement_star = _ffi.new('sqlite3_stmt **')
         next_char = _ffi.new('char **')
         c_sql = _ffi.new("char[]", sql)
-        ret = _lib.sqlite3_prepare_v2(self.__con._db, c_sql, -1,
-                                      statement_star, next_char)
-        self._statement = statement_star[0]
+        ret = self.__prepare(c_sql, next_char)
 
         if ret == _lib.SQLITE_OK and not self._statement:
             # an empty statement, work around that, as it's the least trouble
             self._type = _STMT_TYPE_SELECT
             c_sql = _ffi.new("char[]", b"select 42")
-            ret = _lib.sqlite3_prepare_v2(self.__con._db, c_sql, -1,
-                                          statement_star, next_char)
-            self._statement = statement_star[0]
+            ret = self.__prepare(c_sql, next_char)
 
         if ret != _lib.SQLITE_OK:
             raise self.__con._get_exception(ret)
@@ -1077,6 +1076,17 @@ class Statement(object):
         if _check_remaining_sql(tail):
             raise Warning("You can only execute one statement at a time.")
 
+    def __prepare(self, sql, next_char=_ffi.NULL):
+        statement_star = _ffi.new('sqlite3_stmt **')
+        ret = _lib.sqlite3_prepare_v2(self.__con._db, sql, -1,
+                                      statement_star, next_char)
+        self._statement = statement_star[0]
+        if ret == _lib.SQLITE_OK and self._statement:
+            self._num_params = _lib.sqlite3_bind_parameter_count(
+                self._statement)
+            self._param_names = None
+        return ret
+
     def __del__(self):
         if self._statement:
             self.__con._finalize_raw_statement(self._statement)
@@ -1116,34 +1126,84 @@ class Statement(object):
             pass  # And use previous value
 
         if param is None:
-            rc = _lib.sqlite3_bind_null(self._statement, idx)
+            rc = self._bind_null(idx, param)
         elif isinstance(param, (bool, int, long)):
-            if -2147483648 <= param <= 2147483647:
-                rc = _lib.sqlite3_bind_int(self._statement, idx, param)
-            else:
-                rc = _lib.sqlite3_bind_int64(self._statement, idx, param)
+            rc = self._bind_int(idx, param)
         elif isinstance(param, float):
-            rc = _lib.sqlite3_bind_double(self._statement, idx, param)
+            rc = self._bind_double(idx, param)
         elif isinstance(param, unicode):
-            param = param.encode("utf-8")
-            rc = _lib.sqlite3_bind_text(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
+            rc = self._bind_unicode(idx, param)
         elif isinstance(param, str):
-            self.__check_decodable(param)
-            rc = _lib.sqlite3_bind_text(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
+            rc = self._bind_str(idx, param)
         elif isinstance(param, (buffer, bytes)):
-            param = bytes(param)
-            rc = _lib.sqlite3_bind_blob(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
+            rc = self._bind_blob(idx, param)
         else:
             rc = -1
         return rc
 
-    def _set_params(self, params):
+    def _bind_null(self, idx, param):
+        return _lib.sqlite3_bind_null(self._statement, idx)
+
+    def _bind_int(self, idx, param):
+        if -2147483648 <= param <= 2147483647:
+            return _lib.sqlite3_bind_int(self._statement, idx, param)
+        else:
+            return _lib.sqlite3_bind_int64(self._statement, idx, param)
+
+    def _bind_double(self, idx, param):
+        return _lib.sqlite3_bind_double(self._statement, idx, param)
+
+    def _bind_unicode(self, idx, param):
+        param = param.encode("utf-8")
+        return _lib.sqlite3_bind_text(self._statement, idx, param,
+                                      len(param), _SQLITE_TRANSIENT)
+
+    def _bind_str(self, idx, param):
+        self.__check_decodable(param)
+        return _lib.sqlite3_bind_text(self._statement, idx, param,
+                                      len(param), _SQLITE_TRANSIENT)
+
+    def _bind_blob(self, idx, param):
+        param = bytes(param)
+        return _lib.sqlite3_bind_blob(self._statement, idx, param,
+                                      len(param), _SQLITE_TRANSIENT)
+
+    # the binding methods of the exact types that need no adaptation
+    _param_binders = {
+        type(None): _bind_null,
+        bool: _bind_int,
+        int: _bind_int,
+        long: _bind_int,
+        float: _bind_double,
+        unicode: _bind_unicode,
+    }
+    if sys.version_info[0] < 3:
+        _param_binders[str] = _bind_str
+        _param_binders[buffer] = _bind_blob
+    else:
+        _param_binders[bytes] = _bind_blob
+
+    def __get_param_names(self):
+        names = self._param_names
+        if names is None:
+            names = []
+            for i in range(1, self._num_params + 1):
+                param_name = _lib.sqlite3_bind_parameter_name(self._statement, i)
+                if param_name:
+                    param_name = _ffi.string(param_name).decode('utf-8')[1:]
+                names.append(param_name)
+            self._param_names = names
+        return names
+
+    def _set_params(self, params, binders=None):
+        """Bind the parameters.  'binders' is the result of
+        _get_param_binders(), it can be computed once and reused for all the
+        rows of an executemany()."""
         self._in_use = True
+        if binders is None:
+            binders = _get_param_binders()
 
-        num_params_needed = _lib.sqlite3_bind_parameter_count(self._statement)
+        num_params_needed = self._num_params
         if isinstance(params, (tuple, list)) or \
                 not isinstance(params, dict) and \
                 hasattr(params, '__getitem__'):
@@ -1157,24 +1217,33 @@ class Statement(object):
                                        "there are %d supplied." %
                                        (num_params_needed, num_params))
             for i in range(num_params):
-                rc = self.__set_param(i + 1, params[i])
+                param = params[i]
+                binder = binders.get(type(param))
+                if binder is not None:
+                    rc = binder(self, i + 1, param)
+                else:
+                    rc = self.__set_param(i + 1, param)
                 if rc != _lib.SQLITE_OK:
                     raise InterfaceError("Error binding parameter %d - "
                                          "probably unsupported type." % i)
         elif isinstance(params, dict):
+            param_names = self.__get_param_names()
             for i in range(1, num_params_needed + 1):
-                param_name = _lib.sqlite3_bind_parameter_name(self._statement, i)
+                param_name = param_names[i - 1]
                 if not param_name:
                     raise ProgrammingError("Binding %d has no name, but you "
                                            "supplied a dictionary (which has "
                                            "only names)." % i)
-                param_name = _ffi.string(param_name).decode('utf-8')[1:]
                 try:
                     param = params[param_name]
                 except KeyError:
                     raise ProgrammingError("You did not supply a value for "
                                            "binding %d." % i)
-                rc = self.__set_param(i, param)
+                binder = binders.get(type(param))
+                if binder is not None:
+                    rc = binder(self, i, param)
+                else:
+                    rc = self.__set_param(i, param)
                 if rc != _lib.SQLITE_OK:
                     raise InterfaceError("Error binding parameter :%s - "
                                          "probably unsupported type." %
@@ -1377,6 +1446,19 @@ def register_adapters_and_converters():
     register_converter("timestamp", convert_timestamp)
 
 
+def _get_param_binders():
+    # the parameters of the types listed in Statement._param_binders can be
+    # bound directly, unless an adapter or a converter was registered for
+    # their type
+    binders = Statement._param_binders
+    for typ in binders:
+        if (typ, PrepareProtocol) in adapters or typ in converters:
+            return dict([(typ, binder) for (typ, binder) in binders.items()
+                         if (typ, PrepareProtocol) not in adapters and
+                            typ not in converters])
+    return binders
+
+
 def adapt(val, proto=PrepareProtocol):
     # look for an adapter in the registry
     adapter = adapters.get((type(val), proto), None)
@@ -114,6 +114,11 @@ class Pickler(PythonPickler):
     def getvalue(self):
         return self.__f and self.__f.getvalue()
 
+try:
+    import _cpickle
+except ImportError:
+    _cpickle = None
+
 @builtinify
 def dump(obj, file, protocol=None):
     if protocol > HIGHEST_PROTOCOL:
@@ -121,6 +126,14 @@ def dump(obj, file, protocol=None):
         raise ValueError("pickle protocol %d asked for; "
                      "the highest available protocol is %d" % (
                      protocol, HIGHEST_PROTOCOL))
+    if _cpickle is not None:
+        try:
+            data = _cpickle.dumps(obj, protocol or 0)
+        except _cpickle.Unsupported:
+            pass
+        else:
+            file.write(data)
+            return
     Pickler(file, protocol).dump(obj)
 
 @builtinify
@@ -130,6 +143,11 @@ def dumps(obj, protocol=None):
         raise ValueError("pickle protocol %d asked for; "
                      "the highest available protocol is %d" % (
                      protocol, HIGHEST_PROTOCOL))
+    if _cpickle is not None:
+        try:
+            return _cpickle.dumps(obj, protocol or 0)
+        except _cpickle.Unsupported:
+            pass
     file = StringIO()
     Pickler(file, protocol).dump(obj)
     return file.getvalue()
@@ -623,5 +641,10 @@ def load(f):
     return Unpickler(f).load()
 
 def loads(str):
+    if _cpickle is not None and type(str) is type(''):
+        try:
+            return _cpickle.loads(str)
+        except _cpickle.Unsupported:
+            pass
     f = StringIO(str)
     return Unpickler(f).load()
@@ -0,0 +1,93 @@
+"""Build lib_pypy/stdlib.snapshot, the snapshot of the compiled modules of
+the standard library that pypy loads instead of the .py/.pyc files (see
+pypy/module/imp/snapshot.py for the format).
+
+It must be run by the pypy that will use the snapshot:
+
+    pypy lib_pypy/pypy_tools/build_stdlib_snapshot.py [root]
+
+where 'root' is the directory containing lib-python and lib_pypy (by
+default, the one of this pypy).  Modules whose source file is later
+modified are simply loaded from the source again.
+"""
+from __future__ import print_function
+import sys, os, imp, marshal, struct
+
+SNAPSHOT_MAGIC = b'PyPySnap'
+SNAPSHOT_FILENAME = 'stdlib.snapshot'
+STDLIB_DIRS = [os.path.join('lib-python', '%d.%d' % sys.version_info[:2]),
+               'lib_pypy']
+# test suites and directories that are not in the default sys.path
+SKIP_DIRS = set(['test', 'tests', 'idle_test', 'site-packages',
+                 '__extensions__'])
+
+
+def find_sources(root):
+    for stdlib_dir in STDLIB_DIRS:
+        top = os.path.join(root, stdlib_dir)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(name for name in dirnames
+                                 if name not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if name.endswith('.py'):
+                    yield os.path.join(dirpath, name)
+
+
+def compile_source(filename):
+    with open(filename, 'U') as f:
+        source = f.read()
+    if source and not source.endswith('\n'):
+        source += '\n'
+    try:
+        return compile(source, filename, 'exec', 0, True)
+    except (SyntaxError, TypeError, ValueError):
+        return None     # e.g. test data, or code for other platforms
+
+
+def build_snapshot(root, output=None):
+    """Write the snapshot of the stdlib found in 'root'.  Returns the number
+    of modules that it contains."""
+    root = os.path.abspath(root)
+    if output is None:
+        output = os.path.join(root, 'lib_pypy', SNAPSHOT_FILENAME)
+    entries = []
+    for filename in find_sources(root):
+        code = compile_source(filename)
+        if code is None:
+            continue
+        st = os.stat(filename)
+        relpath = os.path.relpath(filename, root)
+        entries.append((relpath, int(st.st_mtime), st.st_size,
+                        marshal.dumps(code)))
+    #
+    index = [SNAPSHOT_MAGIC, imp.get_magic(), struct.pack('<i', len(entries))]
+    offset = len(SNAPSHOT_MAGIC) + 8
+    offset += sum(4 + len(relpath) + 16 for relpath, _, _, _ in entries)
+    for relpath, mtime, size, data in entries:
+        index.append(struct.pack('<i', len(relpath)))
+        index.append(relpath)
+        index.append(struct.pack('<iiii', mtime, size, offset, len(data)))
+        offset += len(data)
+    #
+    tmpname = output + '.tmp'
+    with open(tmpname, 'wb') as f:
+        f.write(b''.join(index))
+        for _, _, _, data in entries:
+            f.write(data)
+    if sys.platform == 'win32' and os.path.exists(output):
+        os.unlink(output)
+    os.rename(tmpname, output)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    if '__pypy__' not in sys.builtin_module_names:
+        sys.exit("the snapshot must be built by the pypy that will use it")
+    if len(sys.argv) > 1:
+        root = sys.argv[1]
+    else:
+        root = os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__))))
+    count = build_snapshot(root)
+    print('%d modules written to %s' % (
+        count, os.path.join(root, 'lib_pypy', SNAPSHOT_FILENAME)))
@@ -36,7 +36,7 @@ working_modules.update([
     "cStringIO", "thread", "itertools", "pyexpat", "cpyext", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "_cppyy", "_pypyjson", "_jitlog",
+    "_csv", "_cppyy", "_pypyjson", "_jitlog", "_cpickle",
     # "_hashlib", "crypt"
 ])
 
@@ -45,6 +45,8 @@ PYTHONIOENCODING: Encoding[:errors] used for stdin/stdout/stderr.
 PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
+PYPY_WARMUP_PROFILE: file where the JIT saves which loops got hot, and
+               reloads them from at the next start to trace them early.
 """
 
 try:
@@ -638,6 +640,11 @@ def run_command_line(interactive,
         except ImportError as e:
             pass   # CPython just eats any exception here
 
+    warmup_profile = readenv and getenv('PYPY_WARMUP_PROFILE')
+    if warmup_profile and 'pypyjit' in sys.builtin_module_names:
+        import pypyjit
+        pypyjit.enable_warmup_profile(warmup_profile)
+
     # set up the Ctrl-C => KeyboardInterrupt signal handler, if the
     # signal module is available
     try:
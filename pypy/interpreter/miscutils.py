@@ -4,9 +4,25 @@ Miscellaneous utilities.
 
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import not_rpython
+from rpython.rlib.rarithmetic import r_longlong
 
 
-class ThreadLocals:
+class BaseThreadLocals:
+    """The part of 'space.threadlocals' that is common to ThreadLocals
+    and to the implementations of the 'thread' module."""
+
+    # the value of sys.getswitchinterval(), in nanoseconds.  It is only
+    # recorded here; a GIL overrides these methods to use it
+    _switch_interval_ns = r_longlong(5000000)
+
+    def getswitchinterval(self):
+        return self._switch_interval_ns
+
+    def setswitchinterval(self, interval_ns):
+        self._switch_interval_ns = interval_ns
+
+
+class ThreadLocals(BaseThreadLocals):
     """Pseudo thread-local storage, for 'space.threadlocals'.
     This is not really thread-local at all; the intention is that the PyPy
     implementation of the 'thread' module knows how to provide a real
@@ -53,6 +53,7 @@ def cpython_code_signature(code):
 class CodeHookCache(object):
     def __init__(self, space):
         self._code_hook = None
+        self._warmup_profile = None
 
 class PyCode(eval.Code):
     "CPython-style code objects."
@@ -64,6 +65,8 @@ class PyCode(eval.Code):
                           "_args_as_cellvars[*]",
                           "w_globals?",
                           "cell_families[*]"]
+    # loops to trace on first entry, set from a pypyjit warmup profile
+    warmup_instrs = None
 
     def __init__(self, space,  argcount, nlocals, stacksize, flags,
                      code, consts, names, varnames, filename,
@@ -108,7 +111,10 @@ class PyCode(eval.Code):
         return True
 
     def new_code_hook(self):
-        code_hook = self.space.fromcache(CodeHookCache)._code_hook
+        cache = self.space.fromcache(CodeHookCache)
+        if cache._warmup_profile is not None:
+            cache._warmup_profile.new_code(self)
+        code_hook = cache._code_hook
         if code_hook is not None:
             try:
                 self.space.call_function(code_hook, self)
@@ -0,0 +1,148 @@
+from __future__ import absolute_import
+
+import os
+import struct
+import sys
+
+
+# The Channel class is also used by the bootstrap code of the workers,
+# which is why it is given as source code.  It must only depend on 'os'
+# and 'struct'.
+_channel_source = r'''
+class Channel(object):
+    """A channel to another process.  Messages are strings of bytes, and
+they are always copied."""
+
+    _header = struct.Struct('!Q')
+
+    def __init__(self, read_fd, write_fd):
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+
+    def send_bytes(self, data):
+        """Send the string 'data' to the other side."""
+        if not isinstance(data, str):
+            data = memoryview(data).tobytes()
+        self._write(self._header.pack(len(data)))
+        self._write(data)
+
+    def recv_bytes(self):
+        """Return the next string sent by the other side.  Raises EOFError
+if the other side has closed its channel."""
+        header = self._read(self._header.size)
+        length, = self._header.unpack(header)
+        return self._read(length)
+
+    def close(self):
+        """Close the channel.  The other side gets EOFError when it tries
+to receive more messages."""
+        if self.read_fd >= 0:
+            os.close(self.read_fd)
+            os.close(self.write_fd)
+            self.read_fd = self.write_fd = -1
+
+    def _write(self, data):
+        view = memoryview(data)
+        while len(view) > 0:
+            n = os.write(self.write_fd, view)
+            view = view[n:]
+
+    def _read(self, length):
+        chunks = []
+        while length > 0:
+            chunk = os.read(self.read_fd, min(length, 1 << 20))
+            if not chunk:
+                raise EOFError("channel closed by the other side")
+            chunks.append(chunk)
+            length -= len(chunk)
+        return ''.join(chunks)
+'''
+exec _channel_source
+
+_bootstrap = r'''
+import os, struct, sys
+%s
+channel = Channel(int(sys.argv[1]), int(sys.argv[2]))
+del sys.argv[1:]
+source = channel.recv_bytes()
+namespace = {'__name__': '__worker__', 'channel': channel}
+exec compile(source, '<worker>', 'exec') in namespace
+''' % (_channel_source,)
+
+
+class Worker(object):
+    """A worker process, running the source code given to spawn() in a
+fresh interpreter.  It shares nothing with the current process: use the
+'channel' attribute to exchange strings with it."""
+
+    def __init__(self, process, channel):
+        self._process = process
+        self.pid = process.pid
+        self.channel = channel
+
+    def send_bytes(self, data):
+        self.channel.send_bytes(data)
+
+    def recv_bytes(self):
+        return self.channel.recv_bytes()
+
+    @property
+    def exitcode(self):
+        """The exit code of the worker, or None if it is still running."""
+        return self._process.poll()
+
+    def join(self):
+        """Close the channel, wait for the worker to finish and return
+its exit code."""
+        self.channel.close()
+        return self._process.wait()
+
+    def kill(self):
+        """Kill the worker."""
+        self._process.kill()
+
+
+def _set_cloexec(fd, cloexec):
+    import fcntl
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    if cloexec:
+        flags |= fcntl.FD_CLOEXEC
+    else:
+        flags &= ~fcntl.FD_CLOEXEC
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags)
+
+def spawn(source, executable=None):
+    """Start a new worker process running the given source code, and
+return a Worker object.  The code finds a 'channel' global connected to
+the 'channel' of the returned object.  The worker is started by
+executing a fresh interpreter (sys.executable by default), not by
+forking the current process.  Unlike multiprocessing, nothing is
+pickled: the channels only carry strings."""
+    import subprocess
+    if executable is None:
+        executable = sys.executable
+    parent_read, child_write = os.pipe()
+    child_read, parent_write = os.pipe()
+    # no other child process may inherit the pipes, otherwise this
+    # worker would not see the end of its channel
+    for fd in (parent_read, child_write, child_read, parent_write):
+        _set_cloexec(fd, True)
+
+    def keep_child_ends():
+        _set_cloexec(child_read, False)
+        _set_cloexec(child_write, False)
+
+    try:
+        process = subprocess.Popen(
+            [executable, '-c', _bootstrap, str(child_read), str(child_write)],
+            preexec_fn=keep_child_ends)
+    except:
+        os.close(parent_read)
+        os.close(parent_write)
+        raise
+    finally:
+        os.close(child_read)
+        os.close(child_write)
+    channel = Channel(parent_read, parent_write)
+    channel.send_bytes(source)
+    return Worker(process, channel)
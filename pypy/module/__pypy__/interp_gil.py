@@ -0,0 +1,28 @@
+from rpython.rlib import rgil
+from rpython.rlib.rarithmetic import r_longlong
+
+
+def gil_wait_time(space):
+    """Return the time in seconds that the current thread spent waiting for
+    the GIL."""
+    if not space.config.translation.thread:
+        return space.newfloat(0.0)
+    return space.newfloat(float(rgil.get_thread_wait_time()) * 1e-9)
+
+def gil_stats(space):
+    """Return a dict with statistics about the GIL for the whole process:
+    'switches' is the number of times a thread gave the GIL to a waiting
+    thread after a switch interval, 'waits' the number of times a thread
+    had to wait for the GIL, and 'wait_time' the total time in seconds
+    spent waiting."""
+    switches = waits = wait_time_ns = r_longlong(0)
+    if space.config.translation.thread:
+        switches = rgil.get_counter(rgil.GIL_SWITCHES)
+        waits = rgil.get_counter(rgil.GIL_SLOW_ACQUIRES)
+        wait_time_ns = rgil.get_counter(rgil.GIL_WAIT_TIME_NS)
+    w_result = space.newdict()
+    space.setitem_str(w_result, 'switches', space.newint(switches))
+    space.setitem_str(w_result, 'waits', space.newint(waits))
+    space.setitem_str(w_result, 'wait_time',
+                      space.newfloat(float(wait_time_ns) * 1e-9))
+    return w_result
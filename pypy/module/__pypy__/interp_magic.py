@@ -153,6 +153,23 @@ def locals_to_fast(space, w_frame):
 def save_module_content_for_future_reload(space, w_module):
     w_module.save_module_content_for_future_reload()
 
+def import_cache_counters(space):
+    """Return a tuple (saved_syscalls, listdir_calls) for the cache of the
+    directories searched by imports: the number of stat() calls that were
+    avoided thanks to the cached directory listings, and the number of
+    directories that had to be listed."""
+    from pypy.module.imp.importing import get_import_dircache
+    dircache = get_import_dircache(space)
+    return space.newtuple([space.newint(dircache.saved_syscalls),
+                           space.newint(dircache.listdir_calls)])
+
+def clear_import_cache(space):
+    """Forget the cached content of the directories searched by imports.
+    Only needed if files are added to a directory without changing its
+    modification time."""
+    from pypy.module.imp.importing import get_import_dircache
+    get_import_dircache(space).clear()
+
 def specialized_zip_2_lists(space, w_list1, w_list2):
     from pypy.objspace.std.specialisedtupleobject import specialized_zip_2_lists
     return specialized_zip_2_lists(space, w_list1, w_list2)
@@ -32,6 +32,8 @@ class ThreadModule(MixedModule):
     interpleveldefs = {
         '_signals_enter':  'interp_signal.signals_enter',
         '_signals_exit':   'interp_signal.signals_exit',
+        'gil_wait_time':   'interp_gil.gil_wait_time',
+        'gil_stats':       'interp_gil.gil_stats',
     }
 
 
@@ -59,6 +61,17 @@ class OsModule(MixedModule):
     }
 
 
+class WorkerModule(MixedModule):
+    """ Worker processes running a fresh interpreter, that communicate
+    by exchanging strings of bytes """
+    appleveldefs = {
+        'Worker':          'app_worker.Worker',
+        'Channel':         'app_worker.Channel',
+        'spawn':           'app_worker.spawn',
+    }
+    interpleveldefs = {}
+
+
 class PyPyDateTime(MixedModule):
     appleveldefs = {}
     interpleveldefs = {
@@ -112,6 +125,8 @@ class Module(MixedModule):
         'set_code_callback'         : 'interp_magic.set_code_callback',
         'save_module_content_for_future_reload':
                           'interp_magic.save_module_content_for_future_reload',
+        'import_cache_counters'     : 'interp_magic.import_cache_counters',
+        'clear_import_cache'        : 'interp_magic.clear_import_cache',
         'decode_long'               : 'interp_magic.decode_long',
         '_promote'                   : 'interp_magic._promote',
         'side_effects_ok'           : 'interp_magic.side_effects_ok',
@@ -129,6 +144,7 @@ class Module(MixedModule):
         "thread": ThreadModule,
         "intop": IntOpModule,
         "os": OsModule,
+        "worker": WorkerModule,
         '_pypydatetime': PyPyDateTime,
         'bufferable': PyPyBufferable,
     }
@@ -12,6 +12,15 @@ class AppTestMinimal:
             pass
         # assert did not crash
 
+    def test_gil_stats(self):
+        from __pypy__ import thread
+        assert thread.gil_wait_time() >= 0.0
+        stats = thread.gil_stats()
+        assert sorted(stats) == ['switches', 'wait_time', 'waits']
+        assert stats['switches'] >= 0
+        assert stats['waits'] >= 0
+        assert stats['wait_time'] >= thread.gil_wait_time()
+
 
 class AppTestThreadSignal(GenericTestThread):
     spaceconfig = dict(usemodules=['__pypy__', 'thread', 'signal', 'time'])
@@ -0,0 +1,81 @@
+import sys
+
+
+class AppTestWorker:
+    spaceconfig = dict(usemodules=['__pypy__', 'struct', 'select', 'fcntl',
+                                   'signal', 'time', 'binascii'])
+
+    def setup_class(cls):
+        # the workers run on the host python: the bootstrap code only
+        # needs the standard library
+        cls.w_executable = cls.space.wrap(sys.executable)
+
+    def test_channel(self):
+        import os
+        from __pypy__.worker import Channel
+        r1, w1 = os.pipe()
+        r2, w2 = os.pipe()
+        channel1 = Channel(r1, w2)
+        channel2 = Channel(r2, w1)
+        channel1.send_bytes('hello')
+        channel1.send_bytes('')
+        channel1.send_bytes(buffer('x' * 10000))
+        assert channel2.recv_bytes() == 'hello'
+        assert channel2.recv_bytes() == ''
+        assert channel2.recv_bytes() == 'x' * 10000
+        channel2.send_bytes('world')
+        assert channel1.recv_bytes() == 'world'
+        channel1.close()
+        raises(EOFError, channel2.recv_bytes)
+        channel1.close()
+        channel2.close()
+
+    def test_spawn(self):
+        from __pypy__ import worker
+        w = worker.spawn("""if 1:
+            while True:
+                try:
+                    data = channel.recv_bytes()
+                except EOFError:
+                    break
+                channel.send_bytes(data.upper())
+        """, executable=self.executable)
+        assert w.pid > 0
+        w.send_bytes('abc')
+        w.channel.send_bytes('def' * 10000)
+        assert w.recv_bytes() == 'ABC'
+        assert w.recv_bytes() == 'DEF' * 10000
+        assert w.join() == 0
+        assert w.exitcode == 0
+
+    def test_join_several(self):
+        # the workers don't inherit the channels of each other: joining
+        # the first one doesn't wait for the others to finish
+        from __pypy__ import worker
+        source = """if 1:
+            while True:
+                try:
+                    data = channel.recv_bytes()
+                except EOFError:
+                    break
+                channel.send_bytes(data * 2)
+            raise SystemExit(int(data))
+        """
+        workers = [worker.spawn(source, executable=self.executable)
+                   for i in range(3)]
+        for i, w in enumerate(workers):
+            w.send_bytes(str(i + 5))
+            assert w.recv_bytes() == str(i + 5) * 2
+        assert workers[0].join() == 5
+        assert workers[1].exitcode is None
+        assert workers[2].exitcode is None
+        assert workers[2].join() == 7
+        assert workers[1].join() == 6
+
+    def test_spawn_error(self):
+        from __pypy__ import worker
+        w = worker.spawn("raise SystemExit(int(channel.recv_bytes()))",
+                         executable=self.executable)
+        w.send_bytes('42')
+        raises(EOFError, w.recv_bytes)
+        assert w.join() == 42
@@ -1,5 +1,6 @@
 import sys
-from rpython.rlib.objectmodel import specialize
+from rpython.rlib.objectmodel import specialize, import_from_mixin
+from rpython.rlib.longlong2float import float2longlong
 from pypy.interpreter import gateway
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef, make_weakref_descr
@@ -7,6 +8,8 @@ from pypy.interpreter.typedef import GetSetProperty
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.error import OperationError, oefmt
 from rpython.rlib.debug import check_nonneg
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
 
 
 # A `dequeobject` is composed of a doubly-linked list of `block` nodes.
@@ -40,12 +43,484 @@ from rpython.rlib.debug import check_nonneg
 BLOCKLEN = 62
 CENTER   = ((BLOCKLEN - 1) / 2)
 
-class Block(object):
-    __slots__ = ('leftlink', 'rightlink', 'data')
+# The deques with a maxlen store their items in a ring buffer instead.  It
+# starts with RING_MINSIZE slots and grows up to maxlen; the index of any item
+# is then computed in constant time, and once the deque is full, appending to
+# one end simply reuses the slot freed at the other end.
+RING_MINSIZE = 8
+
+# ------------------------------------------------------------
+# Storages.  Like the strategies of lists, they avoid boxing the items of
+# deques that contain only ints or only floats.  A concrete storage class
+# combines the type of the items (see the *ItemsMixin) with a layout (the
+# blocks described above, or a ring buffer).
+
+class DequeStorage(object):
+    """ Abstract base class of the storages of W_Deque.  Also used as the
+    shared storage of the deques that never contained anything; the first
+    item added to a deque selects its real storage. """
+    unboxed = False
+
+    def __init__(self, space):
+        self.space = space
+        self.len = 0
+        self.empty_cursor = EmptyCursor(self)
+
+    def is_correct_type(self, w_obj):
+        return False
+
+    def append_w(self, w_x):
+        raise NotImplementedError
+
+    def appendleft_w(self, w_x):
+        raise NotImplementedError
+
+    def pop_w(self):
+        raise NotImplementedError
+
+    def popleft_w(self):
+        raise NotImplementedError
+
+    def discard_left(self):
+        raise NotImplementedError
+
+    def discard_right(self):
+        raise NotImplementedError
+
+    def getitem_w(self, i):
+        raise NotImplementedError
+
+    def setitem_w(self, i, w_x):
+        raise NotImplementedError
+
+    def count_w(self, w_x):
+        raise NotImplementedError
+
+    def reverse(self):
+        pass
+
+    def rotate(self, n):
+        pass
+
+    def cursor(self, index, step):
+        "Return a DequeCursor on the index-th item, moving by step."
+        return self.empty_cursor
+
+
+class DequeCursor(object):
+    "Walks over the items of a storage, which must not be modified meanwhile"
+    def is_on(self, storage):
+        raise NotImplementedError
+
+    def next_w(self):
+        raise NotImplementedError
+
+
+class EmptyCursor(DequeCursor):
+    def __init__(self, storage):
+        self.storage = storage
+
+    def is_on(self, storage):
+        return self.storage is storage
+
+    def next_w(self):
+        raise AssertionError("no items")
+
+
+class StorageMixin(object):
+    "The operations on wrapped items, common to all the storage classes."
+
+    def append_w(self, w_x):
+        self.append(self.unwrap(w_x))
+
+    def appendleft_w(self, w_x):
+        self.appendleft(self.unwrap(w_x))
+
+    def pop_w(self):
+        return self.wrap(self.pop())
+
+    def popleft_w(self):
+        return self.wrap(self.popleft())
+
+    def discard_left(self):
+        self.popleft()
+
+    def discard_right(self):
+        self.pop()
+
+    def getitem_w(self, i):
+        return self.wrap(self.getitem(i))
+
+    def setitem_w(self, i, w_x):
+        self.setitem(i, self.unwrap(w_x))
+
+    def count_w(self, w_x):
+        # only for unboxed items, where comparing cannot call app-level code
+        x = self.unwrap(w_x)
+        result = 0
+        cursor = self.cursor(0, 1)
+        for i in range(self.len):
+            if self.equal(cursor.next(), x):
+                result += 1
+        return result
+
+    def rotate(self, n):
+        i = 0
+        while i < n:
+            self.appendleft(self.pop())
+            i += 1
+        while i > n:
+            self.append(self.popleft())
+            i -= 1
+
+
+class ObjectItemsMixin(object):
+    _none_value = None
+    unboxed = False
+
+    def is_correct_type(self, w_obj):
+        return True
+
+    def wrap(self, w_x):
+        return w_x
+
+    def unwrap(self, w_x):
+        return w_x
+
+    def equal(self, w_x, w_y):
+        raise NotImplementedError
+
+
+class IntItemsMixin(object):
+    _none_value = 0
+    unboxed = True
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_IntObject
+
+    def wrap(self, x):
+        return self.space.newint(x)
+
+    def unwrap(self, w_x):
+        return self.space.int_w(w_x)
+
+    def equal(self, x, y):
+        return x == y
+
+
+class FloatItemsMixin(object):
+    _none_value = 0.0
+    unboxed = True
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_FloatObject
+
+    def wrap(self, x):
+        return self.space.newfloat(x)
+
+    def unwrap(self, w_x):
+        return self.space.float_w(w_x)
+
+    def equal(self, x, y):
+        # like space.eq_w(), which first compares the identity of two
+        # floats, i.e. their bit pattern: this makes a NaN equal to itself
+        return x == y or float2longlong(x) == float2longlong(y)
+
+
+class BlockMixin(object):
     def __init__(self, leftlink, rightlink):
         self.leftlink = leftlink
         self.rightlink = rightlink
-        self.data = [None] * BLOCKLEN
+        self.data = [self._none_value] * BLOCKLEN
+
+
+class BlockLayoutMixin(object):
+    "The items are in a doubly-linked list of blocks, see the top of the file."
+
+    def __init__(self, space):
+        self.space = space
+        self.leftblock = self.Block(None, None)
+        self.rightblock = self.leftblock
+        self.leftindex = CENTER + 1
+        self.rightindex = CENTER
+        self.len = 0
+        check_nonneg(self.leftindex)
+        check_nonneg(self.rightindex)
+
+    def append(self, x):
+        ri = self.rightindex + 1
+        if ri >= BLOCKLEN:
+            b = self.Block(self.rightblock, None)
+            self.rightblock.rightlink = b
+            self.rightblock = b
+            ri = 0
+        self.rightindex = ri
+        self.rightblock.data[ri] = x
+        self.len += 1
+
+    def appendleft(self, x):
+        li = self.leftindex - 1
+        if li < 0:
+            b = self.Block(None, self.leftblock)
+            self.leftblock.leftlink = b
+            self.leftblock = b
+            li = BLOCKLEN - 1
+        self.leftindex = li
+        self.leftblock.data[li] = x
+        self.len += 1
+
+    def pop(self):
+        self.len -= 1
+        ri = self.rightindex
+        x = self.rightblock.data[ri]
+        self.rightblock.data[ri] = self._none_value
+        ri -= 1
+        if ri < 0:
+            if self.len == 0:
+                # re-center instead of freeing the last block
+                self.leftindex = CENTER + 1
+                ri = CENTER
+            else:
+                b = self.rightblock.leftlink
+                self.rightblock = b
+                b.rightlink = None
+                ri = BLOCKLEN - 1
+        self.rightindex = ri
+        return x
+
+    def popleft(self):
+        self.len -= 1
+        li = self.leftindex
+        x = self.leftblock.data[li]
+        self.leftblock.data[li] = self._none_value
+        li += 1
+        if li >= BLOCKLEN:
+            if self.len == 0:
+                # re-center instead of freeing the last block
+                li = CENTER + 1
+                self.rightindex = CENTER
+            else:
+                b = self.leftblock.rightlink
+                self.leftblock = b
+                b.leftlink = None
+                li = 0
+        self.leftindex = li
+        return x
+
+    def locate(self, i):
+        if i < (self.len >> 1):
+            i += self.leftindex
+            b = self.leftblock
+            while i >= BLOCKLEN:
+                b = b.rightlink
+                i -= BLOCKLEN
+        else:
+            i = i - self.len + 1     # then i <= 0
+            i += self.rightindex
+            b = self.rightblock
+            while i < 0:
+                b = b.leftlink
+                i += BLOCKLEN
+        assert i >= 0
+        return b, i
+
+    def getitem(self, i):
+        b, i = self.locate(i)
+        return b.data[i]
+
+    def setitem(self, i, x):
+        b, i = self.locate(i)
+        b.data[i] = x
+
+    def reverse(self):
+        li = self.leftindex
+        lb = self.leftblock
+        ri = self.rightindex
+        rb = self.rightblock
+        for i in range(self.len >> 1):
+            lb.data[li], rb.data[ri] = rb.data[ri], lb.data[li]
+            li += 1
+            if li >= BLOCKLEN:
+                lb = lb.rightlink
+                li = 0
+            ri -= 1
+            if ri < 0:
+                rb = rb.leftlink
+                ri = BLOCKLEN - 1
+
+    def cursor(self, index, step):
+        return self.Cursor(self, index, step)
+
+
+class BlockCursorMixin(object):
+    def __init__(self, storage, index, step):
+        self.storage = storage
+        self.block, self.index = storage.locate(index)
+        self.step = step
+
+    def is_on(self, storage):
+        return self.storage is storage
+
+    def next(self):
+        i = self.index
+        x = self.block.data[i]
+        i += self.step
+        if i >= BLOCKLEN:
+            self.block = self.block.rightlink
+            i = 0
+        elif i < 0:
+            self.block = self.block.leftlink
+            i = BLOCKLEN - 1
+        self.index = i
+        return x
+
+    def next_w(self):
+        return self.storage.wrap(self.next())
+
+
+class RingLayoutMixin(object):
+    "The items are in a ring buffer, for deques with a maxlen."
+
+    def __init__(self, space, maxlen):
+        self.space = space
+        self.maxlen = maxlen
+        self.items = [self._none_value] * min(maxlen, RING_MINSIZE)
+        self.head = 0
+        self.len = 0
+
+    def _grow(self):
+        items = self.items
+        size = len(items)
+        newsize = max(size * 2, RING_MINSIZE)
+        newsize = min(newsize, self.maxlen)
+        assert newsize > size
+        newitems = [self._none_value] * newsize
+        j = self.head
+        for i in range(self.len):
+            newitems[i] = items[j]
+            j += 1
+            if j == size:
+                j = 0
+        self.items = newitems
+        self.head = 0
+
+    def _index(self, i):
+        # the position in self.items of the i-th item
+        j = self.head + i
+        if j >= len(self.items):
+            j -= len(self.items)
+        return j
+
+    def append(self, x):
+        if self.len == len(self.items):
+            self._grow()
+        self.items[self._index(self.len)] = x
+        self.len += 1
+
+    def appendleft(self, x):
+        if self.len == len(self.items):
+            self._grow()
+        head = self.head - 1
+        if head < 0:
+            head += len(self.items)
+        self.items[head] = x
+        self.head = head
+        self.len += 1
+
+    def pop(self):
+        self.len -= 1
+        j = self._index(self.len)
+        x = self.items[j]
+        self.items[j] = self._none_value
+        return x
+
+    def popleft(self):
+        head = self.head
+        x = self.items[head]
+        self.items[head] = self._none_value
+        head += 1
+        if head == len(self.items):
+            head = 0
+        self.head = head
+        self.len -= 1
+        return x
+
+    def getitem(self, i):
+        return self.items[self._index(i)]
+
+    def setitem(self, i, x):
+        self.items[self._index(i)] = x
+
+    def reverse(self):
+        i = 0
+        j = self.len - 1
+        while i < j:
+            x = self.getitem(i)
+            self.setitem(i, self.getitem(j))
+            self.setitem(j, x)
+            i += 1
+            j -= 1
+
+    def cursor(self, index, step):
+        return self.Cursor(self, index, step)
+
+
+class RingCursorMixin(object):
+    def __init__(self, storage, index, step):
+        self.storage = storage
+        self.index = index
+        self.step = step
+
+    def is_on(self, storage):
+        return self.storage is storage
+
+    def next(self):
+        x = self.storage.getitem(self.index)
+        self.index += self.step
+        return x
+
+    def next_w(self):
+        return self.storage.wrap(self.next())
+
+
+def make_storage_classes(name, ItemsMixin):
+    class Block(object):
+        __slots__ = ('leftlink', 'rightlink', 'data')
+        _none_value = ItemsMixin._none_value
+        import_from_mixin(BlockMixin)
+    Block.__name__ = name + 'Block'
+
+    class BlockCursor(DequeCursor):
+        import_from_mixin(BlockCursorMixin)
+    BlockCursor.__name__ = name + 'BlockCursor'
+
+    class BlockStorage(DequeStorage):
+        import_from_mixin(ItemsMixin)
+        import_from_mixin(StorageMixin)
+        import_from_mixin(BlockLayoutMixin)
+    BlockStorage.Block = Block
+    BlockStorage.Cursor = BlockCursor
+    BlockStorage.__name__ = name + 'BlockStorage'
+
+    class RingCursor(DequeCursor):
+        import_from_mixin(RingCursorMixin)
+    RingCursor.__name__ = name + 'RingCursor'
+
+    class RingStorage(DequeStorage):
+        import_from_mixin(ItemsMixin)
+        import_from_mixin(StorageMixin)
+        import_from_mixin(RingLayoutMixin)
+    RingStorage.Cursor = RingCursor
+    RingStorage.__name__ = name + 'RingStorage'
+
+    return BlockStorage, RingStorage
+
+ObjectBlockStorage, ObjectRingStorage = make_storage_classes(
+    'Object', ObjectItemsMixin)
+IntBlockStorage, IntRingStorage = make_storage_classes(
+    'Int', IntItemsMixin)
+FloatBlockStorage, FloatRingStorage = make_storage_classes(
+    'Float', FloatItemsMixin)
 
 class Lock(object):
     pass
@@ -57,8 +532,6 @@ class W_Deque(W_Root):
         self.space = space
         self.maxlen = sys.maxint
         self.clear()
-        check_nonneg(self.leftindex)
-        check_nonneg(self.rightindex)
         #
         # lightweight locking: any modification to the content of the deque
         # sets the lock to None.  Taking an iterator sets it to a non-None
@@ -80,6 +553,30 @@ class W_Deque(W_Root):
             raise oefmt(self.space.w_RuntimeError,
                         "deque mutated during iteration")
 
+    def generalize_storage(self, w_x):
+        """ Switch to a storage that can contain w_x in addition to the
+        current items, and return it. """
+        storage = self.qstorage
+        if storage.len == 0 and type(w_x) is W_IntObject:
+            newstorage = self.new_storage(IntBlockStorage, IntRingStorage)
+        elif storage.len == 0 and type(w_x) is W_FloatObject:
+            newstorage = self.new_storage(FloatBlockStorage, FloatRingStorage)
+        else:
+            newstorage = self.new_storage(ObjectBlockStorage,
+                                          ObjectRingStorage)
+            cursor = storage.cursor(0, 1)
+            for i in range(storage.len):
+                newstorage.append_w(cursor.next_w())
+        self.qstorage = newstorage
+        return newstorage
+
+    @specialize.arg(1, 2)
+    def new_storage(self, BlockStorage, RingStorage):
+        if self.maxlen == sys.maxint:
+            return BlockStorage(self.space)
+        else:
+            return RingStorage(self.space, self.maxlen)
+
     def init(self, w_iterable=None, w_maxlen=None):
         space = self.space
         if space.is_none(w_maxlen):
@@ -87,75 +584,56 @@ class W_Deque(W_Root):
         else:
             maxlen = space.gateway_nonnegint_w(w_maxlen)
         self.maxlen = maxlen
-        if self.len > 0:
-            self.clear()
+        # always reset the storage, whose layout depends on the maxlen
+        self.clear()
         if w_iterable is not None:
             self.extend(w_iterable)
 
-    def trimleft(self):
-        if self.len > self.maxlen:
-            self.popleft()
-            assert self.len == self.maxlen
-
-    def trimright(self):
-        if self.len > self.maxlen:
-            self.pop()
-            assert self.len == self.maxlen
-
     def append(self, w_x):
         "Add an element to the right side of the deque."
-        ri = self.rightindex + 1
-        if ri >= BLOCKLEN:
-            b = Block(self.rightblock, None)
-            self.rightblock.rightlink = b
-            self.rightblock = b
-            ri = 0
-        self.rightindex = ri
-        self.rightblock.data[ri] = w_x
-        self.len += 1
-        self.trimleft()
+        storage = self.qstorage
+        if not storage.is_correct_type(w_x):
+            storage = self.generalize_storage(w_x)
+        if storage.len >= self.maxlen:
+            if self.maxlen == 0:
+                self.modified()
+                return
+            storage.discard_left()
+        storage.append_w(w_x)
         self.modified()
 
     def appendleft(self, w_x):
         "Add an element to the left side of the deque."
-        li = self.leftindex - 1
-        if li < 0:
-            b = Block(None, self.leftblock)
-            self.leftblock.leftlink = b
-            self.leftblock = b
-            li = BLOCKLEN - 1
-        self.leftindex = li
-        self.leftblock.data[li] = w_x
-        self.len += 1
-        self.trimright()
+        storage = self.qstorage
+        if not storage.is_correct_type(w_x):
+            storage = self.generalize_storage(w_x)
+        if storage.len >= self.maxlen:
+            if self.maxlen == 0:
+                self.modified()
+                return
+            storage.discard_right()
+        storage.appendleft_w(w_x)
         self.modified()
 
     def clear(self):
         "Remove all elements from the deque."
-        self.leftblock = Block(None, None)
-        self.rightblock = self.leftblock
-        self.leftindex = CENTER + 1
-        self.rightindex = CENTER
-        self.len = 0
+        self.qstorage = self.space.fromcache(DequeStorage)
         self.modified()
 
     def count(self, w_x):
         "Return number of occurrences of value."
         space = self.space
+        storage = self.qstorage
+        if storage.unboxed and storage.is_correct_type(w_x):
+            return space.newint(storage.count_w(w_x))
         result = 0
-        block = self.leftblock
-        index = self.leftindex
+        cursor = storage.cursor(0, 1)
         lock = self.getlock()
-        for i in range(self.len):
-            w_item = block.data[index]
+        for i in range(storage.len):
+            w_item = cursor.next_w()
             if space.eq_w(w_item, w_x):
                 result += 1
             self.checklock(lock)
-            # Advance the block/index pair
-            index += 1
-            if index >= BLOCKLEN:
-                block = block.rightlink
-                index = 0
         return space.newint(result)
 
     def extend(self, w_iterable):
@@ -199,91 +677,43 @@ class W_Deque(W_Root):
 
     def pop(self):
         "Remove and return the rightmost element."
-        if self.len == 0:
+        if self.qstorage.len == 0:
             raise oefmt(self.space.w_IndexError, "pop from an empty deque")
-        self.len -= 1
-        ri = self.rightindex
-        w_obj = self.rightblock.data[ri]
-        self.rightblock.data[ri] = None
-        ri -= 1
-        if ri < 0:
-            if self.len == 0:
-                # re-center instead of freeing the last block
-                self.leftindex = CENTER + 1
-                ri = CENTER
-            else:
-                b = self.rightblock.leftlink
-                self.rightblock = b
-                b.rightlink = None
-                ri = BLOCKLEN - 1
-        self.rightindex = ri
+        w_obj = self.qstorage.pop_w()
         self.modified()
         return w_obj
 
     def popleft(self):
         "Remove and return the leftmost element."
-        if self.len == 0:
+        if self.qstorage.len == 0:
             raise oefmt(self.space.w_IndexError, "pop from an empty deque")
-        self.len -= 1
-        li = self.leftindex
-        w_obj = self.leftblock.data[li]
-        self.leftblock.data[li] = None
-        li += 1
-        if li >= BLOCKLEN:
-            if self.len == 0:
-                # re-center instead of freeing the last block
-                li = CENTER + 1
-                self.rightindex = CENTER
-            else:
-                b = self.leftblock.rightlink
-                self.leftblock = b
-                b.leftlink = None
-                li = 0
-        self.leftindex = li
+        w_obj = self.qstorage.popleft_w()
         self.modified()
         return w_obj
 
     def remove(self, w_x):
         "Remove first occurrence of value."
         space = self.space
-        block = self.leftblock
-        index = self.leftindex
+        storage = self.qstorage
+        cursor = storage.cursor(0, 1)
         lock = self.getlock()
-        for i in range(self.len):
-            w_item = block.data[index]
+        for i in range(storage.len):
+            w_item = cursor.next_w()
             equal = space.eq_w(w_item, w_x)
             self.checklock(lock)
             if equal:
                 self.del_item(i)
                 return
-            # Advance the block/index pair
-            index += 1
-            if index >= BLOCKLEN:
-                block = block.rightlink
-                index = 0
         raise oefmt(space.w_ValueError, "deque.remove(x): x not in deque")
 
     def reverse(self):
         "Reverse *IN PLACE*."
-        li = self.leftindex
-        lb = self.leftblock
-        ri = self.rightindex
-        rb = self.rightblock
-        for i in range(self.len >> 1):
-            lb.data[li], rb.data[ri] = rb.data[ri], lb.data[li]
-            li += 1
-            if li >= BLOCKLEN:
-                lb = lb.rightlink
-                li = 0
-            ri -= 1
-            if ri < 0:
-                rb = rb.leftlink
-                ri = BLOCKLEN - 1
+        self.qstorage.reverse()
 
     @unwrap_spec(n=int)
     def rotate(self, n=1):
         "Rotate the deque n steps to the right (default n=1).  If n is negative, rotates left."
-        len = self.len
+        len = self.qstorage.len
         if len <= 1:
             return
         halflen = len >> 1
@@ -291,13 +721,9 @@ class W_Deque(W_Root):
             n %= len
             if n > halflen:
                 n -= len
-        i = 0
-        while i < n:
-            self.appendleft(self.pop())
-            i += 1
-        while i > n:
-            self.append(self.popleft())
-            i -= 1
+        if n != 0:
+            self.qstorage.rotate(n)
+            self.modified()
 
     def iter(self):
         return W_DequeIter(self)
@@ -307,7 +733,7 @@ class W_Deque(W_Root):
         return W_DequeRevIter(self)
 
     def length(self):
-        return self.space.newint(self.len)
+        return self.space.newint(self.qstorage.len)
 
     def repr(self):
         space = self.space
@@ -333,23 +759,6 @@ class W_Deque(W_Root):
     def ge(self, w_other):
         return self.compare(w_other, 'ge')
 
-    def locate(self, i):
-        if i < (self.len >> 1):
-            i += self.leftindex
-            b = self.leftblock
-            while i >= BLOCKLEN:
-                b = b.rightlink
-                i -= BLOCKLEN
-        else:
-            i = i - self.len + 1     # then i <= 0
-            i += self.rightindex
-            b = self.rightblock
-            while i < 0:
-                b = b.leftlink
-                i += BLOCKLEN
-        assert i >= 0
-        return b, i
-
     def del_item(self, i):
         # delitem() implemented in terms of rotate for simplicity and
         # reasonable performance near the end points.
@@ -359,25 +768,26 @@ class W_Deque(W_Root):
 
     def getitem(self, w_index):
         space = self.space
-        start, stop, step = space.decode_index(w_index, self.len)
+        start, stop, step = space.decode_index(w_index, self.qstorage.len)
         if step == 0:  # index only
-            b, i = self.locate(start)
-            return b.data[i]
+            return self.qstorage.getitem_w(start)
         else:
             raise oefmt(space.w_TypeError, "deque[:] is not supported")
 
     def setitem(self, w_index, w_newobj):
         space = self.space
-        start, stop, step = space.decode_index(w_index, self.len)
+        start, stop, step = space.decode_index(w_index, self.qstorage.len)
         if step == 0:  # index only
-            b, i = self.locate(start)
-            b.data[i] = w_newobj
+            storage = self.qstorage
+            if not storage.is_correct_type(w_newobj):
+                storage = self.generalize_storage(w_newobj)
+            storage.setitem_w(start, w_newobj)
         else:
             raise oefmt(space.w_TypeError, "deque[:] is not supported")
 
     def delitem(self, w_index):
         space = self.space
-        start, stop, step = space.decode_index(w_index, self.len)
+        start, stop, step = space.decode_index(w_index, self.qstorage.len)
         if step == 0:  # index only
             self.del_item(start)
         else:
@@ -494,11 +904,9 @@ class W_DequeIter(W_Root):
     def __init__(self, deque):
         self.space = deque.space
         self.deque = deque
-        self.block = deque.leftblock
-        self.index = deque.leftindex
-        self.counter = deque.len
+        self.cursor = deque.qstorage.cursor(0, 1)
+        self.counter = deque.qstorage.len
         self.lock = deque.getlock()
-        check_nonneg(self.index)
 
     def iter(self):
         return self
@@ -514,14 +922,11 @@ class W_DequeIter(W_Root):
         if self.counter == 0:
             raise OperationError(space.w_StopIteration, space.w_None)
         self.counter -= 1
-        ri = self.index
-        w_x = self.block.data[ri]
-        ri += 1
-        if ri == BLOCKLEN:
-            self.block = self.block.rightlink
-            ri = 0
-        self.index = ri
-        return w_x
+        storage = self.deque.qstorage
+        if not self.cursor.is_on(storage):
+            # setitem() switched the deque to another storage
+            self.cursor = storage.cursor(storage.len - self.counter - 1, 1)
+        return self.cursor.next_w()
 
 W_DequeIter.typedef = TypeDef("deque_iterator",
     __iter__        = interp2app(W_DequeIter.iter),
@@ -536,11 +941,9 @@ class W_DequeRevIter(W_Root):
     def __init__(self, deque):
         self.space = deque.space
         self.deque = deque
-        self.block = deque.rightblock
-        self.index = deque.rightindex
-        self.counter = deque.len
+        self.cursor = deque.qstorage.cursor(deque.qstorage.len - 1, -1)
+        self.counter = deque.qstorage.len
         self.lock = deque.getlock()
-        check_nonneg(self.index)
 
     def iter(self):
         return self
@@ -556,14 +959,11 @@ class W_DequeRevIter(W_Root):
         if self.counter == 0:
             raise OperationError(space.w_StopIteration, space.w_None)
         self.counter -= 1
-        ri = self.index
-        w_x = self.block.data[ri]
-        ri -= 1
-        if ri < 0:
-            self.block = self.block.leftlink
-            ri = BLOCKLEN - 1
-        self.index = ri
-        return w_x
+        storage = self.deque.qstorage
+        if not self.cursor.is_on(storage):
+            # setitem() switched the deque to another storage
+            self.cursor = storage.cursor(self.counter, -1)
+        return self.cursor.next_w()
 
 W_DequeRevIter.typedef = TypeDef("deque_reverse_iterator",
     __iter__        = interp2app(W_DequeRevIter.iter),
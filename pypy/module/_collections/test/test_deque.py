@@ -302,3 +302,136 @@ class AppTestBasic:
         d.pop()
         gc.collect(); gc.collect(); gc.collect()
         assert X.freed
+
+    def test_unboxed_items(self):
+        from _collections import deque
+        for items in [range(200), [x * 0.5 for x in range(200)]]:
+            d = deque(items)
+            assert list(d) == items
+            assert list(reversed(d)) == items[::-1]
+            assert d[100] == items[100]
+            assert d.count(items[3]) == 1
+            assert d.count(12345) == 0
+            d.rotate(3)
+            assert d.pop() == items[-4]
+            assert d.popleft() == items[-3]
+            d.reverse()
+            assert d[0] == items[-5]
+        d = deque([1, 2, 3])
+        d.append(1.5)          # switch to wrapped objects
+        d.appendleft('x')
+        assert list(d) == ['x', 1, 2, 3, 1.5]
+        d = deque([1.5, 2.5])
+        d[0] = 2
+        assert d == deque([2, 2.5])
+        assert type(d[0]) is int
+        d = deque([1, True, 2])
+        assert type(d[1]) is bool
+
+    def test_unboxed_nan_and_zero(self):
+        from _collections import deque
+        nan = float('nan')
+        d = deque([nan, 0.0, -0.0, 1.0])
+        assert d.count(nan) == 1
+        assert d.count(nan) == [nan].count(nan)
+        assert d.count(0.0) == 2
+        assert d[0] is nan
+
+    def test_setitem_other_type_while_iterating(self):
+        from _collections import deque
+        for d in [deque(range(10)), deque(range(10), maxlen=20)]:
+            res = []
+            for x in d:
+                res.append(x)
+                if x == 3:
+                    d[7] = 'seven'
+            assert res == [0, 1, 2, 3, 4, 5, 6, 'seven', 8, 9]
+            res = []
+            for x in reversed(d):
+                res.append(x)
+                if x == 8:
+                    d[2] = 'two'
+            assert res == [9, 8, 'seven', 6, 5, 4, 3, 'two', 1, 0]
+
+    def test_maxlen_ring(self):
+        from _collections import deque
+        d = deque(maxlen=100)
+        for i in range(1000):
+            d.append(i)
+            assert len(d) == min(i + 1, 100)
+        assert list(d) == range(900, 1000)
+        assert d[0] == 900 and d[-1] == 999 and d[50] == 950
+        for i in range(30):
+            d.appendleft(-i)
+        assert list(d) == range(-29, 1) + range(900, 970)
+        d.rotate(-10)
+        assert list(d) == range(-19, 1) + range(900, 970) + range(-29, -19)
+        d.reverse()
+        assert d[0] == -20
+        del d[10]
+        assert len(d) == 99
+        d.clear()
+        d.extend('abc')
+        d.extendleft([1, 2])
+        assert list(d) == [2, 1, 'a', 'b', 'c']
+        d.__init__(range(5), 3)
+        assert list(d) == [2, 3, 4]
+        assert d.maxlen == 3
+
+
+class TestDequeStorage:
+    spaceconfig = dict(usemodules=['_collections'])
+
+    def newdeque(self, w_iterable, maxlen=None):
+        from pypy.module._collections.interp_deque import W_Deque
+        space = self.space
+        w_deque = W_Deque(space)
+        if maxlen is None:
+            w_maxlen = space.w_None
+        else:
+            w_maxlen = space.newint(maxlen)
+        space.call_method(w_deque, '__init__', w_iterable, w_maxlen)
+        return w_deque
+
+    def test_storage_classes(self):
+        from pypy.module._collections import interp_deque
+        space = self.space
+        w_deque = self.newdeque(space.newlist([]))
+        assert type(w_deque.qstorage) is interp_deque.DequeStorage
+        cases = [
+            ('[1, 2]', None, interp_deque.IntBlockStorage),
+            ('[1.5]', None, interp_deque.FloatBlockStorage),
+            ('[1, 1.5]', None, interp_deque.ObjectBlockStorage),
+            ('["a"]', None, interp_deque.ObjectBlockStorage),
+            ('[True]', None, interp_deque.ObjectBlockStorage),
+            ('[1, 2]', 3, interp_deque.IntRingStorage),
+            ('[1.5]', 3, interp_deque.FloatRingStorage),
+            ('[None]', 3, interp_deque.ObjectRingStorage),
+        ]
+        for source, maxlen, cls in cases:
+            w_deque = self.newdeque(space.appexec([], "(): return " + source),
+                                    maxlen)
+            assert type(w_deque.qstorage) is cls
+
+    def test_emptied_deque_picks_new_storage_type(self):
+        from pypy.module._collections import interp_deque
+        space = self.space
+        w_deque = self.newdeque(space.appexec([], "(): return [1, 2]"))
+        space.call_method(w_deque, 'pop')
+        space.call_method(w_deque, 'pop')
+        space.call_method(w_deque, 'append', space.newfloat(1.5))
+        assert type(w_deque.qstorage) is interp_deque.FloatBlockStorage
+        space.call_method(w_deque, 'append', space.newint(1))
+        assert type(w_deque.qstorage) is interp_deque.ObjectBlockStorage
+
+    def test_ring_reuses_slots(self):
+        space = self.space
+        w_deque = self.newdeque(space.appexec([], "(): return range(100)"), 10)
+        storage = w_deque.qstorage
+        assert len(storage.items) == 10
+        items = storage.items
+        for i in range(25):
+            space.call_method(w_deque, 'append', space.newint(i))
+        assert w_deque.qstorage is storage
+        assert storage.items is items
+        assert storage.head == 5
@@ -0,0 +1,3 @@
+class Unsupported(Exception):
+    """Raised by dumps() and loads() when the object or the pickle contains
+    something that only the app-level Pickler and Unpickler know about."""
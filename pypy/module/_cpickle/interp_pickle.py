@@ -0,0 +1,870 @@
+"""
+Interp-level fast paths for lib_pypy/cPickle.py.
+
+dumps() and loads() only know about the builtin types that make up typical
+data payloads: None, bool, int, long, float, str, unicode, tuple, list and
+dict (exact types only, no subclasses).  If the object to dump contains
+anything else, dumps() finds out before writing anything; loads() stops at
+the first unknown opcode.  Both raise _cpickle.Unsupported, and cPickle.py
+uses the app-level Pickler or Unpickler instead.  The produced pickles are
+byte-for-byte identical to the ones of the app-level Pickler, including the
+memo indices.
+"""
+
+from rpython.rlib import rutf8
+from rpython.rlib.objectmodel import specialize, r_dict, compute_identity_hash
+from rpython.rlib.rarithmetic import intmask, r_uint, r_ulonglong
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rstring import StringBuilder, replace_count
+from rpython.rlib.rstruct.ieee import float_pack, float_unpack
+from rpython.rtyper.lltypesystem import rffi
+from pypy.interpreter import unicodehelper
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.dictmultiobject import (W_DictMultiObject,
+    BytesDictStrategy, UnicodeDictStrategy, IntDictStrategy, EmptyDictStrategy)
+from pypy.objspace.std.kwargsdict import KwargsDictStrategy
+from pypy.objspace.std.listobject import W_ListObject, ObjectListStrategy
+
+HIGHEST_PROTOCOL = 2
+
+# same as pickle.Pickler._BATCHSIZE
+BATCHSIZE = 1000
+
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+PROTO           = '\x80'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+
+class Unsupported(Exception):
+    """ Raised internally when the fast path gives up. """
+
+
+def raise_unsupported(space):
+    w_module = space.getbuiltinmodule('_cpickle')
+    w_unsupported = space.getattr(w_module, space.newtext('Unsupported'))
+    raise OperationError(w_unsupported, space.w_None)
+
+
+def pack_int32(builder, value):
+    builder.append(chr(value & 0xff))
+    builder.append(chr((value >> 8) & 0xff))
+    builder.append(chr((value >> 16) & 0xff))
+    builder.append(chr((value >> 24) & 0xff))
+
+def encode_long(bigint):
+    """ The two's complement little-endian encoding of bigint, with the
+    smallest possible number of bytes (and no bytes at all for 0). """
+    if bigint.sign == 0:
+        return ''
+    if bigint.sign > 0:
+        nbits = bigint.bit_length()
+    else:
+        nbits = bigint.abs().sub(rbigint.fromint(1)).bit_length()
+    return bigint.tobytes(nbits // 8 + 1, 'little', True)
+
+
+def _same_string(s1, s2):
+    return s1 is s2
+
+def _string_identity_hash(s):
+    return compute_identity_hash(s)
+
+
+class Pickler(object):
+    def __init__(self, space, proto):
+        self.space = space
+        self.proto = proto
+        self.bin = proto >= 1
+        self.builder = StringBuilder()
+        # identity dict {w_obj: memo index}, see memoize() for the numbering
+        self.memo = {}
+        # pickle.py finds the strings in its memo by id().  On PyPy, the id()
+        # of a str or unicode is the identity of the RPython string inside,
+        # which different string objects can share, except for the shortest
+        # strings, whose id() depends only on their value (see
+        # immutable_unique_id()).  So the memo of strings is an identity
+        # dict {RPython string: memo index}, and the memos of short strings
+        # are keyed by value.
+        self.string_memo = r_dict(_same_string, _string_identity_hash)
+        self.short_bytes_memo = {}
+        self.short_unicode_memo = {}
+        self.memo_len = 1
+        # identity dict of the containers seen by check()
+        self.checked = {}
+
+    def dump(self, w_obj):
+        self.check(w_obj)
+        if self.proto >= 2:
+            self.builder.append(PROTO)
+            self.builder.append(chr(self.proto))
+        self.save(w_obj)
+        self.builder.append(STOP)
+        return self.builder.build()
+
+    def memoize(self, w_obj):
+        # the app-level Pickler of cPickle.py starts counting at one
+        if w_obj is not None:
+            self.memo[w_obj] = self.memo_len
+        self.put(self.memo_len)
+        self.memo_len += 1
+
+    def check(self, w_obj):
+        """ Raise Unsupported if w_obj contains an object that save() doesn't
+        know about.  This is checked before writing anything, so that the
+        work is not thrown away when cPickle.py has to use the app-level
+        Pickler anyway. """
+        space = self.space
+        w_type = space.type(w_obj)
+        if w_type is space.w_list:
+            assert isinstance(w_obj, W_ListObject)
+            # only the object strategy can contain other types than
+            # ints, floats, str and unicode
+            if not isinstance(w_obj.strategy, ObjectListStrategy):
+                return
+            if w_obj in self.checked:
+                return
+            self.checked[w_obj] = None
+            for w_item in space.listview(w_obj):
+                self.check(w_item)
+        elif w_type is space.w_dict:
+            assert isinstance(w_obj, W_DictMultiObject)
+            if w_obj in self.checked:
+                return
+            self.checked[w_obj] = None
+            strategy = w_obj.get_strategy()
+            if isinstance(strategy, EmptyDictStrategy):
+                return
+            if (isinstance(strategy, BytesDictStrategy) or
+                    isinstance(strategy, UnicodeDictStrategy) or
+                    isinstance(strategy, IntDictStrategy) or
+                    isinstance(strategy, KwargsDictStrategy)):
+                itervalues = w_obj.itervalues()
+                while True:
+                    w_value = itervalues.next_value()
+                    if w_value is None:
+                        break
+                    self.check(w_value)
+                return
+            iteritems = w_obj.iteritems()
+            while True:
+                w_key, w_value = iteritems.next_item()
+                if w_key is None:
+                    break
+                self.check(w_key)
+                self.check(w_value)
+        elif w_type is space.w_tuple:
+            if w_obj in self.checked:
+                return
+            self.checked[w_obj] = None
+            for w_item in space.fixedview(w_obj):
+                self.check(w_item)
+        elif not (w_type is space.w_int or w_type is space.w_bytes or
+                  w_type is space.w_float or w_type is space.w_unicode or
+                  w_type is space.w_NoneType or w_type is space.w_bool or
+                  w_type is space.w_long):
+            raise Unsupported
+
+    def get_string(self, s, is_unicode):
+        # if the string with this id() was saved already, write a GET
+        if is_unicode and len(s) <= 2:
+            index = self.short_unicode_memo.get(s, -1)
+        elif not is_unicode and len(s) <= 1:
+            index = self.short_bytes_memo.get(s, -1)
+        else:
+            index = self.string_memo.get(s, -1)
+        if index < 0:
+            return False
+        self.get(index)
+        return True
+
+    def memoize_string(self, s, is_unicode):
+        if is_unicode and len(s) <= 2:
+            self.short_unicode_memo[s] = self.memo_len
+        elif not is_unicode and len(s) <= 1:
+            self.short_bytes_memo[s] = self.memo_len
+        else:
+            self.string_memo[s] = self.memo_len
+        self.memoize(None)
+
+    def put(self, i):
+        builder = self.builder
+        if self.bin:
+            if i < 256:
+                builder.append(BINPUT)
+                builder.append(chr(i))
+            else:
+                builder.append(LONG_BINPUT)
+                pack_int32(builder, i)
+        else:
+            builder.append(PUT)
+            builder.append(str(i))
+            builder.append('\n')
+
+    def get(self, i):
+        builder = self.builder
+        if self.bin:
+            if i < 256:
+                builder.append(BINGET)
+                builder.append(chr(i))
+            else:
+                builder.append(LONG_BINGET)
+                pack_int32(builder, i)
+        else:
+            builder.append(GET)
+            builder.append(str(i))
+            builder.append('\n')
+
+    def save(self, w_obj):
+        space = self.space
+        index = self.memo.get(w_obj, -1)
+        if index >= 0:
+            self.get(index)
+            return
+        w_type = space.type(w_obj)
+        if w_type is space.w_int:
+            self.save_int(space.int_w(w_obj))
+        elif w_type is space.w_bytes:
+            self.save_string(space.bytes_w(w_obj))
+        elif w_type is space.w_float:
+            self.save_float(space.float_w(w_obj))
+        elif w_type is space.w_list:
+            self.save_list(w_obj)
+        elif w_type is space.w_dict:
+            self.save_dict(w_obj)
+        elif w_type is space.w_tuple:
+            self.save_tuple(w_obj)
+        elif w_type is space.w_unicode:
+            self.save_unicode(w_obj)
+        elif w_type is space.w_NoneType:
+            self.builder.append(NONE)
+        elif w_type is space.w_bool:
+            self.save_bool(space.is_true(w_obj))
+        elif w_type is space.w_long:
+            self.save_long(space.bigint_w(w_obj))
+        else:
+            raise Unsupported
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            self.builder.append(NEWTRUE if value else NEWFALSE)
+        else:
+            self.builder.append('I01\n' if value else 'I00\n')
+
+    def save_int(self, value):
+        builder = self.builder
+        if self.bin:
+            if value >= 0:
+                if value <= 0xff:
+                    builder.append(BININT1)
+                    builder.append(chr(value))
+                    return
+                if value <= 0xffff:
+                    builder.append(BININT2)
+                    builder.append(chr(value & 0xff))
+                    builder.append(chr(value >> 8))
+                    return
+            high_bits = value >> 31
+            if high_bits == 0 or high_bits == -1:
+                builder.append(BININT)
+                pack_int32(builder, value)
+                return
+        builder.append(INT)
+        builder.append(str(value))
+        builder.append('\n')
+
+    def save_long(self, bigint):
+        builder = self.builder
+        if self.proto >= 2:
+            data = encode_long(bigint)
+            if len(data) < 256:
+                builder.append(LONG1)
+                builder.append(chr(len(data)))
+            else:
+                builder.append(LONG4)
+                pack_int32(builder, len(data))
+            builder.append(data)
+            return
+        builder.append(LONG)
+        builder.append(bigint.str())
+        builder.append('L\n')
+
+    def save_float(self, value):
+        builder = self.builder
+        if self.bin:
+            builder.append(BINFLOAT)
+            bits = float_pack(value, 8)
+            for i in range(7, -1, -1):
+                builder.append(chr(intmask((bits >> (i * 8)) & 0xff)))
+        else:
+            builder.append(FLOAT)
+            builder.append(self.space.bytes_w(
+                self.space.repr(self.space.newfloat(value))))
+            builder.append('\n')
+
+    def save_string(self, s):
+        if self.get_string(s, False):
+            return
+        self.save_bytes(s)
+        self.memoize_string(s, False)
+
+    def save_bytes(self, s):
+        builder = self.builder
+        if self.bin:
+            if len(s) < 256:
+                builder.append(SHORT_BINSTRING)
+                builder.append(chr(len(s)))
+            else:
+                builder.append(BINSTRING)
+                pack_int32(builder, len(s))
+            builder.append(s)
+        else:
+            space = self.space
+            builder.append(STRING)
+            builder.append(space.bytes_w(space.repr(space.newbytes(s))))
+            builder.append('\n')
+
+    def save_unicode(self, w_obj):
+        builder = self.builder
+        utf8 = self.space.utf8_w(w_obj)
+        if self.get_string(utf8, True):
+            return
+        if self.bin:
+            data = utf8
+            if rutf8.has_surrogates(data):
+                data = rutf8.reencode_utf8_with_surrogates(data)
+            builder.append(BINUNICODE)
+            pack_int32(builder, len(data))
+            builder.append(data)
+            self.memoize_string(utf8, True)
+        else:
+            # pickle.py memoizes the result of obj.replace(), which is
+            # either a new string, never found in the memo, or a unicode
+            # object wrapping the same RPython string as obj, with the
+            # same id().  Do the same replacements as unicode.replace().
+            escaped, _ = replace_count(utf8, '\\', '\\u005c', isutf8=True)
+            escaped, _ = replace_count(escaped, '\n', '\\u000a', isutf8=True)
+            builder.append(UNICODE)
+            builder.append(unicodehelper.utf8_encode_raw_unicode_escape(
+                escaped, 'strict', None))
+            builder.append('\n')
+            self.memoize_string(escaped, True)
+
+    def save_tuple(self, w_obj):
+        builder = self.builder
+        items_w = self.space.fixedview(w_obj)
+        n = len(items_w)
+        if n == 0:
+            if self.proto:
+                builder.append(EMPTY_TUPLE)
+            else:
+                builder.append(MARK)
+                builder.append(TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            index = self.memo.get(w_obj, -1)
+            if index >= 0:
+                # the tuple is recursive, see pickle.py
+                for i in range(n):
+                    builder.append(POP)
+                self.get(index)
+            else:
+                builder.append(TUPLESIZE2CODE[n])
+                self.memoize(w_obj)
+            return
+        builder.append(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_obj, -1)
+        if index >= 0:
+            if self.proto:
+                builder.append(POP_MARK)
+            else:
+                for i in range(n + 1):
+                    builder.append(POP)
+            self.get(index)
+            return
+        builder.append(TUPLE)
+        self.memoize(w_obj)
+
+    def save_list(self, w_obj):
+        builder = self.builder
+        if self.bin:
+            builder.append(EMPTY_LIST)
+        else:
+            builder.append(MARK)
+            builder.append(LIST)
+        self.memoize(w_obj)
+        # use the unwrapped items of the list strategies when possible
+        space = self.space
+        ints = space.listview_int(w_obj)
+        if ints is not None:
+            self.save_list_items(ints)
+            return
+        floats = space.listview_float(w_obj)
+        if floats is not None:
+            self.save_list_items(floats)
+            return
+        strings = space.listview_bytes(w_obj)
+        if strings is not None:
+            self.save_list_items(strings)
+            return
+        self.save_list_items(space.listview(w_obj))
+
+    # one copy for each type of items: specialize.argtype() doesn't look
+    # at the type of the items of a list
+    @specialize.call_location()
+    def save_list_items(self, items):
+        builder = self.builder
+        if not self.bin:
+            for item in items:
+                self.save_item(item)
+                builder.append(APPEND)
+            return
+        # write batches of BATCHSIZE items, as pickle.py does
+        start = 0
+        while True:
+            end = min(start + BATCHSIZE, len(items))
+            n = end - start
+            if n > 1:
+                builder.append(MARK)
+                for i in range(start, end):
+                    self.save_item(items[i])
+                builder.append(APPENDS)
+            elif n == 1:
+                self.save_item(items[start])
+                builder.append(APPEND)
+            if n < BATCHSIZE:
+                break
+            start = end
+
+    @specialize.argtype(1)
+    def save_item(self, item):
+        # an item of a list or a key of a dict, either unwrapped or wrapped
+        if isinstance(item, int):
+            self.save_int(item)
+        elif isinstance(item, float):
+            self.save_float(item)
+        elif isinstance(item, str):
+            self.save_string(item)
+        else:
+            assert isinstance(item, W_Root)
+            self.save(item)
+
+    def save_dict(self, w_obj):
+        builder = self.builder
+        if self.bin:
+            builder.append(EMPTY_DICT)
+        else:
+            builder.append(MARK)
+            builder.append(DICT)
+        self.memoize(w_obj)
+        # string-keyed dicts give their unwrapped keys, in iteration order
+        space = self.space
+        keys, values_w = space.view_as_kwargs(w_obj)
+        if keys is not None:
+            self.save_dict_items(keys, values_w)
+            return
+        assert isinstance(w_obj, W_DictMultiObject)
+        keys_w = []
+        values_w = []
+        iteritems = w_obj.iteritems()
+        while True:
+            w_key, w_value = iteritems.next_item()
+            if w_key is None:
+                break
+            keys_w.append(w_key)
+            values_w.append(w_value)
+        self.save_dict_items(keys_w, values_w)
+
+    @specialize.call_location()
+    def save_dict_items(self, keys, values_w):
+        builder = self.builder
+        if not self.bin:
+            for i in range(len(keys)):
+                self.save_item(keys[i])
+                self.save(values_w[i])
+                builder.append(SETITEM)
+            return
+        start = 0
+        while True:
+            end = min(start + BATCHSIZE, len(keys))
+            n = end - start
+            if n > 1:
+                builder.append(MARK)
+                for i in range(start, end):
+                    self.save_item(keys[i])
+                    self.save(values_w[i])
+                builder.append(SETITEMS)
+            elif n == 1:
+                self.save_item(keys[start])
+                self.save(values_w[start])
+                builder.append(SETITEM)
+            if n < BATCHSIZE:
+                break
+            start = end
+
+
+class Unpickler(object):
+    def __init__(self, space, s):
+        self.space = space
+        self.s = s
+        self.pos = 0
+        self.stack_w = []
+        # positions in stack_w of the MARKs
+        self.marks = []
+        self.memo = {}
+
+    def read(self, n):
+        if n < 0:
+            raise Unsupported
+        pos = self.pos
+        end = pos + n
+        if end > len(self.s):
+            raise Unsupported
+        assert end >= 0
+        self.pos = end
+        return self.s[pos:end]
+
+    def read_byte(self):
+        pos = self.pos
+        if pos >= len(self.s):
+            raise Unsupported
+        self.pos = pos + 1
+        return ord(self.s[pos])
+
+    def read_int32(self):
+        pos = self.pos
+        if pos + 4 > len(self.s):
+            raise Unsupported
+        self.pos = pos + 4
+        s = self.s
+        value = (r_uint(ord(s[pos])) |
+                 (r_uint(ord(s[pos + 1])) << 8) |
+                 (r_uint(ord(s[pos + 2])) << 16) |
+                 (r_uint(ord(s[pos + 3])) << 24))
+        return intmask(rffi.cast(rffi.INT, value))
+
+    def readline(self):
+        """ The rest of the line, without the newline. """
+        pos = self.pos
+        end = self.s.find('\n', pos)
+        if end < 0:
+            raise Unsupported
+        self.pos = end + 1
+        return self.s[pos:end]
+
+    def append(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if len(self.stack_w) <= self.top_mark():
+            raise Unsupported
+        return self.stack_w.pop()
+
+    def top(self):
+        if len(self.stack_w) <= self.top_mark():
+            raise Unsupported
+        return self.stack_w[-1]
+
+    def top_mark(self):
+        if self.marks:
+            return self.marks[-1]
+        return 0
+
+    def pop_mark(self):
+        """ Remove the topmost mark and return the items above it. """
+        if not self.marks:
+            raise Unsupported
+        k = self.marks.pop()
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    def memo_get(self, index):
+        try:
+            w_obj = self.memo[index]
+        except KeyError:
+            raise Unsupported
+        self.append(w_obj)
+
+    def memo_key(self, text):
+        """ Text-mode memo keys are strings at app-level; only handle the
+        ones written by a Pickler. """
+        if not text.isdigit() or (len(text) > 1 and text[0] == '0'):
+            raise Unsupported
+        if len(text) > 9:
+            raise Unsupported
+        return int(text)
+
+    def call_or_unsupported(self, w_func, w_arg, w_arg2=None):
+        """ Call a conversion function, giving up on errors so that the
+        app-level Unpickler reports them. """
+        space = self.space
+        try:
+            if w_arg2 is None:
+                return space.call_function(w_func, w_arg)
+            return space.call_function(w_func, w_arg, w_arg2)
+        except OperationError as e:
+            if not e.match(space, space.w_Exception):
+                raise
+            raise Unsupported
+
+    def load(self):
+        space = self.space
+        s = self.s
+        while True:
+            pos = self.pos
+            if pos >= len(s):
+                raise Unsupported
+            op = s[pos]
+            self.pos = pos + 1
+            if op == STOP:
+                break
+            elif op == BININT1:
+                self.append(space.newint(self.read_byte()))
+            elif op == BINPUT:
+                self.memo[self.read_byte()] = self.top()
+            elif op == SHORT_BINSTRING:
+                self.append(space.newbytes(self.read(self.read_byte())))
+            elif op == MARK:
+                self.marks.append(len(self.stack_w))
+            elif op == BINGET:
+                self.memo_get(self.read_byte())
+            elif op == BININT:
+                self.append(space.newint(self.read_int32()))
+            elif op == BININT2:
+                low = self.read_byte()
+                self.append(space.newint(low | (self.read_byte() << 8)))
+            elif op == BINUNICODE:
+                self.load_binunicode(self.read(self.read_int32()))
+            elif op == BINFLOAT:
+                self.load_binfloat()
+            elif op == EMPTY_LIST:
+                self.append(space.newlist([]))
+            elif op == EMPTY_DICT:
+                self.append(space.newdict())
+            elif op == EMPTY_TUPLE:
+                self.append(space.newtuple([]))
+            elif op == APPEND:
+                w_value = self.pop()
+                w_list = self.top()
+                if not isinstance(w_list, W_ListObject):
+                    raise Unsupported
+                w_list.append(w_value)
+            elif op == APPENDS:
+                items_w = self.pop_mark()
+                w_list = self.top()
+                if not isinstance(w_list, W_ListObject):
+                    raise Unsupported
+                for w_item in items_w:
+                    w_list.append(w_item)
+            elif op == SETITEM:
+                w_value = self.pop()
+                w_key = self.pop()
+                w_dict = self.top()
+                if not isinstance(w_dict, W_DictMultiObject):
+                    raise Unsupported
+                space.setitem(w_dict, w_key, w_value)
+            elif op == SETITEMS:
+                items_w = self.pop_mark()
+                w_dict = self.top()
+                if (not isinstance(w_dict, W_DictMultiObject) or
+                        len(items_w) & 1):
+                    raise Unsupported
+                for i in range(0, len(items_w), 2):
+                    space.setitem(w_dict, items_w[i], items_w[i + 1])
+            elif op == TUPLE1:
+                w_item = self.pop()
+                self.append(space.newtuple([w_item]))
+            elif op == TUPLE2:
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.append(space.newtuple([w_item1, w_item2]))
+            elif op == TUPLE3:
+                w_item3 = self.pop()
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.append(space.newtuple([w_item1, w_item2, w_item3]))
+            elif op == TUPLE:
+                self.append(space.newtuple(self.pop_mark()[:]))
+            elif op == LIST:
+                self.append(space.newlist(self.pop_mark()[:]))
+            elif op == DICT:
+                items_w = self.pop_mark()
+                if len(items_w) & 1:
+                    raise Unsupported
+                w_dict = space.newdict()
+                for i in range(0, len(items_w), 2):
+                    space.setitem(w_dict, items_w[i], items_w[i + 1])
+                self.append(w_dict)
+            elif op == NONE:
+                self.append(space.w_None)
+            elif op == NEWTRUE:
+                self.append(space.w_True)
+            elif op == NEWFALSE:
+                self.append(space.w_False)
+            elif op == LONG_BINPUT:
+                self.memo[self.read_int32()] = self.top()
+            elif op == LONG_BINGET:
+                self.memo_get(self.read_int32())
+            elif op == BINSTRING:
+                length = self.read_int32()
+                if length < 0:
+                    raise Unsupported
+                self.append(space.newbytes(self.read(length)))
+            elif op == LONG1:
+                self.load_long_binary(self.read_byte())
+            elif op == LONG4:
+                self.load_long_binary(self.read_int32())
+            elif op == PROTO:
+                if self.read_byte() > HIGHEST_PROTOCOL:
+                    raise Unsupported
+            elif op == PUT:
+                self.memo[self.memo_key(self.readline())] = self.top()
+            elif op == GET:
+                self.memo_get(self.memo_key(self.readline()))
+            elif op == INT:
+                self.load_int(self.readline())
+            elif op == LONG:
+                self.append(self.call_or_unsupported(
+                    space.w_long, space.newbytes(self.readline()),
+                    space.newint(0)))
+            elif op == FLOAT:
+                self.append(self.call_or_unsupported(
+                    space.w_float, space.newbytes(self.readline())))
+            elif op == STRING:
+                self.load_string(self.readline())
+            elif op == UNICODE:
+                self.append(self.call_or_unsupported(
+                    space.w_unicode, space.newbytes(self.readline()),
+                    space.newtext('raw-unicode-escape')))
+            elif op == POP:
+                self.pop()
+            elif op == POP_MARK:
+                self.pop_mark()
+            elif op == DUP:
+                self.append(self.top())
+            else:
+                raise Unsupported
+        if len(self.stack_w) <= self.top_mark():
+            raise Unsupported
+        return self.stack_w[-1]
+
+    def load_int(self, line):
+        space = self.space
+        if line == '00':
+            self.append(space.w_False)
+        elif line == '01':
+            self.append(space.w_True)
+        else:
+            self.append(self.call_or_unsupported(space.w_int,
+                                                 space.newbytes(line)))
+
+    def load_long_binary(self, length):
+        if length < 0:
+            raise Unsupported
+        data = self.read(length)
+        self.append(self.space.newlong_from_rbigint(
+            rbigint.frombytes(data, 'little', True)))
+
+    def load_binfloat(self):
+        data = self.read(8)
+        bits = r_ulonglong(0)
+        for i in range(8):
+            bits = (bits << 8) | r_ulonglong(ord(data[i]))
+        self.append(self.space.newfloat(float_unpack(bits, 8)))
+
+    def load_binunicode(self, data):
+        try:
+            length = rutf8.check_utf8(data, allow_surrogates=True)
+        except rutf8.CheckError:
+            raise Unsupported
+        if rutf8.has_surrogates(data):
+            # leave the handling of encoded surrogate pairs to the codec
+            raise Unsupported
+        self.append(self.space.newutf8(data, length))
+
+    def load_string(self, rep):
+        space = self.space
+        if len(rep) < 2 or rep[0] != rep[-1] or (rep[0] != "'" and
+                                                  rep[0] != '"'):
+            raise Unsupported
+        end = len(rep) - 1
+        assert end > 0
+        rep = rep[1:end]
+        if '\\' not in rep:
+            self.append(space.newbytes(rep))
+            return
+        w_decode = space.getattr(space.newbytes(rep), space.newtext('decode'))
+        self.append(self.call_or_unsupported(
+            w_decode, space.newtext('string-escape')))
+
+
+@unwrap_spec(protocol=int)
+def dumps(space, w_obj, protocol=0):
+    """ dumps(obj, protocol=0) -> str, or raise Unsupported """
+    if protocol < 0:
+        protocol = HIGHEST_PROTOCOL
+    elif protocol > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError,
+                    "pickle protocol %d asked for; the highest available "
+                    "protocol is %d", protocol, HIGHEST_PROTOCOL)
+    pickler = Pickler(space, protocol)
+    try:
+        return space.newbytes(pickler.dump(w_obj))
+    except Unsupported:
+        raise_unsupported(space)
+
+@unwrap_spec(s='bufferstr')
+def loads(space, s):
+    """ loads(str) -> obj, or raise Unsupported """
+    unpickler = Unpickler(space, s)
+    try:
+        return unpickler.load()
+    except Unsupported:
+        raise_unsupported(space)
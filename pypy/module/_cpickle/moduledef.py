@@ -0,0 +1,13 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    """RPython fast paths for the cPickle module"""
+
+    appleveldefs = {
+        'Unsupported': 'app_cpickle.Unsupported',
+        }
+
+    interpleveldefs = {
+        'dumps': 'interp_pickle.dumps',
+        'loads': 'interp_pickle.loads',
+        }
@@ -0,0 +1,125 @@
+from pypy.module._cpickle.interp_pickle import Pickler, Unsupported
+
+
+class TestPickler(object):
+    def test_check_before_writing(self):
+        space = self.space
+        w_obj = space.appexec([], """():
+            class A(object):
+                pass
+            l = [(1, 'a' * 10), {'b': 2.5}, [u'c', None]]
+            l.append(l)
+            return l + [{3: A()}]
+        """)
+        pickler = Pickler(space, 2)
+        try:
+            pickler.dump(w_obj)
+        except Unsupported:
+            pass
+        else:
+            assert False, "should have raised Unsupported"
+        # nothing was written
+        assert pickler.builder.getlength() == 0
+        assert pickler.memo_len == 1
+
+
+class AppTestCPickle(object):
+    spaceconfig = {"usemodules": ["_cpickle", "struct", "binascii"]}
+
+    def setup_class(cls):
+        cls.w_samples = cls.space.appexec([], """():
+            x = [1, 2]
+            s = 'shared'
+            return [
+                None, True, False, 0, 1, 255, 256, 65535, 65536, -1, -2**31,
+                2**31 - 1, 2**31, 2**40, -2**40, 0L, 255L, -256L, 2**100,
+                -2**100, 1.5, -0.0, 1e300, 'abc', '', 'a' * 300,
+                'quote\\'s\\n\\x00', u'', u'abc', u'\\xe9\\u1234\\U00012345',
+                u'back\\\\slash\\n', (), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4),
+                [], [1, 'a', None], range(2500), {}, {'a': 1, 2: [3]},
+                dict.fromkeys(range(1500)), [x, x, (x, s), s, s],
+                {'k': (u'v', 1.25, [None])}, [str(i) for i in range(300)],
+                [i * 0.5 for i in range(300)], ['a' * 300, 'b', ''] * 20,
+                dict([(str(i), [i]) for i in range(1001)]), {'x': x, 'y': x},
+                # equal strings are only shared if they have the same id()
+                [s, 'sh' + s[2:], 'a', 'ba'[1], 'a' + 'b', 'a' + 'b',
+                 u'xy', u'x' + u'y', u'xyz', u'xy' + u'z', s.decode('ascii')],
+            ]
+        """)
+
+    def w_python_dumps(self, obj, proto):
+        import pickle, StringIO
+        class Pickler(pickle.Pickler):
+            def memoize(self, obj):
+                self.memo[id(None)] = None   # cPickle starts counting at one
+                return pickle.Pickler.memoize(self, obj)
+        f = StringIO.StringIO()
+        Pickler(f, proto).dump(obj)
+        return f.getvalue()
+
+    def test_same_as_pickle(self):
+        import _cpickle
+        for proto in [0, 1, 2]:
+            for obj in self.samples:
+                expected = self.python_dumps(obj, proto)
+                assert _cpickle.dumps(obj, proto) == expected, (obj, proto)
+
+    def test_roundtrip(self):
+        import _cpickle
+        for proto in [0, 1, 2]:
+            for obj in self.samples:
+                res = _cpickle.loads(_cpickle.dumps(obj, proto))
+                assert res == obj
+                assert type(res) is type(obj)
+
+    def test_shared_references(self):
+        import _cpickle
+        x = [1]
+        for proto in [0, 1, 2]:
+            res = _cpickle.loads(_cpickle.dumps([x, x, (x,)], proto))
+            assert res[0] is res[1] is res[2][0]
+            l = []
+            l.append(l)
+            res = _cpickle.loads(_cpickle.dumps(l, proto))
+            assert res[0] is res
+
+    def test_negative_protocol(self):
+        import _cpickle
+        assert _cpickle.dumps(None, -1) == '\x80\x02N.'
+        raises(ValueError, _cpickle.dumps, None, 3)
+
+    def test_unsupported(self):
+        import _cpickle
+        class A(object):
+            pass
+        class MyInt(int):
+            pass
+        raises(_cpickle.Unsupported, _cpickle.dumps, A())
+        raises(_cpickle.Unsupported, _cpickle.dumps, [1, {'a': A()}], 2)
+        raises(_cpickle.Unsupported, _cpickle.dumps, MyInt(3))
+        raises(_cpickle.Unsupported, _cpickle.dumps, set())
+        l = [1, 'a']
+        l.append(l)
+        l.append({'b': (l, A())})
+        raises(_cpickle.Unsupported, _cpickle.dumps, l)
+        raises(_cpickle.Unsupported, _cpickle.dumps, {A(): 1})
+        raises(_cpickle.Unsupported, _cpickle.dumps, dict(a=[2, A()]))
+        # GLOBAL, truncated data, stack underflow, invalid opcode, bad memo
+        raises(_cpickle.Unsupported, _cpickle.loads, 'c__builtin__\nset\n.')
+        raises(_cpickle.Unsupported, _cpickle.loads, '\x80\x02]q\x01(K')
+        raises(_cpickle.Unsupported, _cpickle.loads, 'a.')
+        raises(_cpickle.Unsupported, _cpickle.loads, 'Z.')
+        raises(_cpickle.Unsupported, _cpickle.loads, 'h\x05.')
+        raises(_cpickle.Unsupported, _cpickle.loads, '(.')
+
+    def test_loads_text_opcodes(self):
+        import _cpickle
+        assert _cpickle.loads("I12\n.") == 12
+        assert _cpickle.loads("I01\n.") is True
+        assert _cpickle.loads("L12L\n.") == 12L
+        assert _cpickle.loads("F1.5\n.") == 1.5
+        assert _cpickle.loads("S'a\\nb'\np1\n.") == 'a\nb'
+        assert _cpickle.loads("Vx\\u1234\n.") == u'x\u1234'
+        assert _cpickle.loads("(I1\nI2\nd.") == {1: 2}
+        assert _cpickle.loads("N.trailing") is None
+        raises(TypeError, _cpickle.loads, "(]I1\nd.")
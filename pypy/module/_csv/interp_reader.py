@@ -1,5 +1,9 @@
-from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstring import (StringBuilder, ParseStringError,
+                                  ParseStringOverflowError)
+from rpython.rlib.rarithmetic import string_to_int
+from rpython.rlib.rfloat import string_to_float
 from rpython.rlib import objectmodel
+from rpython.rtyper.lltypesystem import rffi
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.gateway import unwrap_spec
@@ -8,6 +12,7 @@ from pypy.interpreter.typedef import interp_attrproperty_w, interp_attrproperty
 from pypy.module._csv.interp_csv import _build_dialect
 from pypy.module._csv.interp_csv import (QUOTE_MINIMAL, QUOTE_ALL,
                                          QUOTE_NONNUMERIC, QUOTE_NONE)
+from pypy.module._csv.simd import find_special_char
 from pypy.objspace.std.util import wrap_parsestringerror
 
 (START_RECORD, START_FIELD, ESCAPED_CHAR, IN_FIELD,
@@ -43,8 +48,6 @@ class W_Reader(W_Root):
         space = self.space
         field = field_builder.build()
         if self.numeric_field:
-            from rpython.rlib.rstring import ParseStringError
-            from rpython.rlib.rfloat import string_to_float
             self.numeric_field = False
             try:
                 ff = string_to_float(field)
@@ -259,6 +262,424 @@ W_Reader.typedef.acceptable_as_base_class = False
 
 # ____________________________________________________________
 
+(COLUMN_BYTES, COLUMN_INT, COLUMN_FLOAT, COLUMN_OBJECT) = range(4)
+
+class Column(object):
+    """The fields of one column of the records read so far by a
+    W_BlockReader.  Strings, integers and floats are stored unwrapped, as
+    long as all the fields of the column are of the same type."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.initial_kind = kind
+        self.reset()
+
+    def reset(self):
+        self.kind = self.initial_kind
+        self.strs = []
+        self.ints = []
+        self.floats = []
+        self.items_w = []
+
+    def append(self, space, field, numeric):
+        kind = self.kind
+        if kind == COLUMN_INT:
+            try:
+                self.ints.append(string_to_int(field))
+            except ParseStringOverflowError:
+                self.append_w(space, space.call_function(space.w_int,
+                                                         space.newtext(field)))
+            except ParseStringError as e:
+                raise wrap_parsestringerror(space, e, space.newtext(field))
+        elif kind == COLUMN_FLOAT or (kind == COLUMN_BYTES and numeric):
+            try:
+                value = string_to_float(field)
+            except ParseStringError as e:
+                raise wrap_parsestringerror(space, e, space.newtext(field))
+            if kind == COLUMN_FLOAT:
+                self.floats.append(value)
+            else:
+                self.append_w(space, space.newfloat(value))
+        elif kind == COLUMN_BYTES:
+            self.strs.append(field)
+        else:
+            self.append_w(space, _wrap_field(space, field, numeric))
+
+    def append_w(self, space, w_value):
+        if self.kind != COLUMN_OBJECT:
+            self._switch_to_objects(space)
+        self.items_w.append(w_value)
+
+    def _switch_to_objects(self, space):
+        if self.kind == COLUMN_INT:
+            self.items_w = [space.newint(x) for x in self.ints]
+        elif self.kind == COLUMN_FLOAT:
+            self.items_w = [space.newfloat(x) for x in self.floats]
+        else:
+            self.items_w = [space.newtext(x) for x in self.strs]
+        self.kind = COLUMN_OBJECT
+
+    def wrap(self, space):
+        if self.kind == COLUMN_INT:
+            w_list = space.newlist_int(self.ints)
+        elif self.kind == COLUMN_FLOAT:
+            w_list = space.newlist_float(self.floats)
+        elif self.kind == COLUMN_BYTES:
+            w_list = space.newlist_bytes(self.strs)
+        else:
+            w_list = space.newlist(self.items_w)
+        self.reset()
+        return w_list
+
+
+def _wrap_field(space, field, numeric):
+    if numeric:
+        try:
+            ff = string_to_float(field)
+        except ParseStringError as e:
+            raise wrap_parsestringerror(space, e, space.newtext(field))
+        return space.newfloat(ff)
+    return space.newtext(field)
+
+
+class W_BlockReader(W_Root):
+    """Parses the data read in big blocks from a file, and returns all the
+    records of a block at once, either as a list of rows or as a list of
+    columns."""
+
+    def __init__(self, space, dialect, w_file, blocksize, columns):
+        self.space = space
+        self.dialect = dialect
+        self.w_file = w_file
+        self.blocksize = blocksize
+        self.columns = columns    # a list of Columns, or None
+        self.line_num = 0
+        self.last_char_cr = False  # the previous block ended with a '\r'
+        self.state = START_RECORD
+        self.field_builder = None
+        self.fields = []          # the fields of the current record
+        self.numeric = []         # for each field, True if it is numeric
+        self.numeric_field = False
+        self.rows_w = []
+        self.nrecords = 0         # in the current batch
+        self.eof = False
+
+    def iter_w(self):
+        return self
+
+    @objectmodel.dont_inline
+    def error(self, msg):
+        space = self.space
+        w_module = space.getbuiltinmodule('_csv')
+        w_error = space.getattr(w_module, space.newtext('Error'))
+        raise oefmt(w_error, "line %d: %s", self.line_num + 1, msg)
+
+    def add_char(self, c):
+        field_builder = self.field_builder
+        assert field_builder is not None
+        if field_builder.getlength() >= field_limit.limit:
+            raise self.error("field larger than field limit")
+        field_builder.append(c)
+
+    def add_run(self, data, ll_chars, start, length):
+        # add the chars from 'start' up to the next special char to the
+        # field, and return the position of that char
+        dialect = self.dialect
+        end = find_special_char(ll_chars, start + 1, length,
+                                dialect.delimiter, dialect.quotechar,
+                                dialect.escapechar)
+        field_builder = self.field_builder
+        assert field_builder is not None
+        if field_builder.getlength() + (end - start) > field_limit.limit:
+            raise self.error("field larger than field limit")
+        field_builder.append_slice(data, start, end)
+        return end
+
+    def save_field(self):
+        field_builder = self.field_builder
+        assert field_builder is not None
+        self.fields.append(field_builder.build())
+        self.numeric.append(self.numeric_field)
+        self.numeric_field = False
+        self.field_builder = None
+
+    def save_record(self):
+        space = self.space
+        fields = self.fields
+        numeric = self.numeric
+        columns = self.columns
+        if columns is None:
+            fields_w = [_wrap_field(space, fields[i], numeric[i])
+                        for i in range(len(fields))]
+            self.rows_w.append(space.newlist(fields_w))
+        elif fields:      # empty lines are ignored
+            if not columns:
+                for i in range(len(fields)):
+                    columns.append(Column(COLUMN_BYTES))
+            if len(fields) != len(columns):
+                raise self.error("expected %d fields, got %d" % (
+                    len(columns), len(fields)))
+            for i in range(len(fields)):
+                columns[i].append(space, fields[i], numeric[i])
+        self.nrecords += 1
+        self.fields = []
+        self.numeric = []
+
+    def parse_block(self, data):
+        ll_chars, llobj, flag = rffi.get_nonmovingbuffer_ll_final_null(data)
+        try:
+            self.parse_chars(data, ll_chars, len(data))
+        finally:
+            rffi.free_nonmovingbuffer_ll(ll_chars, llobj, flag)
+
+    def parse_chars(self, data, ll_chars, length):
+        # the same state machine as W_Reader.next_w(), but working on
+        # blocks that contain any number of lines.  Records end at '\n',
+        # '\r' or '\r\n'.  The plain chars of a field are copied all at
+        # once, up to the next char that needs to be looked at.
+        dialect = self.dialect
+        state = self.state
+        i = 0
+        while i < length:
+            c = data[i]
+            i += 1
+            if c == '\0':
+                raise self.error("line contains NULL byte")
+            if c == '\r':
+                self.line_num += 1
+            elif c == '\n':
+                # '\r\n' is a single line end
+                if i >= 2:
+                    after_cr = data[i - 2] == '\r'
+                else:
+                    after_cr = self.last_char_cr
+                if not after_cr:
+                    self.line_num += 1
+
+            if state == EAT_CRNL:
+                # we have seen a '\r', eat the '\n' that may follow
+                state = START_RECORD
+                if c == '\n':
+                    continue
+
+            if state == START_RECORD:
+                if c == '\n' or c == '\r':
+                    # empty line
+                    self.save_record()
+                    state = EAT_CRNL if c == '\r' else START_RECORD
+                    continue
+                # normal character - handle as START_FIELD
+                state = START_FIELD
+                # fall-through to the next case
+
+            if state == START_FIELD:
+                self.field_builder = StringBuilder(64)
+                # expecting field
+                if c == '\n' or c == '\r':
+                    # save empty field
+                    self.save_field()
+                    self.save_record()
+                    state = EAT_CRNL if c == '\r' else START_RECORD
+                elif (c == dialect.quotechar and
+                          dialect.quoting != QUOTE_NONE):
+                    # start quoted field
+                    state = IN_QUOTED_FIELD
+                elif c == dialect.escapechar:
+                    # possible escaped character
+                    state = ESCAPED_CHAR
+                elif c == ' ' and dialect.skipinitialspace:
+                    # ignore space at start of field
+                    pass
+                elif c == dialect.delimiter:
+                    # save empty field
+                    self.save_field()
+                else:
+                    # begin new unquoted field
+                    if dialect.quoting == QUOTE_NONNUMERIC:
+                        self.numeric_field = True
+                    i = self.add_run(data, ll_chars, i - 1, length)
+                    state = IN_FIELD
+
+            elif state == ESCAPED_CHAR:
+                self.add_char(c)
+                state = IN_FIELD
+
+            elif state == IN_FIELD:
+                # in unquoted field
+                if c == '\n' or c == '\r':
+                    # end of line
+                    self.save_field()
+                    self.save_record()
+                    state = EAT_CRNL if c == '\r' else START_RECORD
+                elif c == dialect.escapechar:
+                    # possible escaped character
+                    state = ESCAPED_CHAR
+                elif c == dialect.delimiter:
+                    # save field - wait for new field
+                    self.save_field()
+                    state = START_FIELD
+                else:
+                    # normal characters - save in field
+                    i = self.add_run(data, ll_chars, i - 1, length)
+
+            elif state == IN_QUOTED_FIELD:
+                # in quoted field
+                if c == dialect.escapechar:
+                    # Possible escape character
+                    state = ESCAPE_IN_QUOTED_FIELD
+                elif (c == dialect.quotechar and
+                          dialect.quoting != QUOTE_NONE):
+                    if dialect.doublequote:
+                        # doublequote; " represented by ""
+                        state = QUOTE_IN_QUOTED_FIELD
+                    else:
+                        # end of quote part of field
+                        state = IN_FIELD
+                else:
+                    # normal characters - save in field
+                    i = self.add_run(data, ll_chars, i - 1, length)
+
+            elif state == ESCAPE_IN_QUOTED_FIELD:
+                self.add_char(c)
+                state = IN_QUOTED_FIELD
+
+            elif state == QUOTE_IN_QUOTED_FIELD:
+                # doublequote - seen a quote in an quoted field
+                if (dialect.quoting != QUOTE_NONE and
+                        c == dialect.quotechar):
+                    # save "" as "
+                    self.add_char(c)
+                    state = IN_QUOTED_FIELD
+                elif c == dialect.delimiter:
+                    # save field - wait for new field
+                    self.save_field()
+                    state = START_FIELD
+                elif c == '\n' or c == '\r':
+                    # end of line
+                    self.save_field()
+                    self.save_record()
+                    state = EAT_CRNL if c == '\r' else START_RECORD
+                elif not dialect.strict:
+                    self.add_char(c)
+                    state = IN_FIELD
+                else:
+                    # illegal
+                    raise self.error("'%s' expected after '%s'" % (
+                        dialect.delimiter, dialect.quotechar))
+        self.state = state
+        if length > 0:
+            self.last_char_cr = data[length - 1] == '\r'
+
+    def finish(self):
+        # end of the data, save the last record if it is not terminated
+        state = self.state
+        self.state = START_RECORD
+        if state == START_RECORD or state == EAT_CRNL:
+            return
+        if state == ESCAPED_CHAR or state == ESCAPE_IN_QUOTED_FIELD:
+            self.add_char('\n')
+            state = IN_QUOTED_FIELD
+        if state == IN_QUOTED_FIELD and self.dialect.strict:
+            raise self.error("unexpected end of data")
+        if state == START_FIELD:
+            self.field_builder = StringBuilder(1)
+        self.save_field()
+        self.save_record()
+
+    def next_w(self):
+        space = self.space
+        while not self.eof and self.nrecords == 0:
+            w_data = space.call_method(self.w_file, 'read',
+                                       space.newint(self.blocksize))
+            data = space.text_w(w_data)
+            if not data:
+                self.eof = True
+                self.finish()
+            else:
+                self.parse_block(data)
+        if self.nrecords == 0:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        self.nrecords = 0
+        columns = self.columns
+        if columns is None:
+            w_result = space.newlist(self.rows_w)
+            self.rows_w = []
+        else:
+            w_result = space.newlist([column.wrap(space)
+                                      for column in columns])
+        return w_result
+
+
+def _get_column_kind(space, w_type):
+    if space.is_w(w_type, space.w_None) or space.is_w(w_type, space.w_bytes):
+        return COLUMN_BYTES
+    if space.is_w(w_type, space.w_int):
+        return COLUMN_INT
+    if space.is_w(w_type, space.w_float):
+        return COLUMN_FLOAT
+    raise oefmt(space.w_TypeError,
+                "column types must be int, float, str or None, not %R",
+                w_type)
+
+
+@unwrap_spec(blocksize=int, columns=bool)
+def csv_block_reader(space, w_file, w_dialect=None, blocksize=65536,
+                     columns=False, w_types=None,
+                     w_delimiter        = None,
+                     w_doublequote      = None,
+                     w_escapechar       = None,
+                     w_lineterminator   = None,
+                     w_quotechar        = None,
+                     w_quoting          = None,
+                     w_skipinitialspace = None,
+                     w_strict           = None,
+                     ):
+    """
+    block_reader = block_reader(fileobj [, dialect='excel']
+                                [, blocksize=65536] [, columns=False]
+                                [, types=None] [optional keyword args])
+    for batch in block_reader:
+        process(batch)
+
+    Like reader(), but reads the data by calling fileobj.read(blocksize)
+    and returns all the records that end in a block at once.  Records
+    end at any of '\\n', '\\r' or '\\r\\n'.
+
+    If columns is False, each batch is a list of rows, as returned by
+    reader().  Otherwise it is a list of columns, each one a list with
+    one field of every record; empty lines are skipped and all the
+    records must have the same number of fields.  The optional "types"
+    argument gives the type of each column, one of str, int or float
+    (None means str); the fields are then converted while parsing."""
+    if blocksize <= 0:
+        raise oefmt(space.w_ValueError, "blocksize must be positive")
+    dialect = _build_dialect(space, w_dialect, w_delimiter, w_doublequote,
+                             w_escapechar, w_lineterminator, w_quotechar,
+                             w_quoting, w_skipinitialspace, w_strict)
+    column_list = None
+    if w_types is not None and not space.is_w(w_types, space.w_None):
+        columns = True
+        column_list = [Column(_get_column_kind(space, w_type))
+                       for w_type in space.listview(w_types)]
+    elif columns:
+        column_list = []
+    return W_BlockReader(space, dialect, w_file, blocksize, column_list)
+
+W_BlockReader.typedef = TypeDef(
+        '_csv.block_reader',
+        dialect = interp_attrproperty_w('dialect', W_BlockReader),
+        line_num = interp_attrproperty('line_num', W_BlockReader,
+            wrapfn="newint"),
+        __iter__ = interp2app(W_BlockReader.iter_w),
+        next = interp2app(W_BlockReader.next_w),
+        __doc__ = """CSV block reader
+
+Block reader objects parse CSV data read in big blocks from a file, and
+return the records of each block as a list of rows or of columns.""")
+W_BlockReader.typedef.acceptable_as_base_class = False
+
+# ____________________________________________________________
+
 class FieldLimit:
     limit = 128 * 1024   # max parsed field size
 field_limit = FieldLimit()
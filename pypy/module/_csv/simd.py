@@ -0,0 +1,52 @@
+from rpython.rtyper.lltypesystem import rffi
+from rpython.rlib import objectmodel
+from pypy.module._pypyjson.simd import (USE_SIMD, WORD_SIZE,
+    char_repeated_word_width, any_char_in_words_zero, index_nonzero)
+
+# find_special_char(ll_chars, startpos, length, delimiter, quotechar,
+# escapechar) returns the position of the first char in
+# ll_chars[startpos:length] that the csv parser must look at: the delimiter,
+# the quotechar, the escapechar, a newline or a NULL byte.  If there is none,
+# it returns length.  The simd version looks at a whole word at a time, using
+# the same SWAR helpers as the json decoder.
+
+
+@objectmodel.always_inline
+def find_special_char_slow(ll_chars, i, length, delimiter, quotechar,
+                           escapechar):
+    while i < length:
+        ch = ll_chars[i]
+        if (ch == delimiter or ch == quotechar or ch == escapechar or
+                ch == '\n' or ch == '\r' or ch == '\x00'):
+            break
+        i += 1
+    return i
+
+@objectmodel.always_inline
+def find_special_char_simd_unaligned(ll_chars, startpos, length, delimiter,
+                                     quotechar, escapechar):
+    maskdelimiter = char_repeated_word_width(delimiter)
+    maskquote = char_repeated_word_width(quotechar)
+    maskescape = char_repeated_word_width(escapechar)
+    masknl = char_repeated_word_width('\n')
+    maskcr = char_repeated_word_width('\r')
+
+    wordarray = rffi.cast(rffi.ULONGP, rffi.ptradd(ll_chars, startpos))
+    num_safe_reads = (length - startpos) // WORD_SIZE
+    for i in range(num_safe_reads):
+        word = wordarray[i]
+        # a byte of one of these words is 0 iff the corresponding char is
+        # special
+        cond = any_char_in_words_zero(maskdelimiter ^ word, maskquote ^ word,
+                                      maskescape ^ word, masknl ^ word,
+                                      maskcr ^ word, word)
+        if cond:
+            return startpos + i * WORD_SIZE + index_nonzero(cond)
+    return find_special_char_slow(ll_chars, startpos + num_safe_reads *
+                                  WORD_SIZE, length, delimiter, quotechar,
+                                  escapechar)
+
+if USE_SIMD:
+    find_special_char = find_special_char_simd_unaligned
+else:
+    find_special_char = find_special_char_slow
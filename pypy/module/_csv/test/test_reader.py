@@ -104,3 +104,144 @@ class AppTestReader(object):
         self._read_test(['a,"'], 'Error', strict=True)
         self._read_test(['"a'], 'Error', strict=True)
         self._read_test(['^'], 'Error', escapechar='^', strict=True)
+
+
+class AppTestBlockReader(object):
+    spaceconfig = dict(usemodules=['_csv', '__pypy__'])
+
+    def setup_class(cls):
+        w__read_test = cls.space.appexec([], r"""():
+            import _csv
+            from StringIO import StringIO
+            def _read_test(input, expect, **kwargs):
+                # try with blocks of various sizes, splitting the records
+                # and fields in all possible places
+                for blocksize in [1, 2, 3, 7, 16, 4096]:
+                    reader = _csv.block_reader(StringIO(input),
+                                               blocksize=blocksize, **kwargs)
+                    if expect == 'Error':
+                        raises(_csv.Error, list, reader)
+                        continue
+                    result = []
+                    for batch in reader:
+                        assert batch
+                        result.extend(batch)
+                    assert result == expect, (
+                        'blocksize: %d\nresult: %r\nexpect: %r' % (
+                            blocksize, result, expect))
+            return _read_test
+        """)
+        if type(w__read_test) is type(lambda:0):
+            w__read_test = staticmethod(w__read_test)
+        cls.w__read_test = w__read_test
+
+    def test_simple(self):
+        self._read_test('foo:bar\n', [['foo', 'bar']], delimiter=':')
+        self._read_test('', [])
+        self._read_test('a,b', [['a', 'b']])
+        self._read_test('a,b\nc,d\n', [['a', 'b'], ['c', 'd']])
+        self._read_test('a,b\r\nc,d\r\n', [['a', 'b'], ['c', 'd']])
+        self._read_test('a,b\rc,d\r', [['a', 'b'], ['c', 'd']])
+        self._read_test('a,b\n\nc,\n\r\n', [['a', 'b'], [], ['c', ''], []])
+        self._read_test('abcdefghijklmnopqrstuvwxyz,0123456789\n' * 3,
+                        [['abcdefghijklmnopqrstuvwxyz', '0123456789']] * 3)
+
+    def test_errors(self):
+        self._read_test('"ab"c', 'Error', strict=1)
+        self._read_test('ab\0c', 'Error')
+        self._read_test('"ab"c', [['abc']], doublequote=0)
+        self._read_test('a,"', 'Error', strict=True)
+        self._read_test('^', 'Error', escapechar='^', strict=True)
+
+    def test_quoting_and_escapes(self):
+        import _csv as csv
+        self._read_test('1,",3,",5\n', [['1', ',3,', '5']])
+        self._read_test('"a\nb", 7\n"x""y"\n', [['a\nb', ' 7'], ['x"y']])
+        self._read_test('1,",3,",5', [['1', '"', '3', '"', '5']],
+                        quoting=csv.QUOTE_NONE, escapechar='\\')
+        self._read_test('a,b\\,c\n"d\\"e"', [['a', 'b,c'], ['d"e']],
+                        escapechar='\\')
+        self._read_test('a, b,  c', [['a', 'b', 'c']],
+                        skipinitialspace=True)
+        self._read_test(',3,"5",7.3, 9\n', [['', 3, '5', 7.3, 9]],
+                        quoting=csv.QUOTE_NONNUMERIC)
+        self._read_test('a,"', [['a', '']])
+        self._read_test('^', [['\n']], escapechar='^')
+
+    def test_field_limit(self):
+        import _csv
+        limit = _csv.field_size_limit()
+        try:
+            _csv.field_size_limit(10)
+            self._read_test('x' * 10 + ',"' + 'y' * 10 + '"',
+                            [['x' * 10, 'y' * 10]])
+            self._read_test('x' * 11, 'Error')
+            self._read_test('"' + 'x' * 11 + '"', 'Error')
+        finally:
+            _csv.field_size_limit(limit)
+
+    def test_batches(self):
+        import _csv
+        from StringIO import StringIO
+        reader = _csv.block_reader(StringIO('a,b\nc,d\ne,"f\ng"\n'),
+                                   blocksize=5)
+        assert reader.next() == [['a', 'b']]
+        assert reader.next() == [['c', 'd']]
+        assert reader.next() == [['e', 'f\ng']]
+        assert reader.line_num == 4
+        raises(StopIteration, reader.next)
+        raises(StopIteration, reader.next)
+        raises(ValueError, _csv.block_reader, StringIO(''), blocksize=0)
+
+    def test_line_num_cr(self):
+        import _csv
+        from StringIO import StringIO
+        data = 'a\rb\r\nc\n"d\re"\r\r\nf\r'
+        expected = [['a'], ['b'], ['c'], ['d\re'], [], ['f']]
+        # a lone '\r' ends a line, '\r\n' is a single line end, also if
+        # it is split between two blocks
+        for blocksize in [1, 2, 3, 5, 100]:
+            reader = _csv.block_reader(StringIO(data), blocksize=blocksize)
+            rows = []
+            for batch in reader:
+                rows.extend(batch)
+            assert rows == expected
+            assert reader.line_num == 7
+
+    def test_columns(self):
+        import _csv, sys
+        from StringIO import StringIO
+        data = 'a,1,2.5\n\nb,-2,3\nc,%d,1e3\n' % (sys.maxint + 1)
+        reader = _csv.block_reader(StringIO(data), columns=True)
+        assert list(reader) == [[['a', 'b', 'c'],
+                                 ['1', '-2', str(sys.maxint + 1)],
+                                 ['2.5', '3', '1e3']]]
+        reader = _csv.block_reader(StringIO(data), types=[None, int, float])
+        [[strs, ints, floats]] = list(reader)
+        assert strs == ['a', 'b', 'c']
+        assert ints == [1, -2, sys.maxint + 1]
+        assert type(ints[0]) is int
+        assert floats == [2.5, 3.0, 1000.0]
+        #
+        reader = _csv.block_reader(StringIO(data), blocksize=9,
+                                   types=[str, int, float])
+        assert reader.next() == [['a'], [1], [2.5]]
+        assert reader.next() == [['b'], [-2], [3.0]]
+        #
+        reader = _csv.block_reader(StringIO('a,b\n'), types=[int, int])
+        raises(ValueError, list, reader)
+        reader = _csv.block_reader(StringIO('1,2\n3\n'), columns=True)
+        raises(_csv.Error, list, reader)
+        reader = _csv.block_reader(StringIO('1,2\n'), types=[int])
+        raises(_csv.Error, list, reader)
+        raises(TypeError, _csv.block_reader, StringIO(''), types=[list])
+
+    def test_columns_strategies(self):
+        import _csv, __pypy__
+        from StringIO import StringIO
+        data = 'a,1,2.5\nb,2,3\n'
+        reader = _csv.block_reader(StringIO(data), types=[None, int, float])
+        [[strs, ints, floats]] = list(reader)
+        assert __pypy__.strategy(strs) == 'BytesListStrategy'
+        assert __pypy__.strategy(ints) == 'IntegerListStrategy'
+        assert __pypy__.strategy(floats) == 'FloatListStrategy'
@@ -0,0 +1,53 @@
+from rpython.rtyper.lltypesystem import rffi
+
+from pypy.module._csv.simd import find_special_char_slow
+from pypy.module._csv.simd import find_special_char_simd_unaligned
+from pypy.module._pypyjson.simd import USE_SIMD
+
+import pytest
+
+try:
+    from hypothesis import given, strategies
+except ImportError:
+    pytest.skip("missing hypothesis!")
+
+if not USE_SIMD:
+    pytest.skip("only implemented for 64 bit for now")
+
+
+def ll(callable, string, *args):
+    ll_chars, llobj, flag = rffi.get_nonmovingbuffer_ll_final_null(string)
+    try:
+        return callable(ll_chars, *args)
+    finally:
+        rffi.free_nonmovingbuffer_ll(ll_chars, llobj, flag)
+
+def find_special_char_reference(s, startpos, delimiter, quotechar,
+                                escapechar):
+    for i in range(startpos, len(s)):
+        if s[i] in (delimiter, quotechar, escapechar, '\n', '\r', '\x00'):
+            return i
+    return len(s)
+
+
+def test_find_special_char():
+    s = 'abcdefghijklmnop,qrstuvw'
+    for func in [find_special_char_slow, find_special_char_simd_unaligned]:
+        assert ll(func, s, 0, len(s), ',', '"', '\x00') == 16
+        assert ll(func, s, 17, len(s), ',', '"', '\x00') == len(s)
+        assert ll(func, s, 0, 10, ',', '"', '\x00') == 10
+        assert ll(func, s, 3, len(s), ',', '"', 'k') == 10
+        assert ll(func, 'abc\r\ndefghijkl', 0, 14, ',', '"', '\\') == 3
+        assert ll(func, 'abcdefghijkl\x00\n', 0, 14, ',', '"', '\\') == 12
+
+@given(strategies.binary(), strategies.integers(min_value=0, max_value=20),
+       strategies.sampled_from(',;\t'), strategies.sampled_from('"\'\x00'),
+       strategies.sampled_from('\\\x00'))
+def test_find_special_char_hypothesis(s, startpos, delimiter, quotechar,
+                                      escapechar):
+    startpos = min(startpos, len(s))
+    expected = find_special_char_reference(s, startpos, delimiter,
+                                           quotechar, escapechar)
+    for func in [find_special_char_slow, find_special_char_simd_unaligned]:
+        assert ll(func, s, startpos, len(s), delimiter, quotechar,
+                  escapechar) == expected
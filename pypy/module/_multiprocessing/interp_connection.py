@@ -2,6 +2,7 @@ import sys
 from errno import EINTR
 
 from rpython.rlib import rpoll, rsocket
+from rpython.rlib.objectmodel import keepalive_until_here
 from rpython.rlib.rarithmetic import intmask
 from rpython.rtyper.lltypesystem import lltype, rffi
 
@@ -28,6 +29,23 @@ class State(object):
         self.w_picklemodule = space.call_method(
             w_builtins, '__import__', space.newtext("pickle"))
 
+if sys.platform != 'win32':
+    from rpython.rlib import rposix
+    from rpython.rtyper.tool import rffi_platform as platform
+    from rpython.translator.tool.cbuild import ExternalCompilationInfo
+
+    class CConfig:
+        _compilation_info_ = ExternalCompilationInfo(includes=['sys/uio.h'])
+        IOVEC = platform.Struct('struct iovec', [('iov_base', rffi.VOIDP),
+                                                 ('iov_len', rffi.SIZE_T)])
+
+    IOVEC = platform.configure(CConfig)['IOVEC']
+    _writev = rffi.llexternal('writev',
+                              [rffi.INT, rffi.CArrayPtr(IOVEC), rffi.INT],
+                              rffi.SSIZE_T,
+                              compilation_info=CConfig._compilation_info_,
+                              save_err=rffi.RFFI_SAVE_ERRNO)
+
 def BufferTooShort(space, w_data):
     w_BufferTooShort = space.fromcache(State).w_BufferTooShort
     return OperationError(w_BufferTooShort, w_data)
@@ -68,6 +86,23 @@ class W_BaseConnection(W_Root):
     def do_poll(self, space, timeout):
         raise NotImplementedError
 
+    def do_send_buffer(self, space, buf, offset, size):
+        self.do_send_string(space, buf.as_str(), offset, size)
+
+    def do_recv_into(self, space, rwbuffer, offset):
+        length = rwbuffer.getlength()
+        res, newbuf = self.do_recv_string(
+            space, length - offset, PY_SSIZE_T_MAX)
+        try:
+            if newbuf:
+                raise BufferTooShort(space, space.newbytes(
+                    rffi.charpsize2str(newbuf, res)))
+            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
+        finally:
+            if newbuf:
+                rffi.free_charp(newbuf)
+        return res
+
     def close(self):
         self.do_close()
 
@@ -95,8 +130,8 @@ class W_BaseConnection(W_Root):
 
     @unwrap_spec(offset='index', size='index')
     def send_bytes(self, space, w_buf, offset=0, size=PY_SSIZE_T_MIN):
-        buf = space.getarg_w('s*', w_buf).as_str()
-        length = len(buf)
+        buf = space.getarg_w('s*', w_buf)
+        length = buf.getlength()
         self._check_writable(space)
         if offset < 0:
             raise oefmt(space.w_ValueError, "offset is negative")
@@ -110,7 +145,7 @@ class W_BaseConnection(W_Root):
         elif offset + size > length:
             raise oefmt(space.w_ValueError, "buffer length > offset + size")
 
-        self.do_send_string(space, buf, offset, size)
+        self.do_send_buffer(space, buf, offset, size)
 
     @unwrap_spec(maxlength='index')
     def recv_bytes(self, space, maxlength=PY_SSIZE_T_MAX):
@@ -132,20 +167,12 @@ class W_BaseConnection(W_Root):
     @unwrap_spec(offset='index')
     def recv_bytes_into(self, space, w_buffer, offset=0):
         rwbuffer = space.writebuf_w(w_buffer)
-        length = rwbuffer.getlength()
-
-        res, newbuf = self.do_recv_string(
-            space, length - offset, PY_SSIZE_T_MAX)
-        try:
-            if newbuf:
-                raise BufferTooShort(space, space.newbytes(
-                    rffi.charpsize2str(newbuf, res)))
-            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
-        finally:
-            if newbuf:
-                rffi.free_charp(newbuf)
-
-        return space.newint(res)
+        self._check_readable(space)
+        if offset < 0:
+            raise oefmt(space.w_ValueError, "negative offset")
+        if offset > rwbuffer.getlength():
+            raise oefmt(space.w_ValueError, "offset too large")
+        return space.newint(self.do_recv_into(space, rwbuffer, offset))
 
     def send(self, space, w_obj):
         self._check_writable(space)
@@ -212,29 +239,34 @@ class W_FileConnection(W_BaseConnection):
     fd = INVALID_HANDLE_VALUE
 
     if sys.platform == 'win32':
-        def WRITE(self, data):
+        def WRITE(self, ptr, size):
             from rpython.rlib._rsocket_rffi import send, geterrno
-            length = send(self.fd, data, len(data), 0)
+            length = send(self.fd, ptr, size, 0)
             if length < 0:
                 raise WindowsError(geterrno(), "send")
             return length
-        def READ(self, size):
+        def READ(self, ptr, size):
             from rpython.rlib._rsocket_rffi import socketrecv, geterrno
-            with rffi.scoped_alloc_buffer(size) as buf:
-                length = socketrecv(self.fd, buf.raw, buf.size, 0)
-                if length < 0:
-                    raise WindowsError(geterrno(), "recv")
-                return buf.str(length)
+            length = socketrecv(self.fd, rffi.cast(rffi.VOIDP, ptr), size, 0)
+            if length < 0:
+                raise WindowsError(geterrno(), "recv")
+            return length
         def CLOSE(self):
             from rpython.rlib._rsocket_rffi import socketclose
             socketclose(self.fd)
     else:
-        def WRITE(self, data):
-            import os
-            return os.write(self.fd, data)
-        def READ(self, length):
-            import os
-            return os.read(self.fd, length)
+        def WRITE(self, ptr, size):
+            length = rffi.cast(lltype.Signed, rposix.c_write(
+                self.fd, rffi.cast(rffi.VOIDP, ptr), size))
+            if length < 0:
+                raise OSError(rposix.get_saved_errno(), "write")
+            return length
+        def READ(self, ptr, size):
+            length = rffi.cast(lltype.Signed, rposix.c_read(
+                self.fd, rffi.cast(rffi.VOIDP, ptr), size))
+            if length < 0:
+                raise OSError(rposix.get_saved_errno(), "read")
+            return length
         def CLOSE(self):
             import os
             try:
@@ -270,23 +302,88 @@ class W_FileConnection(W_BaseConnection):
             self.CLOSE()
             self.fd = self.INVALID_HANDLE_VALUE
 
-    def do_send_string(self, space, buf, offset, size):
-        # Since str2charp copies the buf anyway, always combine the
-        # "header" and the "body" of the message and send them at once.
-        message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
+    if sys.platform == 'win32':
+        def do_send_string(self, space, buf, offset, size):
+            # Since str2charp copies the buf anyway, always combine the
+            # "header" and the "body" of the message and send them at once.
+            message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
+            try:
+                length = rffi.r_uint(rsocket.htonl(
+                        rffi.cast(lltype.Unsigned, size)))
+                rffi.cast(rffi.UINTP, message)[0] = length
+                i = size - 1
+                while i >= 0:
+                    message[4 + i] = buf[offset + i]
+                    i -= 1
+                self._sendall(space, message, size + 4)
+            finally:
+                lltype.free(message, flavor='raw')
+    else:
+        def do_send_string(self, space, buf, offset, size):
+            with rffi.scoped_nonmovingbuffer(buf) as ptr:
+                self._sendv(space, rffi.ptradd(ptr, offset), size)
+
+        def do_send_buffer(self, space, buf, offset, size):
+            # Send the header and the body with a single writev(), reading
+            # the body directly from the memory of 'buf' if possible.
+            try:
+                ptr = buf.get_raw_address()
+            except ValueError:
+                data = buf.as_str()
+                with rffi.scoped_nonmovingbuffer(data) as ptr:
+                    self._sendv(space, rffi.ptradd(ptr, offset), size)
+            else:
+                self._sendv(space, rffi.ptradd(ptr, offset), size)
+                keepalive_until_here(buf)
+
+        def _sendv(self, space, body, size):
+            with lltype.scoped_alloc(rffi.CArray(IOVEC), 2) as iov:
+                with lltype.scoped_alloc(rffi.UINTP.TO, 1) as header:
+                    header[0] = rffi.cast(rffi.UINT, rsocket.htonl(
+                            rffi.cast(lltype.Unsigned, size)))
+                    iov[0].c_iov_base = rffi.cast(rffi.VOIDP, header)
+                    iov[0].c_iov_len = rffi.cast(rffi.SIZE_T, 4)
+                    iov[1].c_iov_base = rffi.cast(rffi.VOIDP, body)
+                    iov[1].c_iov_len = rffi.cast(rffi.SIZE_T, size)
+                    while True:
+                        count = rffi.cast(lltype.Signed,
+                                          _writev(self.fd, iov, 2))
+                        if count >= 0:
+                            break
+                        err = rposix.get_saved_errno()
+                        if err != EINTR:
+                            raise wrap_oserror(space, OSError(err, "writev"))
+                        space.getexecutioncontext().checksignals()
+                    if count < 4:
+                        self._sendall(space, rffi.ptradd(
+                            rffi.cast(rffi.CCHARP, header), count), 4 - count)
+                        count = 0
+                    else:
+                        count -= 4
+            if count < size:
+                self._sendall(space, rffi.ptradd(body, count), size - count)
+
+    def do_recv_into(self, space, rwbuffer, offset):
+        # Receive the message directly into the memory of 'rwbuffer' if
+        # possible, instead of going through self.buffer.
         try:
-            length = rffi.r_uint(rsocket.htonl(
-                    rffi.cast(lltype.Unsigned, size)))
-            rffi.cast(rffi.UINTP, message)[0] = length
-            i = size - 1
-            while i >= 0:
-                message[4 + i] = buf[offset + i]
-                i -= 1
-            self._sendall(space, message, size + 4)
-        finally:
-            lltype.free(message, flavor='raw')
+            ptr = rwbuffer.get_raw_address()
+        except ValueError:
+            return W_BaseConnection.do_recv_into(self, space, rwbuffer, offset)
+        length = self._recv_length(space, PY_SSIZE_T_MAX)
+        if length > rwbuffer.getlength() - offset:
+            newbuf = lltype.malloc(rffi.CCHARP.TO, length, flavor='raw')
+            try:
+                self._recvall(space, newbuf, length)
+                raise BufferTooShort(space, space.newbytes(
+                    rffi.charpsize2str(newbuf, length)))
+            finally:
+                lltype.free(newbuf, flavor='raw')
+        self._recvall(space, rffi.ptradd(ptr, offset), length)
+        keepalive_until_here(rwbuffer)
+        return length
 
-    def do_recv_string(self, space, buflength, maxlength):
+    def _recv_length(self, space, maxlength):
         with lltype.scoped_alloc(rffi.CArrayPtr(rffi.UINT).TO, 1) as length_ptr:
             self._recvall(space, rffi.cast(rffi.CCHARP, length_ptr), 4)
             length = intmask(rsocket.ntohl(
@@ -296,7 +393,10 @@ class W_FileConnection(W_BaseConnection):
             if self.flags == 0:
                 self.close()
             raise oefmt(space.w_IOError, "bad message length")
+        return length
 
+    def do_recv_string(self, space, buflength, maxlength):
+        length = self._recv_length(space, maxlength)
         if length <= buflength:
             self._recvall(space, self.buffer, length)
             return length, lltype.nullptr(rffi.CCHARP.TO)
@@ -307,10 +407,8 @@ class W_FileConnection(W_BaseConnection):
 
     def _sendall(self, space, message, size):
         while size > 0:
-            # XXX inefficient
-            data = rffi.charpsize2str(message, size)
             try:
-                count = self.WRITE(data)
+                count = self.WRITE(message, size)
             except OSError as e:
                 if e.errno == EINTR:
                     space.getexecutioncontext().checksignals()
@@ -324,22 +422,18 @@ class W_FileConnection(W_BaseConnection):
         remaining = length
         while remaining > 0:
             try:
-                data = self.READ(remaining)
+                count = self.READ(buf, remaining)
             except OSError as e:
                 if e.errno == EINTR:
                     space.getexecutioncontext().checksignals()
                     continue
                 raise wrap_oserror(space, e)
-            count = len(data)
             if count == 0:
                 if remaining == length:
                     raise OperationError(space.w_EOFError, space.w_None)
                 else:
                     raise oefmt(space.w_IOError,
                                 "got end of file during message")
-            # XXX inefficient
-            for i in range(count):
-                buf[i] = data[i]
             remaining -= count
             buf = rffi.ptradd(buf, count)
 
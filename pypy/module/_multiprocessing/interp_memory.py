@@ -1,7 +1,17 @@
+import errno
+import os
+import sys
+
+from rpython.rlib import rmmap
+from rpython.rlib.rmmap import RMMapError
 from rpython.rtyper.lltypesystem import rffi
 
-from pypy.interpreter.error import oefmt
-from pypy.module.mmap.interp_mmap import W_MMap
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.buffer import SimpleView
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import GetSetProperty, TypeDef
+from pypy.module.mmap.interp_mmap import W_MMap, MMapBuffer, mmap_error
 
 def address_of_buffer(space, w_obj):
     if space.config.objspace.usemodules.mmap:
@@ -11,3 +21,188 @@ def address_of_buffer(space, w_obj):
                                space.newint(mmap.mmap.size)])
     else:
         raise oefmt(space.w_TypeError, "cannot get address of buffer")
+
+
+if sys.platform != 'win32':
+    from rpython.rlib import rposix
+    from rpython.translator.tool.cbuild import ExternalCompilationInfo
+
+    if sys.platform == 'darwin':
+        libraries = []
+    else:
+        libraries = ['rt']
+
+    eci = ExternalCompilationInfo(
+        includes = ['sys/mman.h',
+                    'fcntl.h',
+                    ],
+        libraries = libraries,
+        )
+
+    _shm_open = rffi.llexternal('shm_open',
+                                [rffi.CCHARP, rffi.INT, rffi.MODE_T], rffi.INT,
+                                compilation_info=eci,
+                                save_err=rffi.RFFI_SAVE_ERRNO)
+    _shm_unlink = rffi.llexternal('shm_unlink', [rffi.CCHARP], rffi.INT,
+                                  compilation_info=eci,
+                                  save_err=rffi.RFFI_SAVE_ERRNO)
+
+    def shm_open(name, flags, mode):
+        with rffi.scoped_str2charp(name) as ll_name:
+            fd = _shm_open(ll_name, flags, mode)
+        if fd < 0:
+            raise OSError(rposix.get_saved_errno(), "shm_open failed")
+        return fd
+
+    def shm_unlink(name):
+        with rffi.scoped_str2charp(name) as ll_name:
+            res = _shm_unlink(ll_name)
+        if res < 0:
+            raise OSError(rposix.get_saved_errno(), "shm_unlink failed")
+
+
+class W_SharedMemory(W_Root):
+    """A named POSIX shared memory segment, mapped in the current process.
+
+    It supports the buffer interface, so that memoryview(), struct's
+    pack_into() or numpy.frombuffer() work directly on the shared pages.
+    Other processes attach to the same segment by passing its name, which
+    is also what gets pickled.
+    """
+
+    def __init__(self, space, name, mmap):
+        self.name = name
+        self.mmap = mmap
+        self.register_finalizer(space)
+
+    def _finalize_(self):
+        self.mmap.close()
+
+    def check_valid(self, space):
+        try:
+            self.mmap.check_valid()
+        except RMMapError as e:
+            raise mmap_error(space, e)
+
+    def buffer_w(self, space, flags):
+        self.check_valid(space)
+        return SimpleView(MMapBuffer(space, self.mmap, False))
+
+    def readbuf_w(self, space):
+        self.check_valid(space)
+        return MMapBuffer(space, self.mmap, True)
+
+    def writebuf_w(self, space):
+        self.check_valid(space)
+        return MMapBuffer(space, self.mmap, False)
+
+    def name_get(self, space):
+        return space.newtext(self.name)
+
+    def size_get(self, space):
+        return space.newint(self.mmap.size)
+
+    def closed_get(self, space):
+        return space.newbool(self.mmap.closed)
+
+    def close(self, space):
+        """Unmap the segment from this process.  Any memoryview or array
+        still using it must not be accessed any more."""
+        self.mmap.close()
+
+    def unlink(self, space):
+        """Remove the name of the segment.  The memory is released once
+        every process has closed it."""
+        try:
+            shm_unlink(self.name)
+        except OSError as e:
+            raise wrap_oserror(space, e)
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self),
+                               space.newtuple([space.newtext(self.name)])])
+
+    def enter(self, space):
+        return self
+
+    def exit(self, space, __args__):
+        self.close(space)
+
+def _unlink_quietly(name):
+    try:
+        shm_unlink(name)
+    except OSError:
+        pass
+
+@unwrap_spec(create=bool, size='index')
+def descr_new_shm(space, w_subtype, w_name=None, create=False, size=0):
+    from pypy.module._multiprocessing.interp_semaphore import CounterState
+    if size < 0:
+        raise oefmt(space.w_ValueError, "size must be a positive number")
+    if create and size == 0:
+        raise oefmt(space.w_ValueError,
+                    "size must be a positive number when creating a segment")
+    if space.is_none(w_name):
+        if not create:
+            raise oefmt(space.w_ValueError,
+                        "a name is needed to attach to an existing segment")
+        name = None
+    else:
+        name = space.text_w(w_name)
+        if not name.startswith('/'):
+            name = '/' + name
+
+    flags = os.O_RDWR
+    if create:
+        flags |= os.O_CREAT | os.O_EXCL
+    try:
+        while True:
+            if name is not None:
+                fd = shm_open(name, flags, 0600)
+                break
+            counter = space.fromcache(CounterState).getCount()
+            tryname = "/mpshm%d-%d" % (os.getpid(), counter)
+            try:
+                fd = shm_open(tryname, flags, 0600)
+            except OSError as e:
+                if e.errno == errno.EEXIST:
+                    continue
+                raise
+            name = tryname
+            break
+    except OSError as e:
+        raise wrap_oserror(space, e)
+
+    try:
+        try:
+            if create:
+                os.ftruncate(fd, size)
+            mmap = rmmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        if create:
+            _unlink_quietly(name)
+        raise wrap_oserror(space, e)
+    except RMMapError as e:
+        if create:
+            _unlink_quietly(name)
+        raise mmap_error(space, e)
+
+    self = space.allocate_instance(W_SharedMemory, w_subtype)
+    W_SharedMemory.__init__(self, space, name, mmap)
+    return self
+
+W_SharedMemory.typedef = TypeDef(
+    "_multiprocessing.SharedMemory",
+    __doc__ = W_SharedMemory.__doc__,
+    __new__ = interp2app(descr_new_shm),
+    name = GetSetProperty(W_SharedMemory.name_get),
+    size = GetSetProperty(W_SharedMemory.size_get),
+    closed = GetSetProperty(W_SharedMemory.closed_get),
+    close = interp2app(W_SharedMemory.close),
+    unlink = interp2app(W_SharedMemory.unlink),
+    __reduce__ = interp2app(W_SharedMemory.descr_reduce),
+    __enter__ = interp2app(W_SharedMemory.enter),
+    __exit__ = interp2app(W_SharedMemory.exit),
+    )
@@ -91,6 +91,29 @@ class BaseConnectionTest(object):
         raises(multiprocessing.BufferTooShort, rhandle.recv_bytes_into, buffer)
         assert rhandle.readable
 
+    def test_send_recv_buffers(self):
+        import array
+        import sys
+        # if not translated, for win32
+        if not hasattr(sys, 'executable'):
+            sys.executable = 'from test_connection.py'
+        rhandle, whandle = self.make_pair()
+
+        data = array.array('i', range(1000))
+        whandle.send_bytes(data)
+        whandle.send_bytes(memoryview(data.tostring())[8:16])
+        whandle.send_bytes(bytearray("abcdef"), 1, 3)
+
+        received = array.array('i', [0] * 1000)
+        assert rhandle.recv_bytes_into(received) == 4000
+        assert received == data
+        buf = bytearray(10)
+        assert rhandle.recv_bytes_into(buf, 2) == 8
+        assert buf[2:] == data.tostring()[8:16]
+        assert rhandle.recv_bytes() == "bcd"
+        raises(ValueError, rhandle.recv_bytes_into, buf, -1)
+        raises(ValueError, rhandle.recv_bytes_into, buf, 11)
+
 class AppTestWinpipeConnection(BaseConnectionTest):
     spaceconfig = {
         "usemodules": [
@@ -1,3 +1,4 @@
+import py
 import sys
 
 class AppTestMemory:
@@ -45,3 +46,73 @@ class AppTestMemory:
         assert buf[0:sizeof_double] != '\0' * sizeof_double
         buf[0:sizeof_double] = '\0' * sizeof_double
         assert var.value == 0
+
+
+class AppTestSharedMemory:
+    spaceconfig = dict(usemodules=('_multiprocessing', 'mmap', 'struct',
+                                   'array', 'signal', 'select', 'fcntl',
+                                   'itertools', 'binascii'))
+
+    def setup_class(cls):
+        if sys.platform == 'win32':
+            py.test.skip("POSIX only")
+
+    def test_create_and_attach(self):
+        import _multiprocessing
+        shm = _multiprocessing.SharedMemory(create=True, size=4096)
+        try:
+            assert shm.size == 4096
+            assert shm.name.startswith('/')
+            view = memoryview(shm)
+            view[0:5] = 'hello'
+            other = _multiprocessing.SharedMemory(shm.name)
+            assert other.size == 4096
+            assert memoryview(other)[0:5].tobytes() == 'hello'
+            memoryview(other)[4096 - 1] = 'x'
+            assert view[4096 - 1] == 'x'
+            other.close()
+            assert other.closed
+            raises(ValueError, memoryview, other)
+        finally:
+            shm.close()
+            shm.unlink()
+        raises(OSError, _multiprocessing.SharedMemory, shm.name)
+
+    def test_errors(self):
+        import _multiprocessing
+        raises(ValueError, _multiprocessing.SharedMemory)
+        raises(ValueError, _multiprocessing.SharedMemory, create=True)
+        raises(ValueError, _multiprocessing.SharedMemory, create=True,
+               size=-1)
+        with _multiprocessing.SharedMemory(create=True, size=10) as shm:
+            raises(OSError, _multiprocessing.SharedMemory, shm.name,
+                   create=True, size=10)
+            shm.unlink()
+        assert shm.closed
+
+    def test_pickle(self):
+        import _multiprocessing, pickle
+        with _multiprocessing.SharedMemory(create=True, size=10) as shm:
+            try:
+                shm2 = pickle.loads(pickle.dumps(shm))
+                assert shm2.name == shm.name
+                memoryview(shm2)[0] = 'z'
+                assert memoryview(shm)[0] == 'z'
+                shm2.close()
+            finally:
+                shm.unlink()
+
+    def test_array_and_struct(self):
+        import _multiprocessing, array, struct
+        data = array.array('d', [0.5 * i for i in range(10)])
+        with _multiprocessing.SharedMemory(create=True, size=80) as shm:
+            try:
+                memoryview(shm)[:] = memoryview(data.tostring())
+                assert struct.unpack_from('d', shm, 24) == (1.5,)
+                struct.pack_into('d', shm, 0, 2.5)
+                copy = array.array('d')
+                copy.fromstring(memoryview(shm).tobytes())
+                assert copy[0] == 2.5
+                assert copy[1:] == data[1:]
+            finally:
+                shm.unlink()
@@ -0,0 +1,17 @@
+def iterload(fp, array=False, chunksize=65536):
+    """ Iterate over the JSON values stored in the file object fp, reading
+    it in chunks of chunksize bytes.  By default fp contains whitespace
+    separated values (e.g. newline-delimited JSON); if array is true, fp
+    contains one big array and its elements are returned one by one. """
+    from _pypyjson import IncrementalDecoder
+    decoder = IncrementalDecoder(array)
+    while True:
+        chunk = fp.read(chunksize)
+        if not chunk:
+            break
+        decoder.feed(chunk)
+        for value in decoder:
+            yield value
+    decoder.close()
+    for value in decoder:
+        yield value
@@ -0,0 +1,67 @@
+# -*- encoding: utf-8 -*-
+# Benchmark of json decoding on documents whose strings are ascii, latin-1
+# or CJK text, with and without escape sequences.
+#
+#     pypy decode.py [runs]
+
+import json
+import random
+import sys
+import time
+
+WORDS = {
+    'ascii': [u'alpha', u'beta', u'gamma', u'delta', u'epsilon', u'zeta',
+              u'theta', u'kappa', u'lambda', u'omicron'],
+    'latin': [u'\xe9t\xe9', u'for\xeat', u'\xe4rger', u'gr\xfc\xdfe',
+              u'na\xefve', u'ni\xf1o', u'fa\xe7ade', u'm\xf8de',
+              u'\xe5ker', u'c\xf4te'],
+    'cjk':   [u'中文', u'日本語', u'한국어',
+              u'漢字', u'文字列', u'資料',
+              u'データ', u'編碼', u'解析',
+              u'結果'],
+}
+
+def make_text(rnd, words, n, escapes):
+    text = u' '.join([rnd.choice(words) for i in range(n)])
+    if escapes:
+        text += u'\n"quoted"\t'
+    return text
+
+def make_document(kind, escapes, size=2000, seed=42):
+    rnd = random.Random(seed)
+    words = WORDS[kind]
+    doc = []
+    for i in range(size):
+        doc.append({
+            'id': i,
+            'name': make_text(rnd, words, 2, False),
+            'title': make_text(rnd, words, 8, escapes),
+            'body': make_text(rnd, words, 60, escapes),
+            'tags': [make_text(rnd, words, 1, False) for j in range(4)],
+        })
+    return json.dumps(doc, ensure_ascii=False).encode('utf-8')
+
+def run(s, runs):
+    a = time.time()
+    for i in xrange(runs):
+        json.loads(s)
+    b = time.time()
+    return b - a
+
+def main(runs):
+    print '%8s %8s %10s %12s %10s' % ('corpus', 'escapes', 'bytes',
+                                      'sec/run', 'MB/s')
+    for kind in ['ascii', 'latin', 'cjk']:
+        for escapes in [False, True]:
+            s = make_document(kind, escapes)
+            run(s, 2)    # warm up
+            t = run(s, runs)
+            print '%8s %8s %10d %12.6f %10.1f' % (kind, escapes, len(s),
+                                                 t / runs,
+                                                 len(s) * runs / t / 1e6)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(20)
@@ -77,15 +77,13 @@ class JSONDecoder(W_Root):
         self.space = space
         self.w_empty_string = space.newutf8("", 0)
 
-        self.s = s
-
-        # we put our string in a raw buffer so:
-        # 1) we automatically get the '\0' sentinel at the end of the string,
-        #    which means that we never have to check for the "end of string"
-        # 2) we can pass the buffer directly to strtod
-        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
+        self._set_buffer(s)
+        # number of bytes decoded before self.s, see reset()
+        self.bytes_decoded_before = 0
+        # added to the positions reported in error messages, when self.s is
+        # only a part of a larger stream
+        self.pos_offset = 0
         self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
-        self.pos = 0
         self.intcache = space.fromcache(IntCache)
 
         # two caches, one for keys, one for general strings. they both have the
@@ -113,14 +111,36 @@ class JSONDecoder(W_Root):
         self.scratch = [[None] * self.DEFAULT_SIZE_SCRATCH]
 
 
+    def _set_buffer(self, s):
+        self.s = s
+
+        # we put our string in a raw buffer so:
+        # 1) we automatically get the '\0' sentinel at the end of the string,
+        #    which means that we never have to check for the "end of string"
+        # 2) we can pass the buffer directly to strtod
+        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
+        self.pos = 0
+
+    def reset(self, s):
+        """ Start decoding the new string s, keeping all the key and string
+        caches of the strings decoded so far. Used by the incremental
+        decoder, which decodes many small documents one after the other. """
+        rffi.free_nonmovingbuffer_ll(self.ll_chars, self.llobj, self.flag)
+        self.bytes_decoded_before += len(self.s)
+        self._set_buffer(s)
+
     def close(self):
         rffi.free_nonmovingbuffer_ll(self.ll_chars, self.llobj, self.flag)
         lltype.free(self.end_ptr, flavor='raw')
+        self.cleanup_unclear_objects()
+
+    def cleanup_unclear_objects(self):
         # clean up objects that are instances of now blocked maps
         for w_obj in self.unclear_objects:
             jsonmap = self._get_jsonmap_from_dict(w_obj)
             if jsonmap.is_state_blocked():
                 self._devolve_jsonmap_dict(w_obj)
+        self.unclear_objects = []
 
     def getslice(self, start, end):
         assert start >= 0
@@ -171,7 +191,13 @@ class JSONDecoder(W_Root):
 
     @specialize.arg(1)
     def _raise(self, msg, *args):
-        raise oefmt(self.space.w_ValueError, msg, *args)
+        # the last argument is always a position in self.s
+        if len(args) == 1:
+            raise oefmt(self.space.w_ValueError, msg,
+                        args[0] + self.pos_offset)
+        assert len(args) == 2
+        raise oefmt(self.space.w_ValueError, msg,
+                    args[0], args[1] + self.pos_offset)
 
     def decode_null(self, i):
         if (self.ll_chars[i]   == 'u' and
@@ -429,28 +455,25 @@ class JSONDecoder(W_Root):
     def decode_string_uncached(self, i):
         start = i
         ll_chars = self.ll_chars
-        nonascii, i = simd.find_end_of_string_no_hash(ll_chars, i, len(self.s))
+        utf8len, i = simd.find_end_of_string_no_hash(ll_chars, i, len(self.s))
         ch = ll_chars[i]
         if ch == '\\':
             self.pos = i
-            return self.decode_string_escaped(start, nonascii)
+            return self.decode_string_escaped(start, utf8len)
         if ch < '\x20':
             self._raise_control_char_in_string(ch, start, i)
         else:
             assert ch == '"'
 
         self.pos = i + 1
-        return self._create_string_wrapped(start, i, nonascii)
+        return self._create_string_wrapped(start, i, utf8len)
 
-    def _create_string_wrapped(self, start, end, nonascii):
+    def _create_string_wrapped(self, start, end, utf8len):
         content = self.getslice(start, end)
-        if nonascii:
-            # contains non-ascii chars, we need to check that it's valid utf-8
-            lgt = unicodehelper.check_utf8_or_raise(self.space,
-                                                          content)
-        else:
-            lgt = end - start
-        return self.space.newutf8(content, lgt)
+        if utf8len < 0:
+            # not valid utf-8, this raises the error
+            utf8len = unicodehelper.check_utf8_or_raise(self.space, content)
+        return self.space.newutf8(content, utf8len)
 
     def _create_dict(self, d):
         from pypy.objspace.std.dictmultiobject import from_unicode_key_dict
@@ -460,27 +483,41 @@ class JSONDecoder(W_Root):
         from pypy.objspace.std.dictmultiobject import create_empty_unicode_key_dict
         return create_empty_unicode_key_dict(self.space)
 
-    def decode_string_escaped(self, start, nonascii):
+    def decode_string_escaped(self, start, utf8len):
+        """ Decode the rest of a string that contains escapes. self.pos is the
+        position of the first backslash and utf8len the number of code points
+        before it, or -1 if that part is not valid utf-8. """
         i = self.pos
+        ll_chars = self.ll_chars
         builder = StringBuilder((i - start) * 2) # just an estimate
         assert start >= 0
         assert i >= 0
         builder.append_slice(self.s, start, i)
         while True:
-            ch = self.ll_chars[i]
-            i += 1
+            ch = ll_chars[i]
             if ch == '"':
                 content_utf8 = builder.build()
-                length = unicodehelper.check_utf8_or_raise(self.space,
-                                                           content_utf8)
-                self.pos = i
-                return self.space.newutf8(content_utf8, length)
+                if utf8len < 0:
+                    utf8len = unicodehelper.check_utf8_or_raise(self.space,
+                                                                content_utf8)
+                self.pos = i + 1
+                return self.space.newutf8(content_utf8, utf8len)
             elif ch == '\\':
-                i = self.decode_escape_sequence_to_utf8(i, builder)
+                # every escape sequence decodes to a single code point
+                i = self.decode_escape_sequence_to_utf8(i + 1, builder)
+                if utf8len >= 0:
+                    utf8len += 1
             elif ch < '\x20':
-                self._raise_control_char_in_string(ch, start, i)
+                self._raise_control_char_in_string(ch, start, i + 1)
             else:
-                builder.append(ch)
+                chunklen, end = simd.find_end_of_string_no_hash(
+                        ll_chars, i, len(self.s))
+                builder.append_slice(self.s, i, end)
+                if chunklen < 0 or utf8len < 0:
+                    utf8len = -1
+                else:
+                    utf8len += chunklen
+                i = end
 
     def decode_escape_sequence_to_utf8(self, i, stringbuilder):
         ch = self.ll_chars[i]
@@ -566,17 +603,18 @@ class JSONDecoder(W_Root):
             contextmap.decoded_strings += 1
             if not contextmap.should_cache_strings():
                 cache = False
-        if len(self.s) < self.MIN_SIZE_FOR_STRING_CACHE:
+        if (self.bytes_decoded_before + len(self.s) <
+                self.MIN_SIZE_FOR_STRING_CACHE):
             cache = False
 
         if not cache:
             return self.decode_string_uncached(i)
 
-        strhash, nonascii, i = simd.find_end_of_string(ll_chars, i, len(self.s))
+        strhash, utf8len, i = simd.find_end_of_string(ll_chars, i, len(self.s))
         ch = ll_chars[i]
         if ch == '\\':
             self.pos = i
-            return self.decode_string_escaped(start, nonascii)
+            return self.decode_string_escaped(start, utf8len)
         if ch < '\x20':
             self._raise_control_char_in_string(ch, start, i)
         else:
@@ -591,7 +629,7 @@ class JSONDecoder(W_Root):
         try:
             entry = self.cache_values[strhash]
         except KeyError:
-            w_res = self._create_string_wrapped(start, i, nonascii)
+            w_res = self._create_string_wrapped(start, i, utf8len)
             # only add *some* strings to the cache, because keeping them all is
             # way too expensive. first we check if the contextmap has caching
             # disabled completely. if not, we check whether we have recently
@@ -608,7 +646,7 @@ class JSONDecoder(W_Root):
             return w_res
         if not entry.compare(ll_chars, start, length):
             # collision! hopefully rare
-            return self._create_string_wrapped(start, i, nonascii)
+            return self._create_string_wrapped(start, i, utf8len)
         if contextmap is not None:
             contextmap.cache_hits += 1
         return entry.w_uni
@@ -643,12 +681,12 @@ class JSONDecoder(W_Root):
         ll_chars = self.ll_chars
         start = i
 
-        strhash, nonascii, i = simd.find_end_of_string(ll_chars, i, len(self.s))
+        strhash, utf8len, i = simd.find_end_of_string(ll_chars, i, len(self.s))
 
         ch = ll_chars[i]
         if ch == '\\':
             self.pos = i
-            w_key = self.decode_string_escaped(start, nonascii)
+            w_key = self.decode_string_escaped(start, utf8len)
             return w_key
         if ch < '\x20':
             self._raise_control_char_in_string(ch, start, i)
@@ -659,14 +697,14 @@ class JSONDecoder(W_Root):
         try:
             entry = self.cache_keys[strhash]
         except KeyError:
-            w_res = self._create_string_wrapped(start, i, nonascii)
+            w_res = self._create_string_wrapped(start, i, utf8len)
             entry = StringCacheEntry(
                     self.getslice(start, start + length), w_res)
             self.cache_keys[strhash] = entry
             return w_res
         if not entry.compare(ll_chars, start, length):
             # collision! hopefully rare
-            w_res = self._create_string_wrapped(start, i, nonascii)
+            w_res = self._create_string_wrapped(start, i, utf8len)
         else:
             w_res = entry.w_uni
         return w_res
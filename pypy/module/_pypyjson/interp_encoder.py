@@ -1,6 +1,16 @@
+import math
+
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib import rutf8
+from rpython.rlib.rfloat import isfinite
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.dictmultiobject import W_DictObject
+from pypy.objspace.std.floatobject import float2string
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.jsondict import JsonDictStrategy
+from pypy.objspace.std.listobject import W_ListObject
 
 
 HEX = '0123456789abcdef'
@@ -45,6 +55,15 @@ def raw_encode_basestring_ascii(space, w_string):
         sb = StringBuilder(len(s))
         first = 0
 
+    _escape_ascii_into(sb, s, first)
+    res = sb.build()
+    return space.newtext(res)
+
+
+def _escape_ascii_into(sb, s, first):
+    """ Append the escaped, ascii-only JSON representation of the utf-8
+    string s to the builder sb, skipping the first 'first' characters (which
+    the caller already knows to need no escaping). """
     it = rutf8.Utf8StringIterator(s)
     for i in range(first):
         it.next()
@@ -77,5 +96,273 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
-    res = sb.build()
-    return space.newtext(res)
+
+
+def _encode_string_into(space, sb, w_string):
+    """ Append the quoted JSON representation of w_string (a str or a
+    unicode) to sb, with the same rules as raw_encode_basestring_ascii. """
+    sb.append('"')
+    if space.isinstance_w(w_string, space.w_bytes):
+        s = space.bytes_w(w_string)
+        for i in range(len(s)):
+            c = s[i]
+            if c >= ' ' and c <= '~' and c != '"' and c != '\\':
+                pass
+            else:
+                unicodehelper.check_utf8_or_raise(space, s)
+                sb.append_slice(s, 0, i)
+                _escape_ascii_into(sb, s, i)
+                break
+        else:
+            sb.append(s)
+    else:
+        _escape_ascii_into(sb, space.utf8_w(w_string), 0)
+    sb.append('"')
+
+
+class JSONEncoder(object):
+    """ Interp-level implementation of the compact, ascii-only variant of
+    json.JSONEncoder.encode(): no indentation, no key sorting, utf-8 input
+    strings.  Objects of unknown types are handed to w_default, which must
+    return something encodable. """
+
+    def __init__(self, space, w_default, check_circular, allow_nan,
+                 skipkeys, item_separator, key_separator):
+        self.space = space
+        self.w_default = w_default
+        self.check_circular = check_circular
+        self.allow_nan = allow_nan
+        self.skipkeys = skipkeys
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        # identity dict of the containers currently being encoded
+        self.markers = {}
+        self.builder = StringBuilder()
+
+    def encode(self, w_obj):
+        self.encode_any(w_obj)
+        return self.builder.build()
+
+    def _mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def _unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def encode_any(self, w_obj):
+        space = self.space
+        sb = self.builder
+        if (space.isinstance_w(w_obj, space.w_bytes) or
+                space.isinstance_w(w_obj, space.w_unicode)):
+            _encode_string_into(space, sb, w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            sb.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            sb.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            sb.append('false')
+        elif type(w_obj) is W_IntObject:
+            sb.append(str(w_obj.intval))
+        elif (space.isinstance_w(w_obj, space.w_int) or
+                space.isinstance_w(w_obj, space.w_long)):
+            sb.append(space.bytes_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            sb.append(self.floatstr(w_obj))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+                space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(w_obj)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(w_obj)
+        else:
+            self.encode_default(w_obj)
+
+    def encode_default(self, w_obj):
+        space = self.space
+        if self.w_default is None:
+            raise oefmt(space.w_TypeError, "%R is not JSON serializable",
+                        w_obj)
+        self._mark(w_obj)
+        w_res = space.call_function(self.w_default, w_obj)
+        self.encode_any(w_res)
+        self._unmark(w_obj)
+
+    def floatstr(self, w_obj):
+        space = self.space
+        x = space.float_w(w_obj)
+        if isfinite(x):
+            # like float.__repr__, ignoring a __repr__ of float subclasses
+            return float2string(x, 'r', 0)
+        if math.isnan(x):
+            text = 'NaN'
+        elif x > 0.0:
+            text = 'Infinity'
+        else:
+            text = '-Infinity'
+        if not self.allow_nan:
+            raise oefmt(space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%R", w_obj)
+        return text
+
+    def encode_list(self, w_lst):
+        space = self.space
+        sb = self.builder
+        if type(w_lst) is W_ListObject:
+            # fast paths for the unboxed list strategies
+            intlist = w_lst.getitems_int()
+            if intlist is not None:
+                self._encode_int_list(intlist)
+                return
+            floatlist = w_lst.getitems_float()
+            if floatlist is not None:
+                self._encode_float_list(w_lst, floatlist)
+                return
+            byteslist = w_lst.getitems_bytes()
+            if byteslist is not None:
+                self._encode_bytes_list(byteslist)
+                return
+        items_w = space.listview(w_lst)
+        if not items_w:
+            sb.append('[]')
+            return
+        self._mark(w_lst)
+        sb.append('[')
+        first = True
+        for w_item in items_w:
+            if first:
+                first = False
+            else:
+                sb.append(self.item_separator)
+            self.encode_any(w_item)
+        sb.append(']')
+        self._unmark(w_lst)
+
+    def _encode_int_list(self, intlist):
+        sb = self.builder
+        sb.append('[')
+        for i in range(len(intlist)):
+            if i:
+                sb.append(self.item_separator)
+            sb.append(str(intlist[i]))
+        sb.append(']')
+
+    def _encode_float_list(self, w_lst, floatlist):
+        sb = self.builder
+        sb.append('[')
+        for i in range(len(floatlist)):
+            if i:
+                sb.append(self.item_separator)
+            x = floatlist[i]
+            if isfinite(x):
+                sb.append(float2string(x, 'r', 0))
+            else:
+                sb.append(self.floatstr(self.space.newfloat(x)))
+        sb.append(']')
+
+    def _encode_bytes_list(self, byteslist):
+        space = self.space
+        sb = self.builder
+        sb.append('[')
+        for i in range(len(byteslist)):
+            if i:
+                sb.append(self.item_separator)
+            _encode_string_into(space, sb, space.newbytes(byteslist[i]))
+        sb.append(']')
+
+    def encode_dict(self, w_dict):
+        space = self.space
+        sb = self.builder
+        if space.len_w(w_dict) == 0:
+            sb.append('{}')
+            return
+        self._mark(w_dict)
+        sb.append('{')
+        first = True
+        if type(w_dict) is W_DictObject:
+            strategy = w_dict.get_strategy()
+            if isinstance(strategy, JsonDictStrategy):
+                # dicts produced by the decoder: keys come from the jsonmap
+                keys_w = strategy.jsonmap.get_keys_in_order()
+                values_w = strategy.unerase(w_dict.dstorage)
+                for i in range(len(keys_w)):
+                    first = self._encode_item(keys_w[i], values_w[i], first)
+            else:
+                # BytesDictStrategy gives us unwrapped keys here
+                keys, values_w = w_dict.view_as_kwargs()
+                if keys is not None:
+                    for i in range(len(keys)):
+                        first = self._encode_item(space.newbytes(keys[i]),
+                                                  values_w[i], first)
+                else:
+                    # every other strategy, including mapdict-backed
+                    # instance dicts, uses its own item iterator
+                    iteritems = w_dict.iteritems()
+                    while True:
+                        w_key, w_value = iteritems.next_item()
+                        if w_key is None:
+                            break
+                        first = self._encode_item(w_key, w_value, first)
+        else:
+            w_iter = space.iter(space.call_method(w_dict, "iteritems"))
+            while True:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError as e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                first = self._encode_item(w_key, w_value, first)
+        sb.append('}')
+        self._unmark(w_dict)
+
+    def _encode_item(self, w_key, w_value, first):
+        """ Encode one 'key: value' pair of a dict, preceded by the item
+        separator unless it is the first one.  Returns the new value of
+        'first'. """
+        space = self.space
+        sb = self.builder
+        if (space.isinstance_w(w_key, space.w_bytes) or
+                space.isinstance_w(w_key, space.w_unicode)):
+            w_strkey = w_key
+        elif space.isinstance_w(w_key, space.w_float):
+            w_strkey = space.newbytes(self.floatstr(w_key))
+        elif space.is_w(w_key, space.w_True):
+            w_strkey = space.newbytes('true')
+        elif space.is_w(w_key, space.w_False):
+            w_strkey = space.newbytes('false')
+        elif space.is_w(w_key, space.w_None):
+            w_strkey = space.newbytes('null')
+        elif (space.isinstance_w(w_key, space.w_int) or
+                space.isinstance_w(w_key, space.w_long)):
+            w_strkey = space.str(w_key)
+        elif self.skipkeys:
+            return first
+        else:
+            raise oefmt(space.w_TypeError, "key %R is not a string", w_key)
+        if not first:
+            sb.append(self.item_separator)
+        _encode_string_into(space, sb, w_strkey)
+        sb.append(self.key_separator)
+        self.encode_any(w_value)
+        return False
+
+
+@unwrap_spec(check_circular=bool, allow_nan=bool, skipkeys=bool,
+             item_separator='text', key_separator='text')
+def encode(space, w_obj, w_default=None, check_circular=True, allow_nan=True,
+           skipkeys=False, item_separator=', ', key_separator=': '):
+    """ encode(obj, default=None, check_circular=True, allow_nan=True,
+               skipkeys=False, item_separator=', ', key_separator=': ')
+
+    Serialize obj to a compact, ascii-only JSON str. """
+    if w_default is not None and space.is_w(w_default, space.w_None):
+        w_default = None
+    encoder = JSONEncoder(space, w_default, check_circular, allow_nan,
+                          skipkeys, item_separator, key_separator)
+    return space.newbytes(encoder.encode(w_obj))
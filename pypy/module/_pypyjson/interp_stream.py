@@ -0,0 +1,293 @@
+from rpython.rlib.rstring import StringBuilder
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.module._pypyjson.interp_decoder import JSONDecoder, is_whitespace
+
+# states of the top-level array when decoding in array mode
+(ARRAY_EXPECT_OPEN, ARRAY_EXPECT_FIRST, ARRAY_EXPECT_VALUE, ARRAY_EXPECT_SEP,
+ ARRAY_DONE) = range(5)
+
+
+def is_structural(ch):
+    return (ch == '[' or ch == ']' or ch == '{' or ch == '}' or ch == ',' or
+            ch == ':' or ch == '"')
+
+
+class W_IncrementalDecoder(W_Root):
+    """ Decode a stream of JSON values that arrives in chunks of bytes.
+
+    In the default mode the stream is a sequence of whitespace-separated
+    top-level values (e.g. newline-delimited JSON).  In array mode the stream
+    is a single top-level array, and its elements are returned one by one.
+
+    Only the bytes of values that are not completely decoded yet are kept
+    around.  All values are decoded by the same JSONDecoder, so that its key
+    and string caches (and the space-wide jsonmaps) are shared between all the
+    values of the stream. """
+
+    # if the cache of keys or the cache of non-key strings grows beyond that
+    # many entries, it is cleared, to keep the memory use of long streams
+    # bounded
+    MAX_STRING_CACHE_ENTRIES = 64 * 1024
+
+    def __init__(self, space, array_mode):
+        self.space = space
+        self.array_mode = array_mode
+        self.array_state = ARRAY_EXPECT_OPEN
+        # the bytes fed so far and not completely decoded yet, as a list of
+        # chunks.  All positions below are relative to the whole stream;
+        # 'base' is the position of the first byte of chunks[0].
+        self.chunks = []
+        self.base = 0
+        # state of the scanner, which finds the end of the next value.  It
+        # is at position scan_pos, which is chunks[scan_chunk][scan_ofs].
+        self.scan_pos = 0
+        self.scan_chunk = 0
+        self.scan_ofs = 0
+        self.value_start = -1
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.eof = False
+        self.decoder = None
+        self.register_finalizer(space)
+
+    def _finalize_(self):
+        # free the raw buffers of the decoder if the stream is not closed
+        if self.decoder is not None:
+            self.decoder.close()
+            self.decoder = None
+
+    def _get_decoder(self, s):
+        decoder = self.decoder
+        if decoder is None:
+            decoder = self.decoder = JSONDecoder(self.space, s)
+        else:
+            decoder.reset(s)
+            if len(decoder.cache_keys) > self.MAX_STRING_CACHE_ENTRIES:
+                decoder.cache_keys = {}
+            if len(decoder.cache_values) > self.MAX_STRING_CACHE_ENTRIES:
+                decoder.cache_values = {}
+        return decoder
+
+    @unwrap_spec(data='bufferstr')
+    def descr_feed(self, space, data):
+        """ feed(data)
+
+        Add the next chunk of bytes of the stream. """
+        if self.eof:
+            raise oefmt(space.w_ValueError, "feed() after close()")
+        if data:
+            self.chunks.append(data)
+
+    def descr_close(self, space):
+        """ close()
+
+        Mark the end of the stream.  Values still buffered can be iterated
+        over afterwards, and an error is raised if the stream ends in the
+        middle of a value. """
+        self.eof = True
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        self._forget_chunks()
+        start, end = self._scan()
+        if start < 0:
+            if self.eof:
+                self._check_complete()
+                if self.decoder is not None:
+                    self.decoder.close()
+                    self.decoder = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        assert end >= start
+        decoder = self._get_decoder(self._get_slice(start, end))
+        decoder.pos_offset = start
+        w_res = decoder.decode_any(0)
+        i = decoder.skip_whitespace(decoder.pos)
+        if i < end - start:
+            raise oefmt(space.w_ValueError,
+                        "Extra data: char %d - %d", start + i, end - 1)
+        decoder.cleanup_unclear_objects()
+        return w_res
+
+    def _get_slice(self, start, end):
+        """ Return the bytes of the stream between the positions start and
+        end, which must still be in self.chunks. """
+        pos = self.base
+        sb = StringBuilder(end - start)
+        for chunk in self.chunks:
+            chunk_end = pos + len(chunk)
+            if start < chunk_end and pos < end:
+                if start >= pos and end <= chunk_end:
+                    # common case: the value is inside a single chunk
+                    lo = start - pos
+                    hi = end - pos
+                    assert lo >= 0 and hi >= 0
+                    return chunk[lo:hi]
+                lo = max(start, pos) - pos
+                hi = min(end, chunk_end) - pos
+                sb.append_slice(chunk, lo, hi)
+            pos = chunk_end
+        return sb.build()
+
+    def _forget_chunks(self):
+        """ Drop the chunks that are before both the scanner and the value
+        being scanned, so that their bytes are not kept alive. """
+        keep = self.value_start
+        if keep < 0:
+            keep = self.scan_pos
+        chunks = self.chunks
+        base = self.base
+        count = 0
+        while count < len(chunks) and base + len(chunks[count]) <= keep:
+            base += len(chunks[count])
+            count += 1
+        if count > 0:
+            del chunks[:count]
+            self.base = base
+            self.scan_chunk -= count
+            assert self.scan_chunk >= 0
+
+    def _check_complete(self):
+        space = self.space
+        if self.value_start >= 0:
+            raise oefmt(space.w_ValueError,
+                        "Unterminated JSON value starting at char %d",
+                        self.value_start)
+        if self.array_mode and self.array_state != ARRAY_DONE:
+            raise oefmt(space.w_ValueError, "Unterminated array")
+
+    def _value_found(self, end):
+        start = self.value_start
+        self.value_start = -1
+        if self.array_mode:
+            self.array_state = ARRAY_EXPECT_SEP
+        return start, end
+
+    def _scan(self):
+        """ Find the next complete value in the chunks, starting at
+        self.scan_pos.  Returns its (start, end) positions, or (-1, -1) if
+        no complete value was fed yet.  The value itself is only checked
+        for well-formedness by the decoder later. """
+        chunks = self.chunks
+        while self.scan_chunk < len(chunks):
+            chunk = chunks[self.scan_chunk]
+            i = self.scan_ofs
+            pos = self.scan_pos
+            while i < len(chunk):
+                end = self._scan_char(chunk[i], pos)
+                if end >= 0:
+                    # the value ends just before or just after chunk[i]
+                    i += end - pos
+                    if i == len(chunk):
+                        self.scan_chunk += 1
+                        i = 0
+                    self.scan_ofs = i
+                    self.scan_pos = end
+                    return self._value_found(end)
+                i += 1
+                pos += 1
+            self.scan_chunk += 1
+            self.scan_ofs = 0
+            self.scan_pos = pos
+        if (self.eof and not self.array_mode and self.value_start >= 0 and
+                self.depth == 0 and not self.in_string):
+            # a number or a constant at the very end of the stream
+            return self._value_found(self.scan_pos)
+        return -1, -1
+
+    def _scan_char(self, ch, i):
+        """ Handle the character ch at position i.  Returns the end of the
+        value if it is complete (either i or i + 1), otherwise -1. """
+        if self.in_string:
+            if self.escaped:
+                self.escaped = False
+            elif ch == '\\':
+                self.escaped = True
+            elif ch == '"':
+                self.in_string = False
+                if self.depth == 0:
+                    return i + 1
+        elif self.value_start < 0:
+            # between two values
+            if is_whitespace(ch):
+                return -1
+            if (self.array_mode and
+                    self.array_state != ARRAY_EXPECT_VALUE and
+                    not self._scan_array_punctuation(ch, i)):
+                return -1
+            self.value_start = i
+            self.depth = 0
+            if ch == '"':
+                self.in_string = True
+            elif ch == '[' or ch == '{':
+                self.depth = 1
+            elif is_structural(ch):
+                raise oefmt(self.space.w_ValueError,
+                            "No JSON object could be decoded: "
+                            "unexpected '%s' at char %d", ch, i)
+        elif self.depth == 0:
+            # a number or a constant, it ends before the next whitespace
+            # or structural character
+            if is_whitespace(ch) or is_structural(ch):
+                return i
+        else:
+            if ch == '"':
+                self.in_string = True
+            elif ch == '[' or ch == '{':
+                self.depth += 1
+            elif ch == ']' or ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return -1
+
+    def _scan_array_punctuation(self, ch, i):
+        """ Handle the character ch at position i, which is outside of any
+        element of the top-level array.  Returns True if an element starts
+        there, otherwise updates self.array_state and returns False. """
+        state = self.array_state
+        if state == ARRAY_EXPECT_OPEN:
+            if ch != '[':
+                raise oefmt(self.space.w_ValueError,
+                            "Expected '[' at char %d", i)
+            self.array_state = ARRAY_EXPECT_FIRST
+        elif state == ARRAY_EXPECT_FIRST:
+            if ch != ']':
+                return True
+            self.array_state = ARRAY_DONE
+        elif state == ARRAY_EXPECT_SEP:
+            if ch == ',':
+                self.array_state = ARRAY_EXPECT_VALUE
+            elif ch == ']':
+                self.array_state = ARRAY_DONE
+            else:
+                raise oefmt(self.space.w_ValueError,
+                            "Unexpected '%s' when decoding array (char %d)",
+                            ch, i)
+        else:
+            assert state == ARRAY_DONE
+            raise oefmt(self.space.w_ValueError,
+                        "Extra data after the array at char %d", i)
+        return False
+
+
+@unwrap_spec(array=bool)
+def descr_new_incremental_decoder(space, w_subtype, array=False):
+    w_self = space.allocate_instance(W_IncrementalDecoder, w_subtype)
+    W_IncrementalDecoder.__init__(w_self, space, array)
+    return w_self
+
+W_IncrementalDecoder.typedef = TypeDef(
+    '_pypyjson.IncrementalDecoder',
+    __new__ = interp2app(descr_new_incremental_decoder),
+    __iter__ = interp2app(W_IncrementalDecoder.descr_iter),
+    next = interp2app(W_IncrementalDecoder.descr_next),
+    feed = interp2app(W_IncrementalDecoder.descr_feed),
+    close = interp2app(W_IncrementalDecoder.descr_close),
+    __doc__ = W_IncrementalDecoder.__doc__,
+)
@@ -3,10 +3,14 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     """fast json implementation"""
 
-    appleveldefs = {}
+    appleveldefs = {
+        'iterload' : 'app_stream.iterload',
+        }
 
     interpleveldefs = {
         'loads' : 'interp_decoder.loads',
+        'encode' : 'interp_encoder.encode',
+        'IncrementalDecoder' : 'interp_stream.W_IncrementalDecoder',
         'raw_encode_basestring_ascii':
             'interp_encoder.raw_encode_basestring_ascii',
         }
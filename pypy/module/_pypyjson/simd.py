@@ -1,14 +1,18 @@
+import sys
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rlib import objectmodel, unroll
 from rpython.rlib.rarithmetic import r_uint, intmask, LONG_BIT
 from rpython.jit.backend.detect_cpu import autodetect, ProcessorAutodetectError
+from rpython.jit.backend.detect_cpu import MODEL_X86_64, MODEL_ARM64
+from rpython.jit.backend.detect_cpu import MODEL_PPC_64
 
 # accelerators for string operations using simd on regular word sizes (*not*
 # SSE instructions). this style is sometimes called SWAR (SIMD Within A
 # Register) or "broadword techniques"
 
-# XXX remove wordsize and endianness restrictions properly, so far only x86-64
-# is tested
+# the word-at-a-time code does unaligned loads and assumes that the first
+# char of a word is its lowest byte, so it is used on the little-endian 64 bit
+# cpus that support unaligned loads
 
 USE_SIMD = False
 if LONG_BIT == 64:
@@ -16,7 +20,8 @@ if LONG_BIT == 64:
     EVERY_BYTE_ONE = 0x0101010101010101
     EVERY_BYTE_HIGHEST_BIT = 0x8080808080808080
     try:
-        if autodetect() == "x86-64":
+        if (autodetect() in (MODEL_X86_64, MODEL_ARM64, MODEL_PPC_64) and
+                sys.byteorder == 'little'):
             USE_SIMD = True
     except ProcessorAutodetectError:
         pass
@@ -77,6 +82,74 @@ def set_high_bytes_to_zero(word, keep_bytes):
 
 
 
+# utf-8 validation: while looking for the end of a string, the functions
+# below also check that it is valid utf-8 (surrogates are allowed, like
+# rutf8.check_utf8(s, True)) and count its code points. They return that
+# count as 'utf8len', or -1 if the string is not valid utf-8. Words that
+# contain only ascii are counted in one step, the other words are fed byte
+# by byte to a small state machine. Its state is 0 between code points, -1
+# after an error, and otherwise encodes the number of continuation bytes that
+# are still expected together with the range allowed for the next one.
+
+@objectmodel.always_inline
+def _utf8_state(remaining, lo, hi):
+    return remaining | (lo << 8) | (hi << 16)
+
+@objectmodel.always_inline
+def _utf8_lead_state(c):
+    if c < 0xc2:
+        return -1
+    if c < 0xe0:
+        return _utf8_state(1, 0x80, 0xbf)
+    if c == 0xe0:
+        return _utf8_state(2, 0xa0, 0xbf)
+    if c < 0xf0:
+        return _utf8_state(2, 0x80, 0xbf)
+    if c == 0xf0:
+        return _utf8_state(3, 0x90, 0xbf)
+    if c < 0xf4:
+        return _utf8_state(3, 0x80, 0xbf)
+    if c == 0xf4:
+        return _utf8_state(3, 0x80, 0x8f)
+    return -1
+
+@objectmodel.always_inline
+def utf8_feed(state, utf8len, c):
+    """ feed the byte c to the utf-8 validator, returns the new state and
+    code point count """
+    if state == 0:
+        utf8len += 1
+        if c >= 0x80:
+            state = _utf8_lead_state(c)
+    elif state > 0:
+        if c < ((state >> 8) & 0xff) or c > (state >> 16):
+            state = -1
+        elif state & 0xff == 1:
+            state = 0
+        else:
+            state = _utf8_state((state & 0xff) - 1, 0x80, 0xbf)
+    return state, utf8len
+
+@objectmodel.always_inline
+def utf8_feed_word(state, utf8len, word, num_bytes):
+    if state == 0 and not word & r_uint(EVERY_BYTE_HIGHEST_BIT):
+        return state, utf8len + num_bytes
+    if state < 0:
+        return state, utf8len
+    j = 0
+    while j < num_bytes:
+        state, utf8len = utf8_feed(state, utf8len, intmask(word & 0xff))
+        word >>= 8
+        j += 1
+    return state, utf8len
+
+@objectmodel.always_inline
+def utf8_result(state, utf8len):
+    if state != 0:
+        return -1
+    return utf8len
+
+
 @objectmodel.always_inline
 def position_string_ender(word):
     maskquote = char_repeated_word_width('"')
@@ -98,13 +171,14 @@ def find_end_of_string_simd_unaligned(ll_chars, startpos, length):
     wordarray = rffi.cast(rffi.ULONGP, rffi.ptradd(ll_chars, startpos))
     num_safe_reads = (length - startpos) // WORD_SIZE
 
-    bits = 0
+    state = 0
+    utf8len = 0
     for i in range(num_safe_reads):
         word = wordarray[i]
         cond = position_string_ender(word)
         if cond:
             break
-        bits |= word
+        state, utf8len = utf8_feed_word(state, utf8len, word, WORD_SIZE)
         strhash = intmask((1000003 * strhash) ^ intmask(word))
     else:
         # didn't find end of string yet, look at remaining chars
@@ -117,26 +191,23 @@ def find_end_of_string_simd_unaligned(ll_chars, startpos, length):
             if ch == '"' or ch == '\\' or ch < '\x20':
                 break
             i += 1
-            bits |= ord(ch)
+            state, utf8len = utf8_feed(state, utf8len, ord(ch))
             word |= ord(ch) << shift
             shift += 8
         if shift:
             strhash = intmask((1000003 * strhash) ^ intmask(word))
 
-        nonascii = bool(bits & char_repeated_word_width(chr(0x80)))
-        return strhash, nonascii, i
+        return strhash, utf8_result(state, utf8len), i
 
     # compute endposition
     nonzero = index_nonzero(cond)
     endposition = startpos + i * WORD_SIZE + nonzero
     if nonzero:
         word = set_high_bytes_to_zero(word, nonzero)
-        bits |= word
+        state, utf8len = utf8_feed_word(state, utf8len, word, nonzero)
         strhash = intmask((1000003 * strhash) ^ intmask(word))
 
-    nonascii = bool(bits & char_repeated_word_width(chr(0x80)))
-
-    return strhash, nonascii, endposition
+    return strhash, utf8_result(state, utf8len), endposition
 
 @objectmodel.always_inline
 def find_end_of_string_simd_unaligned_no_hash(ll_chars, startpos, length):
@@ -145,13 +216,14 @@ def find_end_of_string_simd_unaligned_no_hash(ll_chars, startpos, length):
     wordarray = rffi.cast(rffi.ULONGP, rffi.ptradd(ll_chars, startpos))
     num_safe_reads = (length - startpos) // WORD_SIZE
 
-    bits = 0
+    state = 0
+    utf8len = 0
     for i in range(num_safe_reads):
         word = wordarray[i]
         cond = position_string_ender(word)
         if cond:
             break
-        bits |= word
+        state, utf8len = utf8_feed_word(state, utf8len, word, WORD_SIZE)
     else:
         # didn't find end of string yet, look at remaining chars
         i = startpos + num_safe_reads * WORD_SIZE
@@ -161,21 +233,18 @@ def find_end_of_string_simd_unaligned_no_hash(ll_chars, startpos, length):
             if ch == '"' or ch == '\\' or ch < '\x20':
                 break
             i += 1
-            bits |= ord(ch)
+            state, utf8len = utf8_feed(state, utf8len, ord(ch))
 
-        nonascii = bool(bits & char_repeated_word_width(chr(0x80)))
-        return nonascii, i
+        return utf8_result(state, utf8len), i
 
     # compute endposition
     nonzero = index_nonzero(cond)
     endposition = startpos + i * WORD_SIZE + nonzero
     if nonzero:
         word = set_high_bytes_to_zero(word, nonzero)
-        bits |= word
-
-    nonascii = bool(bits & char_repeated_word_width(chr(0x80)))
+        state, utf8len = utf8_feed_word(state, utf8len, word, nonzero)
 
-    return nonascii, endposition
+    return utf8_result(state, utf8len), endposition
 
 
 @objectmodel.always_inline
@@ -185,7 +254,8 @@ def find_end_of_string_slow(ll_chars, i, length):
     word = 0
     shift = 0
 
-    bits = 0
+    state = 0
+    utf8len = 0
 
     while True:
         # this loop is a fast path for strings which do not contain escape
@@ -194,7 +264,7 @@ def find_end_of_string_slow(ll_chars, i, length):
         if ch == '"' or ch == '\\' or ch < '\x20':
             break
         i += 1
-        bits |= ord(ch)
+        state, utf8len = utf8_feed(state, utf8len, ord(ch))
 
         word |= ord(ch) << shift
         shift += 8
@@ -205,11 +275,12 @@ def find_end_of_string_slow(ll_chars, i, length):
 
     if shift:
         strhash = intmask((1000003 * strhash) ^ word)
-    return strhash, bool(bits & 0x80), i
+    return strhash, utf8_result(state, utf8len), i
 
 @objectmodel.always_inline
 def find_end_of_string_slow_no_hash(ll_chars, i, length):
-    bits = 0
+    state = 0
+    utf8len = 0
     while True:
         # this loop is a fast path for strings which do not contain escape
         # characters
@@ -217,8 +288,8 @@ def find_end_of_string_slow_no_hash(ll_chars, i, length):
         if ch == '"' or ch == '\\' or ch < '\x20':
             break
         i += 1
-        bits |= ord(ch)
-    return bool(bits & 0x80), i
+        state, utf8len = utf8_feed(state, utf8len, ord(ch))
+    return utf8_result(state, utf8len), i
 
 if USE_SIMD:
     find_end_of_string = find_end_of_string_simd_unaligned
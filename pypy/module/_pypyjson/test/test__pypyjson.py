@@ -273,6 +273,50 @@ class TestJson(object):
         dec.close()
 
 
+    def test_reset_keeps_caches(self):
+        from pypy.objspace.std.jsondict import get_jsonmap_from_dict
+        space = self.space
+        dec = JSONDecoder(space, '{"abc": 1}')
+        w_a = dec.decode_any(0)
+        dec.reset('{"abc": 2}')
+        assert dec.pos == 0
+        assert dec.bytes_decoded_before == len('{"abc": 1}')
+        w_b = dec.decode_any(0)
+        dec.close()
+        assert get_jsonmap_from_dict(w_a) is get_jsonmap_from_dict(w_b)
+
+    def test_incremental_caches_bounded(self):
+        from pypy.interpreter.error import OperationError
+        from pypy.module._pypyjson.interp_stream import W_IncrementalDecoder
+        space = self.space
+        w_dec = W_IncrementalDecoder(space, False)
+        w_dec.MAX_STRING_CACHE_ENTRIES = 50
+
+        def decode_all():
+            while True:
+                try:
+                    w_dec.descr_next(space)
+                except OperationError as e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+
+        sizes = []
+        for i in range(20):
+            # every value has 10 new keys, and 10 strings seen twice
+            items = ['"k%d_%d": "v%d_%d"' % (i, j, i, j) for j in range(10)]
+            w_dec.descr_feed(space, '{%s} ' % ', '.join(items) * 2)
+            decode_all()
+            sizes.append((len(w_dec.decoder.cache_keys),
+                          len(w_dec.decoder.cache_values)))
+        assert max([k for k, v in sizes]) <= 50 + 10
+        assert max([v for k, v in sizes]) <= 50 + 10
+        assert sizes[-1][0] > 0
+        w_dec.descr_close(space)
+        decode_all()
+        assert w_dec.decoder is None
+
+
 class AppTest(object):
     spaceconfig = {"objspace.usemodules._pypyjson": True}
 
@@ -364,6 +408,22 @@ class AppTest(object):
         import _pypyjson
         s = '"\xe0"' # this is an invalid UTF8 sequence inside a string
         raises(UnicodeDecodeError, "_pypyjson.loads(s)")
+        s = '"abc\\n\xe4\xb8"'
+        raises(UnicodeDecodeError, "_pypyjson.loads(s)")
+        s = '"\xed\xa0\x80"'   # surrogates are accepted
+        assert _pypyjson.loads(s) == u'\ud800'
+
+    def test_decode_string_utf8_length(self):
+        import _pypyjson
+        for u in [u'\u4e2d\u6587' * 10, u'a\xe4b' * 7, u'\U0001f600x',
+                  u'\u4e2d\n\u6587\\x\xe4' * 5, u'\u1234\U0001f600\n']:
+            s = _pypyjson.loads(
+                '"%s"' % u.encode('utf-8').replace('\\', '\\\\')
+                                         .replace('\n', '\\n'))
+            assert s == u
+            assert len(s) == len(u)
+            assert s[-1] == u[-1]
+            assert list(s) == list(u)
 
     def test_decode_numeric(self):
         import sys
@@ -538,3 +598,197 @@ class AppTest(object):
         a = '{"abc": "4", "k": 1, "k": 1.5, "c": null, "k": 2}'
         d = _pypyjson.loads(a)
         assert d == {u"abc": u"4", u"c": None, u"k": 2}
+
+    def test_encode_basic(self):
+        import _pypyjson
+        assert _pypyjson.encode(None) == 'null'
+        assert _pypyjson.encode(True) == 'true'
+        assert _pypyjson.encode(False) == 'false'
+        assert _pypyjson.encode(42) == '42'
+        assert _pypyjson.encode(-2**70) == str(-2**70)
+        assert _pypyjson.encode(1.5) == '1.5'
+        assert _pypyjson.encode(1e300 * 1e300) == 'Infinity'
+        assert _pypyjson.encode(-1e300 * 1e300) == '-Infinity'
+        assert _pypyjson.encode("abc") == '"abc"'
+        assert _pypyjson.encode(u"\u1234") == '"\\u1234"'
+        assert _pypyjson.encode("a\"\n") == '"a\\"\\n"'
+        assert type(_pypyjson.encode(u"x")) is str
+        raises(UnicodeDecodeError, _pypyjson.encode, "\xc0")
+
+    def test_encode_containers(self):
+        import _pypyjson
+        assert _pypyjson.encode([]) == '[]'
+        assert _pypyjson.encode(()) == '[]'
+        assert _pypyjson.encode({}) == '{}'
+        assert _pypyjson.encode([1, 2, 3]) == '[1, 2, 3]'
+        assert _pypyjson.encode([1.5, 2.25]) == '[1.5, 2.25]'
+        assert _pypyjson.encode(["a", "b\n"]) == '["a", "b\\n"]'
+        assert _pypyjson.encode((1, "a", None)) == '[1, "a", null]'
+        assert _pypyjson.encode(range(3)) == '[0, 1, 2]'
+        assert _pypyjson.encode({"a": [1, {"b": 2}]}) == '{"a": [1, {"b": 2}]}'
+        assert _pypyjson.encode({u"a": 1}) == '{"a": 1}'
+        assert _pypyjson.encode([1, 2], item_separator=',') == '[1,2]'
+        res = _pypyjson.encode({"a": 1}, item_separator=',', key_separator=':')
+        assert res == '{"a":1}'
+
+    def test_encode_dict_keys(self):
+        import _pypyjson
+        assert _pypyjson.encode({1: 2}) == '{"1": 2}'
+        assert _pypyjson.encode({1.5: 2}) == '{"1.5": 2}'
+        assert _pypyjson.encode({True: 2}) == '{"true": 2}'
+        assert _pypyjson.encode({None: 2}) == '{"null": 2}'
+        raises(TypeError, _pypyjson.encode, {(1, 2): 3})
+        assert _pypyjson.encode({(1, 2): 3}, skipkeys=True) == '{}'
+        res = _pypyjson.encode({(1, 2): 3, 4: 5}, skipkeys=True)
+        assert res == '{"4": 5}'
+
+    def test_encode_decoded_dicts(self):
+        import _pypyjson
+        s = '[' + ', '.join(['{"a": 1, "b": [1.5, "x"]}'] * 20) + ']'
+        assert _pypyjson.encode(_pypyjson.loads(s)) == s
+
+    def test_encode_instance_dict(self):
+        import _pypyjson
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = "z"
+        res = _pypyjson.encode(a.__dict__)
+        assert res in ('{"x": 1, "y": "z"}', '{"y": "z", "x": 1}')
+
+    def test_encode_default(self):
+        import _pypyjson
+        class A(object):
+            pass
+        raises(TypeError, _pypyjson.encode, A())
+        res = _pypyjson.encode([A(), 1], lambda o: {"A": 1})
+        assert res == '[{"A": 1}, 1]'
+
+    def test_encode_nan(self):
+        import _pypyjson
+        nan = 1e300 * 1e300 * 0
+        assert _pypyjson.encode([nan]) == '[NaN]'
+        raises(ValueError, _pypyjson.encode, nan, allow_nan=False)
+        raises(ValueError, _pypyjson.encode, [nan], allow_nan=False)
+
+    def test_encode_circular(self):
+        import _pypyjson
+        l = [1]
+        l.append(l)
+        exc = raises(ValueError, _pypyjson.encode, l)
+        assert str(exc.value) == "Circular reference detected"
+        d = {}
+        d["a"] = d
+        raises(ValueError, _pypyjson.encode, d)
+        # the same object twice is fine
+        x = [1]
+        assert _pypyjson.encode([x, x]) == '[[1], [1]]'
+
+    def test_encode_subclasses(self):
+        import _pypyjson
+        class MyInt(int):
+            def __str__(self):
+                return "7"
+        class MyDict(dict):
+            pass
+        class MyList(list):
+            pass
+        assert _pypyjson.encode(MyInt(3)) == '7'
+        assert _pypyjson.encode(MyDict(a=1)) == '{"a": 1}'
+        assert _pypyjson.encode(MyList([1, "a"])) == '[1, "a"]'
+
+    def test_encode_float_subclass_repr(self):
+        import _pypyjson
+        class F(float):
+            def __repr__(self):
+                return 'bogus'
+        assert _pypyjson.encode([F(1.5)]) == '[1.5]'
+        assert _pypyjson.encode(F(0.1)) == '0.1'
+        assert _pypyjson.encode({F(1.5): 1}) == '{"1.5": 1}'
+
+    def test_incremental_ndjson(self):
+        import _pypyjson
+        dec = _pypyjson.IncrementalDecoder()
+        data = '{"a": 1, "b": "x"}\n[1, 2]\n"s\\"}"\n12\ntrue\n{"a": 2, "b": "y"}\n3'
+        res = []
+        for i in range(0, len(data), 3):
+            dec.feed(data[i:i+3])
+            res.extend(dec)
+        assert res == [{u"a": 1, u"b": u"x"}, [1, 2], u's"}', 12, True,
+                       {u"a": 2, u"b": u"y"}]
+        dec.close()
+        assert list(dec) == [3]
+        raises(ValueError, dec.feed, "1")
+
+    def test_incremental_unterminated(self):
+        import _pypyjson
+        dec = _pypyjson.IncrementalDecoder()
+        dec.feed('1 {"a": [1')
+        assert list(dec) == [1]
+        dec.close()
+        raises(ValueError, list, dec)
+
+    def test_incremental_invalid(self):
+        import _pypyjson
+        dec = _pypyjson.IncrementalDecoder()
+        dec.feed('[1, 2 3] ')
+        raises(ValueError, list, dec)
+        dec = _pypyjson.IncrementalDecoder()
+        dec.feed(']')
+        raises(ValueError, list, dec)
+
+    def test_incremental_many_chunks(self):
+        import _pypyjson
+        dec = _pypyjson.IncrementalDecoder()
+        value = '[' + ', '.join(['"%d"' % i for i in range(2000)]) + ']'
+        data = '{"a": 1}\n' + value + '\n[1, 2, x]'
+        res = []
+        for i in range(0, len(data), 7):
+            dec.feed(data[i:i+7])
+            try:
+                res.extend(dec)
+            except ValueError as e:
+                break
+        assert res == [{u"a": 1}, [u"%d" % i for i in range(2000)]]
+        # the position is relative to the whole stream
+        assert str(e).endswith('char %d' % data.index('x'))
+
+    def test_incremental_array(self):
+        import _pypyjson
+        dec = _pypyjson.IncrementalDecoder(array=True)
+        data = ' [ 1, "a,]", {"b": [2, 3]}, [], -1.5e3 ] '
+        res = []
+        for c in data:
+            dec.feed(c)
+            res.extend(dec)
+        dec.close()
+        res.extend(dec)
+        assert res == [1, u"a,]", {u"b": [2, 3]}, [], -1.5e3]
+        dec = _pypyjson.IncrementalDecoder(array=True)
+        dec.feed('[]')
+        dec.close()
+        assert list(dec) == []
+        dec = _pypyjson.IncrementalDecoder(array=True)
+        dec.feed('[1, 2')
+        dec.close()
+        raises(ValueError, list, dec)
+        dec = _pypyjson.IncrementalDecoder(array=True)
+        dec.feed('{}')
+        raises(ValueError, list, dec)
+
+    def test_iterload(self):
+        import _pypyjson
+        class File(object):
+            def __init__(self, data):
+                self.data = data
+            def read(self, n):
+                res = self.data[:n]
+                self.data = self.data[n:]
+                return res
+        lines = ['{"id": %d, "name": "n%d"}' % (i, i) for i in range(50)]
+        res = list(_pypyjson.iterload(File("\n".join(lines)), chunksize=7))
+        assert res == [{u"id": i, u"name": u"n%d" % i} for i in range(50)]
+        res = list(_pypyjson.iterload(File("[1, 2, 3]"), array=True,
+                                      chunksize=2))
+        assert res == [1, 2, 3]
@@ -2,6 +2,7 @@ import sys
 import pytest
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib import rutf8
 
 from pypy.module._pypyjson.simd import USE_SIMD
 from pypy.module._pypyjson.simd import find_end_of_string_slow
@@ -53,12 +54,12 @@ string_in_context_strategy = strategies.builds(
     suffix=strategies.binary())
 
 def compare(string, res1, res2):
-    hash1, nonascii1, endindex1 = res1
-    hash2, nonascii2, endindex2 = res2
+    hash1, utf8len1, endindex1 = res1
+    hash2, utf8len2, endindex2 = res2
     assert endindex1 == endindex2
     if string[endindex1 - 1] == '"':
         assert hash1 == hash2
-    assert nonascii1 == nonascii2
+    assert utf8len1 == utf8len2
 
 
 @example(('"       \x80"      ', 1))
@@ -74,37 +75,76 @@ def compare(string, res1, res2):
 def test_find_end_of_string(a):
     (string, startindex) = a
     res = ll(find_end_of_string_slow, string, startindex, len(string))
-    hash, nonascii1, endposition1 = res
+    hash, utf8len1, endposition1 = res
     res2 = ll(find_end_of_string_slow_no_hash, string, startindex, len(string))
-    assert res2 == (nonascii1, endposition1)
+    assert res2 == (utf8len1, endposition1)
     ch = string[endposition1]
     assert ch == '"' or ch == '\\' or ch < '\x20'
     for ch in string[startindex:endposition1]:
         assert not (ch == '"' or ch == '\\' or ch < '\x20')
     compare(string, res, ll(find_end_of_string_simd_unaligned, string, startindex, len(string)))
 
-    nonascii2, endposition2 = ll(find_end_of_string_simd_unaligned_no_hash, string, startindex, len(string))
-    assert nonascii1 == nonascii2
+    utf8len2, endposition2 = ll(find_end_of_string_simd_unaligned_no_hash, string, startindex, len(string))
+    assert utf8len1 == utf8len2
     assert endposition1 == endposition2
 
 @given(string_in_context_strategy, strategies.binary(min_size=1))
 def test_find_end_of_string_position_invariance(a, prefix):
     fn = find_end_of_string_simd_unaligned
     (string, startindex) = a
-    h1, nonascii1, i1 = ll(fn, string, startindex, len(string))
+    h1, utf8len1, i1 = ll(fn, string, startindex, len(string))
     string2 = prefix + string
-    h2, nonascii2, i2 = ll(fn, string2, startindex + len(prefix), len(string) + len(prefix))
+    h2, utf8len2, i2 = ll(fn, string2, startindex + len(prefix), len(string) + len(prefix))
     assert h1 == h2
-    assert nonascii1 == nonascii2
+    assert utf8len1 == utf8len2
     assert i1 + len(prefix) == i2
 
 @given(string_in_context_strategy, strategies.binary(min_size=1))
 def test_find_end_of_string_position_invariance_no_hash(a, prefix):
     fn = find_end_of_string_simd_unaligned_no_hash
     (string, startindex) = a
-    nonascii1, i1 = ll(fn, string, startindex, len(string))
+    utf8len1, i1 = ll(fn, string, startindex, len(string))
     string2 = prefix + string
-    nonascii2, i2 = ll(fn, string2, startindex + len(prefix), len(string) + len(prefix))
-    assert nonascii1 == nonascii2
+    utf8len2, i2 = ll(fn, string2, startindex + len(prefix), len(string) + len(prefix))
+    assert utf8len1 == utf8len2
     assert i1 + len(prefix) == i2
 
+
+
+def expected_utf8len(content):
+    try:
+        return rutf8.check_utf8(content, True)
+    except rutf8.CheckError:
+        return -1
+
+ALL_FUNCTIONS = [
+    find_end_of_string_slow, find_end_of_string_slow_no_hash,
+    find_end_of_string_simd_unaligned,
+    find_end_of_string_simd_unaligned_no_hash]
+
+def check_utf8len(content):
+    string = fill_to_word_size('"' + content + '"')
+    expected = expected_utf8len(content)
+    for fn in ALL_FUNCTIONS:
+        res = ll(fn, string, 1, len(string))
+        assert res[-1] == len(content) + 1
+        assert res[-2] == expected
+
+@example('\xed\xa0\x80')         # surrogates are allowed
+@example('\xe0\x80\x80')         # overlong
+@example('\xf4\x90\x80\x80')     # too large
+@example('abcdefg\xc3')
+@example('abcdefg\xc3\xa4abcdefgh')
+@example('\xe4\xb8\xad\xe6\x96\x87\xe4\xb8\xad\xe6\x96\x87')
+@given(strategies.binary())
+def test_utf8len_bytes(content):
+    content = ''.join([ch for ch in content
+                       if not (ch == '"' or ch == '\\' or ch < '\x20')])
+    check_utf8len(content)
+
+@given(strategies.text())
+def test_utf8len_text(content):
+    content = content.encode('utf-8')
+    content = ''.join([ch for ch in content
+                       if not (ch == '"' or ch == '\\' or ch < '\x20')])
+    check_utf8len(content)
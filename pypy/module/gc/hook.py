@@ -34,7 +34,8 @@ class LowLevelGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self.w_hooks.gc_collect_enabled
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         action = self.w_hooks.gc_minor
         action.count += 1
         action.duration += duration
@@ -42,9 +43,12 @@ class LowLevelGcHooks(GcHooks):
         action.duration_max = max(action.duration_max, duration)
         action.total_memory_used = total_memory_used
         action.pinned_objects = pinned_objects
+        action.nursery_size = nursery_size
         action.fire()
 
-    def on_gc_collect_step(self, duration, oldstate, newstate):
+    def on_gc_collect_step(self, duration, oldstate, newstate,
+                           increment_step, mark_threads,
+                           mark_duration_min, mark_duration_max):
         action = self.w_hooks.gc_collect_step
         action.count += 1
         action.duration += duration
@@ -52,6 +56,10 @@ class LowLevelGcHooks(GcHooks):
         action.duration_max = max(action.duration_max, duration)
         action.oldstate = oldstate
         action.newstate = newstate
+        action.increment_step = increment_step
+        action.mark_threads = mark_threads
+        action.mark_duration_min += mark_duration_min
+        action.mark_duration_max += mark_duration_max
         action.fire()
 
     def on_gc_collect(self, num_major_collects,
@@ -133,6 +141,7 @@ class NoRecursiveAction(AsyncAction):
 class GcMinorHookAction(NoRecursiveAction):
     total_memory_used = 0
     pinned_objects = 0
+    nursery_size = 0
 
     def __init__(self, space):
         NoRecursiveAction.__init__(self, space)
@@ -156,6 +165,7 @@ class GcMinorHookAction(NoRecursiveAction):
             self.duration_max = NonConstant(-53.2)
             self.total_memory_used = NonConstant(r_uint(42))
             self.pinned_objects = NonConstant(-42)
+            self.nursery_size = NonConstant(-42)
             self.fire()
 
     def _do_perform(self, ec, frame):
@@ -165,7 +175,8 @@ class GcMinorHookAction(NoRecursiveAction):
             self.duration_min,
             self.duration_max,
             self.total_memory_used,
-            self.pinned_objects)
+            self.pinned_objects,
+            self.nursery_size)
         self.reset()
         self.space.call_function(self.w_callable, w_stats)
 
@@ -173,6 +184,8 @@ class GcMinorHookAction(NoRecursiveAction):
 class GcCollectStepHookAction(NoRecursiveAction):
     oldstate = 0
     newstate = 0
+    increment_step = 0
+    mark_threads = 1
 
     def __init__(self, space):
         NoRecursiveAction.__init__(self, space)
@@ -184,6 +197,8 @@ class GcCollectStepHookAction(NoRecursiveAction):
         self.duration = 0.0
         self.duration_min = inf
         self.duration_max = 0.0
+        self.mark_duration_min = 0.0
+        self.mark_duration_max = 0.0
 
     def fix_annotation(self):
         # the annotation of the class and its attributes must be completed
@@ -196,6 +211,10 @@ class GcCollectStepHookAction(NoRecursiveAction):
             self.duration_max = NonConstant(-53.2)
             self.oldstate = NonConstant(-42)
             self.newstate = NonConstant(-42)
+            self.increment_step = NonConstant(-42)
+            self.mark_threads = NonConstant(-42)
+            self.mark_duration_min = NonConstant(-53.2)
+            self.mark_duration_max = NonConstant(-53.2)
             self.fire()
 
     def _do_perform(self, ec, frame):
@@ -206,7 +225,11 @@ class GcCollectStepHookAction(NoRecursiveAction):
             self.duration_max,
             self.oldstate,
             self.newstate,
-            rgc.is_done__states(self.oldstate, self.newstate))
+            rgc.is_done__states(self.oldstate, self.newstate),
+            self.increment_step,
+            self.mark_threads,
+            self.mark_duration_min,
+            self.mark_duration_max)
         self.reset()
         self.space.call_function(self.w_callable, w_stats)
 
@@ -256,13 +279,14 @@ class GcCollectHookAction(NoRecursiveAction):
 class W_GcMinorStats(W_Root):
 
     def __init__(self, count, duration, duration_min, duration_max,
-                 total_memory_used, pinned_objects):
+                 total_memory_used, pinned_objects, nursery_size):
         self.count = count
         self.duration = duration
         self.duration_min = duration_min
         self.duration_max = duration_max
         self.total_memory_used = total_memory_used
         self.pinned_objects = pinned_objects
+        self.nursery_size = nursery_size
 
 
 class W_GcCollectStepStats(W_Root):
@@ -284,7 +308,8 @@ class W_GcCollectStepStats(W_Root):
     GC_STATES = tuple(incminimark.GC_STATES + ['USERDEL'])
 
     def __init__(self, count, duration, duration_min, duration_max,
-                 oldstate, newstate, major_is_done):
+                 oldstate, newstate, major_is_done, increment_step,
+                 mark_threads, mark_duration_min, mark_duration_max):
         self.count = count
         self.duration = duration
         self.duration_min = duration_min
@@ -292,6 +317,10 @@ class W_GcCollectStepStats(W_Root):
         self.oldstate = oldstate
         self.newstate = newstate
         self.major_is_done = major_is_done
+        self.increment_step = increment_step
+        self.mark_threads = mark_threads
+        self.mark_duration_min = mark_duration_min
+        self.mark_duration_max = mark_duration_max
 
 
 class W_GcCollectStats(W_Root):
@@ -346,7 +375,8 @@ W_GcMinorStats.typedef = TypeDef(
         "duration_min",
         "duration_max",
         "total_memory_used",
-        "pinned_objects"))
+        "pinned_objects",
+        "nursery_size"))
     )
 
 W_GcCollectStepStats.typedef = TypeDef(
@@ -367,7 +397,11 @@ W_GcCollectStepStats.typedef = TypeDef(
         "duration_min",
         "duration_max",
         "oldstate",
-        "newstate"))
+        "newstate",
+        "increment_step",
+        "mark_threads",
+        "mark_duration_min",
+        "mark_duration_max"))
     )
 
 W_GcCollectStats.typedef = TypeDef(
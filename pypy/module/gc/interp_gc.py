@@ -117,7 +117,11 @@ class StepCollector(object):
             duration_max = duration,
             oldstate = oldstate,
             newstate = newstate,
-            major_is_done = major_is_done)
+            major_is_done = major_is_done,
+            increment_step = -1,
+            mark_threads = 1,
+            mark_duration_min = 0.0,
+            mark_duration_max = 0.0)
 
     def _collect_step(self):
         return rgc.collect_step()
@@ -135,6 +139,94 @@ def collect_step(space):
     w_stats = sc.do()
     return w_stats
 
+@unwrap_spec(minor=float, step=float)
+def set_pause_budget(space, minor, step=0.0):
+    """
+    Switch the GC to pause-time budget mode: it adapts at runtime the size
+    of the nursery and the amount of memory marked by each step of a major
+    collection, so that minor collections take about 'minor' microseconds
+    and major collection steps about 'step' microseconds.  A budget of 0
+    disables the corresponding adaptation and restores the default size.
+    """
+    if minor < 0.0 or step < 0.0:
+        raise oefmt(space.w_ValueError, "the pause budget must be >= 0")
+    if not (rgc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, minor) and
+            rgc.set_gc_param(rgc.GC_PARAM_MAJOR_STEP_BUDGET, step)):
+        raise oefmt(space.w_RuntimeError,
+                    "the GC does not support pause budgets")
+
+def get_pause_budget(space):
+    """
+    Return the tuple (minor, step) of the current pause-time budgets, in
+    microseconds; see set_pause_budget().
+    """
+    minor = rgc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET)
+    step = rgc.get_gc_param(rgc.GC_PARAM_MAJOR_STEP_BUDGET)
+    if minor < 0.0 or step < 0.0:
+        raise oefmt(space.w_RuntimeError,
+                    "the GC does not support pause budgets")
+    return space.newtuple([space.newfloat(minor), space.newfloat(step)])
+
+# the GC parameters which can be changed with set_param()
+GC_PARAMS = [
+    ('nursery_size', rgc.GC_PARAM_NURSERY_SIZE),
+    ('major_collect', rgc.GC_PARAM_MAJOR_COLLECT),
+    ('growth', rgc.GC_PARAM_GROWTH),
+    ('max_heap_size', rgc.GC_PARAM_MAX_HEAP_SIZE),
+    ('minor_pause_budget', rgc.GC_PARAM_MINOR_PAUSE_BUDGET),
+    ('step_pause_budget', rgc.GC_PARAM_MAJOR_STEP_BUDGET),
+    ('mark_threads', rgc.GC_PARAM_MARK_THREADS),
+    ]
+
+def _get_param_no(space, name):
+    for param_name, param_no in GC_PARAMS:
+        if param_name == name:
+            return param_no
+    raise oefmt(space.w_ValueError, "unknown GC parameter '%s'", name)
+
+@unwrap_spec(name='text', value=float)
+def set_param(space, name, value):
+    """
+    Change a parameter of the GC at runtime.  'name' is one of:
+
+      nursery_size        the size of the nursery, in bytes; the nursery is
+                          reallocated after the next minor collection
+      major_collect       the major collection memory factor, > 1.0 (like
+                          PYPY_GC_MAJOR_COLLECT)
+      growth              the max growth rate of the major collection
+                          threshold, > 1.0 (like PYPY_GC_GROWTH)
+      max_heap_size       the max heap size in bytes, or 0 for no limit
+                          (like PYPY_GC_MAX)
+      minor_pause_budget  see set_pause_budget()
+      step_pause_budget   see set_pause_budget()
+      mark_threads        the number of threads marking objects in parallel
+                          during major collections, between 1 and 64 (like
+                          PYPY_GC_MARK_THREADS); values above 1 need a
+                          PyPy translated with thread support
+
+    'major_collect' and 'growth' take effect at the end of the next major
+    collection.
+    """
+    param_no = _get_param_no(space, name)
+    if value < 0.0 or not rgc.set_gc_param(param_no, value):
+        if rgc.get_gc_param(param_no) < 0.0:
+            raise oefmt(space.w_RuntimeError,
+                        "the GC does not support the parameter '%s'", name)
+        raise oefmt(space.w_ValueError,
+                    "invalid value for the GC parameter '%s'", name)
+
+@unwrap_spec(name='text')
+def get_param(space, name):
+    """
+    Return the current value of a parameter of the GC; see set_param().
+    """
+    param_no = _get_param_no(space, name)
+    value = rgc.get_gc_param(param_no)
+    if value < 0.0:
+        raise oefmt(space.w_RuntimeError,
+                    "the GC does not support the parameter '%s'", name)
+    return space.newfloat(value)
+
 # ____________________________________________________________
 
 @unwrap_spec(filename='fsencode')
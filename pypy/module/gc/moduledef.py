@@ -23,6 +23,10 @@ class Module(MixedModule):
                 })
             self.interpleveldefs.update({
                 'collect_step': 'interp_gc.collect_step',
+                'set_pause_budget': 'interp_gc.set_pause_budget',
+                'get_pause_budget': 'interp_gc.get_pause_budget',
+                'set_param': 'interp_gc.set_param',
+                'get_param': 'interp_gc.get_param',
                 'get_rpy_roots': 'referents.get_rpy_roots',
                 'get_rpy_referents': 'referents.get_rpy_referents',
                 'get_rpy_memory_usage': 'referents.get_rpy_memory_usage',
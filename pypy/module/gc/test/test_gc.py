@@ -119,6 +119,37 @@ class AppTestGC(object):
         assert n >= 2 # at least one step + 1 finalizing
         assert X.deleted == 3
 
+    def test_pause_budget(self):
+        import gc
+        gc.set_pause_budget(500, 2000)
+        try:
+            assert gc.get_pause_budget() == (500.0, 2000.0)
+            gc.set_pause_budget(250.5)
+            assert gc.get_pause_budget() == (250.5, 0.0)
+            raises(ValueError, gc.set_pause_budget, -1)
+            raises(ValueError, gc.set_pause_budget, 0, -1)
+            assert gc.get_pause_budget() == (250.5, 0.0)
+        finally:
+            gc.set_pause_budget(0)
+        assert gc.get_pause_budget() == (0.0, 0.0)
+
+    def test_set_param(self):
+        import gc
+        gc.set_param('growth', 1.5)
+        assert gc.get_param('growth') == 1.5
+        gc.set_param('max_heap_size', 2**30)
+        assert gc.get_param('max_heap_size') == 2**30
+        gc.set_param('max_heap_size', 0)
+        gc.set_param('minor_pause_budget', 100)
+        assert gc.get_pause_budget()[0] == 100.0
+        gc.set_param('minor_pause_budget', 0)
+        gc.set_param('mark_threads', 4)
+        assert gc.get_param('mark_threads') == 4.0
+        gc.set_param('mark_threads', 1)
+        raises(ValueError, gc.set_param, 'growth', -1.0)
+        raises(ValueError, gc.set_param, 'foobar', 1.0)
+        raises(ValueError, gc.get_param, 'foobar')
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
@@ -12,13 +12,20 @@ class AppTestGcHooks(object):
         space = cls.space
         gchooks = space.fromcache(LowLevelGcHooks)
 
-        @unwrap_spec(ObjSpace, int, r_uint, int)
-        def fire_gc_minor(space, duration, total_memory_used, pinned_objects):
-            gchooks.fire_gc_minor(duration, total_memory_used, pinned_objects)
-
-        @unwrap_spec(ObjSpace, int, int, int)
-        def fire_gc_collect_step(space, duration, oldstate, newstate):
-            gchooks.fire_gc_collect_step(duration, oldstate, newstate)
+        @unwrap_spec(ObjSpace, int, r_uint, int, int)
+        def fire_gc_minor(space, duration, total_memory_used, pinned_objects,
+                          nursery_size=0):
+            gchooks.fire_gc_minor(duration, total_memory_used, pinned_objects,
+                                  nursery_size)
+
+        @unwrap_spec(ObjSpace, int, int, int, int, int, float, float)
+        def fire_gc_collect_step(space, duration, oldstate, newstate,
+                                 increment_step=0, mark_threads=1,
+                                 mark_duration_min=0.0,
+                                 mark_duration_max=0.0):
+            gchooks.fire_gc_collect_step(duration, oldstate, newstate,
+                                         increment_step, mark_threads,
+                                         mark_duration_min, mark_duration_max)
 
         @unwrap_spec(ObjSpace, int, int, int, r_uint, r_uint, r_uint)
         def fire_gc_collect(space, a, b, c, d, e, f):
@@ -26,11 +33,11 @@ class AppTestGcHooks(object):
 
         @unwrap_spec(ObjSpace)
         def fire_many(space):
-            gchooks.fire_gc_minor(5.0, 0, 0)
-            gchooks.fire_gc_minor(7.0, 0, 0)
-            gchooks.fire_gc_collect_step(5.0, 0, 0)
-            gchooks.fire_gc_collect_step(15.0, 0, 0)
-            gchooks.fire_gc_collect_step(22.0, 0, 0)
+            gchooks.fire_gc_minor(5.0, 0, 0, 0)
+            gchooks.fire_gc_minor(7.0, 0, 0, 0)
+            gchooks.fire_gc_collect_step(5.0, 0, 0, 0, 1, 0.0, 0.0)
+            gchooks.fire_gc_collect_step(15.0, 0, 0, 0, 1, 0.0, 0.0)
+            gchooks.fire_gc_collect_step(22.0, 0, 0, 0, 1, 0.0, 0.0)
             gchooks.fire_gc_collect(1, 2, 3, 4, 5, 6)
 
         cls.w_fire_gc_minor = space.wrap(interp2app(fire_gc_minor))
@@ -93,6 +100,20 @@ class AppTestGcHooks(object):
         self.fire_gc_collect_step(70, SCANNING, MARKING)  # won't fire
         assert lst == oldlst
 
+    def test_pause_budget_sizes(self):
+        import gc
+        lst = []
+        def on_gc_minor(stats):
+            lst.append(stats.nursery_size)
+        def on_gc_collect_step(stats):
+            lst.append(stats.increment_step)
+        gc.hooks.on_gc_minor = on_gc_minor
+        gc.hooks.on_gc_collect_step = on_gc_collect_step
+        self.fire_gc_minor(10, 20, 30, 4096)
+        self.fire_gc_collect_step(10, 1, 1, 8192)
+        gc.hooks.reset()
+        assert lst == [4096, 8192]
+
     def test_on_gc_collect(self):
         import gc
         lst = []
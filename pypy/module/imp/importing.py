@@ -2,7 +2,7 @@
 Implementation of the interpreter-level default import logic.
 """
 
-import sys, os, stat
+import sys, os, stat, time
 
 from pypy.interpreter.module import Module
 from pypy.interpreter.gateway import interp2app, unwrap_spec
@@ -16,6 +16,7 @@ from rpython.rlib import streamio, jit
 from rpython.rlib.streamio import StreamErrors
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from pypy.module.sys.version import PYPY_VERSION
+from pypy.module.imp.snapshot import get_stdlib_snapshot
 
 _WIN32 = sys.platform == 'win32'
 
@@ -81,20 +82,24 @@ def has_init_module(space, filepart):
         return True
     return False
 
-def find_modtype(space, filepart):
+def find_modtype(space, filepart, listing=None, partname=''):
     """Check which kind of module to import for the given filepart,
     which is a path without extension.  Returns PY_SOURCE, PY_COMPILED or
     SEARCH_ERROR.
+
+    If 'listing' is the cached content of the directory containing the
+    filepart, whose last component is 'partname', the files that are not
+    listed there are not looked for at all.
     """
     # check the .py file
     pyfile = filepart + ".py"
-    if file_exists(pyfile):
+    if may_exist(listing, partname + ".py") and file_exists(pyfile):
         return PY_SOURCE, ".py", "U"
 
     # on Windows, also check for a .pyw file
     if _WIN32:
         pyfile = filepart + ".pyw"
-        if file_exists(pyfile):
+        if may_exist(listing, partname + ".pyw") and file_exists(pyfile):
             return PY_SOURCE, ".pyw", "U"
 
     # The .py file does not exist.  By default on PyPy, lonepycfiles
@@ -105,14 +110,15 @@ def find_modtype(space, filepart):
     # check the .pyc file
     if space.config.objspace.lonepycfiles:
         pycfile = filepart + ".pyc"
-        if file_exists(pycfile):
+        if may_exist(listing, partname + ".pyc") and file_exists(pycfile):
             # existing .pyc file
             return PY_COMPILED, ".pyc", "rb"
 
     if has_so_extension(space):
         so_extension = get_so_extension(space)
         pydfile = filepart + so_extension
-        if file_exists(pydfile):
+        if (may_exist(listing, partname + so_extension) and
+                file_exists(pydfile)):
             return C_EXTENSION, so_extension, "rb"
 
     return SEARCH_ERROR, None, None
@@ -520,22 +526,104 @@ W_NullImporter.typedef = TypeDef(
     find_module=interp2app(W_NullImporter.find_module_w),
     )
 
+class DirListing(object):
+    """The names found in a directory of sys.path (or of a package's
+    __path__) when it was last listed."""
+
+    def __init__(self, dircache, mtime, names):
+        self.dircache = dircache
+        self.mtime = mtime
+        self.names = names
+
+    def contains(self, name):
+        if name in self.names:
+            return True
+        # a stat() call that we don't need to do
+        self.dircache.saved_syscalls += 1
+        return False
+
+def may_exist(listing, name):
+    """Return False if the directory 'listing' surely doesn't contain the
+    given name, and True if it might (or if there is no listing)."""
+    return listing is None or listing.contains(name)
+
+class ImportDirCache(object):
+    """Cache of the content of the directories in which modules are
+    searched.  When a module is looked for, the directory is stat()ed
+    once, and if its mtime did not change since it was listed, all the
+    candidate files that are not in the listing are skipped without
+    further system calls.
+
+    A directory modified less than a second before it is listed is not
+    cached: the granularity of the mtime might not be fine enough to see
+    changes done just after the listing.
+    """
+
+    def __init__(self, space):
+        self.listings = {}
+        self.missing = DirListing(self, -1.0, {})
+        self.saved_syscalls = 0
+        self.listdir_calls = 0
+
+    def clear(self):
+        self.listings = {}
+
+    def get_listing(self, path):
+        """Return the DirListing for the given path, or None if it cannot
+        be used.  Only absolute paths are cached: the meaning of the other
+        ones depends on the current directory."""
+        if not path or not os.path.isabs(path):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            # nothing can be found there (e.g. the directory doesn't exist
+            # or is a zip file that the zipimporter didn't handle)
+            self.listings.pop(path, None)
+            return self.missing
+        mtime = st.st_mtime
+        listing = self.listings.get(path, None)
+        if listing is not None and listing.mtime == mtime:
+            return listing
+        if mtime + 1.0 >= time.time():
+            # the directory was changed very recently, don't cache it
+            self.listings.pop(path, None)
+            return None
+        try:
+            names = os.listdir(path)
+        except OSError:
+            self.listings.pop(path, None)
+            return None
+        self.listdir_calls += 1
+        d = {}
+        for name in names:
+            d[name] = True
+        listing = DirListing(self, mtime, d)
+        self.listings[path] = listing
+        return listing
+
+def get_import_dircache(space):
+    return space.fromcache(ImportDirCache)
+
 class FindInfo:
     def __init__(self, modtype, filename, stream,
-                 suffix="", filemode="", w_loader=None):
+                 suffix="", filemode="", w_loader=None, snapshot_entry=None):
         self.modtype = modtype
         self.filename = filename
         self.stream = stream
         self.suffix = suffix
         self.filemode = filemode
         self.w_loader = w_loader
+        self.snapshot_entry = snapshot_entry
 
     @staticmethod
     def fromLoader(w_loader):
         return FindInfo(IMP_HOOK, '', None, w_loader=w_loader)
 
 def find_module(space, modulename, w_modulename, partname, w_path,
-                use_loader=True):
+                use_loader=True, use_snapshot=True):
     # Examin importhooks (PEP302) before doing the import
     if use_loader:
         w_loader  = find_in_meta_path(space, w_modulename, w_path)
@@ -578,18 +666,27 @@ def find_module(space, modulename, w_modulename, partname, w_path,
             path = space.fsencode_w(w_pathitem)
             filepart = os.path.join(path, partname)
             log_pyverbose(space, 2, "# trying %s\n" % (filepart,))
-            if os.path.isdir(filepart) and case_ok(filepart):
+            listing = get_import_dircache(space).get_listing(path)
+            if (may_exist(listing, partname) and os.path.isdir(filepart) and
+                    case_ok(filepart)):
                 if has_init_module(space, filepart):
                     return FindInfo(PKG_DIRECTORY, filepart, None)
                 else:
                     msg = ("Not importing directory '%s' missing __init__.py" %
                            (filepart,))
                     space.warn(space.newtext(msg), space.w_ImportWarning)
-            modtype, suffix, filemode = find_modtype(space, filepart)
+            modtype, suffix, filemode = find_modtype(space, filepart,
+                                                     listing, partname)
             try:
                 if modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
                     assert suffix is not None
                     filename = filepart + suffix
+                    if modtype == PY_SOURCE and use_snapshot:
+                        entry = get_stdlib_snapshot(space).lookup(
+                            filename, get_pyc_magic(space))
+                        if entry is not None:
+                            return FindInfo(PY_FROZEN, filename, None, suffix,
+                                            filemode, snapshot_entry=entry)
                     stream = streamio.open_file_as_stream(filename, filemode)
                     try:
                         return FindInfo(modtype, filename, stream, suffix, filemode)
@@ -641,7 +738,8 @@ def load_module(space, w_modulename, find_info, reuse=False):
         return space.getbuiltinmodule(find_info.filename, force_init=True,
                                       reuse=reuse)
 
-    if find_info.modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION, PKG_DIRECTORY):
+    if find_info.modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION, PKG_DIRECTORY,
+                             PY_FROZEN):
         w_mod = None
         if reuse:
             try:
@@ -669,6 +767,10 @@ def load_module(space, w_modulename, find_info, reuse=False):
                 return load_compiled_module(space, w_modulename, w_mod, find_info.filename,
                                      magic, timestamp,
                                      _wrap_readall(space, find_info.stream))
+            elif find_info.modtype == PY_FROZEN:
+                return load_snapshot_module(space, w_modulename, w_mod,
+                                            find_info.filename,
+                                            find_info.snapshot_entry)
             elif find_info.modtype == PKG_DIRECTORY:
                 w_path = space.newlist([space.newtext(find_info.filename)])
                 space.setattr(w_mod, space.newtext('__path__'), w_path)
@@ -680,7 +782,8 @@ def load_module(space, w_modulename, find_info, reuse=False):
                     w_mod = load_module(space, w_modulename, find_info,
                                         reuse=True)
                 finally:
-                    _close_ignore(find_info.stream)
+                    if find_info.stream is not None:
+                        _close_ignore(find_info.stream)
                 return w_mod
             elif find_info.modtype == C_EXTENSION and has_so_extension(space):
                 return load_c_extension(space, find_info.filename,
@@ -1090,6 +1193,28 @@ def load_compiled_module(space, w_modulename, w_mod, cpathname, magic,
     return exec_code_module(space, w_mod, code_w, w_modulename,
                             check_afterwards=check_afterwards)
 
+@jit.dont_look_inside
+def load_snapshot_module(space, w_modulename, w_mod, pathname, entry):
+    """
+    Load a module from the snapshot of the standard library and execute
+    it.  Returns 'sys.modules[modulename]', which must exist.
+    """
+    log_pyverbose(space, 1, "import %s # precompiled from %s\n" %
+                  (space.text_w(w_modulename), pathname))
+    data = get_stdlib_snapshot(space).get_code_data(entry)
+    code_w = read_compiled_module(space, pathname, data)
+    try:
+        optimize = space.sys.get_flag('optimize')
+    except RuntimeError:
+        # during bootstrapping
+        optimize = 0
+    if optimize >= 2:
+        code_w.remove_docstrings(space)
+
+    # the snapshot may have been built before the tree was moved
+    update_code_filenames(space, code_w, pathname)
+    return exec_code_module(space, w_mod, code_w, w_modulename)
+
 def open_exclusive(space, cpathname, mode):
     try:
         os.unlink(cpathname)
@@ -54,7 +54,8 @@ def find_module(space, w_name, w_path=None):
         w_path = None
 
     find_info = importing.find_module(
-        space, name, w_name, name, w_path, use_loader=False)
+        space, name, w_name, name, w_path, use_loader=False,
+        use_snapshot=False)
     if not find_info:
         raise oefmt(space.w_ImportError, "No module named %s", name)
 
@@ -0,0 +1,168 @@
+"""
+Support for the snapshot of the standard library: a single file containing
+the marshalled code objects of the modules of lib-python and lib_pypy.  It
+is built by lib_pypy/pypy_tools/build_stdlib_snapshot.py, using the pypy
+that will load it.  The file is mapped in memory the first time a module
+is looked for in the directories of the standard library, and a module
+found there is loaded without opening its .py and .pyc files.  Only the
+parts of the file that are used are read from the disk.
+
+The format is (all integers are signed 4-bytes little-endian, like in the
+header of the .pyc files):
+
+    'PyPySnap'                  magic of the snapshot format
+    pyc magic                   the magic of the compiled code objects
+    number of entries
+    for each entry:
+        length, path            path of the source file, relative to
+                                the root of the snapshot (the directory
+                                containing lib-python and lib_pypy)
+        mtime, size             of the source file, checked at import
+        offset, length          of the marshalled code object
+    marshalled code objects
+"""
+
+import os, stat
+
+from rpython.rlib import rmmap
+
+
+SNAPSHOT_MAGIC = 'PyPySnap'
+SNAPSHOT_FILENAME = 'stdlib.snapshot'
+
+
+def _get_int(data, pos):
+    a = ord(data[pos])
+    b = ord(data[pos + 1])
+    c = ord(data[pos + 2])
+    d = ord(data[pos + 3])
+    if d >= 0x80:
+        d -= 0x100
+    return a | (b << 8) | (c << 16) | (d << 24)
+
+
+class SnapshotEntry(object):
+    def __init__(self, mtime, size, offset, length):
+        self.mtime = mtime
+        self.size = size
+        self.offset = offset
+        self.length = length
+
+
+class StdlibSnapshot(object):
+    """The snapshot of the standard library, for one space.  'root' is set
+    by sys.pypy_find_stdlib(), when app_main.py finds the standard library;
+    the file itself is only opened when the first module is looked for."""
+
+    def __init__(self, space):
+        self.root = None
+        self.mmap = None
+        self.entries = None
+
+    def set_root(self, root):
+        self.close()
+        self.root = root
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        self.mmap = None
+        self.entries = None
+
+    def _open(self, root, magic):
+        # an empty index makes all the lookups fail, e.g. when the file is
+        # missing or does not match this pypy
+        self.entries = {}
+        filename = os.path.join(os.path.join(root, 'lib_pypy'),
+                                SNAPSHOT_FILENAME)
+        try:
+            fd = os.open(filename, os.O_RDONLY, 0)
+        except OSError:
+            return
+        try:
+            try:
+                m = rmmap.mmap(fd, 0, access=rmmap.ACCESS_READ)
+            except (OSError, rmmap.RMMapError):
+                return
+        finally:
+            os.close(fd)
+        try:
+            entries = self._read_index(m, magic)
+        except ValueError:
+            entries = None
+        if entries is None:
+            m.close()
+            return
+        self.mmap = m
+        self.entries = entries
+
+    @staticmethod
+    def _read_index(m, magic):
+        """Parse the index of the snapshot.  Returns None if it was built
+        by another version of pypy, and raises ValueError if it is
+        truncated."""
+        size = m.size
+        header_size = len(SNAPSHOT_MAGIC) + 8
+        if size < header_size:
+            raise ValueError
+        header = m.getslice(0, header_size)
+        if header[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        if _get_int(header, len(SNAPSHOT_MAGIC)) != magic:
+            return None
+        count = _get_int(header, len(SNAPSHOT_MAGIC) + 4)
+        entries = {}
+        pos = header_size
+        for i in range(count):
+            if pos + 4 > size:
+                raise ValueError
+            pathlen = _get_int(m.getslice(pos, 4), 0)
+            pos += 4
+            if pathlen < 0 or pos + pathlen + 16 > size:
+                raise ValueError
+            path = m.getslice(pos, pathlen)
+            pos += pathlen
+            data = m.getslice(pos, 16)
+            pos += 16
+            offset = _get_int(data, 8)
+            length = _get_int(data, 12)
+            if offset < 0 or length < 0 or offset + length > size:
+                raise ValueError
+            entries[path] = SnapshotEntry(_get_int(data, 0),
+                                          _get_int(data, 4),
+                                          offset, length)
+        return entries
+
+    def lookup(self, pathname, magic):
+        """Return the SnapshotEntry for the source file 'pathname', or None
+        if it is not in the snapshot or if the file changed since the
+        snapshot was built."""
+        root = self.root
+        if root is None:
+            return None
+        prefix_len = len(root) + 1
+        if (len(pathname) <= prefix_len or not pathname.startswith(root) or
+                pathname[len(root)] != os.sep):
+            return None
+        if self.entries is None:
+            self._open(root, magic)
+        entry = self.entries.get(pathname[prefix_len:], None)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(pathname)
+        except OSError:
+            return None
+        if (not stat.S_ISREG(st.st_mode) or
+                int(st.st_mtime) != entry.mtime or
+                st.st_size != entry.size):
+            return None
+        return entry
+
+    def get_code_data(self, entry):
+        """Return the marshalled code object of the given entry."""
+        return self.mmap.getslice(entry.offset, entry.length)
+
+
+def get_stdlib_snapshot(space):
+    return space.fromcache(StdlibSnapshot)
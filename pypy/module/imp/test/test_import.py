@@ -1598,3 +1598,169 @@ class AppTestMultithreadedImp(object):
 
         finally:
             sys.path[:] = oldpath
+
+
+class AppTestImportDirCache(object):
+    def setup_class(cls):
+        p = udir.join('impdircache')
+        p.ensure(dir=1)
+        p.join('dircache_a.py').write("x = 42\n")
+        p.join('dircache_pkg').ensure(dir=1)
+        p.join('dircache_pkg', '__init__.py').write("y = 43\n")
+        # an old mtime, so that the listing of the directories can be cached
+        os.utime(str(p.join('dircache_pkg')), (1000000000, 1000000000))
+        os.utime(str(p), (1000000000, 1000000000))
+        cls.w_tmppath = cls.space.wrap(str(p))
+        cls.w_relpath = cls.space.wrap(os.path.relpath(str(p)))
+
+    def test_cache(self):
+        import sys, os, __pypy__
+        oldpath = sys.path[:]
+        try:
+            sys.path[:] = [self.tmppath]
+            # writing the .pyc files would change the mtime of the directory
+            sys.dont_write_bytecode = True
+            __pypy__.clear_import_cache()
+            saved0, listdir0 = __pypy__.import_cache_counters()
+            import dircache_a
+            assert dircache_a.x == 42
+            import dircache_pkg
+            assert dircache_pkg.y == 43
+            saved1, listdir1 = __pypy__.import_cache_counters()
+            # the directory and the package were listed
+            assert listdir1 == listdir0 + 2
+            assert saved1 > saved0
+            raises(ImportError, "import dircache_missing")
+            saved2, listdir2 = __pypy__.import_cache_counters()
+            assert listdir2 == listdir1
+            assert saved2 > saved1
+            # adding a file changes the mtime of the directory
+            with open(os.path.join(self.tmppath, 'dircache_b.py'), 'w') as f:
+                f.write("z = 44\n")
+            import dircache_b
+            assert dircache_b.z == 44
+        finally:
+            sys.path[:] = oldpath
+            sys.dont_write_bytecode = False
+            for name in ['dircache_a', 'dircache_pkg', 'dircache_b']:
+                sys.modules.pop(name, None)
+
+    def test_relative_path_not_cached(self):
+        import sys, __pypy__
+        oldpath = sys.path[:]
+        try:
+            sys.path[:] = [self.relpath]
+            __pypy__.clear_import_cache()
+            saved0, listdir0 = __pypy__.import_cache_counters()
+            raises(ImportError, "import dircache_missing")
+            saved1, listdir1 = __pypy__.import_cache_counters()
+            assert listdir1 == listdir0
+        finally:
+            sys.path[:] = oldpath
+
+
+class AppTestStdlibSnapshot(object):
+    spaceconfig = {
+        "usemodules": ['struct'],
+    }
+
+    def setup_class(cls):
+        from pypy import pypydir
+        from pypy.module.imp.snapshot import get_stdlib_snapshot
+        root = udir.join('snapshotroot')
+        stdlib = root.join('lib-python', '2.7')
+        stdlib.ensure(dir=1)
+        root.join('lib_pypy').ensure(dir=1)
+        stdlib.join('snapmod.py').write("x = 42\ndef f(): pass\n")
+        stdlib.join('snappkg').ensure(dir=1)
+        stdlib.join('snappkg', '__init__.py').write("y = 43\n")
+        stdlib.join('snappkg', 'sub.py').write("z = 44\n")
+        stdlib.join('snapchanged.py').write("value = 'old'\n")
+        stdlib.join('test').ensure(dir=1)
+        stdlib.join('test', 'test_snap.py').write("skipped = True\n")
+        cls.w_root = cls.space.wrap(str(root))
+        cls.w_stdlib = cls.space.wrap(str(stdlib))
+        cls.w_tools = cls.space.wrap(
+            os.path.join(os.path.dirname(pypydir), 'lib_pypy', 'pypy_tools'))
+
+        def set_snapshot_root(space, w_root):
+            get_stdlib_snapshot(space).set_root(space.text_w(w_root))
+        cls.w_set_snapshot_root = cls.space.wrap(
+            gateway.interp2app(set_snapshot_root))
+
+    def teardown_class(cls):
+        from pypy.module.imp.snapshot import get_stdlib_snapshot
+        get_stdlib_snapshot(cls.space).set_root(None)
+
+    def setup_method(self, meth):
+        self.space.appexec([self.w_tools], """(tools):
+            import sys
+            sys.path.insert(0, tools)
+            import build_stdlib_snapshot
+            del sys.path[0]
+        """)
+
+    def w_build(self):
+        import build_stdlib_snapshot
+        count = build_stdlib_snapshot.build_snapshot(self.root)
+        self.set_snapshot_root(self.root)
+        return count
+
+    def test_import_from_snapshot(self):
+        import sys, os
+        assert self.build() == 4
+        oldpath = sys.path[:]
+        sys.path.insert(0, self.stdlib)
+        try:
+            import snapmod
+            import snappkg.sub
+            assert snapmod.x == 42
+            filename = os.path.join(self.stdlib, 'snapmod.py')
+            assert snapmod.__file__ == filename
+            assert snapmod.f.__code__.co_filename == filename
+            assert snappkg.y == 43
+            assert snappkg.sub.z == 44
+            # the .py files were not compiled
+            assert not os.path.exists(filename + 'c')
+            assert not os.path.exists(snappkg.sub.__file__ + 'c')
+            # imp.find_module() still returns the source file
+            import imp
+            f, pathname, description = imp.find_module('snapmod')
+            f.close()
+            assert pathname == filename
+            assert description[2] == imp.PY_SOURCE
+        finally:
+            sys.path[:] = oldpath
+            for name in ['snapmod', 'snappkg', 'snappkg.sub']:
+                sys.modules.pop(name, None)
+
+    def test_changed_source(self):
+        import sys, os
+        self.build()
+        filename = os.path.join(self.stdlib, 'snapchanged.py')
+        with open(filename, 'w') as f:
+            f.write("value = 'new, and longer'\n")
+        oldpath = sys.path[:]
+        sys.path.insert(0, self.stdlib)
+        try:
+            import snapchanged
+            assert snapchanged.value == 'new, and longer'
+        finally:
+            sys.path[:] = oldpath
+            sys.modules.pop('snapchanged', None)
+
+    def test_bad_snapshot(self):
+        import sys, os
+        self.build()
+        filename = os.path.join(self.root, 'lib_pypy', 'stdlib.snapshot')
+        with open(filename, 'r+b') as f:
+            f.truncate(30)
+        self.set_snapshot_root(self.root)
+        oldpath = sys.path[:]
+        sys.path.insert(0, self.stdlib)
+        try:
+            import snapmod
+            assert snapmod.x == 42
+        finally:
+            sys.path[:] = oldpath
+            sys.modules.pop('snapmod', None)
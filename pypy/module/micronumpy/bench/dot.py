@@ -6,27 +6,66 @@ try:
 except ImportError:
     import numpy
 
-def get_matrix(n):
+SIZES = [10, 50, 100, 200, 500, 1000]
+DTYPES = ['float64', 'float32', 'int64']
+
+def get_matrix(n, dtype=numpy.float64):
     import random
-    x = numpy.zeros((n,n), dtype=numpy.float64)
+    x = numpy.zeros((n,n), dtype=dtype)
     for i in range(n):
         for j in range(n):
-            x[i][j] = random.random()
+            x[i][j] = random.random() * 100
     return x
 
-def main(n, r):
-    x = get_matrix(n)
-    y = get_matrix(n)
+def run(n, r, dtype=numpy.float64):
+    x = get_matrix(n, dtype)
+    y = get_matrix(n, dtype)
     a = time.time()
     for _ in xrange(r):
         #z = numpy.dot(x, y)  # uses numpy possibly-blas-lib dot
         z = numpy.core.multiarray.dot(x, y)  # uses strictly numpy C dot
     b = time.time()
-    print '%d runs, %.2f seconds' % (r, b-a)
+    return b - a
 
-n = int(sys.argv[1])
-try:
-    r = int(sys.argv[2])
-except IndexError:
-    r = 1
-main(n, r)
+def main(n, r):
+    print '%d runs, %.2f seconds' % (r, run(n, r))
+
+def sweep(maxsize=1000):
+    # number of runs scaled to do about 10**8 multiply-adds per size,
+    # compared to the generic loop with a strided (non-contiguous) array
+    print '%8s %8s %6s %12s %10s' % ('dtype', 'size', 'runs', 'sec/run',
+                                    'MFlop/s')
+    for dtype in DTYPES:
+        for n in SIZES:
+            if n > maxsize:
+                break
+            r = max(1, 10 ** 8 // n ** 3)
+            t = run(n, r, dtype)
+            print '%8s %8d %6d %12.6f %10.1f' % (dtype, n, r, t / r,
+                                                 2.0 * n ** 3 * r / t / 1e6)
+    for n in SIZES:
+        if n > maxsize:
+            break
+        x = get_matrix(n)
+        y = get_matrix(n)[:, ::-1]
+        a = time.time()
+        numpy.core.multiarray.dot(x, y)
+        t = time.time() - a
+        print '%8s %8d %6d %12.6f %10.1f' % ('strided', n, 1, t,
+                                             2.0 * n ** 3 / t / 1e6)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] == 'sweep':
+        # python dot.py [sweep [maxsize]]
+        try:
+            sweep(int(sys.argv[2]))
+        except IndexError:
+            sweep()
+    else:
+        # python dot.py n [runs]
+        n = int(sys.argv[1])
+        try:
+            r = int(sys.argv[2])
+        except IndexError:
+            r = 1
+        main(n, r)
@@ -5,7 +5,11 @@ over all the array elements.
 import py
 from pypy.interpreter.error import oefmt
 from rpython.rlib import jit
+from rpython.rlib.rarithmetic import widen
+from rpython.rlib.rawstorage import (raw_storage_getitem_unaligned,
+    raw_storage_setitem_unaligned)
 from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.unroll import unrolling_iterable
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.module.micronumpy import support, constants as NPY
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
@@ -574,6 +578,141 @@ dot_driver = jit.JitDriver(name = 'numpy_dot',
                            reds = 'auto',
                            vectorize=True)
 
+# blocking of the matrix multiplication: the right array is processed in
+# blocks of DOT_BLOCK_INNER rows and DOT_BLOCK_COLS columns, which stay in
+# the cache while all the rows of the left array are multiplied by them
+DOT_BLOCK_INNER = 128
+DOT_BLOCK_COLS = 256
+# the inner loop runs along the rows of the result: if they are too short,
+# the generic loop is faster
+DOT_BLOCKED_MIN_COLS = 16
+
+def _new_blocked_dot(name, T, for_computation):
+    # the results are the same as with the generic loop: the products are
+    # added in the same order, and rounded to T after each operation
+    itemsize = rffi.sizeof(T)
+    kernel_driver = jit.JitDriver(name='numpy_dot_kernel_' + name,
+                                  greens=[], reds='auto', vectorize=True)
+    kernel1_driver = jit.JitDriver(name='numpy_dot_kernel1_' + name,
+                                   greens=[], reds='auto', vectorize=True)
+
+    # 'a' is already converted with for_computation(): the reds of the
+    # kernels can't be single floats
+    def muladd(c, a, b):
+        prod = rffi.cast(T, a * for_computation(b))
+        return rffi.cast(T, for_computation(c) + for_computation(prod))
+
+    def kernel(ostorage, o, rstorage, r0, r1, a0, a1, count):
+        # o[j] = o[j] + a0 * r0[j] + a1 * r1[j], for j in range(count);
+        # two rows of the right array are used at once, to halve the
+        # loads and stores of the result
+        j = 0
+        while j < count:
+            kernel_driver.jit_merge_point()
+            c = raw_storage_getitem_unaligned(T, ostorage, o)
+            b0 = raw_storage_getitem_unaligned(T, rstorage, r0)
+            b1 = raw_storage_getitem_unaligned(T, rstorage, r1)
+            c = muladd(muladd(c, a0, b0), a1, b1)
+            raw_storage_setitem_unaligned(ostorage, o, c)
+            o += itemsize
+            r0 += itemsize
+            r1 += itemsize
+            j += 1
+
+    def kernel1(ostorage, o, rstorage, r0, a0, count):
+        j = 0
+        while j < count:
+            kernel1_driver.jit_merge_point()
+            c = raw_storage_getitem_unaligned(T, ostorage, o)
+            b0 = raw_storage_getitem_unaligned(T, rstorage, r0)
+            raw_storage_setitem_unaligned(ostorage, o, muladd(c, a0, b0))
+            o += itemsize
+            r0 += itemsize
+            j += 1
+
+    def blocked_dot(left_impl, right_impl, result_impl):
+        # result += left * right, for C-contiguous 2d arrays of T
+        n = left_impl.get_shape()[0]
+        m = left_impl.get_shape()[1]
+        p = right_impl.get_shape()[1]
+        lstart = left_impl.start
+        rstart = right_impl.start
+        ostart = result_impl.start
+        with left_impl as lstorage:
+            with right_impl as rstorage:
+                with result_impl as ostorage:
+                    jj = 0
+                    while jj < p:
+                        jcount = min(DOT_BLOCK_COLS, p - jj)
+                        kk = 0
+                        while kk < m:
+                            kend = min(kk + DOT_BLOCK_INNER, m)
+                            for i in range(n):
+                                o = ostart + (i * p + jj) * itemsize
+                                arow = lstart + i * m * itemsize
+                                k = kk
+                                while k + 1 < kend:
+                                    a0 = for_computation(
+                                        raw_storage_getitem_unaligned(
+                                            T, lstorage, arow + k * itemsize))
+                                    a1 = for_computation(
+                                        raw_storage_getitem_unaligned(
+                                            T, lstorage,
+                                            arow + (k + 1) * itemsize))
+                                    r0 = rstart + (k * p + jj) * itemsize
+                                    kernel(ostorage, o, rstorage, r0,
+                                           r0 + p * itemsize, a0, a1, jcount)
+                                    k += 2
+                                if k < kend:
+                                    a0 = for_computation(
+                                        raw_storage_getitem_unaligned(
+                                            T, lstorage, arow + k * itemsize))
+                                    r0 = rstart + (k * p + jj) * itemsize
+                                    kernel1(ostorage, o, rstorage, r0, a0,
+                                            jcount)
+                            kk = kend
+                        jj += jcount
+    blocked_dot.__name__ = 'blocked_dot_' + name
+    return blocked_dot
+
+blocked_dot_funcs = unrolling_iterable([
+    (NPY.DOUBLE, _new_blocked_dot('float64', rffi.DOUBLE, float)),
+    (NPY.FLOAT, _new_blocked_dot('float32', rffi.FLOAT, float)),
+    (NPY.LONG, _new_blocked_dot('long', rffi.LONG, widen)),
+    (NPY.LONGLONG, _new_blocked_dot('longlong', rffi.LONGLONG, widen)),
+])
+
+def _is_c_contiguous_2d(impl, dtype):
+    shape = impl.get_shape()
+    if (len(shape) != 2 or impl.dtype.num != dtype.num or
+            not impl.dtype.is_native()):
+        return False
+    strides = impl.get_strides()
+    return (strides[1] == dtype.elsize and
+            strides[0] == shape[1] * dtype.elsize)
+
+def try_blocked_dot(left, right, result, dtype):
+    """ Multiply two 2d matrices with the cache-blocked loop, if they are
+    C-contiguous arrays of a native float32, float64 or int64 dtype.
+    Returns False if the generic loop must be used. """
+    if not dtype.is_native():
+        return False
+    left_impl = left.implementation
+    right_impl = right.implementation
+    result_impl = result.implementation
+    if right.get_shape()[-1] < DOT_BLOCKED_MIN_COLS:
+        return False
+    if not (_is_c_contiguous_2d(left_impl, dtype) and
+            _is_c_contiguous_2d(right_impl, dtype) and
+            _is_c_contiguous_2d(result_impl, dtype)):
+        return False
+    num = dtype.num
+    for dtype_num, blocked_dot in blocked_dot_funcs:
+        if num == dtype_num:
+            blocked_dot(left_impl, right_impl, result_impl)
+            return True
+    return False
+
 def multidim_dot(space, left, right, result, dtype, right_critical_dim):
     ''' assumes left, right are concrete arrays
     given left.shape == [3, 5, 7],
@@ -594,6 +733,8 @@ def multidim_dot(space, left, right, result, dtype, right_critical_dim):
     right_impl = right.implementation
     assert left_shape[-1] == right_shape[right_critical_dim]
     assert result.get_dtype() == dtype
+    if try_blocked_dot(left, right, result, dtype):
+        return result
     outi, outs = result.create_iter()
     outi.track_index = False
     lefti = AllButAxisIter(left_impl, len(left_shape) - 1)
@@ -215,3 +215,43 @@ class AppTestNumSupport(BaseNumpyAppTest):
         a.put(23, -1, mode=1)  # wrap
         assert (a == array([0, 1, -10, -1, -15])).all()
         raises(TypeError, "arange(5).put(22, -5, mode='zzzz')")  # unrecognized mode
+
+
+class AppTestBlockedDot(BaseNumpyAppTest):
+    def setup_class(cls):
+        from pypy.module.micronumpy import loop
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        # use tiny blocks, to test the edges of the blocks with small arrays
+        cls.saved_blocks = (loop.DOT_BLOCK_INNER, loop.DOT_BLOCK_COLS,
+                            loop.DOT_BLOCKED_MIN_COLS)
+        loop.DOT_BLOCK_INNER = 4
+        loop.DOT_BLOCK_COLS = 3
+        loop.DOT_BLOCKED_MIN_COLS = 1
+
+    def teardown_class(cls):
+        from pypy.module.micronumpy import loop
+        (loop.DOT_BLOCK_INNER, loop.DOT_BLOCK_COLS,
+         loop.DOT_BLOCKED_MIN_COLS) = cls.saved_blocks
+
+    def test_dot_blocked(self):
+        # contiguous float and int64 matrices use a cache-blocked loop,
+        # the results must be the same as with the generic loop
+        from numpy import arange, dot
+        for dtype in ['float64', 'float32', 'int64']:
+            a = (arange(3 * 11) % 7 - 3).astype(dtype).reshape(3, 11)
+            b = (arange(11 * 8) % 5 - 2).astype(dtype).reshape(11, 8)
+            c = dot(a, b)
+            assert c.dtype == dtype
+            assert c.shape == (3, 8)
+            # non-contiguous copies take the generic loop
+            c2 = dot(a[:, ::-1][:, ::-1], b[::-1][::-1])
+            assert (c == c2).all()
+            assert c[1, 5] == sum([a[1, k] * b[k, 5] for k in range(11)])
+        a = arange(6.).reshape(2, 3)
+        assert (dot(a, a.T) == [[5, 14], [14, 50]]).all()
+        c = dot(arange(1., 3.).reshape(2, 1), arange(3.).reshape(1, 3))
+        assert c.tolist() == [[0, 1, 2], [0, 2, 4]]
+        out = arange(4.).reshape(2, 2)
+        c = dot(a, a[:, ::-1].T, out=out)
+        assert c is out
+        assert out.tolist() == [[1, 10], [10, 46]]
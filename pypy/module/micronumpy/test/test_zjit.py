@@ -910,6 +910,21 @@ class TestNumpyJit(LLJitMixin):
         assert int(result) == 86
         self.check_vectorized(1, 1)
 
+    def define_dot_blocked():
+        return """
+        mat = |64|
+        m = reshape(mat, [4,16])
+        vec = |8|
+        n = reshape(vec, [2,4])
+        a = dot(n, m)
+        a -> 1 -> 1
+        """
+
+    def test_dot_blocked(self):
+        result = self.run("dot_blocked")
+        assert int(result) == 4 * 1 + 5 * 17 + 6 * 33 + 7 * 49
+        self.check_vectorized(1, 1)
+
 
     # NOT WORKING
 
@@ -0,0 +1,25 @@
+from __future__ import absolute_import
+
+_started = []
+
+
+def start_background_compiler():
+    """Set the 'deferred_compile' JIT parameter and start a daemon thread
+that compiles the traced loops one at a time.  The threads that trace
+them go on in the interpreter instead of waiting for the optimizer and
+the backend.  The compiling thread sleeps until a loop is queued.  It
+needs the GIL like any other, and keeps it while compiling one loop, but
+gives it to the other threads between two loops: a thread that needs the
+GIL waits for at most one loop, instead of for the whole queue."""
+    import thread
+    import pypyjit
+    pypyjit.set_param(deferred_compile=1)
+    if _started:
+        return
+    _started.append(True)
+
+    def compile_loops():
+        while True:
+            pypyjit.wait_pending()
+            pypyjit.compile_pending(1)
+    thread.start_new_thread(compile_loops, ())
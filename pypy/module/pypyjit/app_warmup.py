@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+import marshal
+
+_MAGIC = 'pypyjit-warmup-1'
+
+
+def save_warmup_profile(filename):
+    """Write the loops compiled so far (see record_warmup_profile()) to
+the given file."""
+    import pypyjit
+    entries = pypyjit.get_warmup_profile()
+    with open(filename, 'wb') as f:
+        marshal.dump((_MAGIC, entries), f)
+
+def load_warmup_profile(filename):
+    """Read a file written by save_warmup_profile() and install it with
+set_warmup_profile().  Return the number of loops in it."""
+    import pypyjit
+    with open(filename, 'rb') as f:
+        try:
+            data = marshal.load(f)
+        except (EOFError, TypeError, ValueError):
+            data = None
+    if (not isinstance(data, tuple) or len(data) != 2 or
+            data[0] != _MAGIC):
+        raise ValueError("%r is not a warmup profile" % (filename,))
+    entries = data[1]
+    pypyjit.set_warmup_profile(entries)
+    return len(entries)
+
+def enable_warmup_profile(filename):
+    """Load the profile from the given file if it exists, record the
+loops compiled by this process, and write them back to the file at exit.
+This is what setting the PYPY_WARMUP_PROFILE environment variable does."""
+    import atexit
+    import pypyjit
+    try:
+        load_warmup_profile(filename)
+    except (IOError, ValueError):
+        pass      # missing or not a profile: start from scratch
+    pypyjit.record_warmup_profile(True)
+
+    def save():
+        try:
+            save_warmup_profile(filename)
+        except IOError:
+            pass
+    atexit.register(save)
@@ -0,0 +1,73 @@
+# Request latency while the JIT warms up, with loops compiled in the
+# thread that traced them, and with pypyjit.start_background_compiler().
+# Every "request" runs one of many handlers, each with its own loops,
+# then waits a bit as if doing I/O.  The script runs itself once per
+# mode, so that both start with a cold JIT.
+#
+#     pypy latency.py [requests]
+
+import random
+import subprocess
+import sys
+import time
+
+NUM_HANDLERS = 100
+
+def make_handlers():
+    handlers = []
+    for i in range(NUM_HANDLERS):
+        src = ("def handler%d(data):\n"
+               "    total = 0\n"
+               "    for x in data:\n"
+               "        if x %% %d == 0:\n"
+               "            total += x * 3\n"
+               "        else:\n"
+               "            total ^= x\n"
+               "    words = {}\n"
+               "    for x in data:\n"
+               "        key = x & 0x3f\n"
+               "        words[key] = words.get(key, 0) + 1\n"
+               "    return total + len(words)\n" % (i, i % 7 + 2))
+        d = {}
+        exec compile(src, '<handler-%d>' % i, 'exec') in d
+        handlers.append(d['handler%d' % i])
+    return handlers
+
+def percentile(sorted_values, p):
+    index = min(int(len(sorted_values) * p), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def child(mode, num_requests):
+    if mode == 'background':
+        import pypyjit
+        pypyjit.start_background_compiler()
+    handlers = make_handlers()
+    data = range(2000)
+    rnd = random.Random(42)
+    latencies = []
+    for i in range(num_requests):
+        handler = rnd.choice(handlers)
+        t0 = time.time()
+        handler(data)
+        latencies.append(time.time() - t0)
+        time.sleep(0.001)     # "waiting for the network"
+    latencies.sort()
+    print ' '.join(['%.6f' % percentile(latencies, p)
+                    for p in (0.5, 0.9, 0.99, 1.0)])
+
+def main(num_requests):
+    if 'pypyjit' not in sys.builtin_module_names:
+        print >> sys.stderr, "needs a PyPy with a JIT"
+        sys.exit(1)
+    print '%-12s %10s %10s %10s %10s' % ('', 'p50', 'p90', 'p99', 'max')
+    for mode in ['inline', 'background']:
+        out = subprocess.check_output([sys.executable, __file__, '--child',
+                                       mode, str(num_requests)])
+        values = [float(x) * 1000 for x in out.split()]
+        print '%-12s %8.2fms %8.2fms %8.2fms %8.2fms' % tuple([mode] + values)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,85 @@
+# Time-to-steady-state with and without a warmup profile.  The workload
+# is many small functions, each with a hot loop.  The script runs itself
+# three times: once without a profile, once to record one, and once
+# replaying it.
+#
+#     pypy warmup.py [rounds]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+NUM_FUNCS = 200
+
+def make_funcs():
+    funcs = []
+    for i in range(NUM_FUNCS):
+        src = ("def f%d(n):\n"
+               "    total = 0\n"
+               "    for j in xrange(n):\n"
+               "        total += (j * %d) & 0xff\n"
+               "    return total\n" % (i, i + 1))
+        d = {}
+        exec compile(src, '<warmup-bench-%d>' % i, 'exec') in d
+        funcs.append(d['f%d' % i])
+    return funcs
+
+def workload(rounds):
+    funcs = make_funcs()
+    times = []
+    for r in range(rounds):
+        t0 = time.time()
+        for f in funcs:
+            f(300)
+        times.append(time.time() - t0)
+    return times
+
+def steady_state(times, tolerance=1.1):
+    # time until the first round that is within 'tolerance' of the
+    # median of the last quarter of rounds
+    tail = sorted(times[-max(len(times) // 4, 1):])
+    target = tail[len(tail) // 2] * tolerance
+    elapsed = 0.0
+    for t in times:
+        if t <= target:
+            return elapsed
+        elapsed += t
+    return elapsed
+
+def child(rounds):
+    times = workload(rounds)
+    print '%.6f %.6f' % (steady_state(times), sum(times))
+
+def run(rounds, profile=None):
+    env = os.environ.copy()
+    env.pop('PYPY_WARMUP_PROFILE', None)
+    if profile is not None:
+        env['PYPY_WARMUP_PROFILE'] = profile
+    out = subprocess.check_output([sys.executable, __file__, '--child',
+                                   str(rounds)], env=env)
+    return map(float, out.split())
+
+def main(rounds):
+    if 'pypyjit' not in sys.builtin_module_names:
+        print >> sys.stderr, "needs a PyPy with a JIT"
+    fd, profile = tempfile.mkstemp(suffix='.warmup')
+    os.close(fd)
+    os.unlink(profile)
+    try:
+        cold = run(rounds)
+        run(rounds, profile)      # records the profile
+        warm = run(rounds, profile)
+    finally:
+        if os.path.exists(profile):
+            os.unlink(profile)
+    print '%-10s %14s %10s' % ('', 'steady state', 'total')
+    for name, (steady, total) in [('cold', cold), ('profile', warm)]:
+        print '%-10s %12.1fms %8.1fms' % (name, steady * 1000, total * 1000)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(int(sys.argv[2]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -5,6 +5,8 @@ from rpython.rlib.jit import JitHookInterface, Counters
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmup import (WarmupState,
+    record_compiled_loop)
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -12,7 +14,8 @@ class PyPyJitIface(JitHookInterface):
         cache = space.fromcache(Cache)
         return (cache.w_compile_hook is not None or
                 cache.w_abort_hook is not None or
-                cache.w_trace_too_long_hook is not None)
+                cache.w_trace_too_long_hook is not None or
+                space.fromcache(WarmupState).recording)
 
 
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -53,6 +56,10 @@ class PyPyJitIface(JitHookInterface):
             finally:
                 cache.in_recursion = False
 
+    def on_compile_deferred(self, jitdriver, greenkey):
+        from pypy.module.pypyjit.interp_jit import DeferredCompileState
+        self.space.fromcache(DeferredCompileState).wake_up()
+
     def after_compile(self, debug_info):
         self._compile_hook(debug_info, is_bridge=False)
 
@@ -67,6 +74,8 @@ class PyPyJitIface(JitHookInterface):
 
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
+        if not is_bridge:
+            record_compiled_loop(space, debug_info)
         cache = space.fromcache(Cache)
         if cache.in_recursion:
             return
@@ -19,6 +19,7 @@ from pypy.interpreter.pyopcode import ExitFrame, Yield
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app
+from pypy.module.pypyjit.interp_warmup import prime_warmup_loops
 from opcode import opmap
 
 
@@ -78,6 +79,8 @@ class __extend__(PyFrame):
 
     def dispatch(self, pycode, next_instr, ec):
         self = hint(self, access_directly=True)
+        if not we_are_jitted() and pycode.warmup_instrs is not None:
+            prime_warmup_loops(pycode)
         next_instr = r_uint(next_instr)
         is_being_profiled = self.get_is_being_profiled()
         try:
@@ -250,6 +253,65 @@ def releaseall(space):
     """
     jit_hooks.stats_memmgr_release_all(None)
 
+@unwrap_spec(limit=int)
+@dont_look_inside
+def compile_pending(space, limit=-1):
+    """ compile_pending(limit=-1)
+
+    Compile the loops that were traced while the 'deferred_compile' JIT
+    parameter was set, at most 'limit' of them if it is not negative.
+    Returns the number of loops processed.
+    """
+    return space.newint(jit_hooks.stats_compile_pending_loops(None, limit))
+
+@dont_look_inside
+def pending_compilations(space):
+    """ pending_compilations()
+
+    Return the number of traced loops waiting for compile_pending().
+    """
+    return space.newint(jit_hooks.stats_get_pending_loops(None))
+
+
+class DeferredCompileState(object):
+    """Lets a compiler thread sleep in wait_pending() until a loop is
+    queued.  The lock is held while nobody is waiting; it is released by
+    PyPyJitIface.on_compile_deferred() to wake up the waiting thread."""
+
+    def __init__(self, space):
+        self.space = space
+        self.lock = None
+        self.waiting = False
+
+    def wait(self):
+        if self.lock is None:
+            self.lock = self.space.allocate_lock()
+            self.lock.acquire(True)
+        self.waiting = True
+        self.lock.acquire(True)     # releases the GIL while blocked
+
+    def wake_up(self):
+        if self.waiting:
+            self.waiting = False
+            self.lock.release()
+
+@dont_look_inside
+def wait_pending(space):
+    """ wait_pending()
+
+    Block until at least one traced loop waits for compile_pending().
+    Meant for a single compiler thread: the GIL is first given to the other
+    threads, then released while waiting.
+    """
+    if not space.config.objspace.usemodules.thread:
+        raise oefmt(space.w_RuntimeError,
+                    "wait_pending() needs the 'thread' module")
+    from rpython.rlib import rgil
+    rgil.yield_thread()
+    state = space.fromcache(DeferredCompileState)
+    while jit_hooks.stats_get_pending_loops(None) == 0:
+        state.wait()
+
 # class Cache(object):
 #     in_recursion = False
 
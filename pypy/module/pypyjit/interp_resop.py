@@ -12,7 +12,7 @@ from rpython.rtyper.rclass import OBJECT
 from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.rarithmetic import r_uint
 from rpython.rlib import jit_hooks
-from rpython.rlib.jit import Counters
+from rpython.rlib.jit import Counters, AdaptiveCounters
 from rpython.rlib.objectmodel import compute_unique_id
 from pypy.module.pypyjit.interp_jit import pypyjitdriver
 
@@ -348,10 +348,12 @@ W_JitLoopInfo.typedef.acceptable_as_base_class = False
 
 
 class W_JitInfoSnapshot(W_Root):
-    def __init__(self, space, w_times, w_counters, w_counter_times):
+    def __init__(self, space, w_times, w_counters, w_counter_times,
+                 w_adaptive):
         self.w_loop_run_times = w_times
         self.w_counters = w_counters
         self.w_counter_times = w_counter_times
+        self.w_adaptive = w_adaptive
 
 W_JitInfoSnapshot.typedef = TypeDef(
     "JitInfoSnapshot",
@@ -362,7 +364,10 @@ W_JitInfoSnapshot.typedef = TypeDef(
                                        doc="various JIT counters"),
     counter_times = interp_attrproperty_w("w_counter_times",
                                             cls=W_JitInfoSnapshot,
-                                            doc="various JIT timers")
+                                            doc="various JIT timers"),
+    adaptive = interp_attrproperty_w("w_adaptive",
+                                     cls=W_JitInfoSnapshot,
+                                     doc="adaptive threshold statistics")
 )
 W_JitInfoSnapshot.typedef.acceptable_as_base_class = False
 
@@ -388,7 +393,15 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'TRACING', space.newfloat(tr_time))
     b_time = jit_hooks.stats_get_times_value(None, Counters.BACKEND)
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
-    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
+    w_adaptive = space.newdict()
+    for i, counter_name in enumerate(AdaptiveCounters.counter_names):
+        v = jit_hooks.stats_get_adaptive_value(None, i)
+        space.setitem_str(w_adaptive, counter_name.lower(), space.newint(v))
+    wasted = jit_hooks.stats_get_adaptive_wasted_time(None)
+    space.setitem_str(w_adaptive, 'wasted_compile_time',
+                      space.newfloat(wasted))
+    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times,
+                             w_adaptive)
 
 def get_stats_asmmemmgr(space):
     """Returns the raw memory currently used by the JIT backend,
@@ -397,6 +410,22 @@ def get_stats_asmmemmgr(space):
     m2 = jit_hooks.stats_asmmemmgr_used(None)
     return space.newtuple([space.newint(m1), space.newint(m2)])
 
+def get_stats_jit_memory(space):
+    """Returns a dict describing the memory used by the compiled loops:
+    bytes of machine code, approximate bytes of resume data, number of
+    guards, and number of loops freed because of the 'max_jit_memory'
+    parameter."""
+    w_result = space.newdict()
+    code = jit_hooks.stats_asmmemmgr_used(None)
+    space.setitem_str(w_result, 'code_bytes', space.newint(code))
+    resume = jit_hooks.stats_get_resume_bytes(None)
+    space.setitem_str(w_result, 'resume_bytes', space.newint(resume))
+    guards = jit_hooks.stats_get_guard_count(None)
+    space.setitem_str(w_result, 'guards', space.newint(guards))
+    evicted = jit_hooks.stats_memmgr_evicted_loops(None)
+    space.setitem_str(w_result, 'evicted_loops', space.newint(evicted))
+    return w_result
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
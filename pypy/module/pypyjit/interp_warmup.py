@@ -0,0 +1,174 @@
+"""Warmup profiles: remember which loops got compiled during a run, so
+that the next run of the same program can trace them as soon as they
+are entered, instead of waiting for the usual threshold again.
+
+A loop is identified by its code object and by the 'next_instr' of its
+green key.  Code objects are matched across processes by their file
+name, first line number, name and a fingerprint of their bytecode, so
+that a modified function simply stops matching.
+"""
+
+from rpython.rlib import jit_hooks
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rtyper.annlowlevel import (cast_instance_to_gcref,
+                                        cast_base_ptr_to_instance)
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+
+
+def code_fingerprint(code):
+    # FNV-1a over the bytecode, truncated to 32 bits.  Unlike
+    # compute_hash(), it gives the same result in every process.
+    h = r_uint(2166136261)
+    for c in code.co_code:
+        h = ((h ^ r_uint(ord(c))) * r_uint(16777619)) & r_uint(0xffffffff)
+    return intmask(h)
+
+def _make_key(filename, firstlineno, name, fingerprint):
+    return '%s\x00%d\x00%s\x00%d' % (filename, firstlineno, name, fingerprint)
+
+def code_key(code):
+    return _make_key(code.co_filename, code.co_firstlineno, code.co_name,
+                     code_fingerprint(code))
+
+
+class WarmupEntry(object):
+    def __init__(self, filename, firstlineno, name, fingerprint, next_instr):
+        self.filename = filename
+        self.firstlineno = firstlineno
+        self.name = name
+        self.fingerprint = fingerprint
+        self.next_instr = next_instr
+
+    def wrap(self, space):
+        return space.newtuple([space.newtext(self.filename),
+                               space.newint(self.firstlineno),
+                               space.newtext(self.name),
+                               space.newint(self.fingerprint),
+                               space.newint(self.next_instr)])
+
+
+class WarmupProfile(object):
+    """A loaded profile: for each code key, the list of 'next_instr'
+    to trace on first entry.  Installed on CodeHookCache, which calls
+    new_code() for every code object created afterwards."""
+
+    def __init__(self):
+        self.instrs = {}
+
+    def add(self, key, next_instr):
+        lst = self.instrs.get(key, None)
+        if lst is None:
+            lst = []
+            self.instrs[key] = lst
+        if next_instr not in lst:
+            lst.append(next_instr)
+
+    def new_code(self, code):
+        lst = self.instrs.get(code_key(code), None)
+        if lst is not None:
+            code.warmup_instrs = lst
+
+
+class WarmupState(object):
+    def __init__(self, space):
+        self.recording = False
+        self.seen = {}
+        self.entries = []
+
+    def record(self, code, next_instr):
+        key = code_key(code)
+        seen_key = '%s\x00%d' % (key, next_instr)
+        if seen_key in self.seen:
+            return
+        self.seen[seen_key] = None
+        self.entries.append(WarmupEntry(code.co_filename, code.co_firstlineno,
+                                        code.co_name, code_fingerprint(code),
+                                        next_instr))
+
+def record_compiled_loop(space, debug_info):
+    """Called by the JIT hooks after a loop has been compiled."""
+    state = space.fromcache(WarmupState)
+    if not state.recording:
+        return
+    greenkey = debug_info.greenkey
+    if greenkey is None or debug_info.get_jitdriver().name != 'pypyjit':
+        return
+    if greenkey[1].getint():
+        return     # is_being_profiled: such loops are not worth replaying
+    next_instr = greenkey[0].getint()
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+    state.record(pycode, next_instr)
+
+@dont_look_inside
+def prime_warmup_loops(pycode):
+    """Called the first time a frame of 'pycode' runs, if the loaded
+    profile contains loops of this code object."""
+    instrs = pycode.warmup_instrs
+    pycode.warmup_instrs = None
+    if not we_are_translated():
+        return     # the jitcell interface needs a translated JIT
+    ll_pycode = cast_instance_to_gcref(pycode)
+    for next_instr in instrs:
+        jit_hooks.trace_next_iteration('pypyjit', r_uint(next_instr), 0,
+                                       ll_pycode)
+
+# ____________________________________________________________
+#
+# Public interface
+
+@unwrap_spec(enable=bool)
+def record_warmup_profile(space, enable=True):
+    """ record_warmup_profile(enable=True)
+
+    Start or stop recording which loops get compiled.  The result is
+    returned by get_warmup_profile().  Starting a new recording discards
+    the loops collected by the previous one.
+    """
+    state = space.fromcache(WarmupState)
+    if enable and not state.recording:
+        state.seen.clear()
+        del state.entries[:]
+    state.recording = enable
+
+def get_warmup_profile(space):
+    """ get_warmup_profile()
+
+    Return the loops compiled while recording was enabled, as a list of
+    tuples (filename, firstlineno, name, fingerprint, next_instr).
+    """
+    state = space.fromcache(WarmupState)
+    return space.newlist([entry.wrap(space) for entry in state.entries])
+
+def set_warmup_profile(space, w_entries):
+    """ set_warmup_profile(entries)
+
+    Install a profile returned by get_warmup_profile() in an earlier run.
+    The loops it lists are traced as soon as they are entered, in code
+    objects that are created from now on.  Use None to remove it.
+    """
+    cache = space.fromcache(CodeHookCache)
+    if space.is_none(w_entries):
+        cache._warmup_profile = None
+        return
+    profile = WarmupProfile()
+    for w_entry in space.listview(w_entries):
+        entry_w = space.fixedview(w_entry)
+        if len(entry_w) != 5:
+            raise oefmt(space.w_ValueError,
+                        "warmup profile entries must be 5-tuples")
+        key = _make_key(space.text_w(entry_w[0]), space.int_w(entry_w[1]),
+                        space.text_w(entry_w[2]), space.int_w(entry_w[3]))
+        next_instr = space.int_w(entry_w[4])
+        if next_instr < 0:
+            raise oefmt(space.w_ValueError, "negative next_instr")
+        profile.add(key, next_instr)
+    cache._warmup_profile = profile
@@ -2,6 +2,10 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
     appleveldefs = {
+        'save_warmup_profile': 'app_warmup.save_warmup_profile',
+        'load_warmup_profile': 'app_warmup.load_warmup_profile',
+        'enable_warmup_profile': 'app_warmup.enable_warmup_profile',
+        'start_background_compiler': 'app_deferred.start_background_compiler',
     }
 
     interpleveldefs = {
@@ -13,11 +17,18 @@ class Module(MixedModule):
         'trace_next_iteration': 'interp_jit.trace_next_iteration',
         'trace_next_iteration_hash': 'interp_jit.trace_next_iteration_hash',
         'releaseall': 'interp_jit.releaseall',
+        'compile_pending': 'interp_jit.compile_pending',
+        'pending_compilations': 'interp_jit.pending_compilations',
+        'wait_pending': 'interp_jit.wait_pending',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'get_stats_jit_memory': 'interp_resop.get_stats_jit_memory',
+        'record_warmup_profile': 'interp_warmup.record_warmup_profile',
+        'get_warmup_profile': 'interp_warmup.get_warmup_profile',
+        'set_warmup_profile': 'interp_warmup.set_warmup_profile',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -278,3 +278,35 @@ class AppTestJitHook(object):
         assert isinstance(stats.w_counters, dict)
         assert sorted(stats.w_counters.keys()) == self.sorted_keys
 
+
+
+def test_compile_deferred_wakes_up_waiter():
+    from pypy.module.pypyjit.interp_jit import DeferredCompileState
+
+    class FakeLock(object):
+        def __init__(self):
+            self.log = []
+        def acquire(self, flag):
+            assert flag
+            self.log.append('acquire')
+        def release(self):
+            self.log.append('release')
+
+    class FakeSpace(object):
+        def allocate_lock(self):
+            return FakeLock()
+
+    state = DeferredCompileState(FakeSpace())
+    state.wake_up()        # nobody is waiting: no effect
+    assert state.lock is None
+    # the lock starts held, and the waiter blocks on it
+    state.wait()
+    assert state.lock.log == ['acquire', 'acquire']
+    assert state.waiting
+    state.wake_up()
+    assert state.lock.log == ['acquire', 'acquire', 'release']
+    assert not state.waiting
+    state.wake_up()        # released only once
+    assert state.lock.log == ['acquire', 'acquire', 'release']
+    state.wait()
+    assert state.lock.log == ['acquire', 'acquire', 'release', 'acquire']
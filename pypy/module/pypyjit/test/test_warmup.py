@@ -0,0 +1,115 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import PyCode
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr
+from rpython.jit.metainterp.logger import Logger
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.rlib.jit import JitDebugInfo
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+
+
+class AppTestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+
+        @unwrap_spec(w_code=PyCode, next_instr=int, is_being_profiled=int)
+        def interp_on_compile(space, w_code, next_instr, is_being_profiled=0):
+            ll_code = cast_instance_to_base_ptr(w_code)
+            code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+            greenkey = [ConstInt(next_instr), ConstInt(is_being_profiled),
+                        ConstPtr(code_gcref)]
+            di_loop = JitDebugInfo(MockJitDriverSD, Logger(MockSD()),
+                                   JitCellToken(), [], 'loop', greenkey)
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.after_compile(di_loop)
+
+        @unwrap_spec(w_code=PyCode)
+        def interp_warmup_instrs(space, w_code):
+            if w_code.warmup_instrs is None:
+                return space.w_None
+            return space.newlist([space.newint(i)
+                                  for i in w_code.warmup_instrs])
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_warmup_instrs = space.wrap(interp2app(interp_warmup_instrs))
+        cls.w_tmpfile = space.wrap(str(py.test.ensuretemp('pypyjit_warmup')
+                                       .join('profile')))
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import pypyjit
+            pypyjit.record_warmup_profile(False)
+            pypyjit.set_warmup_profile(None)
+        """)
+
+    def test_record(self):
+        import pypyjit
+        def f(n):
+            while n:
+                n -= 1
+        code = f.__code__
+        self.on_compile(code, 3)
+        assert pypyjit.get_warmup_profile() == []
+        pypyjit.record_warmup_profile()
+        self.on_compile(code, 3)
+        self.on_compile(code, 3)
+        self.on_compile(code, 7, 1)
+        profile = pypyjit.get_warmup_profile()
+        assert len(profile) == 1
+        filename, firstlineno, name, fingerprint, next_instr = profile[0]
+        assert filename == code.co_filename
+        assert firstlineno == code.co_firstlineno
+        assert name == 'f'
+        assert isinstance(fingerprint, int)
+        assert next_instr == 3
+
+    def test_replay(self):
+        import pypyjit
+        src = "def f(n):\n    while n:\n        n -= 1\n"
+        def make():
+            d = {}
+            exec compile(src, 'warmup_test.py', 'exec') in d
+            return d['f']
+        f = make()
+        pypyjit.record_warmup_profile()
+        self.on_compile(f.__code__, 9)
+        profile = pypyjit.get_warmup_profile()
+        pypyjit.set_warmup_profile(profile)
+        g = make()
+        assert self.warmup_instrs(g.__code__) == [9]
+        g(5)
+        assert self.warmup_instrs(g.__code__) is None
+        # a different bytecode no longer matches
+        orig_src = src
+        src = src.replace("    while", "    n += 0\n    while")
+        assert self.warmup_instrs(make().__code__) is None
+        pypyjit.set_warmup_profile(None)
+        src = orig_src
+        assert self.warmup_instrs(make().__code__) is None
+
+    def test_set_errors(self):
+        import pypyjit
+        raises(ValueError, pypyjit.set_warmup_profile, [('a', 1, 'f', 2)])
+        raises(ValueError, pypyjit.set_warmup_profile,
+               [('a', 1, 'f', 2, -1)])
+        raises(TypeError, pypyjit.set_warmup_profile, [(1, 1, 'f', 2, 0)])
+
+    def test_save_and_load(self):
+        import pypyjit
+        def f(n):
+            while n:
+                n -= 1
+        pypyjit.record_warmup_profile()
+        self.on_compile(f.__code__, 3)
+        pypyjit.save_warmup_profile(self.tmpfile)
+        assert pypyjit.load_warmup_profile(self.tmpfile) == 1
+        with open(self.tmpfile, 'wb') as f:
+            f.write('garbage')
+        raises(ValueError, pypyjit.load_warmup_profile, self.tmpfile)
+        pypyjit.enable_warmup_profile(self.tmpfile)   # ignores bad files
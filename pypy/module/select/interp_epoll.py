@@ -12,6 +12,7 @@ from rpython.rtyper.tool import rffi_platform
 from rpython.rlib._rsocket_rffi import socketclose, FD_SETSIZE
 from rpython.rlib.rposix import get_saved_errno
 from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.objectmodel import keepalive_until_here
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
 
 
@@ -57,6 +58,9 @@ DEF_REGISTER_EVENTMASK = (public_symbols["EPOLLIN"] |
                           public_symbols["EPOLLOUT"] |
                           public_symbols["EPOLLPRI"])
 
+EPOLL_EVENTS = rffi.CArrayPtr(epoll_event)
+NULL_EVENTS = lltype.nullptr(EPOLL_EVENTS.TO)
+
 epoll_create = rffi.llexternal(
     "epoll_create", [rffi.INT], rffi.INT, compilation_info=eci,
     save_err=rffi.RFFI_SAVE_ERRNO
@@ -78,6 +82,12 @@ epoll_wait = rffi.llexternal(
 
 
 class W_Epoll(W_Root):
+    # array of epoll_event kept between calls to poll(), so that event loops
+    # don't allocate it for every call.  A thread takes it out of the object
+    # while it is waiting, so concurrent calls use their own array.
+    events = NULL_EVENTS
+    events_size = 0
+
     def __init__(self, space, epfd):
         self.space = space
         self.epfd = epfd
@@ -114,8 +124,31 @@ class W_Epoll(W_Root):
         if not self.get_closed():
             socketclose(self.epfd)
             self.epfd = -1
+            self.free_events()
             self.may_unregister_rpython_finalizer(self.space)
 
+    def free_events(self):
+        evs = self.events
+        if evs:
+            self.events = NULL_EVENTS
+            self.events_size = 0
+            lltype.free(evs, flavor='raw')
+
+    def take_events(self, maxevents):
+        evs = self.events
+        if evs and self.events_size >= maxevents:
+            self.events = NULL_EVENTS
+            return evs, self.events_size
+        return lltype.malloc(EPOLL_EVENTS.TO, maxevents, flavor='raw'), maxevents
+
+    def give_back_events(self, evs, size):
+        if self.get_closed() or (self.events and self.events_size >= size):
+            lltype.free(evs, flavor='raw')
+        else:
+            self.free_events()
+            self.events = evs
+            self.events_size = size
+
     def epoll_ctl(self, space, ctl, w_fd, eventmask, ignore_ebadf=False):
         fd = space.c_filedescriptor_w(w_fd)
         with lltype.scoped_alloc(epoll_event) as ev:
@@ -152,32 +185,79 @@ class W_Epoll(W_Root):
         self.check_closed(space)
         self.epoll_ctl(space, EPOLL_CTL_MOD, w_fd, eventmask)
 
-    @unwrap_spec(timeout=float, maxevents=int)
-    def descr_poll(self, space, timeout=-1.0, maxevents=-1):
-        self.check_closed(space)
+    def wait(self, space, evs, maxevents, timeout):
         if timeout < 0:
             timeout = -1.0
         else:
             timeout *= 1000.0
+        nfds = epoll_wait(self.epfd, evs, maxevents, int(timeout))
+        if nfds < 0:
+            raise exception_from_saved_errno(space, space.w_IOError)
+        return nfds
 
+    @unwrap_spec(timeout=float, maxevents=int)
+    def descr_poll(self, space, timeout=-1.0, maxevents=-1):
+        self.check_closed(space)
         if maxevents == -1:
             maxevents = FD_SETSIZE - 1
         elif maxevents < 1:
             raise oefmt(space.w_ValueError,
                         "maxevents must be greater than 0, not %d", maxevents)
 
-        with lltype.scoped_alloc(rffi.CArray(epoll_event), maxevents) as evs:
-            nfds = epoll_wait(self.epfd, evs, maxevents, int(timeout))
-            if nfds < 0:
-                raise exception_from_saved_errno(space, space.w_IOError)
-
+        evs, size = self.take_events(maxevents)
+        try:
+            nfds = self.wait(space, evs, maxevents, timeout)
             elist_w = [None] * nfds
             for i in xrange(nfds):
                 event = evs[i]
                 elist_w[i] = space.newtuple(
                     [space.newint(event.c_data.c_fd), space.newint(event.c_events)]
                 )
-            return space.newlist(elist_w)
+        finally:
+            self.give_back_events(evs, size)
+        return space.newlist(elist_w)
+
+    @unwrap_spec(timeout=float)
+    def descr_poll_into(self, space, w_buffer, timeout=-1.0):
+        """poll_into(buffer[, timeout=-1]) -> number of events
+
+Like poll(), but stores the events into the writable buffer, for example an
+array('i'), as pairs of C ints (fd, events) instead of building a list of
+tuples.  At most len(buffer) // (2 * sizeof(int)) events are returned.  If
+another thread shrinks the buffer while waiting, so that the events no longer
+fit, BufferError is raised."""
+        self.check_closed(space)
+        rwbuffer = space.writebuf_w(w_buffer)
+        maxevents = rwbuffer.getlength() // (2 * rffi.sizeof(rffi.INT))
+        if maxevents < 1:
+            raise oefmt(space.w_ValueError,
+                        "the buffer must have room for at least one event")
+        try:
+            rwbuffer.get_raw_address()
+        except ValueError:
+            raise oefmt(space.w_TypeError,
+                        "poll_into() needs a buffer with a raw address, "
+                        "like an array or a bytearray")
+
+        evs, size = self.take_events(maxevents)
+        try:
+            nfds = self.wait(space, evs, maxevents, timeout)
+            # get the length and the address only now: the GIL was released
+            # while waiting, and the buffer may have been resized
+            room = rwbuffer.getlength() // (2 * rffi.sizeof(rffi.INT))
+            if nfds > room:
+                raise oefmt(space.w_BufferError,
+                            "the buffer was resized during poll_into(), and "
+                            "has no longer room for the %d events", nfds)
+            target = rffi.cast(rffi.INTP, rwbuffer.get_raw_address())
+            for i in xrange(nfds):
+                event = evs[i]
+                target[2 * i] = event.c_data.c_fd
+                target[2 * i + 1] = rffi.cast(rffi.INT, event.c_events)
+        finally:
+            self.give_back_events(evs, size)
+        keepalive_until_here(rwbuffer)
+        return space.newint(nfds)
 
 
 W_Epoll.typedef = TypeDef("select.epoll",
@@ -191,5 +271,6 @@ W_Epoll.typedef = TypeDef("select.epoll",
     unregister = interp2app(W_Epoll.descr_unregister),
     modify = interp2app(W_Epoll.descr_modify),
     poll = interp2app(W_Epoll.descr_poll),
+    poll_into = interp2app(W_Epoll.descr_poll_into),
 )
 W_Epoll.typedef.acceptable_as_base_class = False
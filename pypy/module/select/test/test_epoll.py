@@ -7,7 +7,7 @@ import platform
 
 class AppTestEpoll(object):
     spaceconfig = {
-        "usemodules": ["select", "_socket", "posix", "time"],
+        "usemodules": ["select", "_socket", "posix", "time", "array"],
     }
 
     def setup_class(cls):
@@ -179,6 +179,84 @@ class AppTestEpoll(object):
         expected = [(server.fileno(), select.EPOLLOUT)]
         assert events == expected
 
+    def test_poll_into(self):
+        import array
+        import select
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        ep.register(client.fileno(), select.EPOLLIN | select.EPOLLOUT)
+
+        buf = array.array('i', [0] * 8)
+        n = ep.poll_into(buf, 1)
+        assert n == 2
+        events = sorted(zip(buf[0:2 * n:2], buf[1:2 * n:2]))
+        expected = [
+            (client.fileno(), select.EPOLLOUT),
+            (server.fileno(), select.EPOLLOUT)
+        ]
+        expected.sort()
+        assert events == expected
+        assert list(buf[2 * n:]) == [0] * (8 - 2 * n)
+
+        # room for a single event
+        small = bytearray(8)
+        assert ep.poll_into(small, 1) == 1
+        fd, mask = array.array('i', str(small))
+        assert (fd, mask) in expected
+
+        assert ep.poll_into(buf, 1) == ep.poll_into(buf, 1) == 2
+        raises(ValueError, ep.poll_into, bytearray(4))
+        raises(TypeError, ep.poll_into, "readonly string")
+        ep.close()
+        raises(ValueError, ep.poll_into, buf)
+
+    def test_modify_same_mask(self):
+        import errno
+        import select
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN)
+        ep.modify(server.fileno(), select.EPOLLIN)
+        assert ep.poll(0) == []
+        ep.modify(server.fileno(), select.EPOLLOUT)
+        assert ep.poll(0) == [(server.fileno(), select.EPOLLOUT)]
+        ep.modify(server.fileno(), select.EPOLLOUT)
+        assert ep.poll(0) == [(server.fileno(), select.EPOLLOUT)]
+
+        # one-shot registrations are re-armed by every modify()
+        mask = select.EPOLLOUT | select.EPOLLONESHOT
+        ep.modify(server.fileno(), mask)
+        assert ep.poll(0) == [(server.fileno(), select.EPOLLOUT)]
+        assert ep.poll(0) == []
+        ep.modify(server.fileno(), mask)
+        assert ep.poll(0) == [(server.fileno(), select.EPOLLOUT)]
+
+        ep.unregister(server.fileno())
+        exc = raises(IOError, ep.modify, server.fileno(), select.EPOLLIN)
+        assert exc.value.errno == errno.ENOENT
+
+    def test_modify_after_unregister_elsewhere(self):
+        import errno
+        import os
+        import select
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN)
+        # a second object for the same epoll instance
+        ep2 = select.epoll.fromfd(os.dup(ep.fileno()))
+        ep2.unregister(server.fileno())
+        exc = raises(IOError, ep.modify, server.fileno(), select.EPOLLIN)
+        assert exc.value.errno == errno.ENOENT
+        ep2.close()
+        ep.close()
+
     def test_errors(self):
         import select
 
@@ -209,3 +287,35 @@ class AppTestEpoll(object):
         ep = select.epoll()
         ep.close()
         ep.close()
+
+
+class AppTestEpollThread(object):
+    spaceconfig = {
+        "usemodules": ["select", "posix", "time", "thread"],
+    }
+
+    def setup_class(cls):
+        if not sys.platform.startswith('linux'):
+            py.test.skip("test requires linux (assumed >= 2.6)")
+
+    def test_poll_into_resized(self):
+        import os
+        import select
+        import thread
+        import time
+
+        r, w = os.pipe()
+        ep = select.epoll()
+        ep.register(r, select.EPOLLIN)
+        buf = bytearray(64)
+
+        def shrink_and_wake_up():
+            time.sleep(0.1)
+            del buf[4:]
+            os.write(w, "x")
+        thread.start_new_thread(shrink_and_wake_up, ())
+        raises(BufferError, ep.poll_into, buf, 5)
+        assert len(buf) == 4
+        ep.close()
+        os.close(r)
+        os.close(w)
@@ -8,6 +8,18 @@ from rpython.rlib.rstruct.formatiterator import FormatIterator
 from pypy.interpreter.error import OperationError
 
 
+@specialize.argtype(0)
+def fits_in_int(value):
+    # CPython tries hard to return int objects whenever it can, but
+    # space.newint returns a long if we pass a r_uint, r_ulonglong or
+    # r_longlong. So, we need special care in those cases.
+    if isinstance(value, r_uint) or isinstance(value, r_ulonglong):
+        return value <= maxint
+    elif isinstance(value, r_longlong):
+        return value == r_longlong(intmask(value))
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
 class PackFormatIterator(FormatIterator):
     def __init__(self, space, wbuf, args_w):
         self.space = space
@@ -161,25 +173,14 @@ class UnpackFormatIterator(FormatIterator):
 
     @specialize.argtype(1)
     def appendobj(self, value):
-        # CPython tries hard to return int objects whenever it can, but
-        # space.newint returns a long if we pass a r_uint, r_ulonglong or
-        # r_longlong. So, we need special care in those cases.
-        is_unsigned = (isinstance(value, r_uint) or
-                       isinstance(value, r_ulonglong))
-        if is_unsigned:
-            if value <= maxint:
-                w_value = self.space.newint(intmask(value))
-            else:
-                w_value = self.space.newint(value)
-        elif isinstance(value, r_longlong):
-            if value == r_longlong(intmask(value)):
-                w_value = self.space.newint(intmask(value))
-            else:
-                w_value = self.space.newint(value)
+        self.result_w.append(self.wrapobj(value))
+
+    @specialize.argtype(1)
+    def wrapobj(self, value):
+        if fits_in_int(value):
+            w_value = self.space.newint(intmask(value))
         elif isinstance(value, bool):
             w_value = self.space.newbool(value)
-        elif isinstance(value, int):
-            w_value = self.space.newint(value)
         elif isinstance(value, float):
             w_value = self.space.newfloat(value)
         elif isinstance(value, str):
@@ -187,8 +188,9 @@ class UnpackFormatIterator(FormatIterator):
         elif isinstance(value, unicode):
             w_value = self.space.newutf8(value.decode('utf-8'), len(value))
         else:
-            assert 0, "unreachable"
-        self.result_w.append(w_value)
+            # a r_uint, r_ulonglong or r_longlong too large for an int
+            w_value = self.space.newint(value)
+        return w_value
 
     def append_utf8(self, value):
         w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
@@ -202,3 +204,105 @@ class UnpackFormatIterator(FormatIterator):
 
     def skip(self, size):
         self.read(size) # XXX, could avoid taking the slice
+
+
+COLUMN_EMPTY = 0
+COLUMN_INT = 1
+COLUMN_FLOAT = 2
+COLUMN_OBJECT = 3
+
+class Column(object):
+    """The values of one field of the format, over all the records.
+    Integers and floats are stored unboxed as long as the whole column
+    is made of them."""
+
+    def __init__(self):
+        self.kind = COLUMN_EMPTY
+        self.ints = []
+        self.floats = []
+        self.items_w = []
+
+    def append_int(self, space, value):
+        if self.kind == COLUMN_EMPTY:
+            self.kind = COLUMN_INT
+        if self.kind == COLUMN_INT:
+            self.ints.append(value)
+        else:
+            self.append_w(space, space.newint(value))
+
+    def append_float(self, space, value):
+        if self.kind == COLUMN_EMPTY:
+            self.kind = COLUMN_FLOAT
+        if self.kind == COLUMN_FLOAT:
+            self.floats.append(value)
+        else:
+            self.append_w(space, space.newfloat(value))
+
+    def append_w(self, space, w_value):
+        if self.kind != COLUMN_OBJECT:
+            self._switch_to_objects(space)
+        self.items_w.append(w_value)
+
+    def _switch_to_objects(self, space):
+        if self.kind == COLUMN_INT:
+            self.items_w = [space.newint(x) for x in self.ints]
+            self.ints = []
+        elif self.kind == COLUMN_FLOAT:
+            self.items_w = [space.newfloat(x) for x in self.floats]
+            self.floats = []
+        self.kind = COLUMN_OBJECT
+
+    def wrap(self, space):
+        if self.kind == COLUMN_INT:
+            return space.newlist_int(self.ints)
+        elif self.kind == COLUMN_FLOAT:
+            return space.newlist_float(self.floats)
+        return space.newlist(self.items_w)
+
+
+class ColumnUnpackFormatIterator(UnpackFormatIterator):
+    """Unpacks consecutive records of the same format, storing each field
+    into its own Column instead of building a tuple per record."""
+
+    def __init__(self, space, buf):
+        UnpackFormatIterator.__init__(self, space, buf)
+        self.columns = []
+        self.column_index = 0
+        self.record_start = 0
+
+    def start_record(self, pos):
+        self.pos = pos
+        self.record_start = pos
+        self.column_index = 0
+
+    def align(self, mask):
+        # alignment is relative to the start of the record
+        start = self.record_start
+        self.pos = start + ((self.pos - start + mask) & ~mask)
+
+    def finished(self):
+        pass     # the record size was checked by the caller
+
+    def _next_column(self):
+        index = self.column_index
+        if index == len(self.columns):
+            self.columns.append(Column())
+        self.column_index = index + 1
+        return self.columns[index]
+
+    @specialize.argtype(1)
+    def appendobj(self, value):
+        column = self._next_column()
+        if fits_in_int(value):
+            column.append_int(self.space, intmask(value))
+        elif isinstance(value, float):
+            column.append_float(self.space, value)
+        else:
+            column.append_w(self.space, self.wrapobj(value))
+
+    def append_utf8(self, value):
+        w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
+        self._next_column().append_w(self.space, w_ch)
+
+    def get_columns_w(self):
+        return [column.wrap(self.space) for column in self.columns]
@@ -1,5 +1,5 @@
 from rpython.rlib import jit
-from rpython.rlib.buffer import SubBuffer
+from rpython.rlib.buffer import StringBuffer, SubBuffer
 from rpython.rlib.mutbuffer import MutableStringBuffer
 from rpython.rlib.rstruct.error import StructError, StructOverflowError
 from rpython.rlib.rstruct.formatiterator import CalcSizeFormatIterator
@@ -10,7 +10,7 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.typedef import TypeDef, interp_attrproperty
 from pypy.interpreter.typedef import make_weakref_descr
 from pypy.module.struct.formatiterator import (
-    PackFormatIterator, UnpackFormatIterator
+    PackFormatIterator, UnpackFormatIterator, ColumnUnpackFormatIterator
 )
 
 
@@ -119,6 +119,112 @@ fmt, starting at offset. Requires len(buffer[offset:]) >= calcsize(fmt)."""
     return _unpack(space, format, buf)
 
 
+class W_UnpackIter(W_Root):
+    """Iterator returned by iter_unpack(): unpacks one record at a time,
+    reading directly from the buffer."""
+
+    def __init__(self, space, format, size, w_buffer):
+        if size <= 0:
+            raise oefmt(get_error(space),
+                        "cannot iteratively unpack with a struct of length %d",
+                        size)
+        buf = space.getarg_w('s*', w_buffer)
+        if buf.getlength() % size != 0:
+            raise oefmt(get_error(space),
+                        "iterative unpacking requires a buffer of a "
+                        "multiple of %d bytes", size)
+        self.format = format
+        self.size = size
+        self.buf = buf
+        self.index = 0
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        buf = self.buf
+        if buf is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        size = self.size
+        index = self.index
+        if index + size > buf.getlength():
+            self.buf = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        self.index = index + size
+        return _unpack(space, jit.promote_string(self.format),
+                       SubBuffer(buf, index, size))
+
+    def descr_length_hint(self, space):
+        if self.buf is None:
+            return space.newint(0)
+        return space.newint((self.buf.getlength() - self.index) // self.size)
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __iter__=interp2app(W_UnpackIter.descr_iter),
+    next=interp2app(W_UnpackIter.descr_next),
+    __length_hint__=interp2app(W_UnpackIter.descr_length_hint),
+)
+W_UnpackIter.typedef.acceptable_as_base_class = False
+
+
+@unwrap_spec(format='text')
+def iter_unpack(space, format, w_buffer):
+    """Return an iterator which unpacks the buffer, containing packed C
+structure data, according to fmt.  Requires len(buffer) to be a multiple
+of calcsize(fmt)."""
+    size = _calcsize(space, format)
+    return W_UnpackIter(space, format, size, w_buffer)
+
+
+def _unpack_columns(space, format, buf, offset, count, size):
+    fmtiter = ColumnUnpackFormatIterator(space, buf)
+    try:
+        for i in range(count):
+            fmtiter.start_record(offset + i * size)
+            fmtiter.interpret(format)
+    except StructOverflowError as e:
+        raise OperationError(space.w_OverflowError, space.newtext(e.msg))
+    except StructError as e:
+        raise OperationError(get_error(space), space.newtext(e.msg))
+    return fmtiter.get_columns_w()
+
+
+@unwrap_spec(format='text', offset=int, count=int)
+def unpack_columns(space, format, w_buffer, offset=0, count=-1):
+    """Unpack count consecutive records from the buffer, starting at
+offset, and return a tuple with one list per field of fmt.  Integer and
+float fields are stored directly into the lists, without building a tuple
+per record.  If count is -1, the rest of the buffer is unpacked and its
+length must be a multiple of calcsize(fmt)."""
+    size = _calcsize(space, format)
+    if size <= 0:
+        raise oefmt(get_error(space),
+                    "cannot unpack columns with a struct of length %d", size)
+    buf = space.getarg_w('s*', w_buffer)
+    length = buf.getlength()
+    if offset < 0:
+        offset += length
+    if offset < 0 or offset > length:
+        raise oefmt(get_error(space), "offset out of range")
+    if count < 0:
+        if (length - offset) % size != 0:
+            raise oefmt(get_error(space),
+                        "unpack_columns requires a buffer of a multiple "
+                        "of %d bytes", size)
+        count = (length - offset) // size
+    elif (length - offset) // size < count:
+        raise oefmt(get_error(space),
+                    "unpack_columns requires a buffer of at least %d bytes",
+                    count * size)
+    if count == 0:
+        # unpack a record of zeroes to know the number of fields
+        nfields = space.len_w(_unpack(space, format,
+                                      StringBuffer('\x00' * size)))
+        return space.newtuple([space.newlist([]) for i in range(nfields)])
+    return space.newtuple(_unpack_columns(space, format, buf, offset,
+                                          count, size))
+
+
 class W_Struct(W_Root):
     _immutable_fields_ = ["format", "size"]
 
@@ -147,6 +253,14 @@ class W_Struct(W_Root):
     def descr_unpack_from(self, space, w_buffer, offset=0):
         return unpack_from(space, jit.promote_string(self.format), w_buffer, offset)
 
+    def descr_iter_unpack(self, space, w_buffer):
+        return W_UnpackIter(space, self.format, self.size, w_buffer)
+
+    @unwrap_spec(offset=int, count=int)
+    def descr_unpack_columns(self, space, w_buffer, offset=0, count=-1):
+        return unpack_columns(space, jit.promote_string(self.format),
+                              w_buffer, offset, count)
+
 W_Struct.typedef = TypeDef("Struct",
     __new__=interp2app(W_Struct.descr__new__.im_func),
     __init__=interp2app(W_Struct.descr__init__),
@@ -157,6 +271,8 @@ W_Struct.typedef = TypeDef("Struct",
     unpack=interp2app(W_Struct.descr_unpack),
     pack_into=interp2app(W_Struct.descr_pack_into),
     unpack_from=interp2app(W_Struct.descr_unpack_from),
+    iter_unpack=interp2app(W_Struct.descr_iter_unpack),
+    unpack_columns=interp2app(W_Struct.descr_unpack_columns),
     __weakref__=make_weakref_descr(W_Struct),
 )
 
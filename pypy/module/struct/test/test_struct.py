@@ -6,7 +6,7 @@ from rpython.rlib.rstruct.nativefmttable import native_is_bigendian
 
 
 class AppTestStruct(object):
-    spaceconfig = dict(usemodules=['struct', 'array'])
+    spaceconfig = dict(usemodules=['struct', 'array', '__pypy__'])
 
     def setup_class(cls):
         """
@@ -462,6 +462,89 @@ class AppTestStruct(object):
         assert val == sys.maxint+1
         assert type(val) is long
 
+    def test_iter_unpack(self):
+        import array
+        s = self.struct.Struct('<hd')
+        data = s.pack(1, 2.5) + s.pack(-3, 4.0) + s.pack(5, -1.5)
+        it = s.iter_unpack(data)
+        assert it.__length_hint__() == 3
+        assert next(it) == (1, 2.5)
+        assert it.__length_hint__() == 2
+        assert list(it) == [(-3, 4.0), (5, -1.5)]
+        assert it.__length_hint__() == 0
+        raises(StopIteration, next, it)
+        assert list(self.struct.iter_unpack('<hd', data)) == [
+            (1, 2.5), (-3, 4.0), (5, -1.5)]
+        assert list(s.iter_unpack(buffer(data))) == list(s.iter_unpack(data))
+        assert list(s.iter_unpack(array.array('c', data))) == [
+            (1, 2.5), (-3, 4.0), (5, -1.5)]
+        assert list(s.iter_unpack('')) == []
+        raises(self.struct.error, s.iter_unpack, data[:-1])
+        raises(self.struct.error, self.struct.iter_unpack, '', data)
+
+    def test_iter_unpack_reads_buffer_lazily(self):
+        b = bytearray(self.struct.pack('ii', 1, 2))
+        it = self.struct.iter_unpack('i', b)
+        assert next(it) == (1,)
+        b[4:] = self.struct.pack('i', 42)
+        assert next(it) == (42,)
+
+    def test_unpack_columns(self):
+        import sys
+        s = self.struct.Struct('<bdQ?2s')
+        data = ''.join([s.pack(i - 2, i * 0.5, i, i % 2, 'x%d' % i)
+                        for i in range(5)])
+        ints, floats, unsigned, bools, strs = s.unpack_columns(data)
+        assert ints == [-2, -1, 0, 1, 2]
+        assert floats == [0.0, 0.5, 1.0, 1.5, 2.0]
+        assert unsigned == [0, 1, 2, 3, 4]
+        assert type(unsigned[0]) is int
+        assert bools == [False, True, False, True, False]
+        assert strs == ['x0', 'x1', 'x2', 'x3', 'x4']
+        assert self.struct.unpack_columns('<bdQ?2s', data) == (
+            ints, floats, unsigned, bools, strs)
+        #
+        assert s.unpack_columns(data, s.size, 2) == (
+            [-1, 0], [0.5, 1.0], [1, 2], [True, False], ['x1', 'x2'])
+        assert s.unpack_columns(data, -2 * s.size) == (
+            [1, 2], [1.5, 2.0], [3, 4], [True, False], ['x3', 'x4'])
+        assert s.unpack_columns(data, count=0) == ([], [], [], [], [])
+        assert s.unpack_columns('') == ([], [], [], [], [])
+        raises(self.struct.error, s.unpack_columns, data[:-1])
+        raises(self.struct.error, s.unpack_columns, data, 0, 6)
+        raises(self.struct.error, s.unpack_columns, data, len(data) + 1)
+        raises(self.struct.error, self.struct.unpack_columns, '0s', data)
+        #
+        # a column of integers that do not all fit into an int
+        data = self.struct.pack('<QQ', 5, sys.maxint + 1)
+        col, = self.struct.unpack_columns('<Q', data)
+        assert col == [5, sys.maxint + 1]
+        assert type(col[0]) is int
+        assert type(col[1]) is long
+
+    def test_unpack_columns_native_alignment(self):
+        # 'ic' has no trailing padding, so the records are not aligned
+        fmt = 'ci'
+        size = self.struct.calcsize(fmt)
+        data = ''.join([self.struct.pack(fmt, c, i)
+                        for c, i in [('a', 1), ('b', 2), ('c', 3)]])
+        assert len(data) == 3 * size
+        assert self.struct.unpack_columns(fmt, data) == (
+            ['a', 'b', 'c'], [1, 2, 3])
+        fmt = 'ic'
+        data = '\x00' + ''.join([self.struct.pack(fmt, i, c)
+                                 for i, c in [(1, 'a'), (2, 'b')]])
+        assert self.struct.unpack_columns(fmt, data, 1) == (
+            [1, 2], ['a', 'b'])
+
+    def test_unpack_columns_strategies(self):
+        import __pypy__
+        data = self.struct.pack('<id', 1, 2.0) * 3
+        ints, floats = self.struct.unpack_columns('<id', data)
+        assert __pypy__.strategy(ints) == 'IntegerListStrategy'
+        assert __pypy__.strategy(floats) == 'FloatListStrategy'
+
+
 class AppTestStructBuffer(object):
     spaceconfig = dict(usemodules=['struct', '__pypy__'])
 
@@ -171,6 +171,10 @@ def pypy_find_stdlib(space, executable):
                 path, prefix = find_stdlib(get_state(space), dyn_path)
         if path is None:
             return space.w_None
+    if not space.config.translation.sandbox:
+        # the snapshot of the stdlib, if any, is opened by the first import
+        from pypy.module.imp.snapshot import get_stdlib_snapshot
+        get_stdlib_snapshot(space).set_root(prefix)
     w_prefix = space.newtext(prefix)
     space.setitem(space.sys.w_dict, space.newtext('prefix'), w_prefix)
     space.setitem(space.sys.w_dict, space.newtext('exec_prefix'), w_prefix)
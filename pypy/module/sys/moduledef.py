@@ -60,6 +60,8 @@ class Module(MixedModule):
         'pypy_get_track_resources' : 'vm.get_track_resources',
         'setcheckinterval'      : 'vm.setcheckinterval',
         'getcheckinterval'      : 'vm.getcheckinterval',
+        'setswitchinterval'     : 'vm.setswitchinterval',
+        'getswitchinterval'     : 'vm.getswitchinterval',
         'exc_info'              : 'vm.exc_info',
         'exc_clear'             : 'vm.exc_clear',
         'settrace'              : 'vm.settrace',
@@ -419,6 +419,19 @@ class AppTestSysModulePortedFromCPython:
             sys.setcheckinterval(n)
             assert sys.getcheckinterval() == n
 
+    def test_setswitchinterval(self):
+        import sys
+        raises(TypeError, sys.setswitchinterval)
+        orig = sys.getswitchinterval()
+        assert orig == 0.005
+        for n in 0.0001, 1, 2.5, orig: # orig last to restore starting state
+            sys.setswitchinterval(n)
+            assert sys.getswitchinterval() == n
+        raises(ValueError, sys.setswitchinterval, 0)
+        raises(ValueError, sys.setswitchinterval, -1.0)
+        raises(ValueError, sys.setswitchinterval, float('nan'))
+        raises(OverflowError, sys.setswitchinterval, 1e100)
+
     def test_recursionlimit(self):
         import sys
         raises(TypeError, sys.getrecursionlimit, 42)
@@ -3,6 +3,7 @@ Implementation of interpreter-level 'sys' routines.
 """
 
 from rpython.rlib import jit
+from rpython.rlib.rarithmetic import r_longlong
 from rpython.rlib.rutf8 import MAXUNICODE
 
 from pypy.interpreter import gateway
@@ -99,6 +100,31 @@ def getcheckinterval(space):
         result = 0
     return space.newint(result)
 
+@unwrap_spec(interval=float)
+def setswitchinterval(space, interval):
+    """Set the ideal thread switching delay inside the Python interpreter.
+The actual frequency of switching threads can be lower if the interpreter
+executes long sequences of uninterruptible code (this is implementation-
+specific and workload-dependent).  A thread coming back from a blocking
+call, like I/O, does not wait for the switch interval.
+
+The parameter must represent the desired switching delay in seconds.
+A typical value is 0.005 (5 milliseconds)."""
+    if not interval > 0.0:
+        raise oefmt(space.w_ValueError,
+                    "switch interval must be strictly positive")
+    if interval > 1e9:
+        raise oefmt(space.w_OverflowError, "switch interval is too large")
+    interval_ns = r_longlong(interval * 1e9)
+    if interval_ns == 0:
+        interval_ns = r_longlong(1)
+    space.threadlocals.setswitchinterval(interval_ns)
+
+def getswitchinterval(space):
+    """Return the current thread switch interval; see setswitchinterval()."""
+    interval_ns = space.threadlocals.getswitchinterval()
+    return space.newfloat(float(interval_ns) * 1e-9)
+
 def exc_info(space):
     """Return the (type, value, traceback) of the most recent exception
 caught by an except clause in the current stack frame or in an older stack
@@ -6,6 +6,7 @@ Global Interpreter Lock.
 # If multiple threads try to execute simultaneously in this space,
 # all but one will be blocked.  The other threads get a chance to run
 # from time to time, using the periodic action GILReleaseAction.
+# See rpython/translator/c/src/thread_gil.c for the details.
 
 from rpython.rlib import rthread, rgil
 from pypy.module.thread.error import wrap_thread_error
@@ -37,6 +38,12 @@ class GILThreadLocals(OSThreadLocals):
     def threads_initialized(self):
         return self.gil_ready
 
+    def getswitchinterval(self):
+        return rgil.get_switch_interval()
+
+    def setswitchinterval(self, interval_ns):
+        rgil.set_switch_interval(interval_ns)
+
     ## def reinit_threads(self, space):
     ##     "Called in the child process after a fork()"
     ##     OSThreadLocals.reinit_threads(self, space)
@@ -44,7 +51,9 @@ class GILThreadLocals(OSThreadLocals):
 
 class GILReleaseAction(PeriodicAsyncAction):
     """An action called every sys.checkinterval bytecodes.  It releases
-    the GIL to give some other thread a chance to run.
+    the GIL to give some other thread a chance to run, if one has been
+    waiting for longer than sys.getswitchinterval() or has just returned
+    from a blocking call.
     """
 
     def perform(self, executioncontext, frame):
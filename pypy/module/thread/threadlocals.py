@@ -4,12 +4,13 @@ from rpython.rlib.objectmodel import we_are_translated
 from rpython.rlib.rarithmetic import r_ulonglong
 from pypy.module.thread.error import wrap_thread_error
 from pypy.interpreter.executioncontext import ExecutionContext
+from pypy.interpreter.miscutils import BaseThreadLocals
 
 
 ExecutionContext._signals_enabled = 0     # default value
 
 
-class OSThreadLocals:
+class OSThreadLocals(BaseThreadLocals):
     """Thread-local storage for OS-level threads.
     For memory management, this version depends on explicit notification when
     a thread finishes.  This works as long as the thread was started by
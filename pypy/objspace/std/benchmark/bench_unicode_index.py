@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+""" Random access into large unicode strings: the cost of the first
+index near the start, of scanning the start of the string, and of
+random and far indices, for ASCII, mostly-ASCII and CJK text.
+
+    pypy bench_unicode_index.py [size_in_chars]
+"""
+
+import random, sys, time
+
+def make_texts(size):
+    ascii = (u'The quick brown fox jumps over the lazy dog. ' *
+             (size // 45 + 1))[:size]
+    mostly = (u'Caf\xe9 na\xefve r\xe9sum\xe9 and plain words here. ' *
+              (size // 42 + 1))[:size]
+    cjk = (u'統一碼是一個字元編'
+           u'碼標準。' * (size // 12 + 1))[:size]
+    return [('ascii', ascii), ('mostly-ascii', mostly), ('cjk', cjk)]
+
+def fresh(s):
+    # a new string object, without any index storage built yet
+    return s[:-1] + s[-1]
+
+def bench_first_index(s, repeat=20):
+    total = 0.0
+    for i in range(repeat):
+        t = fresh(s)
+        t0 = time.time()
+        t[10]
+        total += time.time() - t0
+    return total / repeat
+
+def bench_find_near_start(s, repeat=20):
+    total = 0.0
+    for i in range(repeat):
+        t = fresh(s)
+        t0 = time.time()
+        t.find(s[100:105], 50, 200)
+        total += time.time() - t0
+    return total / repeat
+
+def bench_scan_start(s, count=2000):
+    t = fresh(s)
+    t0 = time.time()
+    for i in xrange(count):
+        t[i]
+    return time.time() - t0
+
+def bench_random(s, count=100000):
+    t = fresh(s)
+    rnd = random.Random(42)
+    indices = [rnd.randrange(len(t)) for i in xrange(count)]
+    t0 = time.time()
+    for i in indices:
+        t[i]
+    return time.time() - t0
+
+def bench_last_char(s, repeat=5):
+    total = 0.0
+    for i in range(repeat):
+        t = fresh(s)
+        t0 = time.time()
+        t[len(t) - 100]
+        total += time.time() - t0
+    return total / repeat
+
+BENCHMARKS = [('first s[10]', bench_first_index),
+              ('find near start', bench_find_near_start),
+              ('scan first 2000', bench_scan_start),
+              ('100000 random', bench_random),
+              ('s[len-100]', bench_last_char)]
+
+def main(size):
+    texts = make_texts(size)
+    print '%-18s' % '', ''.join(['%14s' % name for name, _ in texts])
+    for bench_name, function in BENCHMARKS:
+        results = [function(s) for _, s in texts]
+        print '%-18s' % bench_name, ''.join(['%12.3fms' % (r * 1000)
+                                             for r in results])
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4000000)
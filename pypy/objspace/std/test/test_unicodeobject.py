@@ -53,6 +53,17 @@ class TestUnicodeObject:
         assert space.eq_w(w_char1, w_uni._getitem_result(space, 0))
         assert space.eq_w(w_char2, w_uni._getitem_result(space, 1))
 
+    def test_index_storage_lazy(self):
+        space = self.space
+        u = u"aä" * 10000
+        w_uni = space.newutf8(u.encode("utf-8"), len(u))
+        w_char = w_uni._getitem_result(space, 11)
+        assert space.utf8_w(w_char) == u"ä".encode("utf-8")
+        assert w_uni._index_storage.filled == 0
+        w_char = w_uni._getitem_result(space, 1000)
+        assert space.utf8_w(w_char) == "a"
+        assert w_uni._index_storage.filled == 1000 // 64 + 1
+
 
     if HAS_HYPOTHESIS:
         @given(strategies.text(), strategies.integers(min_value=0, max_value=10),
@@ -0,0 +1,51 @@
+"""Compare the startup time of a pypy with and without the snapshot of the
+standard library (lib_pypy/stdlib.snapshot).
+
+    python startup-bench.py /path/to/pypy-c [runs] [command]
+
+The snapshot is built if it does not exist yet, and temporarily moved away
+for the runs without it.  The command run by pypy defaults to 'pass'.
+"""
+import os, sys, subprocess, time
+
+
+def get_prefix(pypy):
+    return subprocess.check_output(
+        [pypy, '-c', 'import sys; print sys.prefix']).strip()
+
+def measure(pypy, runs, command):
+    times = []
+    for i in range(runs):
+        t0 = time.time()
+        subprocess.check_call([pypy, '-c', command])
+        times.append(time.time() - t0)
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+def main(pypy, runs=20, command='pass'):
+    prefix = get_prefix(pypy)
+    snapshot = os.path.join(prefix, 'lib_pypy', 'stdlib.snapshot')
+    if not os.path.exists(snapshot):
+        subprocess.check_call([pypy, os.path.join(prefix, 'lib_pypy',
+                               'pypy_tools', 'build_stdlib_snapshot.py')])
+    measure(pypy, 2, command)    # warm up the disk caches
+    with_snapshot = measure(pypy, runs, command)
+    os.rename(snapshot, snapshot + '.disabled')
+    try:
+        measure(pypy, 2, command)    # writes the missing .pyc files
+        without_snapshot = measure(pypy, runs, command)
+    finally:
+        os.rename(snapshot + '.disabled', snapshot)
+    print 'pypy -c %r, %d runs (min / median):' % (command, runs)
+    print '  without snapshot: %.4fs / %.4fs' % without_snapshot
+    print '  with snapshot:    %.4fs / %.4fs' % with_snapshot
+    print '  speedup:          %.2fx' % (without_snapshot[0] / with_snapshot[0])
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print __doc__
+        sys.exit(2)
+    args = sys.argv[1:]
+    if len(args) > 1:
+        args[1] = int(args[1])
+    main(*args)
@@ -209,6 +209,13 @@ def create_package(basedir, options, _fake=False):
                     ignore=ignore_patterns('.svn', 'py', '*.pyc', '*~',
                                            '*_cffi.c', '*.o', '*.pyd-*', '*.obj',
                                            '*.lib', '*.exp', '*.manifest'))
+    if not _fake and not options.no_snapshot:
+        # precompiled stdlib, loaded instead of the .py/.pyc files.  The
+        # copies above keep the mtime of the files, which the snapshot
+        # records
+        subprocess.check_call([str(pypy_c), str(basedir.join('lib_pypy',
+                                   'pypy_tools', 'build_stdlib_snapshot.py')),
+                               str(pypydir)])
     for file in ['README.rst',]:
         shutil.copy(str(basedir.join(file)), str(pypydir))
     for file in ['_testcapimodule.c', '_ctypes_test.c']:
@@ -333,6 +340,9 @@ def package(*args, **kwds):
                     help='do not build and package the %r cffi module' % (key,))
     parser.add_argument('--without-cffi', dest='no_cffi', action='store_true',
         help='skip building *all* the cffi modules listed above')
+    parser.add_argument('--without-snapshot', dest='no_snapshot',
+        action='store_true',
+        help='do not build the precompiled snapshot of the stdlib')
     parser.add_argument('--no-keep-debug', dest='keep_debug',
                         action='store_false', help='do not keep debug symbols')
     parser.add_argument('--rename_pypy_c', dest='pypy_c', type=str, default=pypy_exe,
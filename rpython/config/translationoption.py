@@ -106,6 +106,11 @@ translation_optiondescription = OptionDescription(
     # other noticeable options
     BoolOption("thread", "enable use of threading primitives",
                default=False, cmdline="--thread"),
+    BoolOption("gcparallelmark",
+               "allow the incminimark GC to mark objects with several "
+               "threads (experimental, see PYPY_GC_MARK_THREADS)",
+               default=False, cmdline="--gc-parallel-mark",
+               requires=[("translation.thread", True)]),
     BoolOption("sandbox", "Produce a fully-sandboxed executable",
                default=False, cmdline="--sandbox",
                requires=[("translation.thread", False)],
@@ -6,6 +6,7 @@ from rpython.rtyper.annlowlevel import llhelper, MixLevelHelperAnnotator
 from rpython.rtyper.annlowlevel import hlstr, hlunicode
 from rpython.rtyper.llannotation import lltype_to_annotation
 from rpython.rlib.objectmodel import we_are_translated, specialize, compute_hash
+from rpython.rlib.rarithmetic import intmask
 from rpython.jit.metainterp import history, compile
 from rpython.jit.metainterp.optimize import SpeculativeError
 from rpython.jit.metainterp.support import adr2int, ptr2int
@@ -260,6 +261,10 @@ class AbstractLLCPU(AbstractCPU):
                 if self.HAS_CODEMAP:
                     self.codemap.free_asm_block(rawstart, rawstop)
 
+    def get_jit_memory_used(self):
+        return (intmask(self.asmmemmgr.total_mallocs) +
+                self.tracker.total_resume_bytes)
+
     def force(self, addr_of_force_token):
         frame = rffi.cast(jitframe.JITFRAMEPTR, addr_of_force_token)
         frame = frame.resolve()
@@ -268,6 +268,30 @@ class TranslationTestJITStats(CCompiledMixin):
         res = self.meta_interp(main, [])
         assert res == 0
 
+    def test_jit_memory_stats(self):
+        driver = JitDriver(greens = [], reds = ['i'])
+
+        def f():
+            i = 0
+            while i < 100000:
+                driver.jit_merge_point(i=i)
+                i += 1
+
+        def main():
+            set_param(driver, "max_jit_memory", 100000)
+            f()
+            res = 0
+            if jit_hooks.stats_get_guard_count(None) > 0:
+                res += 1
+            if jit_hooks.stats_get_resume_bytes(None) > 0:
+                res += 10
+            if jit_hooks.stats_memmgr_evicted_loops(None) == 0:
+                res += 100
+            return res
+
+        res = self.meta_interp(main, [])
+        assert res == 111
+
 class TranslationRemoveTypePtrTest(CCompiledMixin):
     CPUClass = getcpuclass()
 
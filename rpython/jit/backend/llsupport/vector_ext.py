@@ -224,6 +224,8 @@ class VectorExt(object):
     def __init__(self):
         self._enabled = False
         self.register_size = 0 # in bytes
+        self.default_register_size = 0
+        self.wide_register_size = 0 # 0 if there are no wider registers
         self.accum = False
         self._setup = False
 
@@ -233,9 +235,11 @@ class VectorExt(object):
     def setup_once(self):
         raise NotImplementedError
 
-    def enable(self, vec_size, accum=False):
+    def enable(self, vec_size, accum=False, wide_vec_size=0):
         self._enabled = vec_size != 0
         self.register_size = vec_size
+        self.default_register_size = vec_size
+        self.wide_register_size = wide_vec_size
         self.accum = accum
 
     def is_enabled(self):
@@ -244,6 +248,37 @@ class VectorExt(object):
     def vec_size(self):
         return self.register_size
 
+    # the vector operations that the backend can emit on the wide
+    # registers (if there are any)
+    WIDE_OPS = {}
+
+    def select_vec_size(self, operations):
+        """ Select the vector register size used to vectorize the loop:
+            the wide registers are only used if every operation that
+            could be turned into a vector operation has got an
+            implementation for them, and if all the arrays have got
+            the same item size (otherwise the vectors must be converted).
+            The result is returned and is also the value of vec_size()
+            afterwards.
+        """
+        size = self.default_register_size
+        if self.wide_register_size > size:
+            itemsize = -1
+            for op in operations:
+                if op.vector >= 0 and not rop.is_guard(op.getopnum()) and \
+                        op.vector not in self.WIDE_OPS:
+                    break
+                if op.is_primitive_array_access():
+                    descr = op.getdescr()
+                    opitemsize = descr.get_item_size_in_bytes()
+                    if itemsize != -1 and opitemsize != itemsize:
+                        break
+                    itemsize = opitemsize
+            else:
+                size = self.wide_register_size
+        self.register_size = size
+        return size
+
     def supports_accumulation(self):
         return self.accum
 
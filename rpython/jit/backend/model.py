@@ -10,6 +10,9 @@ class CPUTotalTracker(object):
     total_compiled_bridges = 0
     total_freed_loops = 0
     total_freed_bridges = 0
+    # resume data and guards of the loops not freed so far
+    total_resume_bytes = 0
+    total_guards = 0
 
 class AbstractCPU(object):
     supports_floats = False
@@ -162,6 +165,11 @@ class AbstractCPU(object):
         """
         pass
 
+    def get_jit_memory_used(self):
+        """Bytes of machine code and resume data of the compiled loops
+        that have not been freed yet."""
+        return self.tracker.total_resume_bytes
+
     def sizeof(self, S):
         raise NotImplementedError
 
@@ -292,6 +300,8 @@ class AbstractCPU(object):
 class CompiledLoopToken(object):
     asmmemmgr_blocks = None
     asmmemmgr_gcreftracers = None
+    resume_bytes = 0
+    guard_count = 0
 
     def __init__(self, cpu, number):
         cpu.tracker.total_compiled_loops += 1
@@ -313,6 +323,23 @@ class CompiledLoopToken(object):
         debug_print("allocating Bridge #", self.bridges_count, "of Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def record_guard(self, resume_bytes):
+        """Called for every guard of the loop and its bridges, with an
+        estimate of the size of its resume data."""
+        self.resume_bytes += resume_bytes
+        self.guard_count += 1
+        self.cpu.tracker.total_resume_bytes += resume_bytes
+        self.cpu.tracker.total_guards += 1
+
+    def get_memory_size(self):
+        """Bytes of machine code and resume data of the loop and its
+        bridges, freed together with it."""
+        size = self.resume_bytes
+        if self.asmmemmgr_blocks is not None:
+            for rawstart, rawstop in self.asmmemmgr_blocks:
+                size += rawstop - rawstart
+        return size
+
     def update_frame_info(self, oldlooptoken, baseofs):
         new_fi = self.frame_info
         new_loop_tokens = []
@@ -335,4 +362,6 @@ class CompiledLoopToken(object):
         self.cpu.free_loop_and_bridges(self)
         self.cpu.tracker.total_freed_loops += 1
         self.cpu.tracker.total_freed_bridges += self.bridges_count
+        self.cpu.tracker.total_resume_bytes -= self.resume_bytes
+        self.cpu.tracker.total_guards -= self.guard_count
         #debug_stop("jit-mem-looptoken-free")
@@ -44,6 +44,7 @@ from rpython.rlib.objectmodel import compute_unique_id
 class Assembler386(BaseAssembler, VectorAssemblerMixin):
     _regalloc = None
     _output_loop_log = None
+    wide_vector_regs = False   # True if 256-bit vector registers are used
     _second_tmp_reg = ecx
 
     DEBUG_FRAME_DEPTH = False
@@ -89,6 +90,10 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
                                                         allblocks)
         self.target_tokens_currently_compiling = {}
         self.frame_depth_to_patch = []
+        # decided by the vectorizer for the whole loop, see
+        # VectorizingOptimizer.run_optimization(); the bridges use the
+        # token of their loop, so they keep the whole registers as well
+        self.wide_vector_regs = looptoken.wide_vector_registers
 
 
     def teardown(self):
@@ -1142,8 +1147,12 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
         to_xmm = isinstance(to_loc, RegLoc) and to_loc.is_xmm
         if from_xmm or to_xmm:
             if from_xmm and to_xmm:
-                # copy 128-bit from -> to
-                self.mc.MOVAPD(to_loc, from_loc)
+                if IS_X86_64 and self.wide_vector_regs:
+                    # copy 256-bit from -> to, the loop uses AVX vectors
+                    self.mc.VMOVAPD_yy(to_loc.value, from_loc.value)
+                else:
+                    # copy 128-bit from -> to
+                    self.mc.MOVAPD(to_loc, from_loc)
             else:
                 self.mc.MOVSD(to_loc, from_loc)
         else:
@@ -1972,6 +1981,9 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
         #
         self._update_at_exit(guardtok.fail_locs, guardtok.failargs,
                              guardtok.faildescr, regalloc)
+        if IS_X86_64 and self.wide_vector_regs:
+            # leaving AVX code: avoid the penalty of the next SSE instructions
+            self.mc.VZEROUPPER()
         #
         faildescrindex, target = self.store_info_on_descr(startpos, guardtok)
         if IS_X86_64:
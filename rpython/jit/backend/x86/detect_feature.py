@@ -20,20 +20,28 @@ def detect_sse2():
     code = cpu_id(eax=1)
     return bool(code & (1<<25)) and bool(code & (1<<26))
 
-def cpu_id(eax = 1, ret_edx = True, ret_ecx = False):
+def cpu_id(eax = 1, ret_edx = True, ret_ecx = False, ret_ebx = False,
+           ecx = 0):
     asm = ["\xB8",                     # MOV EAX, $eax
                 chr(eax & 0xff),
                 chr((eax >> 8) & 0xff),
                 chr((eax >> 16) & 0xff),
                 chr((eax >> 24) & 0xff),
+           "\xB9",                     # MOV ECX, $ecx (the subleaf)
+                chr(ecx & 0xff),
+                chr((ecx >> 8) & 0xff),
+                chr((ecx >> 16) & 0xff),
+                chr((ecx >> 24) & 0xff),
            "\x53",                     # PUSH EBX
            "\x0F\xA2",                 # CPUID
-           "\x5B",                     # POP EBX
           ]
-    if ret_edx:
+    if ret_ebx:
+        asm.append("\x89\xD8")         # MOV EAX, EBX
+    elif ret_edx:
         asm.append("\x92")             # XCHG EAX, EDX
     elif ret_ecx:
         asm.append("\x91")             # XCHG EAX, ECX
+    asm.append("\x5B")                 # POP EBX
     asm.append("\xC3")                 # RET
     return cpu_info(''.join(asm))
 
@@ -52,6 +60,30 @@ def detect_sse4a(code=-1):
         code = cpu_id(eax=0x80000001, ret_edx=False, ret_ecx=True)
     return bool(code & (1<<20))
 
+def xgetbv():
+    # the low 32 bits of the extended control register XCR0, telling
+    # which register states are saved and restored by the OS
+    return cpu_info("\x31\xC9"          # XOR ECX, ECX
+                    "\x0F\x01\xD0"      # XGETBV
+                    "\xC3")              # RET
+
+def detect_avx(code=-1):
+    if code == -1:
+        code = cpu_id(eax=1, ret_edx=False, ret_ecx=True)
+    # AVX, and OSXSAVE which says that XGETBV can be used
+    if not (code & (1<<28)) or not (code & (1<<27)):
+        return False
+    # the OS must save both the xmm and the upper halves of the ymm registers
+    return (xgetbv() & 0x6) == 0x6
+
+def detect_avx2():
+    if not detect_avx():
+        return False
+    if cpu_id(eax=0, ret_edx=False) < 7:
+        return False
+    code = cpu_id(eax=7, ecx=0, ret_edx=False, ret_ebx=True)
+    return bool(code & (1<<5))
+
 def detect_x32_mode():
     # 32-bit         64-bit / x32
     code = cpu_info("\x48"                # DEC EAX
@@ -71,6 +103,10 @@ if __name__ == '__main__':
         print 'Processor supports sse4.2'
     if detect_sse4a():
         print 'Processor supports sse4a'
+    if detect_avx():
+        print 'Processor supports avx'
+    if detect_avx2():
+        print 'Processor supports avx2'
 
     if detect_x32_mode():
         print 'Process is running in "x32" mode.'
@@ -23,7 +23,7 @@ from rpython.jit.codewriter import longlong
 from rpython.jit.codewriter.effectinfo import EffectInfo
 from rpython.jit.metainterp.history import (Const, ConstInt, ConstPtr,
     ConstFloat, INT, REF, FLOAT, VECTOR, TargetToken, AbstractFailDescr)
-from rpython.jit.metainterp.resoperation import rop
+from rpython.jit.metainterp.resoperation import rop, VectorOp
 from rpython.jit.metainterp.resume import AccumInfo
 from rpython.rlib import rgc
 from rpython.rlib.objectmodel import we_are_translated
@@ -335,6 +335,9 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
             accuminfo = descr.rd_vector_info
             while accuminfo:
                 accuminfo.location = faillocs[accuminfo.getpos_in_failargs()]
+                vecop = guard_op.getfailargs()[accuminfo.getpos_in_failargs()]
+                if isinstance(vecop, VectorOp):
+                    accuminfo.location_size = vecop.bytesize * vecop.count
                 loc = self.loc(accuminfo.getoriginal())
                 faillocs[accuminfo.getpos_in_failargs()] = loc
                 accuminfo = accuminfo.next()
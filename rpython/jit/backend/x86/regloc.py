@@ -375,7 +375,7 @@ class LocationCodeBuilder(object):
 
     _scratch_register_value = -1    # -1 means 'unknown'
 
-    def _binaryop(name):
+    def _binaryop(name, vex=False):
 
         def insn_with_64_bit_immediate(self, loc1, loc2):
             # These are the worst cases:
@@ -407,8 +407,16 @@ class LocationCodeBuilder(object):
                 self._load_scratch(val2)
                 return False
 
+        def methname_for(codes):
+            # the AVX instructions take 256-bit 'y' registers, which are
+            # the same RegLocs as the 'x' registers
+            if vex:
+                codes = codes.replace('x', 'y', 1)
+            return name + "_" + codes
+        methname_for._annspecialcase_ = 'specialize:memo'
+
         def invoke(self, codes, val1, val2):
-            methname = name + "_" + codes
+            methname = methname_for(codes)
             _rx86_getattr(self, methname)(val1, val2)
         invoke._annspecialcase_ = 'specialize:arg(1)'
 
@@ -420,7 +428,7 @@ class LocationCodeBuilder(object):
             if loc1 == '?':
                 return any([has_implementation_for(loc1, loc2)
                             for loc1 in unrolling_location_codes])
-            methname = name + "_" + loc1 + loc2
+            methname = methname_for(loc1 + loc2)
             if not hasattr(rx86.AbstractX86CodeBuilder, methname):
                 return False
             # any NAME_j should have a NAME_m as a fallback, too.  Check it
@@ -782,6 +790,13 @@ class LocationCodeBuilder(object):
     HADDPD = _binaryop('HADDPD')
     HADDPS = _binaryop('HADDPS')
 
+    # AVX, 256-bit
+    VMOVUPD = _binaryop('VMOVUPD', vex=True)
+    VMOVUPS = _binaryop('VMOVUPS', vex=True)
+    VMOVDQU = _binaryop('VMOVDQU', vex=True)
+    VBROADCASTSD = _binaryop('VBROADCASTSD', vex=True)
+    VBROADCASTSS = _binaryop('VBROADCASTSS', vex=True)
+
     CALL = _relative_unaryop('CALL')
     JMP = _relative_unaryop('JMP')
 
@@ -348,6 +348,49 @@ rex_w  = encode_rex, 0, REX_W, None       # a REX.W prefix
 rex_nw = encode_rex_opt, 0, 0, None       # an optional REX prefix
 rex_fw = encode_rex, 0, 0, None           # a forced REX prefix
 
+# ____________________________________________________________
+# ***X86_64 only***
+# For AVX: the VEX prefix, which replaces the REX prefix and the
+# '\x66', '\xF3', '\xF2' and '\x0F' bytes in front of the opcode.
+# It can name one more register operand, 'vvvv'.  That register
+# number is collected in the bits 4-7 of the rexbyte, together with
+# the REX bits of the other operands.
+
+VEX_PP = {'': 0, '\x66': 1, '\xF3': 2, '\xF2': 3}
+VEX_MAP = {'\x0F': 1, '\x0F\x38': 2, '\x0F\x3A': 3}
+
+@specialize.arg(2)
+def encode_vex(mc, rexbyte, mode, orbyte):
+    assert mc.WORD == 8
+    assert orbyte == 0
+    map_select = mode >> 8
+    # W, vvvv (inverted), L, pp
+    lastbyte = (mode & 0x87) | (((~rexbyte >> 4) & 0xF) << 3)
+    if map_select == 1 and not (rexbyte & (REX_X | REX_B)) and not (mode & 0x80):
+        # the shorter two-bytes form
+        mc.writechar('\xC5')
+        mc.writechar(chr(((~rexbyte & REX_R) << 5) | lastbyte))
+    else:
+        mc.writechar('\xC4')
+        mc.writechar(chr(((~rexbyte & 7) << 5) | map_select))
+        mc.writechar(chr(lastbyte))
+    return 0
+
+def vex(prefix, opcode_map, l=1, w=0):
+    # by default, the 256-bit version of the instruction (VEX.L = 1)
+    mode = (VEX_MAP[opcode_map] << 8) | (w << 7) | (l << 2) | VEX_PP[prefix]
+    return encode_vex, 0, mode, None
+
+def encode_vex_register(mc, reg, _, orbyte):
+    return orbyte     # already written in the VEX prefix
+
+def rex_vex_register(mc, reg, _):
+    assert 0 <= reg < 16
+    return reg << 4
+
+def vex_register(argnum):
+    return encode_vex_register, argnum, None, rex_vex_register
+
 # ____________________________________________________________
 
 def insn(*encoding):
@@ -464,6 +507,7 @@ def shifts(mod_field):
 #     j - address
 #     i - immediate
 #     x - XMM register
+#     y - YMM register (the 256-bit AVX registers, on 64 bits only)
 #     a - 4-tuple: (base_register, scale_register, scale, offset)
 #     m - 2-tuple: (base_register, offset)
 class AbstractX86CodeBuilder(object):
@@ -804,6 +848,42 @@ class AbstractX86CodeBuilder(object):
     CMPPD_xxi = xmminsn('\x66', rex_nw, '\x0F\xC2', register(1,8), register(2), '\xC0', immediate(3, 'b'))
     CMPPS_xxi = xmminsn(        rex_nw, '\x0F\xC2', register(1,8), register(2), '\xC0', immediate(3, 'b'))
 
+    # ------------------------------ AVX ------------------------------
+    # Only on 64-bit.  The 256-bit 'y' registers are the same numbers as
+    # the 'x' registers.  See also define_vex_insn() below.
+
+    VEXTRACTF128_xyi = xmminsn(vex('\x66', '\x0F\x3A'), '\x19', register(2,8), register(1), '\xC0', immediate(3, 'b'))
+    VINSERTF128_yyxi = xmminsn(vex('\x66', '\x0F\x3A'), vex_register(2), '\x18', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+    VEXTRACTI128_xyi = xmminsn(vex('\x66', '\x0F\x3A'), '\x39', register(2,8), register(1), '\xC0', immediate(3, 'b'))
+    VINSERTI128_yyxi = xmminsn(vex('\x66', '\x0F\x3A'), vex_register(2), '\x38', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+
+    # the VEX forms of PEXTR* and PINSR*, to use on the 'x' registers
+    # while the upper halves of the 'y' registers are in use
+    VPEXTRQ_rxi = xmminsn(vex('\x66', '\x0F\x3A', l=0, w=1), '\x16', register(1), register(2,8), '\xC0', immediate(3, 'b'))
+    VPEXTRD_rxi = xmminsn(vex('\x66', '\x0F\x3A', l=0), '\x16', register(1), register(2,8), '\xC0', immediate(3, 'b'))
+    VPEXTRW_rxi = xmminsn(vex('\x66', '\x0F', l=0), '\xC5', register(1,8), register(2), '\xC0', immediate(3, 'b'))
+    VPEXTRB_rxi = xmminsn(vex('\x66', '\x0F\x3A', l=0), '\x14', register(1), register(2,8), '\xC0', immediate(3, 'b'))
+    VPINSRQ_xxri = xmminsn(vex('\x66', '\x0F\x3A', l=0, w=1), vex_register(2), '\x22', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+    VPINSRD_xxri = xmminsn(vex('\x66', '\x0F\x3A', l=0), vex_register(2), '\x22', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+    VPINSRW_xxri = xmminsn(vex('\x66', '\x0F', l=0), vex_register(2), '\xC4', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+    VPINSRB_xxri = xmminsn(vex('\x66', '\x0F\x3A', l=0), vex_register(2), '\x20', register(1,8), register(3), '\xC0', immediate(4, 'b'))
+
+    # for a register-register move, use the same encoding as gas: when
+    # possible, the one that fits in the two-bytes VEX prefix
+    VMOVAPD_yy1 = xmminsn(vex('\x66', '\x0F'), '\x28', register(1,8), register(2), '\xC0')
+    VMOVAPD_yy2 = xmminsn(vex('\x66', '\x0F'), '\x29', register(2,8), register(1), '\xC0')
+
+    def VMOVAPD_yy(self, dst, src):
+        if src >= 8 and dst < 8:
+            self.VMOVAPD_yy2(dst, src)
+        else:
+            self.VMOVAPD_yy1(dst, src)
+    VMOVAPD_yy.is_xmm_insn = True
+
+    # clears the upper half of all the 'y' registers, to avoid the
+    # penalty of mixing AVX and legacy SSE instructions
+    VZEROUPPER = insn('\xC5\xF8\x77')
+
     # ------------------------------------------------------------
 
 Conditions = {
@@ -1047,6 +1127,87 @@ define_pxmm_insn('PCMPEQD_x*',   '\x76')
 define_pxmm_insn('PCMPEQW_x*',   '\x75')
 define_pxmm_insn('PCMPEQB_x*',   '\x74')
 
+def define_vex_insn(insnname_template, prefix, opcode_map, insn_char):
+    # AVX instructions with three operands, 'dest = src1 OP src2';
+    # src1 is encoded in VEX.vvvv
+    def add_insn(char, *post):
+        methname = insnname_template.replace('*', char)
+        insn_func = xmminsn(vex(prefix, opcode_map), vex_register(2),
+                            insn_char, register(1, 8), *post)
+        assert not hasattr(AbstractX86CodeBuilder, methname)
+        setattr(AbstractX86CodeBuilder, methname, insn_func)
+    #
+    assert insnname_template.count('*') == 1
+    add_insn('y', register(3), '\xC0')
+    add_insn('j', abs_(3))
+    add_insn('m', mem_reg_plus_const(3))
+
+define_vex_insn('VADDPD_yy*',  '\x66', '\x0F', '\x58')
+define_vex_insn('VADDPS_yy*',  '',     '\x0F', '\x58')
+define_vex_insn('VSUBPD_yy*',  '\x66', '\x0F', '\x5C')
+define_vex_insn('VSUBPS_yy*',  '',     '\x0F', '\x5C')
+define_vex_insn('VMULPD_yy*',  '\x66', '\x0F', '\x59')
+define_vex_insn('VMULPS_yy*',  '',     '\x0F', '\x59')
+define_vex_insn('VDIVPD_yy*',  '\x66', '\x0F', '\x5E')
+define_vex_insn('VDIVPS_yy*',  '',     '\x0F', '\x5E')
+define_vex_insn('VANDPD_yy*',  '\x66', '\x0F', '\x54')
+define_vex_insn('VANDPS_yy*',  '',     '\x0F', '\x54')
+define_vex_insn('VXORPD_yy*',  '\x66', '\x0F', '\x57')
+define_vex_insn('VXORPS_yy*',  '',     '\x0F', '\x57')
+
+# the integer ones need AVX2
+define_vex_insn('VPADDQ_yy*',  '\x66', '\x0F', '\xD4')
+define_vex_insn('VPADDD_yy*',  '\x66', '\x0F', '\xFE')
+define_vex_insn('VPADDW_yy*',  '\x66', '\x0F', '\xFD')
+define_vex_insn('VPADDB_yy*',  '\x66', '\x0F', '\xFC')
+define_vex_insn('VPSUBQ_yy*',  '\x66', '\x0F', '\xFB')
+define_vex_insn('VPSUBD_yy*',  '\x66', '\x0F', '\xFA')
+define_vex_insn('VPSUBW_yy*',  '\x66', '\x0F', '\xF9')
+define_vex_insn('VPSUBB_yy*',  '\x66', '\x0F', '\xF8')
+define_vex_insn('VPMULLD_yy*', '\x66', '\x0F\x38', '\x40')
+define_vex_insn('VPMULLW_yy*', '\x66', '\x0F', '\xD5')
+define_vex_insn('VPAND_yy*',   '\x66', '\x0F', '\xDB')
+define_vex_insn('VPOR_yy*',    '\x66', '\x0F', '\xEB')
+define_vex_insn('VPXOR_yy*',   '\x66', '\x0F', '\xEF')
+
+def define_vex_modes(insnname_template, before_modrm, regtype=None):
+    # like define_modrm_modes(), for the two-operands AVX instructions;
+    # the register-register form is only defined if 'regtype' is given
+    def add_insn(code, *modrm):
+        methname = insnname_template.replace('*', code)
+        args = before_modrm + list(modrm)
+        if code == regtype:
+            args.append('\xC0')
+        assert not hasattr(AbstractX86CodeBuilder, methname)
+        setattr(AbstractX86CodeBuilder, methname, xmminsn(*args))
+
+    modrm_argnum = insnname_template.split('_')[1].index('*')+1
+
+    if regtype is not None:
+        add_insn(regtype, register(modrm_argnum))
+    add_insn('b', stack_bp(modrm_argnum))
+    add_insn('s', stack_sp(modrm_argnum))
+    add_insn('m', mem_reg_plus_const(modrm_argnum))
+    add_insn('a', mem_reg_plus_scaled_reg_plus_const(modrm_argnum))
+    add_insn('j', abs_(modrm_argnum))
+    add_insn('p', rip_offset(modrm_argnum))
+
+define_vex_modes('VMOVUPD_y*', [vex('\x66', '\x0F'), '\x10', register(1, 8)])
+define_vex_modes('VMOVUPD_*y', [vex('\x66', '\x0F'), '\x11', register(2, 8)])
+define_vex_modes('VMOVUPS_y*', [vex('',     '\x0F'), '\x10', register(1, 8)])
+define_vex_modes('VMOVUPS_*y', [vex('',     '\x0F'), '\x11', register(2, 8)])
+define_vex_modes('VMOVDQU_y*', [vex('\xF3', '\x0F'), '\x6F', register(1, 8)])
+define_vex_modes('VMOVDQU_*y', [vex('\xF3', '\x0F'), '\x7F', register(2, 8)])
+
+# broadcast the lowest element to all the elements; from a register,
+# they need AVX2
+define_vex_modes('VBROADCASTSD_y*', [vex('\x66', '\x0F\x38'), '\x19', register(1, 8)], 'x')
+define_vex_modes('VBROADCASTSS_y*', [vex('\x66', '\x0F\x38'), '\x18', register(1, 8)], 'x')
+define_vex_modes('VPBROADCASTQ_y*', [vex('\x66', '\x0F\x38'), '\x59', register(1, 8)], 'x')
+define_vex_modes('VPBROADCASTD_y*', [vex('\x66', '\x0F\x38'), '\x58', register(1, 8)], 'x')
+define_vex_modes('VPBROADCASTW_y*', [vex('\x66', '\x0F\x38'), '\x79', register(1, 8)], 'x')
+define_vex_modes('VPBROADCASTB_y*', [vex('\x66', '\x0F\x38'), '\x78', register(1, 8)], 'x')
+
 # ____________________________________________________________
 
 _classes = (AbstractX86CodeBuilder, X86_64_CodeBuilder, X86_32_CodeBuilder)
@@ -40,7 +40,7 @@ class FakeFailDescr:
 
 class TestRegallocPushPop(object):
 
-    def do_test(self, callback):
+    def do_test(self, callback, wide_vector_registers=False):
         from rpython.jit.backend.x86.regalloc import X86FrameManager
         from rpython.jit.backend.x86.regalloc import X86XMMRegisterManager
         class FakeToken:
@@ -51,6 +51,7 @@ class TestRegallocPushPop(object):
         if cpu.HAS_CODEMAP:
             cpu.codemap.setup()
         looptoken = FakeToken()
+        looptoken.wide_vector_registers = wide_vector_registers
         asm = cpu.assembler
         asm.setup_once()
         asm.setup(looptoken)
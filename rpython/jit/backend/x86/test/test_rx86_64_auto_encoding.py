@@ -32,7 +32,9 @@ class TestRx86_64(test_rx86_32_auto_encoding.TestRx86_32):
                 # the test suite uses 64 bit registers instead of 32 bit...
                 # it is tested in the 32 bit test!
                 (instrname == 'PEXTRD') or
-                (instrname == 'PINSRD')
+                (instrname == 'PINSRD') or
+                (instrname == 'VPEXTRD') or
+                (instrname == 'VPINSRD')
         )
 
     def array_tests(self):
@@ -3,7 +3,8 @@ from rpython.jit.backend.x86.regloc import *
 from rpython.jit.backend.llsupport.regalloc import Lifetime
 from rpython.jit.backend.x86.regalloc import (RegAlloc,
         X86FrameManager, X86XMMRegisterManager, X86RegisterManager)
-from rpython.jit.backend.x86.vector_ext import TempVector
+from rpython.jit.backend.x86.vector_ext import TempVector, X86VectorExt
+from rpython.jit.backend.x86 import detect_feature
 from rpython.jit.backend.x86.test import test_basic
 from rpython.jit.backend.x86.test.test_assembler import \
         (TestRegallocPushPop as BaseTestAssembler)
@@ -14,12 +15,18 @@ from rpython.jit.backend.detect_cpu import getcpuclass
 class TestBasic(test_basic.Jit386Mixin, test_zvector.VectorizeTests):
     # for the individual tests see
     # ====> ../../../metainterp/test/test_basic.py
+    use_avx2 = False     # only the 128-bit registers
+
     def setup_method(self, method):
         clazz = self.CPUClass
+        use_avx2 = self.use_avx2
         def init(*args, **kwargs):
             cpu = clazz(*args, **kwargs)
             # > 95% can be executed, thus let's cheat here a little
             cpu.supports_guard_gc_type = True
+            if cpu.vector_ext is not None:
+                cpu.vector_ext = X86VectorExt()
+                cpu.vector_ext.use_avx2 = use_avx2
             return cpu
         self.CPUClass = init
 
@@ -31,6 +38,15 @@ class TestBasic(test_basic.Jit386Mixin, test_zvector.VectorizeTests):
 
     enable_opts = 'intbounds:rewrite:virtualize:string:earlyforce:pure:heap:unroll'
 
+class TestBasicAVX2(TestBasic):
+    # the same tests, vectorizing with the 256-bit registers if possible
+    use_avx2 = True
+
+    def setup_method(self, method):
+        if not detect_feature.detect_avx2():
+            py.test.skip("the CPU does not support AVX2")
+        TestBasic.setup_method(self, method)
+
 @py.test.fixture
 def regalloc(request):
     from rpython.jit.backend.x86.regalloc import X86FrameManager
@@ -38,6 +54,7 @@ def regalloc(request):
     class FakeToken:
         class compiled_loop_token:
             asmmemmgr_blocks = None
+        wide_vector_registers = False
     cpu = getcpuclass()(None, None)
     cpu.setup()
     if cpu.HAS_CODEMAP:
@@ -66,6 +83,15 @@ class TestAssembler(BaseTestAssembler):
         ptr[3] = rffi.r_int(d)
         return adr
 
+    def imm_4_int64(self, a, b, c, d):
+        adr = self.xrm.assembler.datablockwrapper.malloc_aligned(32, 32)
+        ptr = rffi.cast(rffi.CArrayPtr(rffi.LONGLONG), adr)
+        ptr[0] = rffi.r_longlong(a)
+        ptr[1] = rffi.r_longlong(b)
+        ptr[2] = rffi.r_longlong(c)
+        ptr[3] = rffi.r_longlong(d)
+        return adr
+
     def test_simple_4_int_load_sum_x86_64(self):
         def callback(asm):
             if asm.mc.WORD != 8:
@@ -117,6 +143,66 @@ class TestAssembler(BaseTestAssembler):
         res = self.do_test(callback) & 0xffffffff
         assert res == 22
 
+    def test_vector_256bit_sum(self):
+        if not detect_feature.detect_avx2():
+            py.test.skip("the CPU does not support AVX2")
+        def callback(asm):
+            addr = self.imm_4_int64(11, 12, 13, 14)
+            asm.mov(ImmedLoc(addr), ecx)
+            asm.mc.VMOVDQU(xmm6, AddressLoc(ecx,ImmedLoc(0)))
+            asm.mc.VPADDQ_yym(xmm6.value, xmm6.value, (ecx.value,0))
+            asm.mc.VMOVDQU(AddressLoc(ecx,ImmedLoc(0)), xmm6)
+            asm.mc.VEXTRACTF128_xyi(xmm7.value, xmm6.value, 1)
+            asm.mc.PADDQ(xmm6, xmm7)
+            asm.mc.VZEROUPPER()
+            asm.mc.MOVDQ_rx(eax.value, xmm6.value)
+
+        res = self.do_test(callback)
+        assert res == 2 * 11 + 2 * 13
+
+    def test_vector_256bit_move_before_first_wide_op(self):
+        # a bridge of a loop using the 256-bit registers, or the code
+        # before the first 256-bit operation of the loop, must move the
+        # whole registers: the loop token tells the assembler about them
+        if not detect_feature.detect_avx2():
+            py.test.skip("the CPU does not support AVX2")
+        def callback(asm):
+            addr = self.imm_4_int64(11, 12, 13, 14)
+            asm.mov(ImmedLoc(addr), ecx)
+            asm.mc.VMOVDQU(xmm6, AddressLoc(ecx,ImmedLoc(0)))
+            asm.mov(xmm6, xmm5)
+            asm.mc.VEXTRACTI128_xyi(xmm7.value, xmm5.value, 1)
+            asm.mc.VPEXTRQ_rxi(eax.value, xmm7.value, 1)
+            asm.mc.VZEROUPPER()
+
+        res = self.do_test(callback, wide_vector_registers=True)
+        assert res == 14
+
+    def test_vector_256bit_pack_keeps_other_half(self):
+        if not detect_feature.detect_avx2():
+            py.test.skip("the CPU does not support AVX2")
+        def callback(asm):
+            addr = self.imm_4_int64(11, 12, 13, 14)
+            asm.mov(ImmedLoc(addr), ecx)
+            asm.mc.VMOVDQU(xmm6, AddressLoc(ecx,ImmedLoc(0)))
+            asm.mov(ImmedLoc(100), eax)
+            # the element 1, in the lower half; then the element 2
+            asm._pack_wide_lanes(xmm6, eax, 1, 0, 1, 8)
+            asm.mov(ImmedLoc(1000), eax)
+            asm._pack_wide_lanes(xmm6, eax, 2, 0, 1, 8)
+            # unpack the element 3 and add the others
+            asm._pack_wide_lanes(eax, xmm6, 0, 3, 1, 8)
+            asm._pack_wide_lanes(ecx, xmm6, 0, 2, 1, 8)
+            asm.mc.ADD(eax, ecx)
+            asm._pack_wide_lanes(ecx, xmm6, 0, 1, 1, 8)
+            asm.mc.ADD(eax, ecx)
+            asm._pack_wide_lanes(ecx, xmm6, 0, 0, 1, 8)
+            asm.mc.ADD(eax, ecx)
+            asm.mc.VZEROUPPER()
+
+        res = self.do_test(callback, wide_vector_registers=True)
+        assert res == 11 + 100 + 1000 + 14
+
     def test_enforce_var(self, regalloc):
         arg = TempVector('f')
         args = []
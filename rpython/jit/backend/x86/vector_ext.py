@@ -51,10 +51,22 @@ class TempInt(TempVar):
 class X86VectorExt(VectorExt):
 
     should_align_unroll = True
+    use_avx2 = True     # use the 256-bit registers if the CPU supports AVX2
+
+    WIDE_OPS = dict.fromkeys([
+        rop.VEC_INT_ADD, rop.VEC_INT_SUB, rop.VEC_INT_MUL,
+        rop.VEC_INT_AND, rop.VEC_INT_OR, rop.VEC_INT_XOR,
+        rop.VEC_FLOAT_ADD, rop.VEC_FLOAT_SUB, rop.VEC_FLOAT_MUL,
+        rop.VEC_FLOAT_TRUEDIV, rop.VEC_FLOAT_ABS, rop.VEC_FLOAT_NEG,
+        rop.VEC_LOAD_I, rop.VEC_LOAD_F, rop.VEC_STORE,
+    ], True)
 
     def setup_once(self, asm):
         if detect_feature.detect_sse4_1():
-            self.enable(16, accum=True)
+            wide_vec_size = 0
+            if self.use_avx2 and detect_feature.detect_avx2():
+                wide_vec_size = 32
+            self.enable(16, accum=True, wide_vec_size=wide_vec_size)
             asm.setup_once_vector()
         self._setup = True
 
@@ -65,6 +77,16 @@ class VectorAssemblerMixin(object):
     def setup_once_vector(self):
         pass
 
+    def _use_wide_registers(self, vecop):
+        """ True if the vector needs the 256-bit registers (AVX2).  The
+            loop token says that the loop uses them, so that self.mov()
+            copies the whole registers in the loop and in its bridges.
+        """
+        if isinstance(vecop, VectorOp) and vecop.bytesize * vecop.count > 16:
+            assert self.wide_vector_regs
+            return True
+        return False
+
     def genop_guard_vec_guard_true(self, guard_op, guard_token, locs, resloc):
         self.implement_guard(guard_token)
 
@@ -80,7 +102,8 @@ class VectorAssemblerMixin(object):
         temp = X86_64_XMM_SCRATCH_REG
         ve = self.cpu.vector_ext
         assert ve is not None # MUST hold, optimize_vector is never entered if vector_ext is entered
-        load = arg.bytesize * arg.count - ve.register_size
+        # the vector guards only work on the 128-bit registers
+        load = arg.bytesize * arg.count - ve.default_register_size
         assert load <= 0
         if true:
             self.mc.PXOR(temp, temp)
@@ -123,6 +146,8 @@ class VectorAssemblerMixin(object):
         if not isinstance(faildescr, ResumeGuardDescr):
             return
         assert regalloc is not None
+        if self.wide_vector_regs and faildescr.rd_vector_info:
+            self._accum_fold_upper_lanes(faildescr.rd_vector_info)
         accum_info = faildescr.rd_vector_info
         while accum_info:
             pos = accum_info.getpos_in_failargs()
@@ -155,6 +180,27 @@ class VectorAssemblerMixin(object):
                 self.mov(scalar_loc, orig_scalar_loc)
             accum_info = accum_info.next()
 
+    def _accum_fold_upper_lanes(self, accum_info):
+        # the 256-bit accumulators: combine the upper 128 bits with the
+        # lower ones, the rest is done by _accum_reduce_*().  Then the
+        # upper halves are not needed any more, and are cleared before
+        # the SSE instructions of _accum_reduce_*()
+        temp = X86_64_XMM_SCRATCH_REG.value
+        while accum_info:
+            if accum_info.location_size > 16:
+                accumloc = accum_info.location
+                assert isinstance(accumloc, RegLoc)
+                acc = accumloc.value
+                self.mc.VEXTRACTF128_xyi(temp, acc, 1)
+                if accum_info.accum_operation == '*':
+                    self.mc.VMULPD_yyy(acc, acc, temp)
+                elif accum_info.getoriginal().type == FLOAT:
+                    self.mc.VADDPD_yyy(acc, acc, temp)
+                else:
+                    self.mc.VPADDQ_yyy(acc, acc, temp)
+            accum_info = accum_info.next()
+        self.mc.VZEROUPPER()
+
     def _accum_reduce_mul(self, arg, accumloc, targetloc):
         self.mov(accumloc, targetloc)
         # swap the two elements
@@ -185,14 +231,22 @@ class VectorAssemblerMixin(object):
         base_loc, ofs_loc, size_loc, scale, ofs, integer_loc = arglocs
         src_addr = addr_add(base_loc, ofs_loc, ofs.value, scale.value)
         self._vec_load(resloc, src_addr, integer_loc.value,
-                       size_loc.value, False)
+                       size_loc.value, False, self._use_wide_registers(op))
 
     genop_vec_load_i = _genop_vec_load
     genop_vec_load_f = _genop_vec_load
 
     @always_inline
-    def _vec_load(self, resloc, src_addr, integer, itemsize, aligned):
-        if integer:
+    def _vec_load(self, resloc, src_addr, integer, itemsize, aligned,
+                  wide=False):
+        if wide:
+            if integer:
+                self.mc.VMOVDQU(resloc, src_addr)
+            elif itemsize == 4:
+                self.mc.VMOVUPS(resloc, src_addr)
+            elif itemsize == 8:
+                self.mc.VMOVUPD(resloc, src_addr)
+        elif integer:
             if aligned:
                 self.mc.MOVDQA(resloc, src_addr)
             else:
@@ -208,11 +262,20 @@ class VectorAssemblerMixin(object):
                 baseofs, integer_loc = arglocs
         dest_loc = addr_add(base_loc, ofs_loc, baseofs.value, scale.value)
         self._vec_store(dest_loc, value_loc, integer_loc.value,
-                        size_loc.value, False)
+                        size_loc.value, False,
+                        self._use_wide_registers(op.getarg(2)))
 
     @always_inline
-    def _vec_store(self, dest_loc, value_loc, integer, itemsize, aligned):
-        if integer:
+    def _vec_store(self, dest_loc, value_loc, integer, itemsize, aligned,
+                   wide=False):
+        if wide:
+            if integer:
+                self.mc.VMOVDQU(dest_loc, value_loc)
+            elif itemsize == 4:
+                self.mc.VMOVUPS(dest_loc, value_loc)
+            elif itemsize == 8:
+                self.mc.VMOVUPD(dest_loc, value_loc)
+        elif integer:
             if aligned:
                 self.mc.MOVDQA(dest_loc, value_loc)
             else:
@@ -237,7 +300,12 @@ class VectorAssemblerMixin(object):
     def genop_vec_int_mul(self, op, arglocs, resloc):
         loc0, loc1, itemsize_loc = arglocs
         itemsize = itemsize_loc.value
-        if itemsize == 2:
+        if self._use_wide_registers(op) and itemsize in (2, 4):
+            if itemsize == 2:
+                self.mc.VPMULLW_yyy(loc0.value, loc0.value, loc1.value)
+            else:
+                self.mc.VPMULLD_yyy(loc0.value, loc0.value, loc1.value)
+        elif itemsize == 2:
             self.mc.PMULLW(loc0, loc1)
         elif itemsize == 4:
             self.mc.PMULLD(loc0, loc1)
@@ -249,7 +317,17 @@ class VectorAssemblerMixin(object):
     def genop_vec_int_add(self, op, arglocs, resloc):
         loc0, loc1, size_loc = arglocs
         size = size_loc.value
-        if size == 1:
+        if self._use_wide_registers(op):
+            res, src = loc0.value, loc1.value
+            if size == 1:
+                self.mc.VPADDB_yyy(res, res, src)
+            elif size == 2:
+                self.mc.VPADDW_yyy(res, res, src)
+            elif size == 4:
+                self.mc.VPADDD_yyy(res, res, src)
+            elif size == 8:
+                self.mc.VPADDQ_yyy(res, res, src)
+        elif size == 1:
             self.mc.PADDB(loc0, loc1)
         elif size == 2:
             self.mc.PADDW(loc0, loc1)
@@ -261,7 +339,17 @@ class VectorAssemblerMixin(object):
     def genop_vec_int_sub(self, op, arglocs, resloc):
         loc0, loc1, size_loc = arglocs
         size = size_loc.value
-        if size == 1:
+        if self._use_wide_registers(op):
+            res, src = loc0.value, loc1.value
+            if size == 1:
+                self.mc.VPSUBB_yyy(res, res, src)
+            elif size == 2:
+                self.mc.VPSUBW_yyy(res, res, src)
+            elif size == 4:
+                self.mc.VPSUBD_yyy(res, res, src)
+            elif size == 8:
+                self.mc.VPSUBQ_yyy(res, res, src)
+        elif size == 1:
             self.mc.PSUBB(loc0, loc1)
         elif size == 2:
             self.mc.PSUBW(loc0, loc1)
@@ -271,13 +359,22 @@ class VectorAssemblerMixin(object):
             self.mc.PSUBQ(loc0, loc1)
 
     def genop_vec_int_and(self, op, arglocs, resloc):
-        self.mc.PAND(resloc, arglocs[0])
+        if self._use_wide_registers(op):
+            self.mc.VPAND_yyy(resloc.value, resloc.value, arglocs[0].value)
+        else:
+            self.mc.PAND(resloc, arglocs[0])
 
     def genop_vec_int_or(self, op, arglocs, resloc):
-        self.mc.POR(resloc, arglocs[0])
+        if self._use_wide_registers(op):
+            self.mc.VPOR_yyy(resloc.value, resloc.value, arglocs[0].value)
+        else:
+            self.mc.POR(resloc, arglocs[0])
 
     def genop_vec_int_xor(self, op, arglocs, resloc):
-        self.mc.PXOR(resloc, arglocs[0])
+        if self._use_wide_registers(op):
+            self.mc.VPXOR_yyy(resloc.value, resloc.value, arglocs[0].value)
+        else:
+            self.mc.PXOR(resloc, arglocs[0])
 
     genop_vec_float_xor = genop_vec_int_xor
 
@@ -285,7 +382,12 @@ class VectorAssemblerMixin(object):
     def genop_vec_float_{type}(self, op, arglocs, resloc):
         loc0, loc1, itemsize_loc = arglocs
         itemsize = itemsize_loc.value
-        if itemsize == 4:
+        if self._use_wide_registers(op):
+            if itemsize == 4:
+                self.mc.V{p_op_s}_yyy(loc0.value, loc0.value, loc1.value)
+            elif itemsize == 8:
+                self.mc.V{p_op_d}_yyy(loc0.value, loc0.value, loc1.value)
+        elif itemsize == 4:
             self.mc.{p_op_s}(loc0, loc1)
         elif itemsize == 8:
             self.mc.{p_op_d}(loc0, loc1)
@@ -301,7 +403,12 @@ class VectorAssemblerMixin(object):
     def genop_vec_float_truediv(self, op, arglocs, resloc):
         loc0, loc1, sizeloc = arglocs
         size = sizeloc.value
-        if size == 4:
+        if self._use_wide_registers(op):
+            if size == 4:
+                self.mc.VDIVPS_yyy(loc0.value, loc0.value, loc1.value)
+            elif size == 8:
+                self.mc.VDIVPD_yyy(loc0.value, loc0.value, loc1.value)
+        elif size == 4:
             self.mc.DIVPS(loc0, loc1)
         elif size == 8:
             self.mc.DIVPD(loc0, loc1)
@@ -309,7 +416,15 @@ class VectorAssemblerMixin(object):
     def genop_vec_float_abs(self, op, arglocs, resloc):
         src, sizeloc = arglocs
         size = sizeloc.value
-        if size == 4:
+        if self._use_wide_registers(op):
+            temp = X86_64_XMM_SCRATCH_REG
+            if size == 4:
+                self.mc.VBROADCASTSS(temp, heap(self.single_float_const_abs_addr))
+                self.mc.VANDPS_yyy(src.value, src.value, temp.value)
+            elif size == 8:
+                self.mc.VBROADCASTSD(temp, heap(self.float_const_abs_addr))
+                self.mc.VANDPD_yyy(src.value, src.value, temp.value)
+        elif size == 4:
             self.mc.ANDPS(src, heap(self.single_float_const_abs_addr))
         elif size == 8:
             self.mc.ANDPD(src, heap(self.float_const_abs_addr))
@@ -317,7 +432,15 @@ class VectorAssemblerMixin(object):
     def genop_vec_float_neg(self, op, arglocs, resloc):
         src, sizeloc = arglocs
         size = sizeloc.value
-        if size == 4:
+        if self._use_wide_registers(op):
+            temp = X86_64_XMM_SCRATCH_REG
+            if size == 4:
+                self.mc.VBROADCASTSS(temp, heap(self.single_float_const_neg_addr))
+                self.mc.VXORPS_yyy(src.value, src.value, temp.value)
+            elif size == 8:
+                self.mc.VBROADCASTSD(temp, heap(self.float_const_neg_addr))
+                self.mc.VXORPD_yyy(src.value, src.value, temp.value)
+        elif size == 4:
             self.mc.XORPS(src, heap(self.single_float_const_neg_addr))
         elif size == 8:
             self.mc.XORPD(src, heap(self.float_const_neg_addr))
@@ -413,7 +536,15 @@ class VectorAssemblerMixin(object):
     def genop_vec_expand_f(self, op, arglocs, resloc):
         srcloc, sizeloc = arglocs
         size = sizeloc.value
-        if isinstance(srcloc, ConstFloatLoc):
+        if self._use_wide_registers(op):
+            # the first element of a ConstFloatLoc is the value as well
+            if size == 4:
+                self.mc.VBROADCASTSS(resloc, srcloc)
+            elif size == 8:
+                self.mc.VBROADCASTSD(resloc, srcloc)
+            else:
+                raise AssertionError("float of size %d not supported" % (size,))
+        elif isinstance(srcloc, ConstFloatLoc):
             # they are aligned!
             self.mc.MOVAPD(resloc, srcloc)
         elif size == 4:
@@ -434,7 +565,17 @@ class VectorAssemblerMixin(object):
             srcloc = X86_64_SCRATCH_REG
         assert not srcloc.is_xmm
         size = sizeloc.value
-        if size == 1:
+        if self._use_wide_registers(op):
+            self._insert_element(resloc.value, srcloc.value, 0, size)
+            if size == 1:
+                self.mc.VPBROADCASTB_yx(resloc.value, resloc.value)
+            elif size == 2:
+                self.mc.VPBROADCASTW_yx(resloc.value, resloc.value)
+            elif size == 4:
+                self.mc.VPBROADCASTD_yx(resloc.value, resloc.value)
+            elif size == 8:
+                self.mc.VPBROADCASTQ_yx(resloc.value, resloc.value)
+        elif size == 1:
             self.mc.PINSRB_xri(resloc.value, srcloc.value, 0)
             self.mc.PSHUFB(resloc, heap(self.expand_byte_mask_addr))
         elif size == 2:
@@ -459,6 +600,9 @@ class VectorAssemblerMixin(object):
         srcidx = srcidxloc.value
         residx = residxloc.value
         count = countloc.value
+        if self._pack_wide_lanes(resultloc, sourceloc, residx, srcidx,
+                                 count, size):
+            return
         # for small data type conversion this can be quite costy
         # NOTE there might be some combinations that can be handled
         # more efficiently! e.g.
@@ -509,6 +653,70 @@ class VectorAssemblerMixin(object):
 
     genop_vec_unpack_i = genop_vec_pack_i
 
+    def _pack_wide_lanes(self, resloc, srcloc, residx, srcidx, count, size):
+        """ In a loop that uses the 256-bit registers, the SSE
+            instructions of genop_vec_pack_*() would only reach the lower
+            128 bits, and mixing them with AVX ones is slow.  Instead,
+            copy the elements one by one with the VEX instructions,
+            through the scratch registers and the half of the 256-bit
+            register, moved to a xmm register.  Returns False if the
+            loop does not use the 256-bit registers.
+        """
+        if not self.wide_vector_regs:
+            return False
+        lane = 16 // size
+        temp = X86_64_XMM_SCRATCH_REG.value
+        scratch = X86_64_SCRATCH_REG.value
+        self.mc.forget_scratch_register()
+        si = srcidx
+        ri = residx
+        k = count
+        while k > 0:
+            elem = srcloc.value
+            if srcloc.is_xmm:
+                src = srcloc.value
+                if si >= lane:
+                    self.mc.VEXTRACTI128_xyi(temp, src, 1)
+                    src = temp
+                elem = scratch
+                if not resloc.is_xmm:
+                    elem = resloc.value
+                self._extract_element(elem, src, si % lane, size)
+            if resloc.is_xmm:
+                # _insert_element() clears the upper half of its register
+                half = ri // lane
+                self.mc.VEXTRACTI128_xyi(temp, resloc.value, half)
+                self._insert_element(temp, elem, ri % lane, size)
+                self.mc.VINSERTI128_yyxi(resloc.value, resloc.value,
+                                         temp, half)
+            si += 1
+            ri += 1
+            k -= 1
+        return True
+
+    def _extract_element(self, reg, xmmreg, index, size):
+        # the VEX forms, for the loops using the 256-bit registers
+        if size == 8:
+            self.mc.VPEXTRQ_rxi(reg, xmmreg, index)
+        elif size == 4:
+            self.mc.VPEXTRD_rxi(reg, xmmreg, index)
+        elif size == 2:
+            self.mc.VPEXTRW_rxi(reg, xmmreg, index)
+        elif size == 1:
+            self.mc.VPEXTRB_rxi(reg, xmmreg, index)
+
+    def _insert_element(self, xmmreg, reg, index, size):
+        # the VEX forms, which also clear the upper half of the 256-bit
+        # register 'xmmreg'
+        if size == 8:
+            self.mc.VPINSRQ_xxri(xmmreg, xmmreg, reg, index)
+        elif size == 4:
+            self.mc.VPINSRD_xxri(xmmreg, xmmreg, reg, index)
+        elif size == 2:
+            self.mc.VPINSRW_xxri(xmmreg, xmmreg, reg, index)
+        elif size == 1:
+            self.mc.VPINSRB_xxri(xmmreg, xmmreg, reg, index)
+
     def genop_vec_pack_f(self, op, arglocs, resultloc):
         resloc, srcloc, residxloc, srcidxloc, countloc, sizeloc = arglocs
         assert isinstance(resloc, RegLoc)
@@ -517,6 +725,8 @@ class VectorAssemblerMixin(object):
         residx = residxloc.value
         srcidx = srcidxloc.value
         size = sizeloc.value
+        if self._pack_wide_lanes(resloc, srcloc, residx, srcidx, count, size):
+            return
         if size == 4:
             si = srcidx
             ri = residx
@@ -5,7 +5,7 @@ from rpython.rtyper.annlowlevel import (
 from rpython.rlib.objectmodel import we_are_translated
 from rpython.rlib.debug import (
     debug_start, debug_stop, debug_print, have_debug_prints)
-from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib.rarithmetic import r_uint, intmask, LONG_BIT
 from rpython.rlib import rstack
 from rpython.rlib.jit import JitDebugInfo, Counters, dont_look_inside
 from rpython.rlib.rjitlog import rjitlog as jl
@@ -184,6 +184,8 @@ def record_loop_or_bridge(metainterp_sd, loop):
         descr = op.getdescr()
         if isinstance(descr, ResumeDescr):
             descr.rd_loop_token = clt   # stick it there
+            if isinstance(descr, AbstractResumeGuardDescr):
+                clt.record_guard(descr.get_resume_size())
         if isinstance(descr, JitCellToken):
             # for a CALL_ASSEMBLER: record it as a potential jump.
             if descr is not original_jitcell_token:
@@ -669,6 +671,11 @@ class ResumeDescr(AbstractFailDescr):
     def clone(self):
         return self
 
+# rough sizes in bytes, for CompiledLoopToken.record_guard()
+WORD = LONG_BIT // 8
+GUARD_DESCR_SIZE = 4 * WORD
+PENDINGFIELD_SIZE = 2 * WORD
+
 class AbstractResumeGuardDescr(ResumeDescr):
     _attrs_ = ('status',)
 
@@ -688,7 +695,19 @@ class AbstractResumeGuardDescr(ResumeDescr):
     def get_resumestorage(self):
         raise NotImplementedError("abstract base class")
 
+    def get_resume_size(self):
+        """Approximate size in bytes of this descr and of the resume
+        data that it owns.  Constants are shared by all the guards of
+        a trace and not counted."""
+        return GUARD_DESCR_SIZE
+
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        if metainterp_sd.warmrunnerdesc is not None:    # for tests
+            adaptive = metainterp_sd.warmrunnerdesc.memory_manager.adaptive
+            if adaptive.enabled and self.rd_loop_token is not None:
+                looptoken = self.rd_loop_token.loop_token_wref()
+                if looptoken is not None:
+                    adaptive.count_guard_failure(looptoken)
         if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd)
                 and not rstack.stack_almost_full()):
             self.start_compiling()
@@ -860,6 +879,19 @@ class ResumeGuardDescr(AbstractResumeGuardDescr):
         guard_op.setfailargs(boxes)
         self.store_hash(metainterp_sd)
 
+    def get_resume_size(self):
+        size = GUARD_DESCR_SIZE
+        if self.rd_numb:
+            size += len(self.rd_numb.code)
+        if self.rd_pendingfields:
+            size += len(self.rd_pendingfields) * PENDINGFIELD_SIZE
+        if self.rd_virtuals is not None:
+            for vinfo in self.rd_virtuals:
+                size += WORD
+                if vinfo is not None:
+                    size += len(vinfo.fieldnums) * 2
+        return size
+
     def clone(self):
         cloned = ResumeGuardDescr()
         cloned.copy_all_attributes_from(self)
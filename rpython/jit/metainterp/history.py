@@ -421,11 +421,17 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    # for the 'adaptive_threshold' parameter, see memmgr.py
+    loop_stats = None
+    compiled_generation = r_int64(0)
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
     # memory and the ResumeGuards.
     compiled_loop_token = None
+    # set by the vectorizer if a loop uses the wide vector registers
+    # (e.g. 256-bit with AVX2); the bridges must then preserve them too
+    wide_vector_registers = False
 
     def __init__(self):
         # For memory management of assembled loops
@@ -2,6 +2,8 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.jit import AdaptiveCounters
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +21,23 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently, if 'max_memory' is set, the machine code and resume
+# data of the loops in 'alive_loops' is kept below it: when it is
+# exceeded, the loops are removed starting from the ones that were
+# entered the longest time ago (i.e. the oldest 'generation'), down
+# to 3/4 of 'max_memory'.  The bridges of a loop are freed with it.
+#
+
+def _generation_lt(looptoken1, looptoken2):
+    return looptoken1.generation < looptoken2.generation
+
+LoopTokenSort = make_timsort_class(lt=_generation_lt)
+
+def get_loop_memory_size(looptoken):
+    clt = looptoken.compiled_loop_token
+    if clt is None:
+        return 0
+    return clt.get_memory_size()
 
 class MemoryManager(object):
 
@@ -38,6 +57,11 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_age = 0
+        self.max_memory = 0
+        self.evicted_loops = 0
+        self.cpu = None       # set by warmspot.py
+        self.adaptive = AdaptiveThresholds(self)
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,11 +73,18 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_memory(self, max_memory):
+        if max_memory < 0:
+            max_memory = 0
+        self.max_memory = max_memory
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.max_memory > 0:
+            self._enforce_max_memory()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
@@ -70,6 +101,8 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
+                if looptoken.loop_stats is not None:
+                    self.adaptive.loop_discarded(looptoken)
                 del self.alive_loops[looptoken]
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
@@ -82,8 +115,168 @@ class MemoryManager(object):
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
 
+    def _enforce_max_memory(self):
+        if (self.cpu is not None and
+                self.cpu.get_jit_memory_used() <= self.max_memory):
+            return
+        # the memory of the loops that were removed from 'alive_loops'
+        # is only released when the GC frees them, so count only the
+        # loops that are still there
+        total = 0
+        for looptoken in self.alive_loops:
+            total += get_loop_memory_size(looptoken)
+        if total <= self.max_memory:
+            return
+        debug_start("jit-mem-evict")
+        debug_print("Current generation:", self.current_generation)
+        debug_print("Memory used:       ", total)
+        looptokens = self.alive_loops.keys()
+        LoopTokenSort(looptokens).sort()
+        target = self.max_memory - (self.max_memory >> 2)
+        evicted = 0
+        for looptoken in looptokens:
+            if total <= target:
+                break
+            if looptoken.generation >= self.current_generation - 1:
+                break      # entered or compiled just now, keep it
+            total -= get_loop_memory_size(looptoken)
+            if looptoken.loop_stats is not None:
+                self.adaptive.loop_discarded(looptoken)
+            del self.alive_loops[looptoken]
+            evicted += 1
+        self.evicted_loops += evicted
+        debug_print("Loop tokens evicted:", evicted)
+        debug_print("Memory left:       ", total)
+        if not we_are_translated() and evicted > 0:
+            looptoken = None
+            looptokens = None
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-evict")
+
     def release_all_loops(self):
         debug_start("jit-mem-releaseall")
         debug_print("Loop tokens cleared:", len(self.alive_loops))
         self.alive_loops.clear()
         debug_stop("jit-mem-releaseall")
+
+
+# ____________________________________________________________
+#
+# Adaptive thresholds (the 'adaptive_threshold' parameter).
+#
+# Every greenkey that got a loop compiled has a LoopStats, shared by
+# its JitCell and by its current JitCellToken.  When that loop goes
+# away, we look at how long it was used.  If it was thrown away soon
+# (invalidated, unused for 'max_age' generations shortly after being
+# compiled, or leaving through failing guards all the time), the
+# greenkey gets a higher penalty: its threshold is doubled for the next
+# time.  If it was used for a long time, the penalty goes down and the
+# threshold can drop below the default.  The JitCell is kept around as
+# long as its penalty is not zero.
+
+class LoopStats(object):
+    penalty = 0
+    compilations = 0
+    entries = 0
+    guard_failures = 0
+    compile_time = 0.0
+    last_compile_time = 0.0
+
+    def __init__(self, policy):
+        self.policy = policy
+
+
+class AdaptiveThresholds(object):
+    MIN_PENALTY = -2        # the threshold is divided by at most 4
+    MAX_PENALTY = 6         # and multiplied by at most 64
+    LONG_LIVED_AGES = 8     # a loop used for 8 * max_age is long-lived
+    FAILING_GUARDS = 1000   # minimum number of guard failures to care
+
+    def __init__(self, memmgr):
+        self.memmgr = memmgr
+        self.enabled = False
+        self.counters = [0] * AdaptiveCounters.ncounters
+        self.wasted_compile_time = 0.0
+
+    def get_stats(self, cell):
+        stats = cell.loop_stats
+        if stats is None:
+            stats = LoopStats(self)
+            cell.loop_stats = stats
+            self.counters[AdaptiveCounters.TRACKED_LOOPS] += 1
+        return stats
+
+    def loop_compiled(self, cell, looptoken):
+        stats = self.get_stats(cell)
+        stats.compilations += 1
+        stats.entries = 0
+        stats.guard_failures = 0
+        looptoken.loop_stats = stats
+        looptoken.compiled_generation = self.memmgr.current_generation
+
+    def loop_traced(self, cell, elapsed):
+        stats = cell.loop_stats
+        if stats is not None:
+            stats.compile_time += elapsed
+            stats.last_compile_time = elapsed
+
+    def loop_discarded(self, looptoken):
+        stats = looptoken.loop_stats
+        looptoken.loop_stats = None
+        if stats is None:
+            return
+        max_age = self.memmgr.max_age
+        lifetime = looptoken.generation - looptoken.compiled_generation
+        failing = (stats.guard_failures >= self.FAILING_GUARDS and
+                   stats.guard_failures > stats.entries)
+        if looptoken.invalidated:
+            self.counters[AdaptiveCounters.INVALIDATIONS] += 1
+        short = max_age > 0 and lifetime < max_age
+        if looptoken.invalidated or failing or short:
+            self.counters[AdaptiveCounters.SHORT_LIVED] += 1
+            self.wasted_compile_time += stats.last_compile_time
+            self._change_penalty(stats, 1)
+        elif max_age > 0 and lifetime >= self.LONG_LIVED_AGES * max_age:
+            self.counters[AdaptiveCounters.LONG_LIVED] += 1
+            self._change_penalty(stats, -1)
+
+    def _change_penalty(self, stats, delta):
+        old = stats.penalty
+        new = old + delta
+        if new > self.MAX_PENALTY or new < self.MIN_PENALTY:
+            return
+        stats.penalty = new
+        if delta > 0:
+            self.counters[AdaptiveCounters.BACKOFFS] += 1
+        else:
+            self.counters[AdaptiveCounters.BOOSTS] += 1
+        if old == 0:
+            self.counters[AdaptiveCounters.ADAPTED_LOOPS] += 1
+        elif new == 0:
+            self.counters[AdaptiveCounters.ADAPTED_LOOPS] -= 1
+
+    def adapt_increment(self, stats, increment):
+        """Scale the jitcounter increment by 2 ** -penalty."""
+        penalty = stats.penalty
+        while penalty > 0:
+            increment *= 0.5
+            penalty -= 1
+        while penalty < 0:
+            increment *= 2.0
+            penalty += 1
+        return increment
+
+    def count_entry(self, looptoken):
+        stats = looptoken.loop_stats
+        if stats is not None:
+            stats.entries += 1
+
+    def count_guard_failure(self, looptoken):
+        stats = looptoken.loop_stats
+        if stats is not None:
+            stats.guard_failures += 1
+            self.counters[AdaptiveCounters.GUARD_FAILURES] += 1
+
+    def get_counter(self, num):
+        return self.counters[num]
@@ -13,6 +13,7 @@ from rpython.jit.metainterp.optimizeopt.optimizer import BasicLoopInfo
 from rpython.jit.metainterp.resoperation import rop, ResOperation
 from rpython.jit.metainterp.optimizeopt.version import LoopVersionInfo
 from rpython.jit.backend.llsupport.descr import ArrayDescr
+from rpython.jit.backend.llsupport.vector_ext import VectorExt
 from rpython.jit.metainterp.optimizeopt.dependency import Node, DependencyGraph
 from rpython.jit.backend.detect_cpu import getcpuclass
 
@@ -301,6 +302,93 @@ class TestVectorize(VecTestHelper):
         assert len(ops) == 2
         assert len(newops) == 4
 
+    def test_select_vec_size(self):
+        ext = VectorExt()
+        ext.WIDE_OPS = dict.fromkeys([rop.VEC_INT_ADD, rop.VEC_FLOAT_MUL,
+                                      rop.VEC_LOAD_F, rop.VEC_STORE], True)
+        ext.enable(16, accum=True, wide_vec_size=32)
+        trace = self.parse_loop("""
+        [p0,i0]
+        f0 = raw_load_f(p0, i0, descr=floatarraydescr)
+        f1 = float_mul(f0, 2.0)
+        raw_store(p0, i0, f1, descr=floatarraydescr)
+        i1 = int_add(i0, 8)
+        i2 = int_lt(i1, 100)
+        guard_true(i2) [p0, i1]
+        jump(p0, i1)
+        """)
+        assert ext.select_vec_size(trace.operations) == 32
+        assert ext.vec_size() == 32
+        # float_add has got no 256-bit implementation
+        trace = self.parse_loop("""
+        [p0,i0]
+        f0 = raw_load_f(p0, i0, descr=floatarraydescr)
+        f1 = float_add(f0, 2.0)
+        raw_store(p0, i0, f1, descr=floatarraydescr)
+        i1 = int_add(i0, 8)
+        jump(p0, i1)
+        """)
+        assert ext.select_vec_size(trace.operations) == 16
+        assert ext.vec_size() == 16
+        # the item sizes differ
+        trace = self.parse_loop("""
+        [p0,p1,i0]
+        f0 = raw_load_f(p0, i0, descr=floatarraydescr)
+        f1 = float_mul(f0, 2.0)
+        raw_store(p1, i0, f1, descr=float32arraydescr)
+        i1 = int_add(i0, 8)
+        jump(p0, p1, i1)
+        """)
+        assert ext.select_vec_size(trace.operations) == 16
+        # no wide registers at all
+        ext.enable(16, accum=True)
+        trace = self.parse_loop("""
+        [p0,i0]
+        f0 = raw_load_f(p0, i0, descr=floatarraydescr)
+        i1 = int_add(i0, 8)
+        jump(p0, i1)
+        """)
+        assert ext.select_vec_size(trace.operations) == 16
+
+    def test_wide_vector_registers_on_token(self):
+        from rpython.jit.metainterp.history import JitCellToken, TargetToken
+        ops = """
+        [p0,p1,p2,i0]
+        i1 = int_add(i0, 8)
+        i10 = int_le(i1, 800)
+        guard_true(i10) []
+        f2 = raw_load_f(p0, i0, descr=floatarraydescr)
+        f3 = raw_load_f(p1, i0, descr=floatarraydescr)
+        f4 = float_mul(f2, f3)
+        raw_store(p2, i0, f4, descr=floatarraydescr)
+        jump(p0,p1,p2,i1)
+        """
+        ext = VectorExt()
+        ext.WIDE_OPS = dict.fromkeys([rop.VEC_INT_ADD, rop.VEC_FLOAT_MUL,
+                                      rop.VEC_LOAD_F, rop.VEC_STORE], True)
+        saved = self.cpu.vector_ext
+        self.cpu.vector_ext = ext
+        try:
+            for wide_vec_size, expected in [(0, False), (32, True)]:
+                ext.enable(16, accum=True, wide_vec_size=wide_vec_size)
+                token = JitCellToken()
+                target = TargetToken(token)
+                token.target_tokens = [target]
+                loop = self.parse_loop(ops)
+                jump = ResOperation(rop.JUMP, loop.jump.getarglist(), target)
+                loop_info = BasicLoopInfo(loop.jump.getarglist(), None, jump)
+                loop_info.label_op = ResOperation(rop.LABEL,
+                        loop.label.getarglist(), target)
+                info, oplist = optimize_vector(None, self.metainterp_sd,
+                        self.jitdriver_sd, FakeWarmState(), loop_info,
+                        loop.operations + [jump], token)
+                assert any([op.is_vector() for op in oplist])
+                # the backend compiles the loop and its bridges with the
+                # whole registers if they are used anywhere in the loop
+                assert token.wide_vector_registers == expected
+        finally:
+            self.cpu.vector_ext = saved
+
     def test_move_guard_first(self):
         trace = self.parse_trace("""
         i10 = int_add(i0, i1)
@@ -220,7 +220,7 @@ class VectorizingOptimizer(Optimizer):
         self.orig_label_args = loop.label.getarglist_copy()
         self.linear_find_smallest_type(loop)
         byte_count = self.smallest_type_bytes
-        vsize = self.vector_ext.vec_size()
+        vsize = self.vector_ext.select_vec_size(loop.operations)
         # stop, there is no chance to vectorize this trace
             # we cannot optimize normal traces (if there is no label)
         if vsize == 0:
@@ -267,6 +267,10 @@ class VectorizingOptimizer(Optimizer):
         for op in loop.align_operations:
             op.set_forwarded(None)
 
+        if jitcell_token is not None and \
+                vsize > self.vector_ext.default_register_size:
+            jitcell_token.wide_vector_registers = True
+
         return loop.finaloplist(jitcell_token=jitcell_token, reset_label_token=False)
 
     def unroll_loop_iterations(self, loop, unroll_count, align_unroll_once=False):
@@ -1860,6 +1860,60 @@ class MIFrame(object):
 
 # ____________________________________________________________
 
+MAX_PENDING_LOOPS = 100
+
+
+class PendingLoop(object):
+    """A loop traced with the 'deferred_compile' parameter enabled, and
+    waiting in MetaInterpStaticData.pending_loops to be compiled.  Only
+    what is needed to compile it is kept: the recorded trace, the green
+    key and the input and jump arguments, not the MetaInterp with its
+    frames."""
+
+    def __init__(self, jitdriver_sd, history, call_pure_results, greenkey,
+                 inputargs, jumpargs, start, use_unroll):
+        self.jitdriver_sd = jitdriver_sd
+        self.history = history
+        self.call_pure_results = call_pure_results
+        self.greenkey = greenkey
+        self.inputargs = inputargs
+        self.jumpargs = jumpargs
+        self.start = start
+        self.use_unroll = use_unroll
+
+    def compile(self, metainterp_sd):
+        from rpython.jit.metainterp.warmstate import JC_COMPILE_PENDING
+        jitdriver_sd = self.jitdriver_sd
+        cell = jitdriver_sd.warmstate.JitCell.get_jit_cell_at_key(
+            self.greenkey)
+        if cell is not None:
+            cell.flags &= ~JC_COMPILE_PENDING
+        # a fresh MetaInterp, which only knows about the trace
+        metainterp = MetaInterp(metainterp_sd, jitdriver_sd)
+        metainterp.history = self.history
+        metainterp.call_pure_results = self.call_pure_results
+        self.history = None
+        original_boxes = self.greenkey + self.inputargs
+        live_arg_boxes = self.greenkey + self.jumpargs
+        # the trace stays valid: all that can change since it was recorded
+        # is checked by its guards, or by the optimizer for quasi-immutable
+        # fields (they are registered together with the compiled loop)
+        debug_start('jit-compile-deferred')
+        try:
+            target_token = metainterp.compile_loop(
+                original_boxes, live_arg_boxes, self.start,
+                use_unroll=self.use_unroll)
+            if target_token is None and self.use_unroll:
+                target_token = metainterp.compile_loop(
+                    original_boxes, live_arg_boxes, self.start,
+                    use_unroll=False)
+        except SwitchToBlackhole:
+            # a loop was compiled for the same greenkey in the meantime
+            target_token = None
+        debug_stop('jit-compile-deferred')
+        return target_token is not None
+
+
 class MetaInterpStaticData(object):
     logger_noopt = None
     logger_ops = None
@@ -1891,6 +1945,7 @@ class MetaInterpStaticData(object):
 
         self._addr2name_keys = []
         self._addr2name_values = []
+        self.pending_loops = []
 
         compile.make_and_attach_done_descrs([self, cpu])
 
@@ -2013,6 +2068,18 @@ class MetaInterpStaticData(object):
         if self.warmrunnerdesc is not None:       # for tests
             self.warmrunnerdesc.memory_manager.next_generation()
 
+    def compile_pending_loops(self, limit):
+        """Compile up to 'limit' of the loops whose compilation was
+        deferred (all of them if 'limit' is negative).  Returns the
+        number of loops processed, including the ones that turned out
+        to be invalid."""
+        count = 0
+        while self.pending_loops and (limit < 0 or count < limit):
+            pending = self.pending_loops.pop(0)
+            pending.compile(self)
+            count += 1
+        return count
+
     # ---------------- logging ------------------------
 
     def log(self, msg):
@@ -2535,7 +2602,11 @@ class MetaInterp(object):
         # a stack of blackhole interpreters filled with the same values, and
         # run it.
         from rpython.jit.metainterp.blackhole import convert_and_run_from_pyjitpl
-        self.aborted_tracing(stb.reason)
+        if stb.reason == Counters.COMPILE_DEFERRED:
+            # not an abort: the trace is kept in staticdata.pending_loops
+            self.staticdata.profiler.count(stb.reason)
+        else:
+            self.aborted_tracing(stb.reason)
         convert_and_run_from_pyjitpl(self, stb.raising_exception)
         assert False    # ^^^ must raise
 
@@ -2622,6 +2693,9 @@ class MetaInterp(object):
                     self.staticdata.log('cancelled too many times!')
                     raise SwitchToBlackhole(Counters.ABORT_BAD_LOOP)
             else:
+                if self.can_defer_compilation():
+                    self.defer_compilation(original_boxes, live_arg_boxes,
+                                           start, can_use_unroll)
                 target_token = self.compile_loop(
                     original_boxes, live_arg_boxes, start,
                     use_unroll=can_use_unroll)
@@ -2776,6 +2850,36 @@ class MetaInterp(object):
                 target_token.targeting_jitcell_token)
         return target_token
 
+    def can_defer_compilation(self):
+        # Only loops traced directly from the interpreter are deferred.
+        # Bridges are attached to a guard of a running loop, and are
+        # usually small enough to be compiled right away.
+        return (self.jitdriver_sd.warmstate.deferred_compile and
+                isinstance(self.resumekey, compile.ResumeFromInterpDescr) and
+                self.cancel_count == 0 and
+                len(self.staticdata.pending_loops) < MAX_PENDING_LOOPS)
+
+    def defer_compilation(self, original_boxes, live_arg_boxes, start,
+                          use_unroll):
+        """Keep the finished trace in staticdata.pending_loops, and
+        continue running the interpreter.  The loop is optimized and
+        sent to the backend later, by compile_pending_loops()."""
+        from rpython.jit.metainterp.warmstate import JC_COMPILE_PENDING
+        num_green_args = self.jitdriver_sd.num_green_args
+        greenkey = original_boxes[:num_green_args]
+        cell = self.jitdriver_sd.warmstate.JitCell.ensure_jit_cell_at_key(
+            greenkey)
+        cell.flags |= JC_COMPILE_PENDING
+        self.staticdata.pending_loops.append(PendingLoop(
+            self.jitdriver_sd, self.history, self.call_pure_results,
+            greenkey, original_boxes[num_green_args:],
+            live_arg_boxes[num_green_args:], start, use_unroll))
+        debug_print('compilation deferred, %d loops pending' %
+                    len(self.staticdata.pending_loops))
+        self.staticdata.warmrunnerdesc.hooks.on_compile_deferred(
+            self.jitdriver_sd.jitdriver, greenkey)
+        raise SwitchToBlackhole(Counters.COMPILE_DEFERRED)
+
     def compile_retrace(self, original_boxes, live_arg_boxes, start):
         num_green_args = self.jitdriver_sd.num_green_args
         greenkey = original_boxes[:num_green_args]
@@ -98,6 +98,8 @@ class QuasiImmut(object):
                 invalidated += 1
                 looptoken.invalidated = True
                 self.cpu.invalidate_loop(looptoken)
+                if looptoken.loop_stats is not None:
+                    looptoken.loop_stats.policy.loop_discarded(looptoken)
                 # NB. we must call cpu.invalidate_loop() even if
                 # looptoken.invalidated was already set to True.
                 # It's possible to invalidate several times the
@@ -28,10 +28,12 @@ class VectorInfo(object):
         location: the register location (an integer), specified by the backend
         variable: the original variable that lived at failargs_pos
     """
-    _attrs_ = ('prev', 'failargs_pos', 'location', 'variable')
+    _attrs_ = ('prev', 'failargs_pos', 'location', 'location_size',
+               'variable')
     prev = None
     failargs_pos = -1
     location = None
+    location_size = 0    # in bytes, the size of the vector at 'location'
     variable = None
 
     def __init__(self, position, variable):
@@ -73,6 +75,7 @@ class AccumInfo(VectorInfo):
         info = AccumInfo(self.failargs_pos, self.variable,
                          self.accum_operation)
         info.location = self.location
+        info.location_size = self.location_size
         info.prev = prev
         return info
 
@@ -1,6 +1,7 @@
 
 import py
 from rpython.rlib.jit import JitDriver, JitHookInterface, Counters, dont_look_inside
+from rpython.rlib.jit import set_param
 from rpython.rlib import jit_hooks
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import JitPolicy
@@ -349,6 +350,62 @@ class JitHookInterfaceTests(object):
                                no_stats_history=True)
         assert res == 42
 
+    def test_deferred_compile(self):
+        deferred = []
+
+        class MyJitIface(JitHookInterface):
+            def are_hooks_enabled(self):
+                return False
+
+            def on_compile_deferred(self, jitdriver, greenkey):
+                assert jitdriver is driver
+                deferred.append(len(greenkey))
+
+        iface = MyJitIface()
+        driver = JitDriver(greens = [], reds = ['i', 'total'])
+        def loop(i):
+            total = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, total=total)
+                total += i
+                i -= 1
+            return total
+        def num_loops():
+            return jit_hooks.stats_get_counter_value(None,
+                                           Counters.TOTAL_COMPILED_LOOPS)
+        def num_pending():
+            return jit_hooks.stats_get_pending_loops(None)
+        def main():
+            set_param(driver, 'deferred_compile', 1)
+            if loop(30) != 465:
+                return 100
+            if num_loops() != 0 or num_pending() != 1:
+                return 1000 + num_loops() * 10 + num_pending()
+            # not traced a second time while it is pending
+            if loop(30) != 465:
+                return 200
+            if num_loops() != 0 or num_pending() != 1:
+                return 2000 + num_loops() * 10 + num_pending()
+            #
+            if jit_hooks.stats_compile_pending_loops(None, -1) != 1:
+                return 300
+            if num_loops() != 1 or num_pending() != 0:
+                return 3000 + num_loops() * 10 + num_pending()
+            if loop(30) != 465:
+                return 400
+            if num_loops() != 1:
+                return 4000 + num_loops()
+            if jit_hooks.stats_get_counter_value(None,
+                                    Counters.COMPILE_DEFERRED) != 1:
+                return 500
+            return 42
+
+        res = self.meta_interp(main, [], ProfilerClass=Profiler,
+                               no_stats_history=True,
+                               policy=JitPolicy(iface))
+        assert res == 42
+        assert deferred == [0]
+
 
 class LLJitHookInterfaceTests(JitHookInterfaceTests):
     # use this for any backend, instead of the super class
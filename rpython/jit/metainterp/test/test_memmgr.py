@@ -13,7 +13,7 @@ if len(sys.argv) >= 4 and sys.argv[1] == '--sub':
 import py
 from rpython.jit.metainterp.memmgr import MemoryManager
 from rpython.jit.metainterp.test.support import LLJitMixin
-from rpython.rlib.jit import JitDriver, dont_look_inside
+from rpython.rlib.jit import JitDriver, dont_look_inside, set_param
 from rpython.jit.metainterp.warmspot import get_stats
 from rpython.jit.metainterp.warmstate import BaseJitCell
 from rpython.rlib import rgc
@@ -21,6 +21,19 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    loop_stats = None
+    compiled_generation = 0
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    def __init__(self, size):
+        self.size = size
+
+    def get_memory_size(self):
+        return self.size
+
+class FakeCell:
+    loop_stats = None
 
 
 class _TestMemoryManager:
@@ -78,6 +91,82 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_max_memory(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_memory(1000)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(200)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+            memmgr.keep_loop_alive(tokens[0])   # always entered
+        assert tokens[0] in memmgr.alive_loops
+        assert tokens[-1] in memmgr.alive_loops
+        assert len(memmgr.alive_loops) * 200 <= 1000
+        assert memmgr.evicted_loops == 10 - len(memmgr.alive_loops)
+        # the evicted loops are the least recently entered ones
+        alive = [i for i in range(10) if tokens[i] in memmgr.alive_loops]
+        assert alive == [0] + range(10 - len(alive) + 1, 10)
+
+    def test_max_memory_disabled(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_memory(0)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(200)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        assert memmgr.evicted_loops == 0
+
+    def test_adaptive_short_lived(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        memmgr.adaptive.enabled = True
+        cell = FakeCell()
+        for expected in [1, 2, 3]:
+            token = FakeLoopToken()
+            memmgr.adaptive.loop_compiled(cell, token)
+            memmgr.keep_loop_alive(token)
+            for i in range(6):
+                memmgr.next_generation()
+            assert token not in memmgr.alive_loops
+            assert token.loop_stats is None
+            assert cell.loop_stats.penalty == expected
+        stats = cell.loop_stats
+        assert stats.compilations == 3
+        assert memmgr.adaptive.adapt_increment(stats, 1.0) == 0.125
+
+    def test_adaptive_long_lived(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        memmgr.adaptive.enabled = True
+        cell = FakeCell()
+        token = FakeLoopToken()
+        memmgr.adaptive.loop_compiled(cell, token)
+        for i in range(40):
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        for i in range(6):
+            memmgr.next_generation()
+        assert token not in memmgr.alive_loops
+        assert cell.loop_stats.penalty == -1
+        assert memmgr.adaptive.adapt_increment(cell.loop_stats, 1.0) == 2.0
+
+    def test_adaptive_invalidated(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        adaptive = memmgr.adaptive
+        cell = FakeCell()
+        for i in range(10):
+            token = FakeLoopToken()
+            adaptive.loop_compiled(cell, token)
+            token.invalidated = True
+            adaptive.loop_discarded(token)
+            adaptive.loop_discarded(token)      # no effect the 2nd time
+        assert cell.loop_stats.penalty == adaptive.MAX_PENALTY
+        assert cell.loop_stats.compilations == 10
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -212,6 +301,63 @@ class _TestIntegration(LLJitMixin):
         assert res == 42
         self.check_enter_count(2 + 10*4)
 
+    def test_max_jit_memory(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(10):
+                for m in range(12):
+                    g(m)
+            return 42
+
+        # with no limit, each g(m) gets a loop and an exit bridge
+        res = self.meta_interp(f, [], loop_longevity=0)
+        assert res == 42
+        self.check_enter_count(24)
+        # with a limit of 1KB (the llgraph backend only has resume
+        # data), the least recently used loops are thrown away and
+        # compiled again
+        def f2():
+            set_param(myjitdriver, 'max_jit_memory', 1)
+            return f()
+        res = self.meta_interp(f2, [], loop_longevity=0)
+        assert res == 42
+        assert get_stats().enter_count > 24
+
+    def test_adaptive_threshold(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            set_param(myjitdriver, 'adaptive_threshold', 1)
+            for i in range(10):
+                g(1)
+                g(2)
+                g(1)
+                g(3)
+                g(1)
+                g(4)
+                g(1)
+                g(5)
+            return 42
+
+        # same as test_throw_away_old_loops, but g(2) to g(5) get a
+        # higher threshold every time they are thrown away
+        res = self.meta_interp(f, [], loop_longevity=3)
+        assert res == 42
+        self.check_enter_count_at_most(2 + 10*4 - 1)
+
     def test_call_assembler_keep_alive(self):
         myjitdriver1 = JitDriver(greens=['m'], reds=['n'])
         myjitdriver2 = JitDriver(greens=['m'], reds=['n', 'rec'])
@@ -1,4 +1,5 @@
 import sys
+import time
 import weakref
 
 from rpython.jit.codewriter import support, longlong
@@ -137,6 +138,7 @@ JC_TRACING         = 0x01
 JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
+JC_COMPILE_PENDING = 0x10
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -172,6 +174,10 @@ class BaseJitCell(object):
 
         JC_TRACING_OCCURRED: set if JC_TRACING was set at least once.
 
+        JC_COMPILE_PENDING: a loop was traced from this greenkey, and is
+        waiting in metainterp_sd.pending_loops to be compiled (see the
+        'deferred_compile' parameter).  Don't trace it again meanwhile.
+
         JC_TEMPORARY: a "temporary" wref_procedure_token.
         It's the procedure_token of a dummy loop that simply calls
         back the interpreter.  Used for a CALL_ASSEMBLER where the
@@ -187,6 +193,7 @@ class BaseJitCell(object):
     flags = 0     # JC_xxx flags
     wref_procedure_token = None
     next = None
+    loop_stats = None     # for the 'adaptive_threshold' parameter
 
     def get_procedure_token(self):
         if self.wref_procedure_token is not None:
@@ -212,13 +219,15 @@ class BaseJitCell(object):
     def should_remove_jitcell(self):
         if self.get_procedure_token() is not None:
             return False    # don't remove JitCells with a procedure_token
-        if self.flags & JC_TRACING:
+        if self.flags & (JC_TRACING | JC_COMPILE_PENDING):
             return False    # don't remove JitCells that are being traced
         if self.flags & JC_DONT_TRACE_HERE:
             # if we have this flag, and we *had* a procedure_token but
             # we no longer have one, then remove me.  this prevents this
             # JitCell from being immortal.
             return self.has_seen_a_procedure_token()     # i.e. dead weakref
+        if self.loop_stats is not None and self.loop_stats.penalty != 0:
+            return False    # remember the adapted threshold of this greenkey
         return True   # Other JitCells can be removed.
 
 # ____________________________________________________________
@@ -288,6 +297,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_max_jit_memory(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_memory(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -308,6 +323,15 @@ class WarmEnterState(object):
             if self.warmrunnerdesc.memory_manager:
                 self.warmrunnerdesc.memory_manager.max_unroll_recursion = value
 
+    def set_param_deferred_compile(self, value):
+        self.deferred_compile = bool(value)
+
+    def set_param_adaptive_threshold(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.adaptive.enabled = bool(value)
+
     def set_param_vec(self, ivalue):
         self.vec = bool(ivalue)
 
@@ -329,6 +353,11 @@ class WarmEnterState(object):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
         cell.set_procedure_token(procedure_token)
+        if (self.warmrunnerdesc is not None and
+                self.warmrunnerdesc.memory_manager is not None):
+            adaptive = self.warmrunnerdesc.memory_manager.adaptive
+            if adaptive.enabled:
+                adaptive.loop_compiled(cell, procedure_token)
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
             # procedure_token is also kept alive by any loop that used
@@ -371,6 +400,7 @@ class WarmEnterState(object):
         func_execute_token = self.cpu.make_execute_token(*ARGS)
         cpu = self.cpu
         jitcounter = self.warmrunnerdesc.jitcounter
+        adaptive = self.warmrunnerdesc.memory_manager.adaptive
         result_type = jitdriver_sd.result_type
 
         def execute_assembler(loop_token, *args):
@@ -389,6 +419,8 @@ class WarmEnterState(object):
             # Record in the memmgr that we just ran this loop,
             # so that it will keep it alive for a longer time
             warmrunnerdesc.memory_manager.keep_loop_alive(loop_token)
+            if adaptive.enabled:
+                adaptive.count_entry(loop_token)
             #
             # Handle the failure
             fail_descr = cpu.get_latest_descr(deadframe)
@@ -425,10 +457,15 @@ class WarmEnterState(object):
                 cell = JitCell(*greenargs)
                 jitcounter.install_new_cell(hash, cell)
             cell.flags |= JC_TRACING | JC_TRACING_OCCURRED
+            start = 0.0
+            if adaptive.enabled:
+                start = time.time()
             try:
                 metainterp.compile_and_run_once(jitdriver_sd, *args)
             finally:
                 cell.flags &= ~JC_TRACING
+                if adaptive.enabled:
+                    adaptive.loop_traced(cell, time.time() - start)
 
         def maybe_compile_and_run(increment_threshold, *args):
             """Entry point to the JIT.  Called at the point with the
@@ -455,10 +492,11 @@ class WarmEnterState(object):
 
             # Here, we have found 'cell'.
             #
-            if cell.flags & (JC_TRACING | JC_TEMPORARY):
-                if cell.flags & JC_TRACING:
+            if cell.flags & (JC_TRACING | JC_TEMPORARY | JC_COMPILE_PENDING):
+                if cell.flags & (JC_TRACING | JC_COMPILE_PENDING):
                     # tracing already happening in some outer invocation of
-                    # this function. don't trace a second time.
+                    # this function, or the trace is waiting to be compiled.
+                    # don't trace a second time.
                     return
                 # attached by compile_tmp_callback().  count normally
                 if jitcounter.tick(hash, increment_threshold):
@@ -479,6 +517,15 @@ class WarmEnterState(object):
                         if tick:
                             bound_reached(hash, cell, *args)
                         return
+                if cell.loop_stats is not None and cell.loop_stats.penalty:
+                    # the loop was freed, and its previous versions were
+                    # thrown away too early or kept for long: count with
+                    # an adapted threshold before tracing it again
+                    increment = adaptive.adapt_increment(cell.loop_stats,
+                                                         increment_threshold)
+                    if jitcounter.tick(hash, increment):
+                        bound_reached(hash, cell, *args)
+                    return
                 # it was an aborted compilation, or maybe a weakref that
                 # has been freed
                 jitcounter.cleanup_chain(hash)
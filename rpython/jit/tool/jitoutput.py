@@ -25,6 +25,7 @@ REGEXES = [
     (('abort.vable_escape',), '^abort: vable escape:\s+(\d+)$'),
     (('abort.bad_loop',), '^abort: bad loop:\s+(\d+)$'),
     (('abort.force_quasiimmut',), '^abort: force quasi-immut:\s+(\d+)$'),
+    (('compile_deferred',), '^compile deferred:\s+(\d+)$'),
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
@@ -58,6 +59,7 @@ class OutputInfo(object):
     opt_ops = 0
     opt_guards = 0
     forcings = 0
+    compile_deferred = 0
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
@@ -21,12 +21,18 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         """
         Called after a minor collection
+
+        ``nursery_size`` is the size that the nursery will have for the next
+        minor collections; it changes only in pause-time budget mode.
         """
 
-    def on_gc_collect_step(self, duration, oldstate, newstate):
+    def on_gc_collect_step(self, duration, oldstate, newstate,
+                           increment_step, mark_threads,
+                           mark_duration_min, mark_duration_max):
         """
         Called after each individual step of a major collection, in case the GC is
         incremental.
@@ -34,6 +40,15 @@ class GcHooks(object):
         ``oldstate`` and ``newstate`` are integers which indicate the GC
         state; for incminimark, see incminimark.STATE_* and
         incminimark.GC_STATES.
+
+        ``increment_step`` is the amount of memory that the next marking
+        steps will mark; it changes only in pause-time budget mode.
+
+        ``mark_threads`` is the number of threads which marked objects in
+        parallel during this step (1 if parallel marking is disabled).  In
+        that case, ``mark_duration_min`` and ``mark_duration_max`` are the
+        time spent marking by the least and the most busy thread; they are
+        0.0 otherwise.
         """
 
 
@@ -49,14 +64,20 @@ class GcHooks(object):
     # overridden
 
     @rgc.no_collect
-    def fire_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def fire_gc_minor(self, duration, total_memory_used, pinned_objects,
+                      nursery_size):
         if self.is_gc_minor_enabled():
-            self.on_gc_minor(duration, total_memory_used, pinned_objects)
+            self.on_gc_minor(duration, total_memory_used, pinned_objects,
+                             nursery_size)
 
     @rgc.no_collect
-    def fire_gc_collect_step(self, duration, oldstate, newstate):
+    def fire_gc_collect_step(self, duration, oldstate, newstate,
+                             increment_step, mark_threads,
+                             mark_duration_min, mark_duration_max):
         if self.is_gc_collect_step_enabled():
-            self.on_gc_collect_step(duration, oldstate, newstate)
+            self.on_gc_collect_step(duration, oldstate, newstate,
+                                    increment_step, mark_threads,
+                                    mark_duration_min, mark_duration_max)
 
     @rgc.no_collect
     def fire_gc_collect(self, num_major_collects,
@@ -52,6 +52,30 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_MINOR_BUDGET    Pause-time budget for minor collections, in
+                         microseconds.  If set, the size of the nursery is
+                         adapted at runtime (never above its initial size)
+                         so that each minor collection takes about that
+                         long.  Defaults to 0, which disables it.
+
+ PYPY_GC_STEP_BUDGET     Pause-time budget for the marking steps of major
+                         collections, in microseconds.  If set, the amount
+                         of memory marked per step (see
+                         PYPY_GC_INCREMENT_STEP) is adapted at runtime so
+                         that each step takes about that long.  Defaults to
+                         0, which disables it.
+
+ PYPY_GC_MARK_THREADS    Number of threads that mark objects in parallel
+                         during the marking steps of major collections
+                         (see parallelmark.py).  Needs a translation with
+                         --gc-parallel-mark.  Defaults to 1, which
+                         disables parallel marking.
+
+The nursery size, PYPY_GC_MAJOR_COLLECT, PYPY_GC_GROWTH, PYPY_GC_MAX,
+the pause-time budgets and the number of marking threads can also be
+changed at runtime with rgc.set_gc_param(); see the GC_PARAM_* constants
+in rpython.rlib.rgc.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -75,6 +99,7 @@ from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib import rgc
 from rpython.memory.gc.minimarkpage import out_of_memory
+from rpython.memory.gc import parallelmark
 
 #
 # Handles the objects in 2 generations:
@@ -323,6 +348,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.debug_tiny_nursery = -1
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
+        self.mark_thread_support = parallelmark.get_mark_thread_support(
+            config, self.translated_to_c)
         #
         # The ArenaCollection() handles the nonmovable objects allocation.
         if ArenaCollectionClass is None:
@@ -436,6 +463,29 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_objects_pointing_to_pinned = self.AddressStack()
         self.updated_old_objects_pointing_to_pinned = False
         #
+        # Pause-time budget mode: if non-zero, these are the durations (in
+        # seconds) that a minor collection, respectively a marking step of
+        # a major collection, should not exceed.  The size of the nursery
+        # and 'gc_increment_step' are adapted after each of them.  The
+        # nursery is only resized by collect_and_reserve(), when it is
+        # empty; until then the new size is stored in
+        # 'requested_nursery_size'.
+        # The budget mode never makes the nursery larger than its initial
+        # size, nor smaller than the minimum needed to allocate objects
+        # just below 'large_object'.
+        self.minor_pause_budget = 0.0
+        self.major_step_budget = 0.0
+        self.min_nursery_size = 2 * (self.nonlarge_max + 1)
+        self.max_nursery_size = self.nursery_size
+        self.requested_nursery_size = self.nursery_size
+        #
+        # Parallel marking: if 'mark_threads' > 1, the marking steps are
+        # done by that many threads, managed by 'mark_pool' (created
+        # lazily).  See parallelmark.py.
+        self.mark_threads = 1
+        self.mark_pool = None
+        self.mark_threads_used = 1
+        #
         # Allocate a nursery.  In case of auto_nursery_size, start by
         # allocating a very small nursery, enough to do things like look
         # up the env var, which requires the GC; and then really
@@ -505,11 +555,25 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            #
+            minor_budget = env.read_uint_from_env('PYPY_GC_MINOR_BUDGET')
+            self.minor_pause_budget = float(minor_budget) / 1000000.0
+            step_budget = env.read_uint_from_env('PYPY_GC_STEP_BUDGET')
+            self.major_step_budget = float(step_budget) / 1000000.0
+            #
+            mark_threads = env.read_uint_from_env('PYPY_GC_MARK_THREADS')
+            if mark_threads > 1:
+                self.set_mark_threads(intmask(mark_threads))
+            #
             self._minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
             self.allocate_nursery()
         #
+        self.max_nursery_size = self.nursery_size
+        self.requested_nursery_size = self.nursery_size
+        self.default_gc_increment_step = self.gc_increment_step
+        #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
         if env_max_number_of_pinned_objects:
             try:
@@ -523,6 +587,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Estimate this number conservatively
             bigobj = self.nonlarge_max + 1
             self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+        self.max_number_of_pinned_objects_initial = (
+            self.max_number_of_pinned_objects)
 
     def enable(self):
         self.enabled = True
@@ -568,6 +634,87 @@ class IncrementalMiniMarkGC(MovingGCBase):
         ll_assert(self.extra_threshold == 0, "extra_threshold set too early")
         debug_stop("gc-set-nursery-size")
 
+    def set_nursery_size(self, newsize):
+        # Change the size of the nursery at runtime.  The new nursery is
+        # only allocated by _maybe_resize_nursery(), after the next minor
+        # collection; make sure that this occurs soon, by pretending that
+        # the current nursery is full.
+        newsize = max(newsize & ~(WORD - 1), self.min_nursery_size)
+        self.max_nursery_size = newsize
+        self.requested_nursery_size = newsize
+        if newsize != self.nursery_size:
+            self.nursery_free = self.nursery_top
+
+    def _maybe_resize_nursery(self):
+        # Called just after a minor collection.  If set_nursery_size() or
+        # the pause-time budget mode asked for another nursery size,
+        # allocate the new nursery now.  This is only possible if the
+        # current one is really empty: it must not contain pinned objects,
+        # and nothing must have been allocated in it since the minor
+        # collection (e.g. by finalizers).
+        newsize = self.requested_nursery_size
+        if (newsize == self.nursery_size or
+                self.pinned_objects_in_nursery > 0 or
+                self.nursery_free != self.nursery or
+                self.debug_rotating_nurseries):
+            return
+        debug_start("gc-set-nursery-size")
+        debug_print("nursery size:", newsize)
+        nursery = llarena.arena_malloc(newsize + self.nonlarge_max + 1, 0)
+        if not nursery:
+            # out of memory: keep the current nursery, and don't try again
+            debug_print("cannot allocate the new nursery")
+            self.requested_nursery_size = self.nursery_size
+            self.max_nursery_size = self.nursery_size
+            debug_stop("gc-set-nursery-size")
+            return
+        llarena.arena_free(self.nursery)
+        self.nursery_size = newsize
+        self.nursery = nursery
+        self.nursery_free = self.nursery
+        self.nursery_top = self.nursery + self.nursery_size
+        #
+        # the estimate of the number of pinned objects that fit in the
+        # nursery must remain conservative for the new size
+        bigobj = self.nonlarge_max + 1
+        self.max_number_of_pinned_objects = min(
+            self.max_number_of_pinned_objects_initial,
+            self.nursery_size / (bigobj * 2))
+        debug_stop("gc-set-nursery-size")
+
+    def _adapt_nursery_size(self, duration):
+        # Pause-time budget mode: choose the size of the next nurseries so
+        # that a minor collection takes about 'minor_pause_budget' seconds,
+        # assuming that its duration grows with the size of the nursery.
+        # Shrink quickly if we are above the budget, and grow slowly if we
+        # are well below it.
+        budget = self.minor_pause_budget
+        size = self.requested_nursery_size
+        if duration > budget:
+            factor = max(budget / duration, 0.5)
+        elif duration < budget * 0.5:
+            factor = 1.25
+        else:
+            return
+        newsize = int(size * factor) & ~(WORD - 1)
+        newsize = max(newsize, self.min_nursery_size)
+        newsize = min(newsize, self.max_nursery_size)
+        self.requested_nursery_size = newsize
+
+    def _adapt_increment_step(self, duration):
+        # Pause-time budget mode: same as _adapt_nursery_size(), but for
+        # the amount of memory marked during one major collection step.
+        budget = self.major_step_budget
+        step = intmask(self.gc_increment_step)
+        if duration > budget:
+            factor = max(budget / duration, 0.5)
+        elif duration < budget * 0.5:
+            factor = 1.25
+        else:
+            return
+        newstep = max(int(step * factor), self.min_nursery_size)
+        self.gc_increment_step = r_uint(newstep)
+
 
     def set_major_threshold_from(self, threshold, reserving_size=0):
         # Set the next_major_collection_threshold.
@@ -916,6 +1063,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                               "Calling minor_collection() twice is not "
                               "enough. Too many pinned objects?")
                     self._minor_collection()
+                self._maybe_resize_nursery()
             #
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
@@ -1076,13 +1224,105 @@ class IncrementalMiniMarkGC(MovingGCBase):
     # Other functions in the GC API
 
     def set_max_heap_size(self, size):
-        self.max_heap_size = float(size)
+        self._set_max_heap_size(float(size))
+
+    def _set_max_heap_size(self, size):
+        self.max_heap_size = size
         if self.max_heap_size > 0.0:
             if self.max_heap_size < self.next_major_collection_initial:
                 self.next_major_collection_initial = self.max_heap_size
             if self.max_heap_size < self.next_major_collection_threshold:
                 self.next_major_collection_threshold = self.max_heap_size
 
+    def set_gc_param(self, param_no, value):
+        if param_no == rgc.GC_PARAM_MINOR_PAUSE_BUDGET:
+            if value < 0.0:
+                return False
+            self.minor_pause_budget = value / 1000000.0
+            if value == 0.0:
+                self.requested_nursery_size = self.max_nursery_size
+            return True
+        elif param_no == rgc.GC_PARAM_MAJOR_STEP_BUDGET:
+            if value < 0.0:
+                return False
+            self.major_step_budget = value / 1000000.0
+            if value == 0.0:
+                self.gc_increment_step = self.default_gc_increment_step
+            return True
+        elif param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            if not (0.0 < value < float(sys.maxint // 4)):
+                return False
+            self.set_nursery_size(int(value))
+            return True
+        elif param_no == rgc.GC_PARAM_MAJOR_COLLECT:
+            # takes effect at the end of the next major collection
+            if value <= 1.0:
+                return False
+            self.major_collection_threshold = value
+            return True
+        elif param_no == rgc.GC_PARAM_GROWTH:
+            # takes effect at the end of the next major collection
+            if value <= 1.0:
+                return False
+            self.growth_rate_max = value
+            return True
+        elif param_no == rgc.GC_PARAM_MAX_HEAP_SIZE:
+            if value < 0.0:
+                return False
+            self._set_max_heap_size(value)
+            return True
+        elif param_no == rgc.GC_PARAM_MARK_THREADS:
+            if not (1.0 <= value <= float(parallelmark.MAX_MARK_THREADS)):
+                return False
+            return self.set_mark_threads(int(value))
+        return False
+
+    def get_gc_param(self, param_no):
+        if param_no == rgc.GC_PARAM_MINOR_PAUSE_BUDGET:
+            return self.minor_pause_budget * 1000000.0
+        elif param_no == rgc.GC_PARAM_MAJOR_STEP_BUDGET:
+            return self.major_step_budget * 1000000.0
+        elif param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            return float(self.max_nursery_size)
+        elif param_no == rgc.GC_PARAM_MAJOR_COLLECT:
+            return self.major_collection_threshold
+        elif param_no == rgc.GC_PARAM_GROWTH:
+            return self.growth_rate_max
+        elif param_no == rgc.GC_PARAM_MAX_HEAP_SIZE:
+            return self.max_heap_size
+        elif param_no == rgc.GC_PARAM_MARK_THREADS:
+            return float(self.mark_threads)
+        return -1.0
+
+    def set_mark_threads(self, nthreads):
+        # Change the number of marking threads.  The helper threads are
+        # stopped now, and new ones are started by the next marking step.
+        if nthreads > 1 and not self.mark_thread_support.is_available():
+            return False
+        if nthreads > parallelmark.MAX_MARK_THREADS:
+            nthreads = parallelmark.MAX_MARK_THREADS
+        if self.mark_pool is not None:
+            self.mark_pool.delete()
+            self.mark_pool = None
+        self.mark_threads = nthreads
+        return True
+
+    def _get_mark_pool(self):
+        pool = self.mark_pool
+        if pool is not None:
+            if pool.pid == self.mark_thread_support.getpid():
+                return pool
+            # we are in the child of a fork(): the helper threads are gone
+            pool.forget()
+        pool = parallelmark.ParallelMarker(self, self.mark_threads)
+        if pool.nthreads < 2:
+            # could not start any helper thread: don't try again
+            pool.delete()
+            pool = None
+            self.mark_threads = 1
+        self.mark_pool = pool
+        return pool
+
     def raw_malloc_memory_pressure(self, sizehint, adr):
         # Decrement by 'sizehint' plus a very little bit extra.  This
         # is needed e.g. for _rawffi, which may allocate a lot of tiny
@@ -1910,10 +2150,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
         debug_stop("gc-minor")
         duration = time.time() - start
         self.total_gc_time += duration
+        if self.minor_pause_budget > 0.0:
+            self._adapt_nursery_size(duration)
         self.hooks.fire_gc_minor(
             duration=duration,
             total_memory_used=total_memory_used,
-            pinned_objects=self.pinned_objects_in_nursery)
+            pinned_objects=self.pinned_objects_in_nursery,
+            nursery_size=self.requested_nursery_size)
 
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
@@ -2318,6 +2561,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         start = time.time()
         debug_start("gc-collect-step")
         oldstate = self.gc_state
+        self.mark_threads_used = 1
+        if self.mark_pool is not None:
+            self.mark_pool.reset_stats()
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
         # Debugging checks
         if self.pinned_objects_in_nursery == 0:
@@ -2383,7 +2629,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if estimate_from_nursery > estimate:
                 estimate = estimate_from_nursery
             estimate = intmask(estimate)
-            remaining = self.visit_all_objects_step(estimate)
+            remaining = self.mark_objects_step(estimate)
             #
             if remaining >= estimate // 2:
                 if self.more_objects_to_trace.non_empty():
@@ -2395,7 +2641,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     swap = self.objects_to_trace
                     self.objects_to_trace = self.more_objects_to_trace
                     self.more_objects_to_trace = swap
-                    self.visit_all_objects()
+                    self.mark_all_objects()
 
             # XXX A simplifying assumption that should be checked,
             # finalizers/weak references are rare and short which means that
@@ -2408,7 +2654,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # First, 'prebuilt_root_objects' might have grown since
                 # we scanned it in collect_roots() (rare case).  Rescan.
                 self.collect_nonstack_roots()
-                self.visit_all_objects()
+                self.mark_all_objects()
                 #
                 if self.rrc_enabled:
                     self.rrc_major_collection_trace()
@@ -2563,10 +2809,21 @@ class IncrementalMiniMarkGC(MovingGCBase):
         debug_stop("gc-collect-step")
         duration = time.time() - start
         self.total_gc_time += duration
+        if self.major_step_budget > 0.0 and oldstate == STATE_MARKING:
+            self._adapt_increment_step(duration)
+        mark_duration_min = 0.0
+        mark_duration_max = 0.0
+        if self.mark_threads_used > 1:
+            mark_duration_min = self.mark_pool.get_duration_min()
+            mark_duration_max = self.mark_pool.get_duration_max()
         self.hooks.fire_gc_collect_step(
             duration=duration,
             oldstate=oldstate,
-            newstate=self.gc_state)
+            newstate=self.gc_state,
+            increment_step=intmask(self.gc_increment_step),
+            mark_threads=self.mark_threads_used,
+            mark_duration_min=mark_duration_min,
+            mark_duration_max=mark_duration_max)
 
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
@@ -2699,6 +2956,50 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 return 0
         return size_to_track
 
+    def mark_objects_step(self, size_to_track):
+        # Like visit_all_objects_step(), but with several threads if
+        # parallel marking is enabled
+        if self.mark_threads > 1 and not self.TEST_VISIT_SINGLE_STEP:
+            pool = self._get_mark_pool()
+            if pool is not None:
+                self.mark_threads_used = pool.nthreads
+                return pool.mark(size_to_track)
+        return self.visit_all_objects_step(size_to_track)
+
+    def mark_all_objects(self):
+        while self.objects_to_trace.non_empty():
+            self.mark_objects_step(sys.maxint)
+
+    def visit_parallel(self, obj, stack):
+        # Like visit(), but called by the parallel marking workers, which
+        # push the objects found into their own 'stack'.  Must not use
+        # anything but the GC header of objects and the type info.
+        hdr = self.header(obj)
+        ll_assert((hdr.tid & GCFLAG_PINNED) == 0,
+                  "pinned object in 'objects_to_trace'")
+        if hdr.tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS):
+            return 0
+        # This read-modify-write of 'tid' is not atomic, but it is safe:
+        # during a parallel step, the only writes to any 'tid' are this
+        # line, done by the workers, which all OR the same two flags.  The
+        # mutator is stopped.  So whatever the interleaving, the result is
+        # the old 'tid' with the two flags set.  The worst case is two
+        # workers both reading the object as unvisited and tracing it
+        # twice.  The collecting thread sees all the writes after it has
+        # acquired every worker's 'done_lock'.
+        hdr.tid |= GCFLAG_VISITED | GCFLAG_TRACK_YOUNG_PTRS
+        if self.has_gcptr(llop.extract_ushort(llgroup.HALFWORD, hdr.tid)):
+            self.trace(obj, self._collect_ref_parallel, stack)
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        totalsize = size_gc_header + self.get_size(obj)
+        return raw_malloc_usage(totalsize)
+
+    def _collect_ref_parallel(self, root, stack):
+        # see _collect_obj(): the pinned objects are skipped
+        obj = root.address[0]
+        if not self.is_in_nursery(obj):
+            stack.append(obj)
+
     def visit(self, obj):
         #
         # 'obj' is a live object.  Check GCFLAG_VISITED to know if we
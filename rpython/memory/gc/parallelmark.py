@@ -0,0 +1,547 @@
+"""
+Parallel marking for incminimark.
+
+When enabled (PYPY_GC_MARK_THREADS or rgc.GC_PARAM_MARK_THREADS, in a
+translation with --gc-parallel-mark), the marking steps of major
+collections are done by N threads: the thread that runs the collection,
+plus N-1 helper threads that sleep between steps.  The mutator is
+stopped during a step (it is the thread running the collection, and the
+other Python threads are waiting for the GIL), so the only concurrency is
+between the markers themselves:
+
+* Each worker traces objects from a private stack.  When this stack
+  grows, batches of objects are moved to a second, 'shared' stack of
+  the same worker, protected by a lock, from which the idle workers
+  steal.  The GC's own 'objects_to_trace' is the initial pool of work;
+  workers take batches out of it under the pool lock.
+
+* Setting GCFLAG_VISITED is not atomic: two workers may both see an
+  object as unvisited and trace it twice.  This is harmless, as they
+  set the same flags and push the same objects.
+
+* The amount of memory to mark during the step is shared between the
+  workers in chunks.  When it is exhausted, all workers stop, and
+  whatever is left in their stacks goes back to 'objects_to_trace'.
+
+The helper threads are raw threads: they never hold the GIL, and the code
+they run must not allocate GC objects, raise exceptions or use thread-
+locals.  This is why everything here is built on raw-malloced memory and
+on the low-level lock functions.  When not translated, the threads are
+emulated with the 'thread' module.
+"""
+from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
+from rpython.rtyper.annlowlevel import llhelper
+from rpython.rtyper.annlowlevel import cast_nongc_instance_to_adr
+from rpython.rtyper.annlowlevel import cast_adr_to_nongc_instance
+from rpython.rlib.objectmodel import we_are_translated, free_non_gc_object
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.debug import ll_assert
+from rpython.memory.gc.minimarkpage import out_of_memory
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+import sys, time
+
+MAX_MARK_THREADS = 64
+
+# number of objects moved at once from one stack to another
+BATCH_SIZE = 64
+
+ADDRESS_SIZE = llmemory.sizeof(llmemory.Address)
+
+
+class MarkStack(object):
+    """A stack of addresses in a raw-malloced array, for the marking
+    workers (AddressStack cannot be used by several threads, because all
+    AddressStacks share a free list of chunks)."""
+    _alloc_flavor_ = "raw"
+
+    INITIAL_SIZE = 1024
+
+    def __init__(self):
+        self.items = self._allocate(self.INITIAL_SIZE)
+        self.length = 0
+        self.allocated = self.INITIAL_SIZE
+
+    def non_empty(self):
+        return self.length != 0
+
+    def append(self, addr):
+        if self.length == self.allocated:
+            self._grow()
+        self.items.address[self.length] = addr
+        self.length += 1
+
+    def pop(self):
+        ll_assert(self.length > 0, "pop on empty MarkStack")
+        self.length -= 1
+        return self.items.address[self.length]
+
+    @staticmethod
+    def _allocate(size):
+        items = llmemory.raw_malloc(ADDRESS_SIZE * size)
+        if not items:
+            out_of_memory("out of memory: cannot allocate a marking stack")
+        return items
+
+    def _grow(self):
+        newsize = self.allocated * 2
+        newitems = self._allocate(newsize)
+        llmemory.raw_memcopy(self.items, newitems, ADDRESS_SIZE * self.length)
+        llmemory.raw_free(self.items)
+        self.items = newitems
+        self.allocated = newsize
+    _grow._dont_inline_ = True
+
+    def move_to(self, other, count):
+        """Move up to 'count' objects from the top of this stack to
+        'other'.  Returns the number of objects moved."""
+        moved = 0
+        while moved < count and self.length > 0:
+            other.append(self.pop())
+            moved += 1
+        return moved
+
+    def delete(self):
+        llmemory.raw_free(self.items)
+        free_non_gc_object(self)
+
+
+# ____________________________________________________________
+# Thread support
+
+class MarkThreadSupport(object):
+    """The primitives used to run the marking threads.  This class is used
+    when the GC is not translated to C with --gc-parallel-mark: untranslated
+    (e.g. in test_direct.py), it emulates them with the 'thread' module;
+    otherwise, it refuses to start threads, so that parallel marking
+    cannot be enabled."""
+
+    def is_available(self):
+        return not we_are_translated()
+
+    def allocate_lock(self):
+        if we_are_translated():
+            return llmemory.NULL
+        import thread
+        return thread.allocate_lock()
+
+    def free_lock(self, lock):
+        pass
+
+    def acquire(self, lock):
+        if not we_are_translated():
+            lock.acquire()
+
+    def release(self, lock):
+        if not we_are_translated():
+            lock.release()
+
+    def yield_cpu(self):
+        # called by the idle workers, between two checks for more work
+        if not we_are_translated():
+            time.sleep(0.0001)
+
+    def start_thread(self, worker):
+        if we_are_translated():
+            return False
+        import thread
+        try:
+            thread.start_new_thread(worker.thread_loop, ())
+        except thread.error:
+            return False
+        return True
+
+    def getpid(self):
+        if we_are_translated():
+            return 0
+        import os
+        return os.getpid()
+
+
+MARK_THREAD_FUNC = lltype.Ptr(lltype.FuncType([llmemory.Address],
+                                              lltype.Void))
+
+def _mark_thread_main(arg):
+    worker = cast_adr_to_nongc_instance(MarkWorker, arg)
+    worker.thread_loop()
+
+
+class CMarkThreadSupport(MarkThreadSupport):
+    """The primitives used to run the marking threads, when translated to
+    C with --gc-parallel-mark."""
+
+    def __init__(self):
+        "NOT_RPYTHON"
+        from rpython.rlib import rthread
+        # unlike rthread.c_thread_start(), this doesn't wrap the callback
+        # to acquire the GIL
+        self.c_start = rffi.llexternal('RPyThreadStartEx',
+                                       [MARK_THREAD_FUNC, llmemory.Address],
+                                       rffi.LONG,
+                                       compilation_info=rthread.eci,
+                                       _nowrapper=True)
+        if sys.platform == 'win32':
+            self.c_yield = rffi.llexternal('SwitchToThread', [], rffi.INT,
+                compilation_info=ExternalCompilationInfo(
+                    includes=['windows.h']),
+                _nowrapper=True)
+        else:
+            self.c_yield = rffi.llexternal('sched_yield', [], rffi.INT,
+                compilation_info=ExternalCompilationInfo(
+                    includes=['sched.h']),
+                _nowrapper=True)
+
+    def is_available(self):
+        return True
+
+    def allocate_lock(self):
+        from rpython.rlib import rthread
+        ll_lock = lltype.malloc(rthread.TLOCKP.TO, flavor='raw',
+                                track_allocation=False)
+        res = rthread.c_thread_lock_init(ll_lock)
+        if rffi.cast(lltype.Signed, res) <= 0:
+            lltype.free(ll_lock, flavor='raw', track_allocation=False)
+            return rthread.null_ll_lock
+        return ll_lock
+
+    def free_lock(self, ll_lock):
+        from rpython.rlib import rthread
+        if ll_lock:
+            rthread.c_thread_lock_dealloc_NOAUTO(ll_lock)
+            lltype.free(ll_lock, flavor='raw', track_allocation=False)
+
+    def acquire(self, ll_lock):
+        from rpython.rlib import rthread
+        rthread.c_thread_acquirelock_NOAUTO(ll_lock, rffi.cast(rffi.INT, 1))
+
+    def release(self, ll_lock):
+        from rpython.rlib import rthread
+        rthread.c_thread_releaselock_NOAUTO(ll_lock)
+
+    def yield_cpu(self):
+        self.c_yield()
+
+    def start_thread(self, worker):
+        func = llhelper(MARK_THREAD_FUNC, _mark_thread_main)
+        ident = self.c_start(func, cast_nongc_instance_to_adr(worker))
+        return intmask(ident) != -1
+
+    def getpid(self):
+        from rpython.rlib import rposix
+        return intmask(rposix.c_getpid())
+
+
+def get_mark_thread_support(config, translated_to_c):
+    """NOT_RPYTHON: the MarkThreadSupport instance for the GC.  Parallel
+    marking is experimental: translated, it is only available with the
+    'gcparallelmark' translation option (which needs threads)."""
+    if translated_to_c and getattr(config, 'gcparallelmark', False):
+        return CMarkThreadSupport()
+    return MarkThreadSupport()
+
+# ____________________________________________________________
+
+
+class MarkWorker(object):
+    _alloc_flavor_ = "raw"
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.next = None
+        self.local = MarkStack()
+        self.shared = MarkStack()
+        support = pool.support
+        self.shared_lock = support.allocate_lock()
+        # for the helper threads: 'start_lock' is released to start a
+        # marking run, and 'done_lock' is released by the thread when it
+        # is finished.  Both are normally held by the collecting thread.
+        self.start_lock = support.allocate_lock()
+        self.done_lock = support.allocate_lock()
+        self.budget = 0
+        self.marked = 0
+        self.duration = 0.0
+
+    def locks_ok(self):
+        return bool(self.shared_lock and self.start_lock and self.done_lock)
+
+    def delete(self):
+        support = self.pool.support
+        support.free_lock(self.shared_lock)
+        support.free_lock(self.start_lock)
+        support.free_lock(self.done_lock)
+        self.local.delete()
+        self.shared.delete()
+        free_non_gc_object(self)
+
+    def thread_loop(self):
+        # the main function of the helper threads
+        pool = self.pool
+        support = pool.support
+        while True:
+            support.acquire(self.start_lock)
+            if pool.shutting_down:
+                break
+            self.run()
+            support.release(self.done_lock)
+        support.release(self.done_lock)
+
+    def run(self):
+        # 'pool.stop' is only read and written with the pool lock held, by
+        # reserve_budget() and find_work().  Between two calls to them, a
+        # worker that missed the stop goes on at most until its chunk of
+        # the budget is used up.
+        pool = self.pool
+        gc = pool.gc
+        local = self.local
+        start = time.time()
+        while True:
+            while local.non_empty():
+                obj = local.pop()
+                size = gc.visit_parallel(obj, local)
+                self.marked += size
+                self.budget -= size
+                if self.budget < 0 and not pool.reserve_budget(self):
+                    break
+                if (local.length > 2 * BATCH_SIZE and
+                        not self.shared.non_empty()):
+                    self.publish()
+            if not self.find_work():
+                break
+        self.duration += time.time() - start
+
+    def publish(self):
+        # make some of our objects available to the other workers
+        support = self.pool.support
+        support.acquire(self.shared_lock)
+        self.local.move_to(self.shared, BATCH_SIZE)
+        support.release(self.shared_lock)
+
+    def take_shared(self, victim, count):
+        support = self.pool.support
+        support.acquire(victim.shared_lock)
+        if count == 0:
+            count = (victim.shared.length + 1) // 2
+        moved = victim.shared.move_to(self.local, count)
+        support.release(victim.shared_lock)
+        return moved > 0
+
+    def steal(self):
+        victim = self.next
+        while victim is not self:
+            if victim is None:
+                victim = self.pool.first_worker
+                continue
+            if victim.shared.non_empty() and self.take_shared(victim, 0):
+                return True
+            victim = victim.next
+        return False
+
+    def find_work(self):
+        pool = self.pool
+        support = pool.support
+        if pool.is_stopped():
+            return False
+        if self.shared.non_empty() and self.take_shared(self, BATCH_SIZE):
+            return True
+        if pool.take_global(self.local) or self.steal():
+            return True
+        # nothing to do: wait until either some other worker publishes
+        # objects, or all workers are idle.  The shared state is read
+        # while holding the pool lock, so that it is reloaded every time.
+        support.acquire(pool.lock)
+        pool.idle += 1
+        while True:
+            if pool.stop or pool.idle == pool.nthreads:
+                support.release(pool.lock)
+                return False
+            if pool.work_available():
+                pool.idle -= 1
+                support.release(pool.lock)
+                if pool.take_global(self.local) or self.steal():
+                    return True
+                support.acquire(pool.lock)
+                pool.idle += 1
+            else:
+                support.release(pool.lock)
+                support.yield_cpu()
+                support.acquire(pool.lock)
+
+
+class ParallelMarker(object):
+    """The marking workers.  Worker 0 is the thread running the
+    collection; the others are helper threads."""
+    _alloc_flavor_ = "raw"
+
+    def __init__(self, gc, nthreads):
+        self.gc = gc
+        self.support = gc.mark_thread_support
+        self.pid = self.support.getpid()
+        self.lock = self.support.allocate_lock()
+        self.nthreads = 1
+        self.idle = 0
+        self.stop = False
+        self.shutting_down = False
+        self.budget_left = 0
+        self.budget_chunk = 0
+        self.first_worker = MarkWorker(self, 0)
+        self.last_worker = self.first_worker
+        if self.lock and self.first_worker.locks_ok():
+            self.start_threads(nthreads)
+
+    def start_threads(self, nthreads):
+        support = self.support
+        while self.nthreads < nthreads:
+            worker = MarkWorker(self, self.nthreads)
+            if not worker.locks_ok():
+                worker.delete()
+                break
+            support.acquire(worker.start_lock)
+            support.acquire(worker.done_lock)
+            if not support.start_thread(worker):
+                worker.delete()
+                break
+            self.last_worker.next = worker
+            self.last_worker = worker
+            self.nthreads += 1
+
+    def delete(self):
+        """Stop the helper threads and free everything."""
+        support = self.support
+        self.shutting_down = True
+        worker = self.first_worker.next
+        while worker is not None:
+            support.release(worker.start_lock)
+            support.acquire(worker.done_lock)
+            worker = worker.next
+        self._free()
+
+    def forget(self):
+        """Free the pool without stopping the helper threads, which don't
+        exist any more after a fork()."""
+        self._free()
+
+    def _free(self):
+        worker = self.first_worker
+        while worker is not None:
+            next = worker.next
+            worker.delete()
+            worker = next
+        self.support.free_lock(self.lock)
+        free_non_gc_object(self)
+
+    def reset_stats(self):
+        worker = self.first_worker
+        while worker is not None:
+            worker.duration = 0.0
+            worker = worker.next
+
+    def get_duration_min(self):
+        result = self.first_worker.duration
+        worker = self.first_worker.next
+        while worker is not None:
+            if worker.duration < result:
+                result = worker.duration
+            worker = worker.next
+        return result
+
+    def get_duration_max(self):
+        result = self.first_worker.duration
+        worker = self.first_worker.next
+        while worker is not None:
+            if worker.duration > result:
+                result = worker.duration
+            worker = worker.next
+        return result
+
+    def reserve_budget(self, worker):
+        # called by a worker when its part of the budget is used up.  If
+        # the whole budget is used up, all the workers stop.
+        self.support.acquire(self.lock)
+        ok = not self.stop and self._take_chunk(worker)
+        if not ok:
+            self.stop = True
+        self.support.release(self.lock)
+        return ok
+
+    def _take_chunk(self, worker):
+        if self.budget_left <= 0:
+            return False
+        chunk = self.budget_chunk
+        if chunk > self.budget_left:
+            chunk = self.budget_left
+        self.budget_left -= chunk
+        worker.budget += chunk
+        return True
+
+    def is_stopped(self):
+        self.support.acquire(self.lock)
+        stop = self.stop
+        self.support.release(self.lock)
+        return stop
+
+    def take_global(self, stack):
+        # take a batch of objects out of the GC's 'objects_to_trace'
+        pending = self.gc.objects_to_trace
+        self.support.acquire(self.lock)
+        count = 0
+        while count < BATCH_SIZE and pending.non_empty():
+            stack.append(pending.pop())
+            count += 1
+        self.support.release(self.lock)
+        return count > 0
+
+    def work_available(self):
+        # called with the pool lock held
+        if self.gc.objects_to_trace.non_empty():
+            return True
+        worker = self.first_worker
+        while worker is not None:
+            if worker.shared.non_empty():
+                return True
+            worker = worker.next
+        return False
+
+    def mark(self, size_to_track):
+        """Visit objects from 'objects_to_trace' with all the workers, until
+        there are none left or about 'size_to_track' bytes have been
+        marked.  Returns what is left of 'size_to_track', like
+        visit_all_objects_step()."""
+        support = self.support
+        self.idle = 0
+        self.stop = False
+        chunk = size_to_track // (self.nthreads * 4)
+        if chunk < 1:
+            chunk = 1
+        self.budget_chunk = chunk
+        self.budget_left = size_to_track
+        worker = self.first_worker
+        while worker is not None:
+            worker.marked = 0
+            worker.budget = 0
+            self._take_chunk(worker)     # the helper threads are waiting
+            worker = worker.next
+        #
+        worker = self.first_worker.next
+        while worker is not None:
+            support.release(worker.start_lock)
+            worker = worker.next
+        self.first_worker.run()
+        worker = self.first_worker.next
+        while worker is not None:
+            support.acquire(worker.done_lock)
+            worker = worker.next
+        #
+        # put the objects not visited back into 'objects_to_trace'
+        pending = self.gc.objects_to_trace
+        marked = 0
+        worker = self.first_worker
+        while worker is not None:
+            while worker.local.non_empty():
+                pending.append(worker.local.pop())
+            while worker.shared.non_empty():
+                pending.append(worker.shared.pop())
+            marked += worker.marked
+            worker = worker.next
+        if self.stop or marked > size_to_track:
+            return 0
+        return size_to_track - marked
@@ -9,7 +9,7 @@ see as the list of roots (stack and prebuilt objects).
 import py
 from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.memory.gctypelayout import TypeLayoutBuilder, FIN_HANDLER_ARRAY
-from rpython.rlib.rarithmetic import LONG_BIT, is_valid_int
+from rpython.rlib.rarithmetic import LONG_BIT, is_valid_int, r_uint
 from rpython.memory.gc import minimark, incminimark
 from rpython.memory.gctypelayout import zero_gc_pointers_inside, zero_gc_pointers
 from rpython.rlib.debug import debug_print
@@ -844,3 +844,183 @@ class TestIncrementalMiniMarkGCFull(DirectGCTest):
             (incminimark.STATE_SWEEPING, incminimark.STATE_FINALIZING),
             (incminimark.STATE_FINALIZING, incminimark.STATE_SCANNING)
             ]
+
+    def test_gc_param_pause_budget(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        assert gc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET) == 0.0
+        assert gc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, 250.0)
+        assert gc.set_gc_param(rgc.GC_PARAM_MAJOR_STEP_BUDGET, 500.0)
+        assert gc.minor_pause_budget == 250e-6
+        assert gc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET) == 250.0
+        assert gc.get_gc_param(rgc.GC_PARAM_MAJOR_STEP_BUDGET) == 500.0
+        assert not gc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, -1.0)
+        assert gc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET) == 250.0
+        assert not gc.set_gc_param(1000, 1.0)
+        assert gc.get_gc_param(1000) == -1.0
+
+    def test_pause_budget_adapts(self):
+        gc = self.gc
+        gc.minor_pause_budget = 100e-6
+        gc.major_step_budget = 100e-6
+        size = gc.requested_nursery_size
+        step = gc.gc_increment_step
+        # too slow: shrink, by at most a factor 2
+        gc._adapt_nursery_size(1.0)
+        gc._adapt_increment_step(1.0)
+        assert gc.requested_nursery_size == max(size // 2, gc.min_nursery_size)
+        assert gc.gc_increment_step == step // 2
+        # well within the budget: grow again, but not above the initial size
+        for i in range(20):
+            gc._adapt_nursery_size(1e-6)
+            gc._adapt_increment_step(1e-6)
+        assert gc.requested_nursery_size == gc.max_nursery_size
+        assert gc.gc_increment_step > step
+        # close to the budget: no change
+        step = gc.gc_increment_step
+        gc._adapt_nursery_size(80e-6)
+        gc._adapt_increment_step(80e-6)
+        assert gc.requested_nursery_size == gc.max_nursery_size
+        assert gc.gc_increment_step == step
+
+    def test_pause_budget_resizes_nursery(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        initial_size = gc.nursery_size
+        # a budget of 1us cannot be met: the nursery shrinks to its minimum
+        gc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, 1.0)
+        for i in range(100):
+            s = self.malloc(S)
+            s.x = i
+            self.stackroots.append(s)
+        assert gc.nursery_size == gc.min_nursery_size < initial_size
+        assert gc.nursery_top == gc.nursery + gc.min_nursery_size
+        assert [s.x for s in self.stackroots] == range(100)
+        # disabling the budget restores the initial size
+        gc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, 0.0)
+        for i in range(100):
+            self.malloc(S)
+        assert gc.nursery_size == initial_size
+        assert [s.x for s in self.stackroots] == range(100)
+
+    def test_gc_param_nursery_size(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        initial_size = gc.nursery_size
+        s = self.malloc(S)
+        s.x = 42
+        self.stackroots.append(s)
+        newsize = gc.min_nursery_size + 3
+        assert gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, float(newsize))
+        assert gc.get_gc_param(rgc.GC_PARAM_NURSERY_SIZE) == (
+            gc.min_nursery_size)
+        # the nursery is only resized by the next minor collection, which
+        # is triggered by the next allocation
+        assert gc.nursery_size == initial_size
+        self.malloc(S)
+        assert gc.nursery_size == gc.min_nursery_size
+        assert self.stackroots[0].x == 42
+        # it can grow above its initial size
+        assert gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, initial_size * 2.0)
+        self.malloc(S)
+        assert gc.nursery_size == initial_size * 2
+        assert self.stackroots[0].x == 42
+        assert not gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 0.0)
+        assert not gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 1e300)
+
+    def test_gc_param_thresholds(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        assert gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 3.5)
+        assert gc.major_collection_threshold == 3.5
+        assert gc.set_gc_param(rgc.GC_PARAM_GROWTH, 1.1)
+        assert gc.get_gc_param(rgc.GC_PARAM_GROWTH) == 1.1
+        assert not gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 1.0)
+        assert not gc.set_gc_param(rgc.GC_PARAM_GROWTH, 0.5)
+        assert gc.get_gc_param(rgc.GC_PARAM_MAJOR_COLLECT) == 3.5
+        #
+        limit = gc.next_major_collection_threshold / 2
+        assert gc.set_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE, limit)
+        assert gc.get_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE) == limit
+        assert gc.next_major_collection_threshold == limit
+        assert gc.set_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE, 0.0)
+        assert gc.max_heap_size == 0.0
+        assert not gc.set_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE, -1.0)
+
+    def _build_tree(self, depth):
+        # a complete binary tree of S, numbered in preorder
+        counter = [0]
+        def build(depth):
+            p = self.malloc(S)
+            p.x = counter[0]
+            counter[0] += 1
+            if depth > 0:
+                self.stackroots.append(p)
+                left = build(depth - 1)
+                self.write(self.stackroots[-1], 'prev', left)
+                right = build(depth - 1)
+                p = self.stackroots.pop()
+                self.write(p, 'next', right)
+            return p
+        return build(depth)
+
+    def _check_tree(self, p, depth):
+        # returns the number of nodes
+        if depth == 0:
+            assert not p.prev and not p.next
+            return 1
+        left = self._check_tree(p.prev, depth - 1)
+        assert p.prev.x == p.x + 1
+        assert p.next.x == p.x + 1 + left
+        return 1 + left + self._check_tree(p.next, depth - 1)
+
+    def test_gc_param_mark_threads(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        assert gc.get_gc_param(rgc.GC_PARAM_MARK_THREADS) == 1.0
+        assert gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 3.0)
+        assert gc.get_gc_param(rgc.GC_PARAM_MARK_THREADS) == 3.0
+        assert not gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 0.0)
+        assert not gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 65.0)
+        assert gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 1.0)
+        assert gc.mark_pool is None
+
+    def test_parallel_marking(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        self.stackroots.append(self._build_tree(7))
+        for i in range(300):
+            self.malloc(S)      # garbage
+        gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 4.0)
+        try:
+            gc.collect()
+            assert gc.mark_pool.nthreads == 4
+            assert self._check_tree(self.stackroots[0], 7) == 255
+            gc.collect()
+            assert self._check_tree(self.stackroots[0], 7) == 255
+        finally:
+            gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 1.0)
+        assert gc.mark_pool is None
+
+    def test_parallel_marking_incremental(self):
+        # many small marking steps: the workers stop when the step's
+        # budget is used, and put the rest back into 'objects_to_trace'
+        from rpython.rlib import rgc
+        gc = self.gc
+        self.stackroots.append(self._build_tree(7))
+        gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 3.0)
+        try:
+            gc.collect()     # move the tree out of the nursery
+            gc.gc_increment_step = r_uint(200)
+            n = 0
+            while True:
+                val = gc.collect_step()
+                if rgc.old_state(val) == incminimark.STATE_MARKING:
+                    n += 1
+                    assert self._check_tree(self.stackroots[0], 7) == 255
+                if rgc.is_done(val):
+                    break
+            assert n > 3
+            assert self._check_tree(self.stackroots[0], 7) == 255
+        finally:
+            gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 1.0)
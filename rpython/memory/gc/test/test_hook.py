@@ -26,15 +26,26 @@ class MyGcHooks(GcHooks):
         self.steps = []
         self.collects = []
         self.durations = []
+        self.nursery_sizes = []
+        self.increment_steps = []
+        self.mark_threads = []
+        self.mark_durations = []
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         self.durations.append(duration)
+        self.nursery_sizes.append(nursery_size)
         self.minors.append({
             'total_memory_used': total_memory_used,
             'pinned_objects': pinned_objects})
 
-    def on_gc_collect_step(self, duration, oldstate, newstate):
+    def on_gc_collect_step(self, duration, oldstate, newstate,
+                           increment_step, mark_threads,
+                           mark_duration_min, mark_duration_max):
         self.durations.append(duration)
+        self.increment_steps.append(increment_step)
+        self.mark_threads.append(mark_threads)
+        self.mark_durations.append((mark_duration_min, mark_duration_max))
         self.steps.append({
             'oldstate': oldstate,
             'newstate': newstate})
@@ -123,3 +134,52 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         assert self.gc.hooks.minors == []
         assert self.gc.hooks.steps == []
         assert self.gc.hooks.collects == []
+
+    def test_pause_budget_reported(self):
+        from rpython.memory.gc import incminimark as m
+        self.gc.hooks._gc_minor_enabled = True
+        self.gc.hooks._gc_collect_step_enabled = True
+        nursery_size = self.gc.nursery_size
+        self.gc._minor_collection()
+        assert self.gc.hooks.nursery_sizes == [nursery_size]
+        self.gc.hooks.reset()
+        #
+        # a budget of 1us cannot be met: the nursery and the marking step
+        # are shrunk, and the hooks see the new sizes
+        self.gc.minor_pause_budget = 1e-6
+        self.gc.major_step_budget = 1e-6
+        step = self.gc.gc_increment_step
+        self.gc._minor_collection()
+        assert self.gc.hooks.nursery_sizes == [self.gc.min_nursery_size]
+        self.gc.collect()
+        marking = [i for i, d in enumerate(self.gc.hooks.steps)
+                   if d['oldstate'] == m.STATE_MARKING]
+        assert len(marking) == 1
+        assert self.gc.hooks.increment_steps[marking[0]] < step
+
+    def test_parallel_marking_reported(self):
+        from rpython.rlib import rgc
+        from rpython.memory.gc import incminimark as m
+        self.gc.hooks._gc_collect_step_enabled = True
+        for i in range(50):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        assert set(self.gc.hooks.mark_threads) == set([1])
+        assert set(self.gc.hooks.mark_durations) == set([(0.0, 0.0)])
+        self.gc.hooks.reset()
+        #
+        self.gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 2.0)
+        try:
+            self.gc.collect()
+        finally:
+            self.gc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 1.0)
+        marking = [i for i, d in enumerate(self.gc.hooks.steps)
+                   if d['oldstate'] == m.STATE_MARKING]
+        assert len(marking) > 0
+        for i in range(len(self.gc.hooks.steps)):
+            if i in marking:
+                assert self.gc.hooks.mark_threads[i] == 2
+                dmin, dmax = self.gc.hooks.mark_durations[i]
+                assert 0.0 <= dmin <= dmax and dmax > 0.0
+            else:
+                assert self.gc.hooks.mark_threads[i] == 1
@@ -0,0 +1,138 @@
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.memory.gc import parallelmark
+from rpython.memory.gc.parallelmark import MarkStack, ParallelMarker
+from rpython.memory.gc.parallelmark import MarkThreadSupport, BATCH_SIZE
+from rpython.memory.support import get_address_stack
+
+
+NODE = lltype.Struct('NODE', ('index', lltype.Signed))
+
+
+class FakeGC(object):
+    """Just enough of a GC for the ParallelMarker: a graph of raw nodes,
+    where tracing an object pushes its children."""
+
+    def __init__(self, nnodes, nchildren):
+        self.mark_thread_support = MarkThreadSupport()
+        self.objects_to_trace = get_address_stack()()
+        self.nodes = []
+        for i in range(nnodes):
+            node = lltype.malloc(NODE, flavor='raw')
+            node.index = i
+            self.nodes.append(llmemory.cast_ptr_to_adr(node))
+        self.visited = [0] * nnodes
+        self.nchildren = nchildren
+
+    def children(self, i):
+        first = i * self.nchildren + 1
+        last = min(first + self.nchildren, len(self.nodes))
+        return range(first, last)
+
+    def visit_parallel(self, obj, stack):
+        i = llmemory.cast_adr_to_ptr(obj, lltype.Ptr(NODE)).index
+        if self.visited[i]:
+            return 0
+        self.visited[i] = 1
+        for j in self.children(i):
+            stack.append(self.nodes[j])
+        return 1
+
+    def delete(self):
+        self.objects_to_trace.delete()
+        for adr in self.nodes:
+            lltype.free(llmemory.cast_adr_to_ptr(adr, lltype.Ptr(NODE)),
+                        flavor='raw')
+
+
+def test_mark_stack():
+    gc = FakeGC(3000, 0)
+    stack = MarkStack()
+    other = MarkStack()
+    assert not stack.non_empty()
+    for adr in gc.nodes:
+        stack.append(adr)
+    assert stack.allocated >= 3000
+    assert stack.move_to(other, 10) == 10
+    assert other.length == 10
+    assert other.pop() == gc.nodes[-10]
+    for i in range(2989, -1, -1):
+        assert stack.pop() == gc.nodes[i]
+    assert not stack.non_empty()
+    assert stack.move_to(other, 10) == 0
+    stack.delete()
+    other.delete()
+    gc.delete()
+
+def test_take_global():
+    gc = FakeGC(BATCH_SIZE * 2 + 5, 0)
+    for adr in gc.nodes:
+        gc.objects_to_trace.append(adr)
+    pool = ParallelMarker(gc, 1)
+    stack = MarkStack()
+    assert pool.take_global(stack)
+    assert stack.length == BATCH_SIZE
+    assert pool.take_global(stack)
+    assert pool.take_global(stack)
+    assert stack.length == BATCH_SIZE * 2 + 5
+    assert not gc.objects_to_trace.non_empty()
+    assert not pool.take_global(stack)
+    stack.delete()
+    pool.delete()
+    gc.delete()
+
+def test_steal():
+    gc = FakeGC(BATCH_SIZE * 3, 0)
+    pool = ParallelMarker(gc, 1)
+    victim = pool.first_worker
+    thief = parallelmark.MarkWorker(pool, 1)
+    victim.next = thief
+    for adr in gc.nodes:
+        victim.local.append(adr)
+    victim.publish()
+    victim.publish()
+    assert victim.shared.length == BATCH_SIZE * 2
+    # the thief takes half of the victim's shared stack
+    assert thief.steal()
+    assert thief.local.length == BATCH_SIZE
+    assert victim.shared.length == BATCH_SIZE
+    while victim.shared.non_empty():
+        assert thief.steal()
+    assert thief.local.length == BATCH_SIZE * 2
+    assert not thief.steal()
+    victim.next = None
+    thief.delete()
+    pool.delete()
+    gc.delete()
+
+def test_mark_all():
+    gc = FakeGC(5000, 3)
+    gc.objects_to_trace.append(gc.nodes[0])
+    pool = ParallelMarker(gc, 4)
+    assert pool.nthreads == 4
+    # the workers may trace an object twice, which counts it twice
+    assert pool.mark(10 ** 9) <= 10 ** 9 - 5000
+    assert min(gc.visited) == 1
+    assert not gc.objects_to_trace.non_empty()
+    pool.delete()
+    gc.delete()
+
+def test_mark_budget():
+    gc = FakeGC(5000, 3)
+    gc.objects_to_trace.append(gc.nodes[0])
+    pool = ParallelMarker(gc, 4)
+    steps = 0
+    while True:
+        left = pool.mark(500)
+        steps += 1
+        if left > 0:
+            break
+        assert not pool.first_worker.local.non_empty()
+        assert pool.is_stopped()
+        # each step stops once the budget is used up, give or take the
+        # objects that the other workers were busy with
+        assert sum(gc.visited) < 500 * steps + 200 * 4
+    assert steps >= 10
+    assert min(gc.visited) == 1
+    assert not gc.objects_to_trace.non_empty()
+    pool.delete()
+    gc.delete()
@@ -430,6 +430,14 @@ class BaseFrameworkGCTransformer(GCTransformer):
             self.get_stats_ptr = getfn(get_stats, [annmodel.SomeInteger()],
                 annmodel.SomeInteger())
 
+        if getattr(GCClass, 'set_gc_param', False):
+            self.set_gc_param_ptr = getfn(GCClass.set_gc_param.im_func,
+                [s_gc, annmodel.SomeInteger(), annmodel.SomeFloat()],
+                annmodel.s_Bool)
+            self.get_gc_param_ptr = getfn(GCClass.get_gc_param.im_func,
+                [s_gc, annmodel.SomeInteger()],
+                annmodel.SomeFloat())
+
 
         self.identityhash_ptr = getfn(GCClass.identityhash.im_func,
                                       [s_gc, s_gcref],
@@ -887,6 +895,26 @@ class BaseFrameworkGCTransformer(GCTransformer):
             resultvar=hop.spaceop.result)
 
 
+    def gct_gc_set_param(self, hop):
+        op = hop.spaceop
+        if not hasattr(self, 'set_gc_param_ptr'):
+            return GCTransformer.gct_gc_set_param(self, hop)
+        [v_param_no, v_value] = op.args
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.set_gc_param_ptr, self.c_const_gc,
+                                  v_param_no, v_value],
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
+    def gct_gc_get_param(self, hop):
+        op = hop.spaceop
+        if not hasattr(self, 'get_gc_param_ptr'):
+            return GCTransformer.gct_gc_get_param(self, hop)
+        [v_param_no] = op.args
+        hop.genop("direct_call", [self.get_gc_param_ptr, self.c_const_gc,
+                                  v_param_no],
+                  resultvar=op.result)
+
     def gct_gc__collect(self, hop):
         op = hop.spaceop
         if len(op.args) == 1:
@@ -135,6 +135,16 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def set_gc_param(self, param_no, value):
+        if hasattr(self.gc, 'set_gc_param'):
+            return self.gc.set_gc_param(param_no, value)
+        return False
+
+    def get_gc_param(self, param_no):
+        if hasattr(self.gc, 'get_gc_param'):
+            return self.gc.get_gc_param(param_no)
+        return -1.0
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
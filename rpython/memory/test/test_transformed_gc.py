@@ -1421,10 +1421,13 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return True
 
-    def on_gc_minor(self, duration, total_memory_used, pinned_objects):
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    nursery_size):
         self.stats.minors += 1
 
-    def on_gc_collect_step(self, duration, oldstate, newstate):
+    def on_gc_collect_step(self, duration, oldstate, newstate,
+                           increment_step, mark_threads,
+                           mark_duration_min, mark_duration_max):
         self.stats.steps += 1
         
     def on_gc_collect(self, num_major_collects,
@@ -1514,6 +1517,64 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         assert steps == 4 * collects   # 4 steps for each major collection
         assert minors == steps         # one minor collection for each step
 
+    def define_gc_set_param(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            # a budget of 1us makes the nursery shrink after the next minor
+            # collections; the objects kept alive must survive the resizing
+            ok = rgc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, 1.0)
+            lst = []
+            for i in range(100):
+                s = lltype.malloc(S)
+                s.x = i
+                lst.append(s)
+            for i in range(100):
+                if lst[i].x != i:
+                    return -1
+            budget = rgc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET)
+            rgc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, 0.0)
+            return ok * 1000 + int(budget)
+        return f
+
+    def test_gc_set_param(self):
+        run = self.runner("gc_set_param")
+        res = run([])
+        assert res == 1001
+
+    def define_gc_set_param_nursery_size(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            rgc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 64.0 * WORD)
+            lst = []
+            for i in range(100):
+                s = lltype.malloc(S)
+                s.x = i
+                lst.append(s)
+            for i in range(100):
+                if lst[i].x != i:
+                    return -1
+            return rgc.get_stats(rgc.NURSERY_SIZE)
+        return f
+
+    def test_gc_set_param_nursery_size(self):
+        run = self.runner("gc_set_param_nursery_size")
+        res = run([])
+        assert res == 64 * WORD
+
+    def define_gc_set_param_mark_threads(cls):
+        def f():
+            # parallel marking needs a translation to C with threads
+            ok = rgc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 4.0)
+            rgc.collect()
+            nthreads = rgc.get_gc_param(rgc.GC_PARAM_MARK_THREADS)
+            return ok * 1000 + int(nthreads)
+        return f
+
+    def test_gc_set_param_mark_threads(self):
+        run = self.runner("gc_set_param_mark_threads")
+        res = run([])
+        assert res == 1
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -553,6 +553,8 @@ PARAMETER_DOCS = {
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'max_jit_memory': 'maximum size in KB of the machine code and resume data of the compiled loops; '
+                      'above it, the least recently entered loops are freed (0=no limit)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
@@ -565,6 +567,10 @@ PARAMETER_DOCS = {
     'vec_cost': 'threshold for which traces to bail. Unpacking increases the counter,'\
                 ' vector operation decrease the cost',
     'vec_all': 'try to vectorize trace loops that occur outside of the numpypy library',
+    'adaptive_threshold': 'adapt the threshold of each loop to how long its '
+                          'previous versions were kept before being thrown away (1/0)',
+    'deferred_compile': 'queue traced loops instead of compiling them at once; '
+                        'they are compiled by jit_hooks.stats_compile_pending_loops() (1/0)',
 }
 
 PARAMETERS = {'threshold': 1039, # just above 1024, prime
@@ -574,6 +580,7 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'max_jit_memory': 0,
               'retrace_limit': 0,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
@@ -583,6 +590,8 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'vec': 0,
               'vec_all': 0,
               'vec_cost': 0,
+              'deferred_compile': 0,
+              'adaptive_threshold': 0,
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.items())
 
@@ -1120,6 +1129,13 @@ class JitHookInterface(object):
         disabled function
         """
 
+    def on_compile_deferred(self, jitdriver, greenkey):
+        """ A hook called each time a loop is traced with the
+        'deferred_compile' parameter set, and queued until
+        jit_hooks.stats_compile_pending_loops() compiles it.  Unlike the
+        other hooks, it is called even if are_hooks_enabled() is False.
+        """
+
     #def before_optimize(self, debug_info):
     #    """ A hook called before optimizer is run, called with instance of
     #    JitDebugInfo. Overwrite for custom behavior
@@ -1329,6 +1345,7 @@ class Counters(object):
     ABORT_BAD_LOOP
     ABORT_ESCAPE
     ABORT_FORCE_QUASIIMMUT
+    COMPILE_DEFERRED
     NVIRTUALS
     NVHOLES
     NVREUSED
@@ -1349,3 +1366,30 @@ class Counters(object):
         Counters.ncounters = len(names)
 
 Counters._setup()
+
+
+class AdaptiveCounters(object):
+    """Statistics of the 'adaptive_threshold' policy, see
+    rpython/jit/metainterp/memmgr.py."""
+    counters="""
+    TRACKED_LOOPS
+    ADAPTED_LOOPS
+    BACKOFFS
+    BOOSTS
+    SHORT_LIVED
+    LONG_LIVED
+    INVALIDATIONS
+    GUARD_FAILURES
+    """
+
+    counter_names = []
+
+    @staticmethod
+    def _setup():
+        names = AdaptiveCounters.counters.split()
+        for i, name in enumerate(names):
+            setattr(AdaptiveCounters, name, i)
+            AdaptiveCounters.counter_names.append(name)
+        AdaptiveCounters.ncounters = len(names)
+
+AdaptiveCounters._setup()
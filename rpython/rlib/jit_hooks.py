@@ -128,10 +128,38 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger())
+def stats_get_resume_bytes(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.cpu.tracker.total_resume_bytes
+
+@register_helper(annmodel.SomeInteger())
+def stats_get_guard_count(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.cpu.tracker.total_guards
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_loops
+
 @register_helper(None)
 def stats_memmgr_release_all(warmrunnerdesc):
     warmrunnerdesc.memory_manager.release_all_loops()
 
+@register_helper(annmodel.SomeInteger())
+def stats_compile_pending_loops(warmrunnerdesc, limit):
+    return warmrunnerdesc.metainterp_sd.compile_pending_loops(limit)
+
+@register_helper(annmodel.SomeInteger())
+def stats_get_pending_loops(warmrunnerdesc):
+    return len(warmrunnerdesc.metainterp_sd.pending_loops)
+
+@register_helper(annmodel.SomeInteger())
+def stats_get_adaptive_value(warmrunnerdesc, no):
+    return warmrunnerdesc.memory_manager.adaptive.get_counter(no)
+
+@register_helper(annmodel.SomeFloat())
+def stats_get_adaptive_wasted_time(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.adaptive.wasted_compile_time
+
 # ---------------------- jitcell interface ----------------------
 
 def _new_hook(name, resulttype):
@@ -91,6 +91,22 @@ else:
 
 KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
+# Toom-Cook 3-way multiplication is O(N**1.465), but it has a larger
+# overhead than Karatsuba: use it only if both operands contain more than
+# TOOM3_CUTOFF digits.
+TOOM3_CUTOFF = 6 * KARATSUBA_CUTOFF
+
+# For long division, use the O(N**2) school algorithm unless the divisor
+# and the quotient both contain more than BURNIKEL_ZIEGLER_CUTOFF digits.
+# In that case, use the recursive algorithm of Burnikel and Ziegler, which
+# is as fast as the multiplication (times log(N)).
+BURNIKEL_ZIEGLER_CUTOFF = 4 * KARATSUBA_CUTOFF
+
+# When converting a string to a bigint, the digits are grouped in chunks
+# that fit in one digit each.  Above that number of chunks, the string is
+# converted recursively by halves, which uses fast multiplications.
+STR_TO_BIGINT_CUTOFF = 8 * KARATSUBA_CUTOFF
+
 # For exponentiation, use the binary left-to-right algorithm
 # unless the exponent contains more than FIVEARY_CUTOFF digits.
 # In that case, do 5 bits at a time.  The potential drawback is that
@@ -737,8 +753,10 @@ class rbigint(object):
 
             if selfsize <= i:
                 result = _x_mul(self, other)
-                """elif 2 * selfsize <= othersize:
-                    result = _k_lopsided_mul(self, other)"""
+            elif 2 * selfsize <= othersize:
+                result = _k_lopsided_mul(self, other)
+            elif selfsize > TOOM3_CUTOFF:
+                result = _tc_mul(self, other)
             else:
                 result = _k_mul(self, other)
         else:
@@ -1908,6 +1926,142 @@ def _k_mul(a, b):
     ret._normalize()
     return ret
 
+def _k_lopsided_mul(a, b):
+    """
+    b has at least twice the digits of a, and a is big enough that
+    Karatsuba would pay off *if* the inputs had balanced sizes.  View b
+    as a sequence of slices, each with a.numdigits() digits, and multiply
+    the slices by a, one at a time.  This gives k_mul balanced inputs to
+    work with, and is also cache-friendly (we compute one double-width
+    slice of the result at a time, then move on, never backtracking
+    except for the helpful single-width slice overlap between successive
+    partial sums).  Ignores the input signs.
+    """
+    asize = a.numdigits()
+    bsize = b.numdigits()
+    assert asize > KARATSUBA_CUTOFF
+    assert 2 * asize <= bsize
+
+    ret = rbigint([NULLDIGIT] * (asize + bsize), 1)
+    nbdone = 0
+    while bsize > 0:
+        nbtouse = min(bsize, asize)
+        # multiply the next slice of b by a
+        bslice = _digits_slice(b, nbdone, nbdone + nbtouse)
+        product = _abs(a).mul(bslice)
+        # add into the result
+        _v_iadd(ret, nbdone, ret.numdigits() - nbdone,
+                product, product.numdigits())
+        bsize -= nbtouse
+        nbdone += nbtouse
+
+    ret._normalize()
+    return ret
+
+def _abs(a):
+    """ Return abs(a), possibly sharing the digits of a. """
+    if a.sign >= 0:
+        return a
+    return rbigint(a._digits, 1, a.numdigits())
+
+def _digits_slice(a, start, stop):
+    """ Return the (non-negative) number made of the digits start:stop of
+    abs(a), i.e. (abs(a) >> (start*SHIFT)) % (1 << ((stop-start)*SHIFT)). """
+    size = a.numdigits()
+    if stop > size:
+        stop = size
+    if start >= stop:
+        return NULLRBIGINT
+    assert start >= 0
+    z = rbigint(a._digits[start:stop], 1, stop - start)
+    z._normalize()
+    return z
+
+def _digits_concat(hi, lo, n):
+    """ Return hi * BASE**n + lo, for non-negative numbers hi and lo with
+    lo < BASE**n, i.e. put the digits of hi on top of the n digits of lo. """
+    if hi.sign == 0:
+        return lo
+    hisize = hi.numdigits()
+    z = rbigint([NULLDIGIT] * (n + hisize), 1, n + hisize)
+    if lo.sign != 0:
+        losize = lo.numdigits()
+        assert losize <= n
+        for i in range(losize):
+            z._digits[i] = lo._digits[i]
+    for i in range(hisize):
+        z._digits[n + i] = hi._digits[i]
+    return z
+
+def _tc_mul(a, b):
+    """
+    Toom-Cook 3-way multiplication.  Ignores the input signs, and returns
+    the absolute value of the product.
+    Both numbers are split in three pieces of k digits, a = a2*X**2 +
+    a1*X + a0 with X = BASE**k, so that the product is a polynomial of
+    degree 4 in X.  It is evaluated at 0, 1, -1, -2 and infinity with 5
+    multiplications of numbers of k digits, then interpolated with the
+    sequence of Bodrato and Zanoni ("Integer and polynomial
+    multiplication: towards optimal Toom-Cook matrices", 2007).
+    """
+    asize = a.numdigits()
+    bsize = b.numdigits()
+    k = (max(asize, bsize) + 2) // 3
+    a0 = _digits_slice(a, 0, k)
+    a1 = _digits_slice(a, k, 2 * k)
+    a2 = _digits_slice(a, 2 * k, asize)
+
+    # evaluation: pa_x = a(x) for x in 1, -1, -2
+    t = a0.add(a2)
+    pa1 = t.add(a1)
+    pam1 = t.sub(a1)
+    pam2 = pam1.add(a2).lshift(1).sub(a0)
+    if a is b:
+        b0, b2 = a0, a2
+        pb1, pbm1, pbm2 = pa1, pam1, pam2
+    else:
+        b0 = _digits_slice(b, 0, k)
+        b1 = _digits_slice(b, k, 2 * k)
+        b2 = _digits_slice(b, 2 * k, bsize)
+        t = b0.add(b2)
+        pb1 = t.add(b1)
+        pbm1 = t.sub(b1)
+        pbm2 = pbm1.add(b2).lshift(1).sub(b0)
+
+    # pointwise multiplication
+    r0 = a0.mul(b0)
+    r1 = pa1.mul(pb1)
+    rm1 = pam1.mul(pbm1)
+    rm2 = pam2.mul(pbm2)
+    rinf = a2.mul(b2)
+
+    # interpolation; all the divisions are exact
+    r3 = rm2.sub(r1).int_floordiv(3)
+    r1 = r1.sub(rm1).rshift(1)
+    r2 = rm1.sub(r0)
+    r3 = r2.sub(r3).rshift(1).add(rinf.lshift(1))
+    r2 = r2.add(r1).sub(rinf)
+    r1 = r1.sub(r3)
+
+    # recomposition: the coefficients are all non-negative, and the
+    # result fits in asize + bsize digits, so the partial sums do too
+    ret = rbigint([NULLDIGIT] * (asize + bsize), 1)
+    size = ret.numdigits()
+    _tc_add_coefficient(ret, size, 0, r0)
+    _tc_add_coefficient(ret, size, k, r1)
+    _tc_add_coefficient(ret, size, 2 * k, r2)
+    _tc_add_coefficient(ret, size, 3 * k, r3)
+    _tc_add_coefficient(ret, size, 4 * k, rinf)
+    ret._normalize()
+    return ret
+
+def _tc_add_coefficient(ret, size, ofs, r):
+    assert r.sign >= 0
+    if r.sign == 0:
+        return
+    carry = _v_iadd(ret, ofs, size - ofs, r, r.numdigits())
+    assert carry == 0
+
 def _inplace_divrem1(pout, pin, n):
     """
     Divide bigint pin by non-zero digit n, storing quotient
@@ -2158,6 +2312,9 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0), 1)
+    elif (size_b > BURNIKEL_ZIEGLER_CUTOFF and
+          size_a - size_b > BURNIKEL_ZIEGLER_CUTOFF):
+        z, rem = _divrem_bz(a, b)
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -2170,6 +2327,77 @@ def _divrem(a, b):
         rem.sign = - rem.sign
     return z, rem
 
+def _bz_div2n1n(a, b, n):
+    """ Divide a by b, where b has exactly n digits and its top digit is
+    normalized (as in _x_divrem), and 0 <= a < b * BASE**n.  Returns the
+    non-negative quotient and remainder.  This is algorithm 1 of
+    Burnikel and Ziegler, "Fast Recursive Division" (1998). """
+    if n <= BURNIKEL_ZIEGLER_CUTOFF:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        # make n even by multiplying both a and b by BASE
+        a = a.lshift(SHIFT)
+        b = b.lshift(SHIFT)
+        n += 1
+    half = n >> 1
+    b1, b2 = _kmul_split(b, half)
+    a123, a4 = _kmul_split(a, half)
+    a12, a3 = _kmul_split(a123, half)
+    q1, r = _bz_div3n2n(a12, a3, b, b1, b2, half)
+    q2, r = _bz_div3n2n(r, a4, b, b1, b2, half)
+    if pad:
+        r = _digits_slice(r, 1, r.numdigits())
+    return _digits_concat(q1, q2, half), r
+
+def _bz_div3n2n(a12, a3, b, b1, b2, n):
+    """ Helper for _bz_div2n1n: divide a12 * BASE**n + a3 by b, where
+    b = b1 * BASE**n + b2 has 2n digits and a12 < b.  This is algorithm 2
+    of Burnikel and Ziegler. """
+    a1, _ = _kmul_split(a12, n)
+    if a1.eq(b1):
+        # the quotient is BASE**n - 1 or BASE**n - 2
+        q = rbigint([_store_digit(MASK)] * n, 1, n)
+        r = a12.sub(_digits_concat(b1, NULLRBIGINT, n)).add(b1)
+    else:
+        q, r = _bz_div2n1n(a12, b1, n)
+    r = _digits_concat(r, a3, n).sub(q.mul(b2))
+    # at most two corrections are needed, because b is normalized
+    while r.sign < 0:
+        q = q.int_sub(1)
+        r = r.add(b)
+    return q, r
+
+def _divrem_bz(a, b):
+    """ Unsigned division of abs(a) by abs(b) with the algorithm of
+    Burnikel and Ziegler, for a divisor and a quotient of many digits.
+    abs(a) is cut in blocks with as many digits as b, which are divided
+    by b from the top, each with _bz_div2n1n(). """
+    a = _abs(a)
+    b = _abs(b)
+    # normalize: shift b left so that its top digit is >= BASE/2
+    d = SHIFT - bits_in_digit(b.digit(abs(b.numdigits() - 1)))
+    if d:
+        a = a.lshift(d)
+        b = b.lshift(d)
+    n = b.numdigits()
+    size_a = a.numdigits()
+    nblocks = (size_a + n - 1) // n
+    q = rbigint([NULLDIGIT] * (nblocks * n), 1, nblocks * n)
+    r = NULLRBIGINT
+    i = nblocks - 1
+    while i >= 0:
+        block = _digits_slice(a, i * n, (i + 1) * n)
+        qi, r = _bz_div2n1n(_digits_concat(r, block, n), b, n)
+        if qi.sign != 0:
+            for j in range(qi.numdigits()):
+                q._digits[i * n + j] = qi._digits[j]
+        i -= 1
+    q._normalize()
+    if d:
+        r = r.rshift(d)
+    return q, r
+
 def _x_int_lt(a, b, eq=False):
     """ Compare bigint a with int b for less than or less than or equal """
     osign = 1
@@ -2892,6 +3120,41 @@ def digits_max_for_base(base):
 BASE_MAX = [0, 1] + [digits_max_for_base(_base) for _base in range(2, 37)]
 DEC_MAX = digits_max_for_base(10)
 assert DEC_MAX == BASE_MAX[10]
+DEC_PER_DIGIT = len(str(DEC_MAX)) - 1
+
+def _chunks_to_bigint(chunks, chunkbase):
+    """Return the value of the non-empty list of 'chunks', the digits of a
+    number in base 'chunkbase', most significant first.  Short lists are
+    converted in quadratic time with _muladd1(); long ones recursively by
+    halves, as hi * chunkbase**k + lo, which uses fast multiplications."""
+    n = len(chunks)
+    if n <= STR_TO_BIGINT_CUTOFF:
+        return _chunks_to_bigint_simple(chunks, 0, n, chunkbase)
+    # powers[j] == chunkbase ** (2 ** j), for all 2 ** j < n
+    powers = [rbigint.fromint(chunkbase)]
+    while (1 << len(powers)) < n:
+        powers.append(powers[-1].mul(powers[-1]))
+    return _chunks_to_bigint_rec(chunks, 0, n, chunkbase, powers)
+
+def _chunks_to_bigint_simple(chunks, start, stop, chunkbase):
+    a = NULLRBIGINT
+    for i in range(start, stop):
+        a = _muladd1(a, chunkbase, chunks[i])
+    return a
+
+def _chunks_to_bigint_rec(chunks, start, stop, chunkbase, powers):
+    n = stop - start
+    if n <= STR_TO_BIGINT_CUTOFF:
+        return _chunks_to_bigint_simple(chunks, start, stop, chunkbase)
+    # the low part gets the largest power of two of chunks that is < n,
+    # so that all the multiplications use one of the precomputed powers
+    j = 0
+    while (2 << j) < n:
+        j += 1
+    mid = stop - (1 << j)
+    hi = _chunks_to_bigint_rec(chunks, start, mid, chunkbase, powers)
+    lo = _chunks_to_bigint_rec(chunks, mid, stop, chunkbase, powers)
+    return hi.mul(powers[j]).add(lo)
 
 def _decimalstr_to_bigint(s):
     # a string that has been already parsed to be decimal and valid,
@@ -2905,41 +3168,67 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
-    a = NULLRBIGINT
-    tens = 1
-    dig = 0
-    ord0 = ord('0')
-    while p < lim:
-        dig = dig * 10 + ord(s[p]) - ord0
-        p += 1
-        tens *= 10
-        if tens == DEC_MAX or p == lim:
-            a = _muladd1(a, tens, dig)
-            tens = 1
-            dig = 0
+    if lim - p > STR_TO_BIGINT_CUTOFF * DEC_PER_DIGIT:
+        a = _long_decimalstr_to_bigint(s, p, lim)
+    else:
+        a = NULLRBIGINT
+        tens = 1
+        dig = 0
+        ord0 = ord('0')
+        while p < lim:
+            dig = dig * 10 + ord(s[p]) - ord0
+            p += 1
+            tens *= 10
+            if tens == DEC_MAX or p == lim:
+                a = _muladd1(a, tens, dig)
+                tens = 1
+                dig = 0
     if sign and a.sign == 1:
         a.sign = -1
     return a
 
+def _long_decimalstr_to_bigint(s, p, lim):
+    # the chunks of DEC_PER_DIGIT digits are cut from the right, so that
+    # only the first one can be shorter
+    ord0 = ord('0')
+    chunks = []
+    stop = p + (lim - p) % DEC_PER_DIGIT
+    if stop == p:
+        stop += DEC_PER_DIGIT
+    while p < lim:
+        dig = 0
+        while p < stop:
+            dig = dig * 10 + ord(s[p]) - ord0
+            p += 1
+        chunks.append(dig)
+        stop += DEC_PER_DIGIT
+    return _chunks_to_bigint(chunks, DEC_MAX)
+
 def parse_digit_string(parser):
     # helper for fromstr
     base = parser.base
     if (base & (base - 1)) == 0 and base >= 2:
         return parse_string_from_binary_base(parser)
-    a = NULLRBIGINT
+    chunks = []
     digitmax = BASE_MAX[base]
     tens, dig = 1, 0
     while True:
         digit = parser.next_digit()
-        if tens == digitmax or digit < 0:
-            a = _muladd1(a, tens, dig)
-            if digit < 0:
-                break
+        if digit < 0:
+            break
+        if tens == digitmax:
+            chunks.append(dig)
             dig = digit
             tens = base
         else:
             dig = dig * base + digit
             tens *= base
+    # the last chunk of digits may be shorter than the others
+    if chunks:
+        a = _chunks_to_bigint(chunks, digitmax)
+    else:
+        a = NULLRBIGINT
+    a = _muladd1(a, tens, dig)
     a.sign *= parser.sign
     return a
 
@@ -63,6 +63,42 @@ def set_max_heap_size(nbytes):
     """
     pass
 
+# Parameters of the GC which can be changed at runtime with set_gc_param().
+# The values are floats; their meaning depends on the parameter:
+#
+#  GC_PARAM_MINOR_PAUSE_BUDGET: pause-time budget of minor collections,
+#     in microseconds (0 to disable)
+#  GC_PARAM_MAJOR_STEP_BUDGET: pause-time budget of the marking steps of
+#     major collections, in microseconds (0 to disable)
+#  GC_PARAM_NURSERY_SIZE: size of the nursery, in bytes
+#  GC_PARAM_MAJOR_COLLECT: major collection memory factor (> 1.0)
+#  GC_PARAM_GROWTH: max growth rate of the major collection threshold (> 1.0)
+#  GC_PARAM_MAX_HEAP_SIZE: max heap size, in bytes (0 for no limit)
+#  GC_PARAM_MARK_THREADS: number of threads marking in parallel during
+#     major collections (1 to disable parallel marking)
+#
+(GC_PARAM_MINOR_PAUSE_BUDGET, GC_PARAM_MAJOR_STEP_BUDGET,
+ GC_PARAM_NURSERY_SIZE, GC_PARAM_MAJOR_COLLECT, GC_PARAM_GROWTH,
+ GC_PARAM_MAX_HEAP_SIZE, GC_PARAM_MARK_THREADS) = range(7)
+
+# for test purposes, when not translated, set_gc_param() just records the
+# values here
+_gc_params = {}
+
+def set_gc_param(param_no, value):
+    """Change the GC parameter 'param_no' (one of the GC_PARAM_* constants)
+    to 'value'.  Return False if the GC does not support this parameter or
+    this value.  This may run a collection.
+    """
+    _gc_params[param_no] = value
+    return True
+
+def get_gc_param(param_no):
+    """Return the current value of the GC parameter 'param_no', or -1.0
+    if the GC does not support it.
+    """
+    return _gc_params.get(param_no, -1.0)
+
 def must_split_gc_address_space():
     """Returns True if we have a "split GC address space", i.e. if
     we are translating with an option that doesn't support taking raw
@@ -226,6 +262,31 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+class SetGcParamEntry(ExtRegistryEntry):
+    _about_ = set_gc_param
+
+    def compute_result_annotation(self, s_param_no, s_value):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_Bool
+
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed, lltype.Float)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_set_param', vlist, resulttype=lltype.Bool)
+
+
+class GetGcParamEntry(ExtRegistryEntry):
+    _about_ = get_gc_param
+
+    def compute_result_annotation(self, s_param_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeFloat()
+
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_param', vlist, resulttype=lltype.Float)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
@@ -42,6 +42,27 @@ _gil_get_holder = llexternal('RPyGilGetHolder', [], lltype.Signed,
                              _nowrapper=True, sandboxsafe=True,
                              compilation_info=eci)
 
+_gil_set_switch_interval = llexternal('RPyGilSetSwitchInterval',
+                                      [rffi.LONGLONG], lltype.Void,
+                                      _nowrapper=True, sandboxsafe=True,
+                                      compilation_info=eci)
+
+_gil_get_switch_interval = llexternal('RPyGilGetSwitchInterval',
+                                      [], rffi.LONGLONG,
+                                      _nowrapper=True, sandboxsafe=True,
+                                      compilation_info=eci)
+
+_gil_get_counter = llexternal('RPyGilGetCounter', [lltype.Signed],
+                              rffi.LONGLONG,
+                              _nowrapper=True, sandboxsafe=True,
+                              compilation_info=eci)
+
+# indexes for get_counter(), see thread.h
+GIL_SWITCHES = 0        # number of times yield_thread() gave the GIL away
+GIL_SLOW_ACQUIRES = 1   # number of times a thread had to wait for the GIL
+GIL_WAIT_TIME_NS = 2    # total time spent waiting for the GIL
+GIL_NUM_COUNTERS = 3
+
 # ____________________________________________________________
 
 
@@ -223,6 +244,38 @@ def gil_get_holder():
         allocate()
         return _emulated_gil_holder.get_holder()
 
+_emulated_switch_interval = [5000000]
+
+def set_switch_interval(interval_ns):
+    """Set the time, in nanoseconds, after which a thread waiting for the
+    GIL asks the thread holding it to release it at the next call to
+    yield_thread().  If it is zero, the GIL is released at every call to
+    yield_thread() while other threads are waiting.
+    """
+    if we_are_translated():
+        _gil_set_switch_interval(rffi.cast(rffi.LONGLONG, interval_ns))
+    else:
+        _emulated_switch_interval[0] = interval_ns
+
+def get_switch_interval():
+    if we_are_translated():
+        return _gil_get_switch_interval()
+    else:
+        return rffi.cast(rffi.LONGLONG, _emulated_switch_interval[0])
+
+def get_counter(index):
+    """Return one of the GIL_* statistics of the whole process."""
+    if we_are_translated():
+        return _gil_get_counter(index)
+    else:
+        return rffi.cast(rffi.LONGLONG, 0)
+
+def get_thread_wait_time():
+    """Return the time in nanoseconds that the current thread spent
+    waiting for the GIL."""
+    from rpython.rlib import rthread
+    return rthread.tlfield_gil_wait_time.getraw()
+
 def am_I_holding_the_GIL():
     from rpython.rlib import rthread
     my_tid = rthread.get_or_make_ident()
@@ -456,6 +456,8 @@ tlfield_p_errno = ThreadLocalField(rffi.CArrayPtr(rffi.INT), "p_errno",
                                    loop_invariant=True)
 tlfield_rpy_errno = ThreadLocalField(rffi.INT, "rpy_errno")
 tlfield_alt_errno = ThreadLocalField(rffi.INT, "alt_errno")
+# time spent waiting for the GIL, updated by the C code (see rgil.py)
+tlfield_gil_wait_time = ThreadLocalField(rffi.LONGLONG, "gil_wait_time_ns")
 _win32 = (sys.platform == "win32")
 if _win32:
     from rpython.rlib import rwin32
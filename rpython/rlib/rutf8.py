@@ -19,7 +19,7 @@ import sys
 from rpython.rlib.objectmodel import enforceargs, we_are_translated, specialize
 from rpython.rlib.objectmodel import always_inline, dont_inline, try_inline
 from rpython.rlib.rstring import StringBuilder
-from rpython.rlib import jit, types, rarithmetic
+from rpython.rlib import jit, types, rarithmetic, rgc
 from rpython.rlib.signature import signature, finishsigs
 from rpython.rlib.types import char, none
 from rpython.rlib.rarithmetic import r_uint
@@ -505,65 +505,150 @@ def surrogate_in_utf8(utf8):
     return -1
 
 
-UTF8_INDEX_STORAGE = lltype.GcArray(lltype.Struct('utf8_loc_elem',
-        ('baseindex', lltype.Signed),
-        ('ofs', lltype.FixedSizeArray(lltype.Char, 16)),
-    ))
+# The index storage records the byte position of every 4th codepoint.
+# It is split in entries of 64 codepoints: 'baseindex[k]' is the byte
+# position of the codepoint 64*k, and 'ofs[16*k+i]' is the position of
+# the codepoint 64*k+4*i+1 relative to it.  The entries are computed on
+# demand, up to the largest index looked up so far; an index close to
+# the one looked up last time is found by walking from there, without
+# computing any entry.
+
+UTF8_INDEX_STORAGE = lltype.GcStruct('utf8_index_storage',
+        ('length', lltype.Signed),      # number of codepoints in the string
+        ('filled', lltype.Signed),      # number of entries computed so far
+        ('fill_pos', lltype.Signed),    # byte position of entry 'filled'
+        ('last_index', lltype.Signed),  # the last index looked up
+        ('last_pos', lltype.Signed),    # and its byte position
+        ('baseindex', lltype.Ptr(lltype.GcArray(lltype.Signed))),
+        ('ofs', lltype.Ptr(lltype.GcArray(lltype.Char))),
+    )
+
+# how many codepoints we walk from the last position looked up instead
+# of computing entries of the index storage
+INDEX_STORAGE_SHORT_RANGE = 16
 
 def null_storage():
     return lltype.nullptr(UTF8_INDEX_STORAGE)
 
 def create_utf8_index_storage(utf8, utf8len):
     """ Create an index storage which stores index of each 4th character
-    in utf8 encoded unicode string.
+    in utf8 encoded unicode string.  It is initially empty, and filled
+    lazily by the functions that use it.
     """
-    arraysize = utf8len // 64 + 1
-    storage = lltype.malloc(UTF8_INDEX_STORAGE, arraysize)
-    baseindex = 0
-    current = 0
-    while True:
-        storage[current].baseindex = baseindex
-        next = baseindex
-        for i in range(16):
-            if utf8len == 0:
-                next += 1      # assume there is an extra '\x00' character
-            else:
-                next = next_codepoint_pos(utf8, next)
-            storage[current].ofs[i] = chr(next - baseindex)
-            utf8len -= 4
-            if utf8len < 0:
-                assert current + 1 == len(storage)
-                break
-            next = next_codepoint_pos(utf8, next)
-            next = next_codepoint_pos(utf8, next)
-            next = next_codepoint_pos(utf8, next)
-        else:
-            current += 1
-            baseindex = next
-            continue
-        break
+    storage = lltype.malloc(UTF8_INDEX_STORAGE)
+    storage.length = utf8len
+    storage.filled = 0
+    storage.fill_pos = 0
+    storage.last_index = 0
+    storage.last_pos = 0
+    storage.baseindex = lltype.nullptr(UTF8_INDEX_STORAGE.baseindex.TO)
+    storage.ofs = lltype.nullptr(UTF8_INDEX_STORAGE.ofs.TO)
     return storage
 
-@jit.elidable
+def _index_storage_num_entries(storage):
+    return (storage.length >> 6) + 1
+
+def _grow_index_storage(storage, minsize):
+    size = 0
+    if storage.baseindex:
+        size = len(storage.baseindex)
+    size += (size >> 1) + 8
+    if size < minsize:
+        size = minsize
+    maxsize = _index_storage_num_entries(storage)
+    if size > maxsize:
+        size = maxsize
+    baseindex = lltype.malloc(UTF8_INDEX_STORAGE.baseindex.TO, size)
+    ofs = lltype.malloc(UTF8_INDEX_STORAGE.ofs.TO, size << 4)
+    if storage.filled > 0:
+        rgc.ll_arraycopy(storage.baseindex, baseindex, 0, 0, storage.filled)
+        rgc.ll_arraycopy(storage.ofs, ofs, 0, 0, storage.filled << 4)
+    storage.baseindex = baseindex
+    storage.ofs = ofs
+
+def _fill_index_entry(utf8, storage, current, baseindex):
+    # compute the entry 'current', which starts at the byte position
+    # 'baseindex'.  Returns the position where the next entry starts.
+    storage.baseindex[current] = baseindex
+    remaining = storage.length - (current << 6)
+    ofs = storage.ofs
+    next = baseindex
+    for i in range(16):
+        if remaining == 0:
+            next += 1      # assume there is an extra '\x00' character
+        else:
+            next = next_codepoint_pos(utf8, next)
+        ofs[(current << 4) + i] = chr(next - baseindex)
+        remaining -= 4
+        if remaining < 0:
+            break          # this was the last entry
+        next = next_codepoint_pos(utf8, next)
+        next = next_codepoint_pos(utf8, next)
+        next = next_codepoint_pos(utf8, next)
+    return next
+
+def _ensure_index_storage(utf8, storage, current):
+    """ Compute the entries of the storage up to 'current' included.
+    """
+    if current < storage.filled:
+        return
+    if not storage.baseindex or current >= len(storage.baseindex):
+        _grow_index_storage(storage, current + 1)
+    while storage.filled <= current:
+        storage.fill_pos = _fill_index_entry(utf8, storage, storage.filled,
+                                             storage.fill_pos)
+        storage.filled += 1
+
+def _walk_codepoints(utf8, bytepos, delta):
+    while delta > 0:
+        bytepos = next_codepoint_pos(utf8, bytepos)
+        delta -= 1
+    while delta < 0:
+        bytepos = prev_codepoint_pos(utf8, bytepos)
+        delta += 1
+    return bytepos
+
 def codepoint_position_at_index(utf8, storage, index):
     """ Return byte index of a character inside utf8 encoded string, given
     storage of type UTF8_INDEX_STORAGE.  The index must be smaller than
     or equal to the utf8 length: if needed, check explicitly before calling
     this function.
     """
-    current = index >> 6
-    ofs = ord(storage[current].ofs[(index >> 2) & 0x0F])
-    bytepos = storage[current].baseindex + ofs
-    index &= 0x3
-    if index == 0:
-        return prev_codepoint_pos(utf8, bytepos)
-    elif index == 1:
-        assert bytepos >= 0
-        return bytepos
-    elif index == 2:
-        return next_codepoint_pos(utf8, bytepos)
+    if (index >> 6) >= storage.filled:
+        return _position_at_index_lazy(utf8, storage, index)
+    return _position_at_index_in_storage(utf8, storage, index)
+
+@jit.dont_look_inside
+def _position_at_index_lazy(utf8, storage, index):
+    # the entry containing 'index' is not computed yet: walk from the last
+    # index looked up if it is close, otherwise compute the entries up to
+    # this one.  This mutates the storage, so it is not elidable.
+    delta = index - storage.last_index
+    if -INDEX_STORAGE_SHORT_RANGE <= delta <= INDEX_STORAGE_SHORT_RANGE:
+        bytepos = _walk_codepoints(utf8, storage.last_pos, delta)
     else:
-        return next_codepoint_pos(utf8, next_codepoint_pos(utf8, bytepos))
+        _ensure_index_storage(utf8, storage, index >> 6)
+        bytepos = _position_at_index_in_storage(utf8, storage, index)
+    assert bytepos >= 0
+    storage.last_index = index
+    storage.last_pos = bytepos
+    return bytepos
+
+@jit.elidable
+def _position_at_index_in_storage(utf8, storage, index):
+    # only reads the entry containing 'index', which must be computed
+    # already; computed entries never change afterwards
+    ofs = ord(storage.ofs[index >> 2])
+    bytepos = storage.baseindex[index >> 6] + ofs
+    rest = index & 0x3
+    if rest == 0:
+        bytepos = prev_codepoint_pos(utf8, bytepos)
+    elif rest == 2:
+        bytepos = next_codepoint_pos(utf8, bytepos)
+    elif rest == 3:
+        bytepos = next_codepoint_pos(utf8, next_codepoint_pos(utf8, bytepos))
+    assert bytepos >= 0
+    return bytepos
 
 def _pos_at_index(utf8, index):
     # Slow!
@@ -572,25 +657,33 @@ def _pos_at_index(utf8, index):
         pos = next_codepoint_pos(utf8, pos)
     return pos
 
-@jit.elidable
 def codepoint_at_index(utf8, storage, index):
     """ Return codepoint of a character inside utf8 encoded string, given
     storage of type UTF8_INDEX_STORAGE
     """
-    current = index >> 6
-    ofs = ord(storage[current].ofs[(index >> 2) & 0x0F])
-    bytepos = storage[current].baseindex + ofs
-    index &= 0x3
-    if index == 0:
-        return codepoint_before_pos(utf8, bytepos)
-    if index == 3:
-        bytepos = next_codepoint_pos(utf8, bytepos)
-        index = 2     # fall-through to the next case
-    if index == 2:
-        bytepos = next_codepoint_pos(utf8, bytepos)
+    bytepos = codepoint_position_at_index(utf8, storage, index)
     return codepoint_at_pos(utf8, bytepos)
 
-@jit.elidable
+def _count_codepoints_from_last(utf8, storage, bytepos):
+    # if 'bytepos' is close to the last position looked up, count the
+    # codepoints from there.  Returns -1 otherwise.
+    lastpos = storage.last_pos
+    if lastpos <= bytepos <= lastpos + INDEX_STORAGE_SHORT_RANGE:
+        index = storage.last_index
+        while lastpos < bytepos:
+            lastpos = next_codepoint_pos(utf8, lastpos)
+            index += 1
+    elif lastpos - INDEX_STORAGE_SHORT_RANGE <= bytepos < lastpos:
+        index = storage.last_index
+        while lastpos > bytepos:
+            lastpos = prev_codepoint_pos(utf8, lastpos)
+            index -= 1
+    else:
+        return -1
+    storage.last_index = index
+    storage.last_pos = lastpos
+    return index
+
 def codepoint_index_at_byte_position(utf8, storage, bytepos, num_codepoints):
     """ Return the character index for which
     codepoint_position_at_index(index) == bytepos.
@@ -600,32 +693,60 @@ def codepoint_index_at_byte_position(utf8, storage, bytepos, num_codepoints):
     """
     if bytepos < 0:
         return bytepos
-    # binary search on elements of storage
+    if (storage.filled < _index_storage_num_entries(storage) and
+            bytepos >= storage.fill_pos):
+        # the entry containing 'bytepos' is not computed yet
+        result = _index_at_byte_position_lazy(utf8, storage, bytepos)
+        if result >= 0:
+            return result
+    return _index_at_byte_position_in_storage(utf8, storage, bytepos,
+                                              num_codepoints)
+
+@jit.dont_look_inside
+def _index_at_byte_position_lazy(utf8, storage, bytepos):
+    # count the codepoints from the last position looked up if it is
+    # close, otherwise compute the entries up to the one containing
+    # 'bytepos' and return -1.  This mutates the storage.
+    result = _count_codepoints_from_last(utf8, storage, bytepos)
+    if result >= 0:
+        return result
+    num_entries = _index_storage_num_entries(storage)
+    while storage.filled < num_entries and bytepos >= storage.fill_pos:
+        _ensure_index_storage(utf8, storage, storage.filled)
+    return -1
+
+@jit.elidable
+def _index_at_byte_position_in_storage(utf8, storage, bytepos,
+                                       num_codepoints):
+    # only reads the computed entries of the storage, which must include
+    # the one containing 'bytepos'
+    num_entries = _index_storage_num_entries(storage)
+    # binary search on the entries of storage
     index_min = 0
-    index_max = len(storage) - 1
+    index_max = storage.filled - 1
     while index_min < index_max:
         # this addition can't overflow because storage has a length that is
         # 1/64 of the length of a string
         index_middle = (index_min + index_max + 1) // 2
-        base_bytepos = storage[index_middle].baseindex
+        base_bytepos = storage.baseindex[index_middle]
         if bytepos < base_bytepos:
             index_max = index_middle - 1
         else:
             index_min = index_middle
 
-    baseindex = storage[index_min].baseindex
+    baseindex = storage.baseindex[index_min]
     if baseindex == bytepos:
         return index_min << 6
 
     # use ofs to get closer to the correct character index
     result = index_min << 6
     bytepos1 = baseindex
-    if index_min == len(storage) - 1:
+    if index_min == num_entries - 1:
         maxindex = ((num_codepoints - 1) >> 2) & 0x0F
     else:
         maxindex = 16
     for i in range(maxindex):
-        x = baseindex + ord(storage[index_min].ofs[i])
+        x = baseindex + ord(storage.ofs[(index_min << 4) + i])
         if x >= bytepos:
             break
         bytepos1 = x
@@ -1060,6 +1060,88 @@ class TestInternalFunctions(object):
         ret = lobj._k_mul(f1, f2)
         assert ret.tolong() == f1.tolong() * f2.tolong()
 
+    def test__k_lopsided_mul(self):
+        digs_a = KARATSUBA_CUTOFF + 3
+        a = bigint([lobj.MASK] * digs_a, 1)
+        for digs_b in [2 * digs_a, 2 * digs_a + 1, 5 * digs_a - 1]:
+            b = bigint([lobj.MASK] * (digs_b - 1) + [1], 1)
+            ret = lobj._k_lopsided_mul(a, b)
+            assert ret.tolong() == a.tolong() * b.tolong()
+
+    def test__tc_mul(self):
+        digs = lobj.TOOM3_CUTOFF + 1
+        f1 = bigint([lobj.MASK] * digs, 1)
+        f2 = lobj._x_add(f1, bigint([1], 1))
+        ret = lobj._tc_mul(f1, f2)
+        assert ret.tolong() == f1.tolong() * f2.tolong()
+        ret = lobj._tc_mul(f1, f1)
+        assert ret.tolong() == f1.tolong() ** 2
+        # operands of different sizes, and pieces that are zero
+        f3 = bigint([0] * (digs // 2) + [lobj.MASK] * 2 + [0] * digs + [1], 1)
+        ret = lobj._tc_mul(f1, f3)
+        assert ret.tolong() == f1.tolong() * f3.tolong()
+
+    def test_mul_big(self, monkeypatch):
+        # use small cutoffs, to test all the algorithms with smaller numbers
+        monkeypatch.setattr(lobj, 'KARATSUBA_CUTOFF', 3)
+        monkeypatch.setattr(lobj, 'KARATSUBA_SQUARE_CUTOFF', 5)
+        monkeypatch.setattr(lobj, 'TOOM3_CUTOFF', 8)
+        for i in range(30):
+            x = long(randint(0, 1 << (SHIFT * randint(1, 80))))
+            y = long(randint(0, 1 << (SHIFT * randint(1, 80))))
+            for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+                f1 = rbigint.fromlong(sx * x)
+                f2 = rbigint.fromlong(sy * y)
+                assert f1.mul(f2).tolong() == sx * x * sy * y
+            assert f1.mul(f1).tolong() == x * x
+
+    def test__divrem_bz(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'BURNIKEL_ZIEGLER_CUTOFF', 3)
+        for i in range(30):
+            y = long(randint(1, 1 << (SHIFT * randint(1, 40))))
+            x = long(randint(0, 1 << (SHIFT * randint(1, 120))))
+            div, rem = lobj._divrem_bz(rbigint.fromlong(x),
+                                       rbigint.fromlong(y))
+            _div, _rem = divmod(x, y)
+            assert div.tolong() == _div
+            assert rem.tolong() == _rem
+        # the cases where the quotient of a 3n/2n step is too large,
+        # and needs the most corrections
+        for y, x in [((1 << (SHIFT * 20)) - 1, (1 << (SHIFT * 40)) - 2),
+                     (1 << (SHIFT * 21 - 1), (1 << (SHIFT * 63 - 3)) - 1),
+                     ((1 << (SHIFT * 17)) + 1, 1 << (SHIFT * 51))]:
+            div, rem = lobj._divrem_bz(rbigint.fromlong(x),
+                                       rbigint.fromlong(y))
+            assert div.tolong() == x // y
+            assert rem.tolong() == x % y
+
+    def test_divmod_big(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'BURNIKEL_ZIEGLER_CUTOFF', 3)
+        for i in range(20):
+            y = long(randint(1, 1 << (SHIFT * randint(1, 40))))
+            x = long(randint(0, 1 << (SHIFT * randint(1, 120))))
+            for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+                f1 = rbigint.fromlong(sx * x)
+                f2 = rbigint.fromlong(sy * y)
+                div, rem = f1.divmod(f2)
+                _div, _rem = divmod(sx * x, sy * y)
+                assert div.tolong() == _div
+                assert rem.tolong() == _rem
+
+    def test_fromstr_big(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'STR_TO_BIGINT_CUTOFF', 2)
+        for i in range(20):
+            x = long(randint(0, 1 << (SHIFT * randint(1, 40))))
+            s = str(x)
+            assert rbigint.fromdecimalstr(s).tolong() == x
+            assert rbigint.fromdecimalstr('-' + s).tolong() == -x
+            assert rbigint.fromstr(s).tolong() == x
+            assert rbigint.fromstr('0' * 50 + s, 10).tolong() == x
+            assert rbigint.fromstr('-' + s).tolong() == -x
+            assert rbigint.fromstr(rbigint.fromlong(x).format(
+                '0123456', ''), 7).tolong() == x
+        assert rbigint.fromdecimalstr('0' * 500).tolong() == 0
+
     def test_longlong(self):
         max = 1L << (r_longlong.BITS-1)
         f1 = rbigint.fromlong(max-1)    # fits in r_longlong
@@ -69,6 +69,21 @@ def test_collect_step():
     res = interpret(f, [])
     assert res
 
+def test_set_gc_param():
+    def f(value):
+        if not rgc.set_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET, value):
+            return -2.0
+        return rgc.get_gc_param(rgc.GC_PARAM_MINOR_PAUSE_BUDGET)
+
+    assert f(42.0) == 42.0
+    t, typer, graph = gengraph(f, [float])
+    blockops = list(graph.iterblockops())
+    opnames = [op.opname for block, op in blockops
+               if op.opname.startswith('gc_')]
+    assert opnames == ['gc_set_param', 'gc_get_param']
+    res = interpret(f, [12.5])
+    assert res == 12.5
+
 def test__encode_states():
     val = rgc._encode_states(42, 43)
     assert rgc.old_state(val) == 42
@@ -160,6 +160,57 @@ class BaseTestGIL(StandaloneTests):
         data = cbuilder.cmdexec('')
         assert data == "OK\n"
 
+    def test_switch_interval_and_counters(self):
+        import time
+        from rpython.rlib import rthread
+
+        class Glob:
+            pass
+        glob = Glob()
+
+        def io_thread():
+            # every time.sleep() needs to get the GIL back from the main
+            # thread, which only releases it in yield_thread()
+            for i in range(50):
+                time.sleep(0.0005)
+            glob.wait_time = rgil.get_thread_wait_time()
+            glob.done = True
+            glob.finish_lock.release()
+
+        def main(argv):
+            rgil.set_switch_interval(int(argv[1]))
+            assert rgil.get_switch_interval() == int(argv[1])
+            glob.done = False
+            glob.finish_lock = rthread.allocate_lock()
+            glob.finish_lock.acquire(True)
+            rthread.start_new_thread(io_thread, ())
+            # a CPU-bound loop in the main thread
+            start = time.time()
+            while not glob.done:
+                rgil.yield_thread()
+                assert time.time() - start < 60.0
+            glob.finish_lock.acquire(True)
+            assert glob.wait_time > 0
+            assert rgil.get_counter(rgil.GIL_SWITCHES) >= 50
+            assert rgil.get_counter(rgil.GIL_SLOW_ACQUIRES) >= 50
+            assert (rgil.get_counter(rgil.GIL_WAIT_TIME_NS) >=
+                    glob.wait_time + rgil.get_thread_wait_time())
+            print "OK"
+            return 0
+
+        self.config = get_combined_translation_config(
+            overrides={"translation.thread": True})
+        t, cbuilder = self.compile(main)
+        # the thread coming back from time.sleep() gets the GIL as soon
+        # as the main thread calls yield_thread(), whatever the switch
+        # interval is
+        start = time.time()
+        data = cbuilder.cmdexec('10000000000')    # 10 seconds
+        assert data == "OK\n"
+        assert time.time() - start < 10.0
+        data = cbuilder.cmdexec('0')
+        assert data == "OK\n"
+
 
 class TestGILShadowStack(BaseTestGIL):
     gc = 'minimark'
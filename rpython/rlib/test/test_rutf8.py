@@ -153,6 +153,42 @@ def test_codepoint_position_at_index_inverse(u):
         assert rutf8.codepoint_index_at_byte_position(
                        b, storage, bytepos, len(u)) == i
 
+@given(strategies.text(), strategies.lists(strategies.integers(min_value=0)))
+@example(u'xሴ' * 500, [999, 3, 64, 1000, 0, 700, 701, 128])
+def test_index_storage_random_access(u, indices):
+    b = u.encode('utf8')
+    storage = rutf8.create_utf8_index_storage(b, len(u))
+    for i in indices:
+        i %= len(u) + 1
+        bytepos = len(u[:i].encode('utf8'))
+        assert rutf8.codepoint_position_at_index(b, storage, i) == bytepos
+        j = (i * 7) % (len(u) + 1)
+        bytepos = len(u[:j].encode('utf8'))
+        assert rutf8.codepoint_index_at_byte_position(
+                       b, storage, bytepos, len(u)) == j
+
+def test_index_storage_is_lazy():
+    u = u'字x' * 5000
+    b = u.encode('utf8')
+    storage = rutf8.create_utf8_index_storage(b, len(u))
+    # close to the start, or to the last index: no entry is computed
+    assert rutf8.codepoint_position_at_index(b, storage, 10) == 20
+    assert rutf8.codepoint_position_at_index(b, storage, 3) == 7
+    assert storage.filled == 0
+    # further away: only the entries up to the index are computed
+    assert rutf8.codepoint_position_at_index(b, storage, 1000) == 2000
+    assert storage.filled == 1000 // 64 + 1
+    assert rutf8.codepoint_position_at_index(b, storage, 150) == 300
+    assert storage.filled == 1000 // 64 + 1
+    assert rutf8.codepoint_index_at_byte_position(
+                   b, storage, 2007, len(u)) == 1003
+    assert storage.filled == 1000 // 64 + 1
+    assert rutf8.codepoint_index_at_byte_position(
+                   b, storage, 8000, len(u)) == 4000
+    assert storage.filled == 4000 // 64 + 1
+    assert rutf8.codepoint_position_at_index(b, storage, len(u)) == len(b)
+    assert storage.filled == len(u) // 64 + 1
+
 
 repr_func = rutf8.make_utf8_escape_function(prefix='u', pass_printable=False,
                                             quotes=True)
@@ -826,6 +826,12 @@ class LLFrame(object):
     def op_gc__collect_step(self):
         return self.heap.collect_step()
 
+    def op_gc_set_param(self, param_no, value):
+        return self.heap.set_gc_param(param_no, value)
+
+    def op_gc_get_param(self, param_no):
+        return self.heap.get_gc_param(param_no)
+
     def op_gc__enable(self):
         self.heap.enable()
 
@@ -6,6 +6,7 @@ from rpython.rtyper.lltypesystem.llmemory import weakref_create, weakref_deref
 setfield = setattr
 from operator import setitem as setarrayitem
 from rpython.rlib.rgc import can_move, collect, enable, disable, isenabled, add_memory_pressure, collect_step
+from rpython.rlib.rgc import set_gc_param, get_gc_param
 
 def setinterior(toplevelcontainer, inneraddr, INNERTYPE, newvalue,
                 offsets=None):
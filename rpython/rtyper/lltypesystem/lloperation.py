@@ -491,6 +491,8 @@ LL_OPERATIONS = {
     'gc_id':                LLOp(sideeffects=False, canmallocgc=True),
     'gc_obtain_free_space': LLOp(revdb_protect=True),
     'gc_set_max_heap_size': LLOp(revdb_protect=True),
+    'gc_set_param':         LLOp(canmallocgc=True, revdb_protect=True),
+    'gc_get_param':         LLOp(),
     'gc_can_move'         : LLOp(sideeffects=False),
     'gc_thread_run'       : LLOp(),
     'gc_thread_start'     : LLOp(),
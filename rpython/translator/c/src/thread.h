@@ -30,6 +30,13 @@ typedef enum RPyLockStatus {
 RPY_EXTERN void RPyGilAllocate(void);
 RPY_EXTERN long RPyGilYieldThread(void);
 RPY_EXTERN void RPyGilAcquireSlowPath(void);
+RPY_EXTERN void RPyGilSetSwitchInterval(long long);
+RPY_EXTERN long long RPyGilGetSwitchInterval(void);
+RPY_EXTERN long long RPyGilGetCounter(long);
+#define RPY_GIL_SWITCHES          0
+#define RPY_GIL_SLOW_ACQUIRES     1
+#define RPY_GIL_WAIT_TIME_NS      2
+#define RPY_GIL_NUM_COUNTERS      3
 #define RPyGilAcquire _RPyGilAcquire
 #define RPyGilRelease _RPyGilRelease
 #define RPyFetchFastGil _RPyFetchFastGil
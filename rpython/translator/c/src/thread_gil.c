@@ -56,6 +56,15 @@ The slow path works as follows:
 
 
 
+  9. Switch interval: the thread holding the GIL only releases it in
+     RPyGilYieldThread() if another thread asked for it, by setting
+     'rpy_gil_drop_request'.  The stealer does so after it has been
+     waiting for 'rpy_gil_switch_interval_ns'.  A thread that comes back
+     from a blocking call (any call to RPyGilAcquireSlowPath()) does so
+     immediately, which gives priority to I/O-bound threads over a
+     CPU-bound thread that only releases the GIL in RPyGilYieldThread().
+
+
 To sum up, there are various possible patterns of interaction:
 
   - I release the GIL using the fast-path: the GIL will be acquired by a
@@ -88,6 +97,10 @@ static long rpy_waiting_threads = -42;    /* GIL not initialized */
 static volatile int rpy_early_poll_n = 0;
 static mutex1_t mutex_gil_stealer;
 static mutex2_t mutex_gil;
+static long long rpy_gil_switch_interval_ns = 5000000;     /* 5 ms */
+static volatile int rpy_gil_drop_request = 0;
+/* statistics, only modified by the thread holding the GIL */
+static long long rpy_gil_counters[RPY_GIL_NUM_COUNTERS];
 
 
 static void rpy_init_mutexes(void)
@@ -111,12 +124,18 @@ void RPyGilAllocate(void)
 #define RPY_GIL_POKE_MIN   40
 #define RPY_GIL_POKE_MAX  400
 
-void RPyGilAcquireSlowPath(void)
+static void rpy_gil_acquire_slowpath(int priority)
 {
     /* Acquires the GIL.  This is the slow path after which we failed
        the compare-and-swap (after point (5)).  Another thread is busy
-       with the GIL.
+       with the GIL.  If 'priority' is set, ask the thread holding the
+       GIL to release it as soon as possible (point (9)).
      */
+    long long start_time, steal_time, now;
+    start_time = rpy_gil_clock_ns();
+    if (priority)
+        rpy_gil_drop_request = 1;
+
     if (1) {      /* preserve commit history */
         int n;
         long old_waiting_threads;
@@ -200,7 +219,10 @@ void RPyGilAcquireSlowPath(void)
         mutex2_loop_start(&mutex_gil);
 
         /* We are now the stealer thread.  Steals! */
+        steal_time = rpy_gil_clock_ns();
         while (1) {
+            if (priority || rpy_gil_switch_interval_ns <= 0)
+                rpy_gil_drop_request = 1;
             /* Busy-looping here.  Try to look again if 'rpy_fastgil' is
                released.
             */
@@ -223,6 +245,13 @@ void RPyGilAcquireSlowPath(void)
                 rpy_fastgil = _rpygil_get_my_ident();
                 break;
             }
+            /* Ask for the GIL if we have been waiting for longer than
+               the switch interval.  Point (9). */
+            if (!rpy_gil_drop_request) {
+                now = rpy_gil_clock_ns();
+                if (now - steal_time >= rpy_gil_switch_interval_ns)
+                    rpy_gil_drop_request = 1;
+            }
             /* Loop back. */
         }
         atomic_decrement(&rpy_waiting_threads);
@@ -230,6 +259,21 @@ void RPyGilAcquireSlowPath(void)
         mutex1_unlock(&mutex_gil_stealer);
     }
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
+
+    /* We have got the GIL, so we can update the statistics */
+    rpy_gil_drop_request = 0;
+    now = rpy_gil_clock_ns() - start_time;
+    rpy_gil_counters[RPY_GIL_SLOW_ACQUIRES]++;
+    rpy_gil_counters[RPY_GIL_WAIT_TIME_NS] += now;
+#ifdef RPY_TLOFS_gil_wait_time_ns
+    ((struct pypy_threadlocal_s *)_RPy_ThreadLocals_Get())->gil_wait_time_ns
+        += now;
+#endif
+}
+
+void RPyGilAcquireSlowPath(void)
+{
+    rpy_gil_acquire_slowpath(1);
 }
 
 long RPyGilYieldThread(void)
@@ -240,6 +284,12 @@ long RPyGilYieldThread(void)
     if (rpy_waiting_threads <= 0)
         return 0;
 
+    /* Only release the GIL if another thread asked for it.  Point (9).
+     */
+    if (!rpy_gil_drop_request)
+        return 0;
+    rpy_gil_counters[RPY_GIL_SWITCHES]++;
+
     /* Explicitly release the 'mutex_gil'.
      */
     mutex2_unlock(&mutex_gil);
@@ -250,11 +300,30 @@ long RPyGilYieldThread(void)
        If there is no other waiting thread, it will fall through both
        its mutex_lock() and mutex_lock_timeout() now.  But that's
        unlikely, because we tested above that 'rpy_waiting_threads > 0'.
+       We don't ask for priority here: we are the thread that was asked
+       to release the GIL.
      */
-    RPyGilAcquire();
+    if (!_rpygil_acquire_fast_path())
+        rpy_gil_acquire_slowpath(0);
     return 1;
 }
 
+void RPyGilSetSwitchInterval(long long interval_ns)
+{
+    rpy_gil_switch_interval_ns = interval_ns;
+}
+
+long long RPyGilGetSwitchInterval(void)
+{
+    return rpy_gil_switch_interval_ns;
+}
+
+long long RPyGilGetCounter(long index)
+{
+    assert(0 <= index && index < RPY_GIL_NUM_COUNTERS);
+    return rpy_gil_counters[index];
+}
+
 /********** for tests only **********/
 
 /* These functions are usually defined as a macros RPyXyz() in thread.h
@@ -275,6 +275,16 @@ static INLINE void mutex1_unlock(mutex1_t *mutex) {
     LeaveCriticalSection(mutex);
 }
 
+static INLINE long long rpy_gil_clock_ns(void)
+{
+    static LARGE_INTEGER frequency;
+    LARGE_INTEGER counter;
+    if (frequency.QuadPart == 0)
+        QueryPerformanceFrequency(&frequency);
+    QueryPerformanceCounter(&counter);
+    return (long long)(counter.QuadPart * (1000000000.0 / frequency.QuadPart));
+}
+
 //#define pypy_lock_test_and_set(ptr, value)  see thread_nt.h
 #define atomic_increment(ptr)          InterlockedIncrement(ptr)
 #define atomic_decrement(ptr)          InterlockedDecrement(ptr)
@@ -551,6 +551,19 @@ static inline int mutex2_lock_timeout(mutex2_t *mutex, double delay) {
     return result;
 }
 
+static inline long long rpy_gil_clock_ns(void)
+{
+#ifdef CLOCK_MONOTONIC
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec * 1000000000LL + t.tv_nsec;
+#else
+    struct timeval tv;
+    RPY_GETTIMEOFDAY(&tv);
+    return tv.tv_sec * 1000000000LL + tv.tv_usec * 1000LL;
+#endif
+}
+
 //#define pypy_lock_test_and_set(ptr, value)  see thread_pthread.h
 #define atomic_increment(ptr)          __sync_add_and_fetch(ptr, 1)
 #define atomic_decrement(ptr)          __sync_sub_and_fetch(ptr, 1)
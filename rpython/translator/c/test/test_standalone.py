@@ -1178,12 +1178,13 @@ class TestThread(object):
     gcrootfinder = 'shadowstack'
     config = None
 
-    def compile(self, entry_point, no__thread=True):
+    def compile(self, entry_point, no__thread=True, gcparallelmark=False):
         t = TranslationContext(self.config)
         t.config.translation.gc = "incminimark"
         t.config.translation.gcrootfinder = self.gcrootfinder
         t.config.translation.thread = True
         t.config.translation.no__thread = no__thread
+        t.config.translation.gcparallelmark = gcparallelmark
         t.buildannotator().build_types(entry_point, [s_list_of_strings])
         t.buildrtyper().specialize()
         #
@@ -1484,6 +1485,71 @@ class TestThread(object):
                 and result.count('a') == 1
                 and result.count('d') == 6)
 
+    def test_gc_parallel_marking(self):
+        from rpython.rlib import rgc
+
+        class Node:
+            def __init__(self, x, left, right):
+                self.x = x
+                self.left = left
+                self.right = right
+
+        def build(depth, start):
+            if depth == 0:
+                return Node(start, None, None)
+            left = build(depth - 1, start + 1)
+            right = build(depth - 1, start + (1 << depth))
+            return Node(start, left, right)
+
+        def check(node, depth, start):
+            if node.x != start:
+                return False
+            if depth == 0:
+                return node.left is None and node.right is None
+            return (check(node.left, depth - 1, start + 1) and
+                    check(node.right, depth - 1, start + (1 << depth)))
+
+        def run(trees):
+            for i in range(len(trees)):
+                trees[i] = build(14, 0)
+                build(12, 0)           # garbage
+                rgc.collect()
+            for tree in trees:
+                if not check(tree, 14, 0):
+                    return False
+            return True
+
+        can_fork = hasattr(os, 'fork')
+
+        def entry_point(argv):
+            if not rgc.set_gc_param(rgc.GC_PARAM_MARK_THREADS, 4.0):
+                os.write(1, "not supported\n")
+                return 1
+            trees = [None] * 6
+            if run(trees):
+                os.write(1, "ok\n")
+            if can_fork:
+                # the marking threads don't survive a fork(): the child
+                # must start new ones
+                childpid = os.fork()
+                if run(trees):
+                    if childpid == 0:
+                        os.write(1, "child ok\n")
+                        os._exit(0)
+                    os.waitpid(childpid, 0)
+                    os.write(1, "parent ok\n")
+            os.write(1, "%d threads\n" %
+                     int(rgc.get_gc_param(rgc.GC_PARAM_MARK_THREADS)))
+            return 0
+
+        t, cbuilder = self.compile(entry_point, gcparallelmark=True)
+        data = cbuilder.cmdexec('')
+        assert data.startswith('ok\n')
+        assert data.endswith('4 threads\n')
+        if can_fork:
+            assert 'child ok\n' in data
+            assert 'parent ok\n' in data
+
 
 class TestShared(StandaloneTests):
 
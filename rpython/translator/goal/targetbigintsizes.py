@@ -0,0 +1,94 @@
+#! /usr/bin/env python
+"""
+Benchmark of the operations on big integers whose cost depends on the
+algorithm used for large numbers: multiplication, division, conversion
+to and from decimal strings.  Each operation is timed for numbers of
+1000 to 1000000 decimal digits (or up to the size given as first
+argument), with the number of repetitions scaled down as they grow.
+
+    ./targetbigintsizes-c [max_decimal_digits]
+"""
+
+import sys
+from time import time
+from rpython.rlib.rbigint import rbigint
+
+# __________  Entry point  __________
+
+def make_number(ndigits, seed):
+    # a pseudo-random number of exactly 'ndigits' decimal digits
+    chars = ['1'] * ndigits
+    x = seed
+    for i in range(1, ndigits):
+        x = (x * 1103515245 + 12345) & 0x7fffffff
+        chars[i] = chr(ord('0') + (x >> 16) % 10)
+    return ''.join(chars)
+
+def bench(name, ndigits, repeat, func, a, b):
+    t = time()
+    for i in range(repeat):
+        func(a, b)
+    _time = (time() - t) / repeat
+    print "%s %d digits: %f" % (name, ndigits, _time)
+    return _time
+
+def bench_parse(name, ndigits, repeat, func, s):
+    t = time()
+    for i in range(repeat):
+        func(s)
+    _time = (time() - t) / repeat
+    print "%s %d digits: %f" % (name, ndigits, _time)
+    return _time
+
+def op_mul(a, b):
+    a.mul(b)
+
+def op_square(a, b):
+    a.mul(a)
+
+def op_divmod(a, b):
+    a.divmod(b)
+
+def op_str(a, b):
+    a.str()
+
+def op_fromstr(s):
+    rbigint.fromstr(s)
+
+def op_fromdecimalstr(s):
+    rbigint.fromdecimalstr(s)
+
+def entry_point(argv):
+    maxdigits = 1000000
+    if len(argv) > 1:
+        maxdigits = int(argv[1])
+    sumTime = 0.0
+    ndigits = 1000
+    repeat = 1000
+    while ndigits <= maxdigits:
+        sa = make_number(ndigits, 1)
+        sb = make_number(ndigits // 2, 2)
+        a = rbigint.fromdecimalstr(sa)
+        b = rbigint.fromdecimalstr(sb)
+        aa = rbigint.fromdecimalstr(sa + sb)
+        sumTime += bench("mul", ndigits, repeat, op_mul, a, a.int_add(1))
+        sumTime += bench("mul (lopsided)", ndigits, repeat, op_mul, a, b)
+        sumTime += bench("square", ndigits, repeat, op_square, a, a)
+        sumTime += bench("divmod", ndigits, repeat, op_divmod, aa, a)
+        sumTime += bench("str", ndigits, repeat, op_str, a, a)
+        sumTime += bench_parse("fromstr", ndigits, repeat, op_fromstr, sa)
+        sumTime += bench_parse("fromdecimalstr", ndigits, repeat,
+                               op_fromdecimalstr, sa)
+        ndigits *= 10
+        repeat = repeat // 10 or 1
+    print "Sum: ", sumTime
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    res = entry_point(sys.argv)
+    sys.exit(res)